@@ -3,15 +3,20 @@
 import asyncio
 from datetime import datetime, timezone
 import json
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Callable, Literal, TypeVar
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from openai import APIError, RateLimitError
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
 from app.core.dialogs import pick_directory
+from app.core.save_cache import SaveConflictError
+from app.core.session_executor import ExecutorSaturatedError, session_executor
 from app.core.storage import read_json, storage_state, write_json_atomic
 from app.core.token_usage import token_usage_store
 from app.models.schemas import (
+    ArchiveQueryResponse,
     AreaCurrentResponse,
     AreaDiscoverInteractionsRequest,
     AreaDiscoverInteractionsResponse,
@@ -97,9 +102,14 @@ from app.models.schemas import (
     QuestPublishRequest,
     QuestStateResponse,
     RolePoolListResponse,
+    RuntimeExecutorResponse,
+    RuntimeLlmCacheResponse,
+    RuntimeLlmClientsResponse,
     RoleRelationSetRequest,
     RoleRelationUpsertRequest,
     NpcRoleCard,
+    MapViewRequest,
+    MapViewResponse,
     RenderMapRequest,
     RenderMapResponse,
     SaveClearRequest,
@@ -107,6 +117,7 @@ from app.models.schemas import (
     SaveImportRequest,
     SaveSetRequest,
     StorySnapshotResponse,
+    SyncResponse,
     TeamDebugGenerateRequest,
     TeamInviteRequest,
     TeamLeaveRequest,
@@ -119,9 +130,11 @@ from app.models.schemas import (
     ValidateError,
     WorldClockInitRequest,
     WorldClockInitResponse,
+    WorldMapQueryRequest,
+    WorldMapQueryResponse,
     NpcKnowledgeResponse,
 )
-from app.services.ai_adapter import discover_models, resolve_model_profile
+from app.services.ai_adapter import discover_models, llm_client_registry, llm_response_cache, resolve_model_profile
 from app.services.chat_service import MissingAPIKeyError, resolve_main_chat_turn
 from app.services.world_service import (
     AIBehaviorError,
@@ -162,8 +175,14 @@ from app.services.world_service import (
     move_to_sub_zone,
     NpcChatConfigError,
     NpcChatGenerationError,
+    astream_npc_chat,
     npc_chat,
     render_map,
+    map_view_etag,
+    render_map_view,
+    sync_save_changes,
+    query_world_map,
+    retry_save_conflicts,
     save_current,
     set_game_log_settings,
     set_player_runtime,
@@ -176,7 +195,7 @@ from app.services.world_service import (
     npc_greet,
 )
 from app.services.encounter_service import (
-    act_on_encounter,
+    aact_on_encounter,
     check_for_encounter,
     escape_encounter,
     get_encounter_debug_overview,
@@ -199,6 +218,7 @@ from app.services.quest_service import (
     track_quest,
 )
 from app.services.reputation_service import get_area_reputation
+from app.services.retention_service import query_archive
 from app.services.roleplay_service import build_role_drive_summaries
 from app.services.consistency_service import (
     build_entity_index,
@@ -217,6 +237,18 @@ from app.services.team_service import (
 
 router = APIRouter(prefix="/api/v1", tags=["api"])
 
+T = TypeVar("T")
+
+
+async def _save_job(session_id: str, fn: Callable[..., T], *args: Any) -> T:
+    return await session_executor.run(session_id, retry_save_conflicts, fn, *args)
+
+
+def _log_chat_turn(session_id: str, player_text: str | None, reply_text: str) -> None:
+    if player_text is not None:
+        retry_save_conflicts(add_game_log, GameLogAddRequest(session_id=session_id, kind="player_input", message=player_text))
+    retry_save_conflicts(add_game_log, GameLogAddRequest(session_id=session_id, kind="gm_reply", message=reply_text))
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health() -> HealthResponse:
@@ -244,8 +276,10 @@ async def config_model_discover(payload: ModelProfileRequest) -> ModelDiscoverRe
         raise HTTPException(status_code=400, detail="api_key is required")
     try:
         return ModelDiscoverResponse(
-            models=discover_models(payload.provider, api_key, payload.base_url_override)
+            models=await session_executor.run(None, discover_models, payload.provider, api_key, payload.base_url_override)
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as exc:
         message = str(exc) or "model discovery failed"
         lowered = message.lower()
@@ -277,20 +311,12 @@ async def chat(payload: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=502, detail=str(exc))
     token_usage_store.add(payload.session_id, "chat", usage.input_tokens, usage.output_tokens)
     last_user = next((m for m in reversed(payload.messages) if m.role == "user"), None)
-    if last_user is not None:
-        add_game_log(
-            GameLogAddRequest(
-                session_id=payload.session_id,
-                kind="player_input",
-                message=last_user.content,
-            )
-        )
-    add_game_log(
-        GameLogAddRequest(
-            session_id=payload.session_id,
-            kind="gm_reply",
-            message=reply.content,
-        )
+    await session_executor.run(
+        payload.session_id,
+        _log_chat_turn,
+        payload.session_id,
+        last_user.content if last_user is not None else None,
+        reply.content,
     )
     return ChatResponse(
         session_id=payload.session_id,
@@ -303,6 +329,16 @@ async def chat(payload: ChatRequest) -> ChatResponse:
     )
 
 
+async def _drain_deltas(queue: asyncio.Queue[Any], task: asyncio.Future) -> AsyncIterator[Any]:
+    while not task.done() or not queue.empty():
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            yield getter.result()
+        else:
+            getter.cancel()
+
+
 @router.post("/chat/stream")
 async def chat_sse(payload: ChatRequest) -> StreamingResponse:
     if not payload.config.stream:
@@ -311,10 +347,30 @@ async def chat_sse(payload: ChatRequest) -> StreamingResponse:
     async def event_gen():
         yield "event: start\ndata: {\"session_id\":\"%s\"}\n\n" % payload.session_id
         last_user = next((m for m in reversed(payload.messages) if m.role == "user"), None)
+        queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+        turn = asyncio.ensure_future(
+            resolve_main_chat_turn(
+                payload,
+                on_delta=lambda chunk: queue.put_nowait(("delta", {"content": chunk})),
+                on_stage=lambda event, data: queue.put_nowait((event, data)),
+            )
+        )
+        streamed = False
         try:
-            reply, usage, tool_events, scene_events, time_spent_min, archived_sub_zone_turn_id = await resolve_main_chat_turn(payload)
-            data = json.dumps({"content": reply.content}, ensure_ascii=False)
-            yield f"event: delta\ndata: {data}\n\n"
+            async for event, data in _drain_deltas(queue, turn):
+                if event == "narration" and not streamed:
+                    yield f"event: delta\ndata: {json.dumps({'content': data['reply']['content']}, ensure_ascii=False)}\n\n"
+                streamed = event != "delta_reset"
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            reply, usage, tool_events, scene_events, time_spent_min, archived_sub_zone_turn_id = await turn
+            token_usage_store.add(payload.session_id, "chat", usage.input_tokens, usage.output_tokens)
+            await session_executor.run(
+                payload.session_id,
+                _log_chat_turn,
+                payload.session_id,
+                last_user.content if last_user is not None else None,
+                reply.content,
+            )
         except MissingAPIKeyError:
             data = json.dumps({"code": 401, "message": "api_key is not configured in config"})
             yield f"event: error\ndata: {data}\n\n"
@@ -333,23 +389,15 @@ async def chat_sse(payload: ChatRequest) -> StreamingResponse:
             data = json.dumps({"code": 502, "message": str(exc)})
             yield f"event: error\ndata: {data}\n\n"
             return
+        except ExecutorSaturatedError as exc:
+            data = json.dumps({"code": 503, "message": str(exc)})
+            yield f"event: error\ndata: {data}\n\n"
+            return
+        except SaveConflictError as exc:
+            data = json.dumps({"code": 409, "message": str(exc)})
+            yield f"event: error\ndata: {data}\n\n"
+            return
 
-        token_usage_store.add(payload.session_id, "chat", usage.input_tokens, usage.output_tokens)
-        if last_user is not None:
-            add_game_log(
-                GameLogAddRequest(
-                    session_id=payload.session_id,
-                    kind="player_input",
-                    message=last_user.content,
-                )
-            )
-        add_game_log(
-            GameLogAddRequest(
-                session_id=payload.session_id,
-                kind="gm_reply",
-                message=reply.content,
-            )
-        )
         usage_data = json.dumps(
             {
                 "usage": {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens},
@@ -430,46 +478,123 @@ async def pick_save_path() -> PathStatusResponse:
     return storage_state.path_status(path)
 
 
+def _model_json_response(model: BaseModel) -> Response:
+    # Large payloads: serialize straight to bytes in pydantic-core instead of dict + json.dumps.
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
 @router.get("/saves/current", response_model=SaveFile)
-async def get_save_current() -> SaveFile:
-    return get_current_save()
+async def get_save_current() -> Response:
+    return _model_json_response(get_current_save())
 
 
 @router.post("/saves/current", response_model=SaveFile)
-async def set_save_current(payload: SaveSetRequest) -> SaveFile:
+async def set_save_current(payload: SaveSetRequest) -> Response:
     save = SaveFile.model_validate(payload.save_data)
-    save_current(save)
-    return save
+    await session_executor.run(save.session_id, save_current, save)
+    return _model_json_response(save)
 
 
 @router.post("/saves/import", response_model=SaveFile)
-async def import_save_file(payload: SaveImportRequest) -> SaveFile:
+async def import_save_file(payload: SaveImportRequest) -> Response:
     save = SaveFile.model_validate(payload.save_data)
-    return import_save(save)
+    return _model_json_response(await session_executor.run(save.session_id, import_save, save))
 
 
 @router.post("/saves/clear", response_model=SaveFile)
-async def clear_save(payload: SaveClearRequest) -> SaveFile:
-    return clear_current_save(payload.session_id)
+async def clear_save(payload: SaveClearRequest) -> Response:
+    return _model_json_response(await session_executor.run(payload.session_id, clear_current_save, payload.session_id))
 
 
 @router.post("/world-map/regions/generate", response_model=RegionGenerateResponse)
 async def world_map_generate(payload: RegionGenerateRequest) -> RegionGenerateResponse:
     try:
-        return generate_regions(payload)
+        return await session_executor.run(payload.session_id, generate_regions, payload)
     except AIRegionGenerationError as exc:
         raise HTTPException(status_code=502, detail=f"地图区块 AI 生成失败: {exc}")
 
 
 @router.post("/world-map/render", response_model=RenderMapResponse)
 async def world_map_render(payload: RenderMapRequest) -> RenderMapResponse:
-    return render_map(payload)
+    return await session_executor.run(payload.session_id, render_map, payload)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {item.strip() for item in if_none_match.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+def _map_view_body(req: MapViewRequest, if_none_match: str | None) -> tuple[str, str | None]:
+    save = get_current_save(default_session_id=req.session_id)
+    etag = map_view_etag(save, req)
+    if _etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, render_map_view(req, save).model_dump_json()
+
+
+# Read-only map and sync routes run on the unkeyed lane so they neither block the event loop nor queue behind the session's writes.
+@router.get("/world-map/view", response_model=MapViewResponse)
+async def world_map_view(
+    session_id: str,
+    min_x: int,
+    min_y: int,
+    max_x: int,
+    max_y: int,
+    zoom: float = 1.0,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    try:
+        req = MapViewRequest(session_id=session_id, min_x=min_x, min_y=min_y, max_x=max_x, max_y=max_y, zoom=zoom)
+        etag, body = await session_executor.run(None, _map_view_body, req, if_none_match)
+    except (ValidationError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/world-map/query", response_model=WorldMapQueryResponse)
+async def world_map_query(
+    session_id: str,
+    mode: Literal["nearest", "radius", "bbox"] = "nearest",
+    x: int | None = None,
+    y: int | None = None,
+    k: int = 5,
+    radius_m: int = 500,
+    min_x: int | None = None,
+    min_y: int | None = None,
+    max_x: int | None = None,
+    max_y: int | None = None,
+    touching: bool = False,
+    include_sub_zones: bool = True,
+) -> WorldMapQueryResponse:
+    try:
+        req = WorldMapQueryRequest(
+            session_id=session_id,
+            mode=mode,
+            x=x,
+            y=y,
+            k=k,
+            radius_m=radius_m,
+            min_x=min_x,
+            min_y=min_y,
+            max_x=max_x,
+            max_y=max_y,
+            touching=touching,
+            include_sub_zones=include_sub_zones,
+        )
+        return await session_executor.run(None, query_world_map, req)
+    except (ValidationError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
 
 @router.post("/world-map/move", response_model=MoveResponse)
 async def world_map_move(payload: MoveRequest) -> MoveResponse:
     try:
-        return move_to_zone(payload)
+        return await session_executor.run(payload.session_id, move_to_zone, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="zone not found")
     except ValueError as exc:
@@ -479,17 +604,33 @@ async def world_map_move(payload: MoveRequest) -> MoveResponse:
 @router.post("/logs/behavior/describe", response_model=BehaviorDescribeResponse)
 async def behavior_describe(payload: BehaviorDescribeRequest) -> BehaviorDescribeResponse:
     try:
-        return describe_behavior(payload.session_id, payload.log, payload.config)
+        return await session_executor.run(payload.session_id, describe_behavior, payload.session_id, payload.log, payload.config)
     except AIBehaviorError as exc:
         raise HTTPException(status_code=502, detail=f"行为叙事 AI 生成失败: {exc}")
 
 
 @router.post("/logs/game", response_model=GameLogListResponse)
 async def game_log_add(payload: GameLogAddRequest) -> GameLogListResponse:
-    add_game_log(payload)
+    await _save_job(payload.session_id, add_game_log, payload)
     return get_game_logs(payload.session_id, limit=200)
 
 
+@router.get("/sync", response_model=SyncResponse)
+async def sync_get(session_id: str, since: int | None = None) -> SyncResponse:
+    return await session_executor.run(None, sync_save_changes, session_id, since)
+
+
+@router.get("/archive", response_model=ArchiveQueryResponse)
+async def archive_get(
+    session_id: str,
+    collection: Literal["game_logs", "quests", "encounters", "fate_archive", "dialogue_logs"],
+    owner_id: str | None = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> ArchiveQueryResponse:
+    return await session_executor.run(None, query_archive, session_id, collection, owner_id, offset=offset, limit=limit)
+
+
 @router.get("/logs/game", response_model=GameLogListResponse)
 async def game_log_list(session_id: str, limit: int | None = None) -> GameLogListResponse:
     return get_game_logs(session_id, limit=limit)
@@ -502,7 +643,7 @@ async def game_log_settings_get(session_id: str) -> GameLogSettingsResponse:
 
 @router.post("/logs/game/settings", response_model=GameLogSettingsResponse)
 async def game_log_settings_set(session_id: str, payload: GameLogSettings) -> GameLogSettingsResponse:
-    return set_game_log_settings(session_id, payload)
+    return await _save_job(session_id, set_game_log_settings, session_id, payload)
 
 
 @router.get("/quests", response_model=QuestStateResponse)
@@ -518,20 +659,20 @@ async def quest_current_get(session_id: str) -> QuestStateResponse:
 @router.post("/quests/publish", response_model=QuestMutationResponse)
 async def quest_publish(payload: QuestPublishRequest) -> QuestMutationResponse:
     try:
-        return publish_quest(payload)
+        return await session_executor.run(payload.session_id, publish_quest, payload)
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
 
 @router.post("/quests/debug/generate", response_model=QuestMutationResponse)
 async def quest_debug_generate(payload: FateGenerateRequest) -> QuestMutationResponse:
-    return debug_generate_quest(payload.session_id, payload.config)
+    return await session_executor.run(payload.session_id, debug_generate_quest, payload.session_id, payload.config)
 
 
 @router.post("/quests/{quest_id}/accept", response_model=QuestMutationResponse)
 async def quest_accept(quest_id: str, payload: QuestActionRequest) -> QuestMutationResponse:
     try:
-        return accept_quest(payload.session_id, quest_id, payload.config)
+        return await session_executor.run(payload.session_id, accept_quest, payload.session_id, quest_id, payload.config)
     except KeyError:
         raise HTTPException(status_code=404, detail="quest not found")
     except ValueError as exc:
@@ -541,7 +682,7 @@ async def quest_accept(quest_id: str, payload: QuestActionRequest) -> QuestMutat
 @router.post("/quests/{quest_id}/reject", response_model=QuestMutationResponse)
 async def quest_reject(quest_id: str, payload: QuestActionRequest) -> QuestMutationResponse:
     try:
-        return reject_quest(payload.session_id, quest_id, payload.config)
+        return await session_executor.run(payload.session_id, reject_quest, payload.session_id, quest_id, payload.config)
     except KeyError:
         raise HTTPException(status_code=404, detail="quest not found")
     except ValueError as exc:
@@ -551,7 +692,7 @@ async def quest_reject(quest_id: str, payload: QuestActionRequest) -> QuestMutat
 @router.post("/quests/{quest_id}/track", response_model=QuestMutationResponse)
 async def quest_track(quest_id: str, session_id: str) -> QuestMutationResponse:
     try:
-        return track_quest(session_id, quest_id)
+        return await _save_job(session_id, track_quest, session_id, quest_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="quest not found")
     except ValueError as exc:
@@ -563,7 +704,7 @@ async def quest_evaluate(quest_id: str, payload: QuestEvaluateRequest) -> QuestM
     if payload.quest_id != quest_id:
         raise HTTPException(status_code=409, detail="quest id mismatch")
     try:
-        return evaluate_quest(payload)
+        return await session_executor.run(payload.session_id, evaluate_quest, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="quest not found")
     except ValueError as exc:
@@ -572,7 +713,7 @@ async def quest_evaluate(quest_id: str, payload: QuestEvaluateRequest) -> QuestM
 
 @router.post("/quests/evaluate-all", response_model=QuestStateResponse)
 async def quest_evaluate_all(payload: QuestEvaluateAllRequest) -> QuestStateResponse:
-    return evaluate_all_quests(payload)
+    return await session_executor.run(payload.session_id, evaluate_all_quests, payload)
 
 
 @router.get("/encounters/pending", response_model=EncounterPendingResponse)
@@ -588,7 +729,7 @@ async def encounter_history(session_id: str) -> EncounterHistoryResponse:
 @router.post("/encounters/check", response_model=EncounterCheckResponse)
 async def encounter_check(payload: EncounterCheckRequest) -> EncounterCheckResponse:
     try:
-        return check_for_encounter(payload)
+        return await session_executor.run(payload.session_id, check_for_encounter, payload)
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
@@ -596,7 +737,7 @@ async def encounter_check(payload: EncounterCheckRequest) -> EncounterCheckRespo
 @router.post("/encounters/{encounter_id}/present", response_model=EncounterPresentResponse)
 async def encounter_present(encounter_id: str, payload: EncounterPresentRequest) -> EncounterPresentResponse:
     try:
-        return present_encounter(encounter_id, payload)
+        return await session_executor.run(payload.session_id, present_encounter, encounter_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="encounter not found")
     except ValueError as exc:
@@ -606,7 +747,7 @@ async def encounter_present(encounter_id: str, payload: EncounterPresentRequest)
 @router.post("/encounters/{encounter_id}/act", response_model=EncounterActResponse)
 async def encounter_act(encounter_id: str, payload: EncounterActRequest) -> EncounterActResponse:
     try:
-        return act_on_encounter(encounter_id, payload)
+        return await aact_on_encounter(encounter_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="encounter not found")
     except ValueError as exc:
@@ -616,7 +757,7 @@ async def encounter_act(encounter_id: str, payload: EncounterActRequest) -> Enco
 @router.post("/encounters/{encounter_id}/escape", response_model=EncounterEscapeResponse)
 async def encounter_escape(encounter_id: str, payload: EncounterEscapeRequest) -> EncounterEscapeResponse:
     try:
-        return escape_encounter(encounter_id, payload)
+        return await session_executor.run(payload.session_id, escape_encounter, encounter_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="encounter not found")
     except ValueError as exc:
@@ -626,7 +767,7 @@ async def encounter_escape(encounter_id: str, payload: EncounterEscapeRequest) -
 @router.post("/encounters/{encounter_id}/rejoin", response_model=EncounterRejoinResponse)
 async def encounter_rejoin(encounter_id: str, payload: EncounterRejoinRequest) -> EncounterRejoinResponse:
     try:
-        return rejoin_encounter(encounter_id, payload)
+        return await session_executor.run(payload.session_id, rejoin_encounter, encounter_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="encounter not found")
     except ValueError as exc:
@@ -635,7 +776,7 @@ async def encounter_rejoin(encounter_id: str, payload: EncounterRejoinRequest) -
 
 @router.post("/encounters/debug/force-toggle", response_model=EncounterForceToggleResponse)
 async def encounter_force_toggle(payload: EncounterForceToggleRequest) -> EncounterForceToggleResponse:
-    return set_debug_force_toggle(payload)
+    return await _save_job(payload.session_id, set_debug_force_toggle, payload)
 
 
 @router.get("/encounters/debug/overview", response_model=EncounterDebugOverviewResponse)
@@ -679,19 +820,19 @@ async def public_scene_state(session_id: str) -> PublicSceneStateResponse:
 @router.post("/fate/debug/generate", response_model=FateGenerateResponse)
 async def fate_debug_generate(payload: FateGenerateRequest) -> FateGenerateResponse:
     try:
-        return generate_fate(payload)
+        return await session_executor.run(payload.session_id, generate_fate, payload)
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
 
 @router.post("/fate/debug/regenerate", response_model=FateGenerateResponse)
 async def fate_debug_regenerate(payload: FateGenerateRequest) -> FateGenerateResponse:
-    return regenerate_fate(payload)
+    return await session_executor.run(payload.session_id, regenerate_fate, payload)
 
 
 @router.post("/fate/evaluate", response_model=FateEvaluateResponse)
 async def fate_evaluate(payload: FateEvaluateRequest) -> FateEvaluateResponse:
-    return evaluate_fate_state(payload)
+    return await session_executor.run(payload.session_id, evaluate_fate_state, payload)
 
 
 @router.get("/story/snapshot", response_model=StorySnapshotResponse)
@@ -722,11 +863,10 @@ async def consistency_status_get(session_id: str) -> ConsistencyStatusResponse:
     return ConsistencyStatusResponse(session_id=session_id, world_state=save.world_state, issue_count=len(issues), issues=issues)
 
 
-@router.post("/consistency/run", response_model=ConsistencyRunResponse)
-async def consistency_run(payload: ConsistencyRunRequest) -> ConsistencyRunResponse:
+def _run_consistency(payload: ConsistencyRunRequest) -> ConsistencyRunResponse:
     save = get_current_save(default_session_id=payload.session_id)
     save.session_id = payload.session_id
-    issues, changed = reconcile_consistency(save, session_id=payload.session_id, reason="manual")
+    issues, changed = reconcile_consistency(save, session_id=payload.session_id, reason="manual", full=payload.full)
     save_current(save)
     return ConsistencyRunResponse(
         session_id=payload.session_id,
@@ -737,11 +877,31 @@ async def consistency_run(payload: ConsistencyRunRequest) -> ConsistencyRunRespo
     )
 
 
+@router.post("/consistency/run", response_model=ConsistencyRunResponse)
+async def consistency_run(payload: ConsistencyRunRequest) -> ConsistencyRunResponse:
+    return await session_executor.run(payload.session_id, _run_consistency, payload)
+
+
 @router.get("/token-usage", response_model=TokenUsageResponse)
 async def token_usage(session_id: str) -> TokenUsageResponse:
     return token_usage_store.get(session_id)
 
 
+@router.get("/runtime/executor", response_model=RuntimeExecutorResponse)
+async def runtime_executor_stats() -> RuntimeExecutorResponse:
+    return RuntimeExecutorResponse.model_validate(session_executor.stats())
+
+
+@router.get("/runtime/llm-clients", response_model=RuntimeLlmClientsResponse)
+async def runtime_llm_client_stats() -> RuntimeLlmClientsResponse:
+    return RuntimeLlmClientsResponse.model_validate(llm_client_registry.stats())
+
+
+@router.get("/runtime/llm-cache", response_model=RuntimeLlmCacheResponse)
+async def runtime_llm_cache_stats() -> RuntimeLlmCacheResponse:
+    return RuntimeLlmCacheResponse.model_validate(llm_response_cache.stats())
+
+
 @router.get("/player/static", response_model=PlayerStaticData)
 async def player_static_get(session_id: str) -> PlayerStaticData:
     return get_player_static(session_id)
@@ -749,13 +909,13 @@ async def player_static_get(session_id: str) -> PlayerStaticData:
 
 @router.post("/player/static", response_model=PlayerStaticData)
 async def player_static_set(session_id: str, payload: PlayerStaticData) -> PlayerStaticData:
-    return set_player_static(session_id, payload)
+    return await _save_job(session_id, set_player_static, session_id, payload)
 
 
 @router.post("/player/equipment/equip", response_model=PlayerStaticData)
 async def player_equip_item(session_id: str, payload: PlayerEquipRequest) -> PlayerStaticData:
     try:
-        return equip_player_item(session_id, payload)
+        return await _save_job(session_id, equip_player_item, session_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="item not found")
     except ValueError as exc:
@@ -764,13 +924,13 @@ async def player_equip_item(session_id: str, payload: PlayerEquipRequest) -> Pla
 
 @router.post("/player/equipment/unequip", response_model=PlayerStaticData)
 async def player_unequip_item(session_id: str, payload: PlayerUnequipRequest) -> PlayerStaticData:
-    return unequip_player_item(session_id, payload)
+    return await _save_job(session_id, unequip_player_item, session_id, payload)
 
 
 @router.post("/inventory/equip", response_model=InventoryMutationResponse)
 async def inventory_equip_item(payload: InventoryEquipRequest) -> InventoryMutationResponse:
     try:
-        return inventory_equip(payload)
+        return await session_executor.run(payload.session_id, inventory_equip, payload)
     except KeyError as exc:
         code = str(exc)
         if "ROLE_NOT_FOUND" in code:
@@ -783,7 +943,7 @@ async def inventory_equip_item(payload: InventoryEquipRequest) -> InventoryMutat
 @router.post("/inventory/unequip", response_model=InventoryMutationResponse)
 async def inventory_unequip_item(payload: InventoryUnequipRequest) -> InventoryMutationResponse:
     try:
-        return inventory_unequip(payload)
+        return await session_executor.run(payload.session_id, inventory_unequip, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
     except ValueError as exc:
@@ -793,7 +953,7 @@ async def inventory_unequip_item(payload: InventoryUnequipRequest) -> InventoryM
 @router.post("/inventory/interact", response_model=InventoryInteractResponse)
 async def inventory_interact_item(payload: InventoryInteractRequest) -> InventoryInteractResponse:
     try:
-        return inventory_interact(payload)
+        return await session_executor.run(payload.session_id, inventory_interact, payload)
     except KeyError as exc:
         code = str(exc)
         if "ROLE_NOT_FOUND" in code:
@@ -805,71 +965,71 @@ async def inventory_interact_item(payload: InventoryInteractRequest) -> Inventor
 
 @router.post("/player/buffs/add", response_model=PlayerStaticData)
 async def player_buff_add(session_id: str, payload: PlayerBuffAddRequest) -> PlayerStaticData:
-    return add_player_buff(session_id, payload)
+    return await _save_job(session_id, add_player_buff, session_id, payload)
 
 
 @router.post("/player/buffs/remove", response_model=PlayerStaticData)
 async def player_buff_remove(session_id: str, payload: PlayerBuffRemoveRequest) -> PlayerStaticData:
-    return remove_player_buff(session_id, payload)
+    return await _save_job(session_id, remove_player_buff, session_id, payload)
 
 
 @router.post("/player/items/add", response_model=PlayerStaticData)
 async def player_item_add(session_id: str, payload: PlayerItemAddRequest) -> PlayerStaticData:
-    return add_player_item(session_id, payload)
+    return await _save_job(session_id, add_player_item, session_id, payload)
 
 
 @router.post("/player/items/remove", response_model=PlayerStaticData)
 async def player_item_remove(session_id: str, payload: PlayerItemRemoveRequest) -> PlayerStaticData:
     try:
-        return remove_player_item(session_id, payload)
+        return await _save_job(session_id, remove_player_item, session_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="item not found")
 
 
 @router.post("/player/spells/add", response_model=PlayerStaticData)
 async def player_spell_add(session_id: str, payload: PlayerSpellSetRequest) -> PlayerStaticData:
-    return add_player_spell(session_id, payload)
+    return await _save_job(session_id, add_player_spell, session_id, payload)
 
 
 @router.post("/player/spells/remove", response_model=PlayerStaticData)
 async def player_spell_remove(session_id: str, payload: PlayerSpellSetRequest) -> PlayerStaticData:
-    return remove_player_spell(session_id, payload)
+    return await _save_job(session_id, remove_player_spell, session_id, payload)
 
 
 @router.post("/player/skills/add", response_model=PlayerStaticData)
 async def player_skill_add(session_id: str, payload: PlayerSkillSetRequest) -> PlayerStaticData:
-    return add_player_skill(session_id, payload)
+    return await _save_job(session_id, add_player_skill, session_id, payload)
 
 
 @router.post("/player/skills/remove", response_model=PlayerStaticData)
 async def player_skill_remove(session_id: str, payload: PlayerSkillSetRequest) -> PlayerStaticData:
-    return remove_player_skill(session_id, payload)
+    return await _save_job(session_id, remove_player_skill, session_id, payload)
 
 
 @router.post("/player/resources/spell-slots/consume", response_model=PlayerStaticData)
 async def player_spell_slots_consume(session_id: str, payload: PlayerSpellSlotAdjustRequest) -> PlayerStaticData:
     try:
-        return consume_spell_slots(session_id, payload)
+        return await _save_job(session_id, consume_spell_slots, session_id, payload)
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
 
 @router.post("/player/resources/spell-slots/recover", response_model=PlayerStaticData)
 async def player_spell_slots_recover(session_id: str, payload: PlayerSpellSlotAdjustRequest) -> PlayerStaticData:
-    return recover_spell_slots(session_id, payload)
+    return await _save_job(session_id, recover_spell_slots, session_id, payload)
 
 
 @router.post("/player/resources/stamina/consume", response_model=PlayerStaticData)
 async def player_stamina_consume(session_id: str, payload: PlayerStaminaAdjustRequest) -> PlayerStaticData:
     try:
-        return consume_stamina(session_id, payload)
+        return await _save_job(session_id, consume_stamina, session_id, payload)
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
 
 @router.post("/player/resources/stamina/recover", response_model=PlayerStaticData)
 async def player_stamina_recover(session_id: str, payload: PlayerStaminaAdjustRequest) -> PlayerStaticData:
-    return recover_stamina(session_id, payload)
+    return await _save_job(session_id, recover_stamina, session_id, payload)
 
 
 @router.get("/player/runtime", response_model=PlayerRuntimeData)
@@ -879,12 +1039,12 @@ async def player_runtime_get(session_id: str) -> PlayerRuntimeData:
 
 @router.post("/player/runtime", response_model=PlayerRuntimeData)
 async def player_runtime_set(session_id: str, payload: PlayerRuntimeData) -> PlayerRuntimeData:
-    return set_player_runtime(session_id, payload)
+    return await _save_job(session_id, set_player_runtime, session_id, payload)
 
 
 @router.get("/role-pool", response_model=RolePoolListResponse)
-async def role_pool_list(session_id: str, q: str | None = None, limit: int | None = None) -> RolePoolListResponse:
-    return get_role_pool(session_id, query=q, limit=(limit if limit is not None else 200))
+async def role_pool_list(session_id: str, q: str | None = None, limit: int | None = None) -> Response:
+    return _model_json_response(get_role_pool(session_id, query=q, limit=(limit if limit is not None else 200)))
 
 
 @router.get("/role-pool/{role_id}", response_model=NpcRoleCard)
@@ -898,7 +1058,7 @@ async def role_pool_get(role_id: str, session_id: str) -> NpcRoleCard:
 @router.post("/role-pool/{role_id}/relate-player", response_model=NpcRoleCard)
 async def role_pool_relate_player(role_id: str, session_id: str, payload: RoleRelationUpsertRequest) -> NpcRoleCard:
     try:
-        return upsert_player_relation(session_id, role_id, payload.relation_tag, payload.note)
+        return await _save_job(session_id, upsert_player_relation, session_id, role_id, payload.relation_tag, payload.note)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
 
@@ -906,7 +1066,7 @@ async def role_pool_relate_player(role_id: str, session_id: str, payload: RoleRe
 @router.post("/role-pool/{role_id}/relations", response_model=NpcRoleCard)
 async def role_pool_set_relation(role_id: str, session_id: str, payload: RoleRelationSetRequest) -> NpcRoleCard:
     try:
-        return set_role_relation(session_id, role_id, payload)
+        return await _save_job(session_id, set_role_relation, session_id, role_id, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
 
@@ -914,7 +1074,7 @@ async def role_pool_set_relation(role_id: str, session_id: str, payload: RoleRel
 @router.post("/npc/greet", response_model=NpcGreetResponse)
 async def npc_greet_run(payload: NpcGreetRequest) -> NpcGreetResponse:
     try:
-        return npc_greet(payload)
+        return await session_executor.run(payload.session_id, npc_greet, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
 
@@ -922,7 +1082,7 @@ async def npc_greet_run(payload: NpcGreetRequest) -> NpcGreetResponse:
 @router.post("/npc/chat", response_model=NpcChatResponse)
 async def npc_chat_run(payload: NpcChatRequest) -> NpcChatResponse:
     try:
-        return npc_chat(payload)
+        return await session_executor.run(payload.session_id, npc_chat, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
     except NpcChatConfigError as exc:
@@ -955,7 +1115,9 @@ async def team_state_get(session_id: str) -> TeamStateResponse:
 @router.post("/team/invite", response_model=TeamMutationResponse)
 async def team_invite_run(payload: TeamInviteRequest) -> TeamMutationResponse:
     try:
-        return invite_npc_to_team(payload)
+        return await session_executor.run(payload.session_id, invite_npc_to_team, payload)
+    except ExecutorSaturatedError:
+        raise
     except KeyError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except Exception as exc:
@@ -965,7 +1127,9 @@ async def team_invite_run(payload: TeamInviteRequest) -> TeamMutationResponse:
 @router.post("/team/leave", response_model=TeamMutationResponse)
 async def team_leave_run(payload: TeamLeaveRequest) -> TeamMutationResponse:
     try:
-        return leave_npc_from_team(payload)
+        return await session_executor.run(payload.session_id, leave_npc_from_team, payload)
+    except ExecutorSaturatedError:
+        raise
     except KeyError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except Exception as exc:
@@ -975,7 +1139,9 @@ async def team_leave_run(payload: TeamLeaveRequest) -> TeamMutationResponse:
 @router.post("/team/debug/generate", response_model=TeamMutationResponse)
 async def team_debug_generate_run(payload: TeamDebugGenerateRequest) -> TeamMutationResponse:
     try:
-        return generate_debug_teammate(payload)
+        return await session_executor.run(payload.session_id, generate_debug_teammate, payload)
+    except ExecutorSaturatedError:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
@@ -983,7 +1149,9 @@ async def team_debug_generate_run(payload: TeamDebugGenerateRequest) -> TeamMuta
 @router.post("/team/chat", response_model=TeamChatResponse)
 async def team_chat_run(payload: TeamChatRequest) -> TeamChatResponse:
     try:
-        return team_chat(payload)
+        return await session_executor.run(payload.session_id, team_chat, payload)
+    except ExecutorSaturatedError:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
@@ -995,14 +1163,16 @@ async def npc_chat_stream(payload: NpcChatRequest) -> StreamingResponse:
 
     async def event_gen():
         yield "event: start\ndata: {\"session_id\":\"%s\",\"npc_role_id\":\"%s\"}\n\n" % (payload.session_id, payload.npc_role_id)
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        turn = asyncio.ensure_future(astream_npc_chat(payload, queue.put_nowait))
+        streamed = False
         try:
-            result = npc_chat(payload)
-            reply_text = result.reply
-            step = 14
-            for idx in range(0, len(reply_text), step):
-                chunk = reply_text[idx : idx + step]
+            async for chunk in _drain_deltas(queue, turn):
+                streamed = True
                 yield f"event: delta\ndata: {json.dumps({'content': chunk}, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.015)
+            result = await turn
+            if not streamed:
+                yield f"event: delta\ndata: {json.dumps({'content': result.reply}, ensure_ascii=False)}\n\n"
         except KeyError:
             data = json.dumps({"code": 404, "message": "role not found"}, ensure_ascii=False)
             yield f"event: error\ndata: {data}\n\n"
@@ -1015,6 +1185,14 @@ async def npc_chat_stream(payload: NpcChatRequest) -> StreamingResponse:
             data = json.dumps({"code": 502, "message": str(exc)}, ensure_ascii=False)
             yield f"event: error\ndata: {data}\n\n"
             return
+        except ExecutorSaturatedError as exc:
+            data = json.dumps({"code": 503, "message": str(exc)}, ensure_ascii=False)
+            yield f"event: error\ndata: {data}\n\n"
+            return
+        except SaveConflictError as exc:
+            data = json.dumps({"code": 409, "message": str(exc)}, ensure_ascii=False)
+            yield f"event: error\ndata: {data}\n\n"
+            return
         except Exception as exc:
             data = json.dumps({"code": 500, "message": str(exc)}, ensure_ascii=False)
             yield f"event: error\ndata: {data}\n\n"
@@ -1034,7 +1212,7 @@ async def npc_chat_stream(payload: NpcChatRequest) -> StreamingResponse:
 
 @router.post("/world/clock/init", response_model=WorldClockInitResponse)
 async def world_clock_init(payload: WorldClockInitRequest) -> WorldClockInitResponse:
-    return init_world_clock(payload)
+    return await _save_job(payload.session_id, init_world_clock, payload)
 
 
 @router.get("/world/area/current", response_model=AreaCurrentResponse)
@@ -1045,7 +1223,7 @@ async def world_area_current(session_id: str) -> AreaCurrentResponse:
 @router.post("/world/area/move-sub-zone", response_model=AreaMoveResult)
 async def world_area_move_sub_zone(payload: AreaMoveSubZoneRequest) -> AreaMoveResult:
     try:
-        return move_to_sub_zone(payload)
+        return await session_executor.run(payload.session_id, move_to_sub_zone, payload)
     except KeyError as exc:
         if str(exc) == "'AREA_SUB_ZONE_NOT_FOUND'":
             raise HTTPException(status_code=404, detail="sub zone not found")
@@ -1059,7 +1237,7 @@ async def world_area_move_sub_zone(payload: AreaMoveSubZoneRequest) -> AreaMoveR
 @router.post("/world/area/interactions/discover", response_model=AreaDiscoverInteractionsResponse)
 async def world_area_discover_interactions(payload: AreaDiscoverInteractionsRequest) -> AreaDiscoverInteractionsResponse:
     try:
-        return discover_interactions(payload)
+        return await session_executor.run(payload.session_id, discover_interactions, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="sub zone not found")
     except ValueError as exc:
@@ -1069,7 +1247,7 @@ async def world_area_discover_interactions(payload: AreaDiscoverInteractionsRequ
 @router.post("/world/area/interactions/execute", response_model=AreaExecuteInteractionResponse)
 async def world_area_execute_interaction(payload: AreaExecuteInteractionRequest) -> AreaExecuteInteractionResponse:
     try:
-        return execute_interaction(payload)
+        return await session_executor.run(payload.session_id, execute_interaction, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="interaction not found")
     except ValueError as exc:
@@ -1079,7 +1257,7 @@ async def world_area_execute_interaction(payload: AreaExecuteInteractionRequest)
 @router.post("/actions/check/plan", response_model=ActionCheckPlanResponse)
 async def action_check_plan_run(payload: ActionCheckPlanRequest) -> ActionCheckPlanResponse:
     try:
-        return plan_action_check(payload)
+        return await session_executor.run(payload.session_id, plan_action_check, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
 
@@ -1087,7 +1265,7 @@ async def action_check_plan_run(payload: ActionCheckPlanRequest) -> ActionCheckP
 @router.post("/actions/check", response_model=ActionCheckResponse)
 async def action_check_run(payload: ActionCheckRequest) -> ActionCheckResponse:
     try:
-        return action_check(payload)
+        return await session_executor.run(payload.session_id, action_check, payload)
     except KeyError:
         raise HTTPException(status_code=404, detail="role not found")
     except ValueError as exc:
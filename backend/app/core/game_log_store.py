@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+from app.core.helpers import write_text_atomic
+
+GAME_LOG_PART_FORMAT = "jsonl_segments_v1"
+GAME_LOG_SEGMENT_SIZE = 500
+_INDEX_NAME = "index.json"
+
+
+def _encode_line(item: dict[str, Any]) -> bytes:
+    return (json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class GameLogStore:
+    def __init__(self, root: Path, segment_size: int = GAME_LOG_SEGMENT_SIZE) -> None:
+        self.root = root
+        self.segment_size = max(1, int(segment_size))
+        self._index: dict[str, Any] | None = None
+
+    def exists(self) -> bool:
+        return (self.root / _INDEX_NAME).exists()
+
+    def _load_index(self) -> dict[str, Any]:
+        if self._index is None:
+            path = self.root / _INDEX_NAME
+            if path.exists():
+                data = json.loads(path.read_text(encoding="utf-8"))
+            else:
+                data = {}
+            if data.get("format") != GAME_LOG_PART_FORMAT or not isinstance(data.get("segments"), list):
+                data = {"format": GAME_LOG_PART_FORMAT, "segments": [], "next_segment": 1}
+            self._index = data
+        return self._index
+
+    def _save_index(self, index: dict[str, Any]) -> None:
+        write_text_atomic(self.root / _INDEX_NAME, json.dumps(index, ensure_ascii=False, indent=2))
+        self._index = index
+
+    def count(self) -> int:
+        return sum(int(seg.get("count", 0)) for seg in self._load_index()["segments"])
+
+    def signature(self) -> str:
+        segments = self._load_index()["segments"]
+        last_id = str(segments[-1].get("last_id", "")) if segments else ""
+        first_id = str(segments[0].get("first_id", "")) if segments else ""
+        return f"{GAME_LOG_PART_FORMAT}:{self.count()}:{first_id}:{last_id}"
+
+    def _read_segment(self, segment: dict[str, Any]) -> list[dict[str, Any]]:
+        path = self.root / str(segment["name"])
+        with path.open("rb") as fh:
+            raw = fh.read(int(segment.get("bytes", 0)))
+        return [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+
+    def read_all(self) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        for segment in self._load_index()["segments"]:
+            items.extend(self._read_segment(segment))
+        return items
+
+    def read_all_json(self) -> bytes:
+        lines: list[bytes] = []
+        for segment in self._load_index()["segments"]:
+            path = self.root / str(segment["name"])
+            with path.open("rb") as fh:
+                raw = fh.read(int(segment.get("bytes", 0)))
+            lines.extend(line for line in raw.splitlines() if line.strip())
+        return b"[" + b",".join(lines) + b"]"
+
+    def tail(self, limit: int) -> list[dict[str, Any]]:
+        if limit <= 0:
+            return []
+        needed: list[dict[str, Any]] = []
+        covered = 0
+        for segment in reversed(self._load_index()["segments"]):
+            needed.append(segment)
+            covered += int(segment.get("count", 0))
+            if covered >= limit:
+                break
+        items: list[dict[str, Any]] = []
+        for segment in reversed(needed):
+            items.extend(self._read_segment(segment))
+        return items[-limit:]
+
+    def _new_segment(self, index: dict[str, Any]) -> dict[str, Any]:
+        number = int(index.get("next_segment", 1))
+        index["next_segment"] = number + 1
+        return {"name": f"segment_{number:06d}.jsonl", "count": 0, "bytes": 0, "first_id": "", "last_id": ""}
+
+    def _write_items(self, index: dict[str, Any], items: list[dict[str, Any]]) -> None:
+        segments: list[dict[str, Any]] = index["segments"]
+        pos = 0
+        while pos < len(items):
+            if not segments or int(segments[-1]["count"]) >= self.segment_size:
+                segments.append(self._new_segment(index))
+            segment = segments[-1]
+            room = self.segment_size - int(segment["count"])
+            chunk = items[pos : pos + room]
+            pos += len(chunk)
+            data = b"".join(_encode_line(item) for item in chunk)
+            path = self.root / str(segment["name"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("ab") as fh:
+                # Drop bytes from an append that was never committed to the index.
+                fh.truncate(int(segment["bytes"]))
+                fh.seek(int(segment["bytes"]))
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            if not segment["count"]:
+                segment["first_id"] = str(chunk[0].get("id", ""))
+            segment["count"] = int(segment["count"]) + len(chunk)
+            segment["bytes"] = int(segment["bytes"]) + len(data)
+            segment["last_id"] = str(chunk[-1].get("id", ""))
+
+    def append(self, items: list[dict[str, Any]]) -> None:
+        if not items:
+            return
+        index = json.loads(json.dumps(self._load_index()))
+        self._write_items(index, items)
+        self._save_index(index)
+
+    def rewrite(self, items: list[dict[str, Any]]) -> None:
+        index = self._load_index()
+        fresh = {"format": GAME_LOG_PART_FORMAT, "segments": [], "next_segment": int(index.get("next_segment", 1))}
+        self._write_items(fresh, items)
+        self._save_index(fresh)
+        self._remove_orphans()
+
+    def compact(self) -> None:
+        self.rewrite(self.read_all())
+
+    def _remove_orphans(self) -> None:
+        live = {str(seg["name"]) for seg in self._load_index()["segments"]}
+        for path in self.root.glob("segment_*.jsonl"):
+            if path.name not in live:
+                path.unlink(missing_ok=True)
+
+    def append_start(self, total: int, item_id: Callable[[int], str]) -> int | None:
+        # Stored entries must be a prefix of the caller's list (first/last id check); None means rewrite.
+        if not self.exists():
+            return None
+        stored = self.count()
+        if stored > total:
+            return None
+        if stored == 0:
+            return 0
+        segments = self._load_index()["segments"]
+        if item_id(0) != str(segments[0].get("first_id", "")) or item_id(stored - 1) != str(segments[-1].get("last_id", "")):
+            return None
+        return stored
+
+    def sync_from(self, total: int, item_id: Callable[[int], str], dump: Callable[[int], list[dict[str, Any]]]) -> bool:
+        start = self.append_start(total, item_id)
+        if start is None:
+            self.rewrite(dump(0))
+            return True
+        fresh = dump(start)
+        self.append(fresh)
+        return bool(fresh)
+
+    def sync(self, items: list[dict[str, Any]]) -> bool:
+        return self.sync_from(len(items), lambda idx: str(items[idx].get("id", "")), lambda start: items[start:])
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+from typing import Any
+
+_CODEC_ENV = "ROLEPLAY_JSON_CODEC"
+
+
+def _resolve_codec() -> str:
+    wanted = (os.environ.get(_CODEC_ENV) or "auto").strip().lower()
+    if wanted == "stdlib":
+        return "stdlib"
+    if wanted in {"auto", "orjson"} and importlib.util.find_spec("orjson") is not None:
+        return "orjson"
+    return "stdlib"
+
+
+codec_name = _resolve_codec()
+
+
+def dumps(payload: Any, *, compact: bool = False) -> bytes:
+    if codec_name == "orjson":
+        import orjson
+
+        return orjson.dumps(payload, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def loads(raw: bytes | str) -> Any:
+    if codec_name == "orjson":
+        import orjson
+
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from contextlib import asynccontextmanager, contextmanager
+from threading import BoundedSemaphore, Lock
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+from app.core.helpers import env_int
+
+T = TypeVar("T")
+
+_DEFAULT_PROVIDER_CONCURRENCY = 4
+_DEFAULT_FANOUT_THREADS = 16
+_DEFAULT_DEADLINE_MS = 20000
+
+
+class ProviderLimiter:
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, int(limit))
+        self._lock = Lock()
+        self._sync: dict[str, BoundedSemaphore] = {}
+        self._async: dict[tuple[int, str], tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        with self._lock:
+            semaphore = self._sync.setdefault(provider, BoundedSemaphore(self.limit))
+        with semaphore:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self, provider: str) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            key = (id(loop), provider)
+            entry = self._async.get(key)
+            if entry is None or entry[0] is not loop:
+                for stale in [k for k, (owner, _) in self._async.items() if owner.is_closed()]:
+                    self._async.pop(stale, None)
+                entry = (loop, asyncio.Semaphore(self.limit))
+                self._async[key] = entry
+        async with entry[1]:
+            yield
+
+
+class FanOut:
+    def __init__(self, max_workers: int, provider_limit: int, deadline_ms: int) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.deadline_s = max(1, int(deadline_ms)) / 1000
+        self.limiter = ProviderLimiter(provider_limit)
+        self._lock = Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="roleplay-fanout")
+            return self._pool
+
+    def run(self, jobs: list[Callable[[], T]], *, provider: str, deadline_s: float | None = None) -> list[T | None]:
+        if not jobs:
+            return []
+        ends_at = time.monotonic() + (self.deadline_s if deadline_s is None else deadline_s)
+
+        def guarded(job: Callable[[], T]) -> T | None:
+            with self.limiter.slot(provider):
+                if time.monotonic() >= ends_at:
+                    return None
+                return job()
+
+        pool = self._ensure_pool()
+        futures = [pool.submit(guarded, job) for job in jobs]
+        wait_futures(futures, timeout=max(0.0, ends_at - time.monotonic()))
+        results: list[T | None] = []
+        for future in futures:
+            if not future.done():
+                future.cancel()
+                results.append(None)
+                continue
+            try:
+                results.append(future.result())
+            except Exception:
+                results.append(None)
+        return results
+
+    async def arun(
+        self,
+        factories: list[Callable[[], Awaitable[T]]],
+        *,
+        provider: str,
+        deadline_s: float | None = None,
+    ) -> list[T | None]:
+        if not factories:
+            return []
+
+        async def guarded(factory: Callable[[], Awaitable[T]]) -> T:
+            async with self.limiter.aslot(provider):
+                return await factory()
+
+        tasks = [asyncio.ensure_future(guarded(factory)) for factory in factories]
+        _, pending = await asyncio.wait(tasks, timeout=self.deadline_s if deadline_s is None else deadline_s)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        results: list[T | None] = []
+        for task in tasks:
+            if task.cancelled() or task.exception() is not None:
+                results.append(None)
+            else:
+                results.append(task.result())
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+llm_fanout = FanOut(
+    max_workers=env_int("ROLEPLAY_LLM_FANOUT_THREADS", _DEFAULT_FANOUT_THREADS, minimum=1),
+    provider_limit=env_int("ROLEPLAY_LLM_PROVIDER_CONCURRENCY", _DEFAULT_PROVIDER_CONCURRENCY, minimum=1),
+    deadline_ms=env_int("ROLEPLAY_SCENE_FANOUT_DEADLINE_MS", _DEFAULT_DEADLINE_MS, minimum=1),
+)
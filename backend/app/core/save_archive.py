@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from app.core.helpers import write_bytes_atomic
+
+ARCHIVE_PART_FORMAT = "jsonl_gz_segments_v1"
+ARCHIVE_COLLECTIONS = ("game_logs", "quests", "encounters", "fate_archive", "dialogue_logs")
+_INDEX_NAME = "index.json"
+_RECENT_KEYS = 2048
+_archive_lock = Lock()
+
+
+def _empty_index(session_id: str) -> dict[str, Any]:
+    return {"format": ARCHIVE_PART_FORMAT, "session_id": session_id, "segments": [], "next_segment": 1, "recent_keys": []}
+
+
+def _session_dir(session_id: str) -> str:
+    # Session ids come from clients, so the directory name is a digest; the index still records the id itself.
+    return hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:20]
+
+
+def _record_key(owner: str, item_id: str, item: dict[str, Any]) -> str:
+    # Ids minted in the same millisecond can repeat, so the dedupe key also covers the content.
+    digest = hashlib.sha1(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"{owner}:{item_id}:{digest}"
+
+
+class SaveArchive:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def collection_dir(self, session_id: str, collection: str) -> Path:
+        return self.root / _session_dir(session_id) / collection
+
+    def _load_index(self, session_id: str, collection: str) -> dict[str, Any] | None:
+        path = self.collection_dir(session_id, collection) / _INDEX_NAME
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("format") != ARCHIVE_PART_FORMAT or not isinstance(data.get("segments"), list):
+            return None
+        if data.get("session_id") != session_id:
+            return None
+        return data
+
+    def _read_segment(self, session_id: str, collection: str, segment: dict[str, Any]) -> list[dict[str, Any]]:
+        raw = gzip.decompress((self.collection_dir(session_id, collection) / str(segment["name"])).read_bytes())
+        return [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+
+    def append(self, session_id: str, collection: str, records: list[tuple[str, str, dict[str, Any]]]) -> int:
+        if collection not in ARCHIVE_COLLECTIONS:
+            raise ValueError(f"unknown archive collection: {collection}")
+        if not records:
+            return 0
+        with _archive_lock:
+            index = self._load_index(session_id, collection) or _empty_index(session_id)
+            directory = self.collection_dir(session_id, collection)
+            # A save retried after a conflict re-archives the same items; skip what already landed.
+            recent = set(index["recent_keys"])
+            fresh = [(owner, item_id, item) for owner, item_id, item in records if _record_key(owner, item_id, item) not in recent]
+            if not fresh:
+                return 0
+            number = int(index.get("next_segment", 1))
+            name = f"segment_{number:06d}.jsonl.gz"
+            lines = [json.dumps({"owner": owner, "item": item}, ensure_ascii=False, separators=(",", ":")) for owner, _, item in fresh]
+            write_bytes_atomic(directory / name, gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+            index["segments"].append(
+                {
+                    "name": name,
+                    "count": len(fresh),
+                    "first_id": fresh[0][1],
+                    "last_id": fresh[-1][1],
+                    "owners": sorted({owner for owner, _, _ in fresh if owner}),
+                }
+            )
+            index["next_segment"] = number + 1
+            index["recent_keys"] = (index["recent_keys"] + [_record_key(owner, item_id, item) for owner, item_id, item in fresh])[-_RECENT_KEYS:]
+            write_bytes_atomic(directory / _INDEX_NAME, json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8"))
+            return len(fresh)
+
+    def count(self, session_id: str, collection: str) -> int:
+        index = self._load_index(session_id, collection)
+        if index is None:
+            return 0
+        return sum(int(segment.get("count", 0)) for segment in index["segments"])
+
+    def query(
+        self,
+        session_id: str,
+        collection: str,
+        *,
+        owner: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> tuple[int, list[dict[str, Any]]]:
+        index = self._load_index(session_id, collection)
+        if index is None:
+            return 0, []
+        segments = [segment for segment in index["segments"] if owner is None or owner in segment.get("owners", [])]
+        total = 0 if owner is not None else sum(int(segment.get("count", 0)) for segment in segments)
+        items: list[dict[str, Any]] = []
+        skipped = 0
+        for segment in reversed(segments):
+            if owner is None and len(items) >= limit:
+                break
+            if owner is None and skipped + int(segment.get("count", 0)) <= offset:
+                skipped += int(segment.get("count", 0))
+                continue
+            for record in reversed(self._read_segment(session_id, collection, segment)):
+                if owner is not None:
+                    if record.get("owner") != owner:
+                        continue
+                    total += 1
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if len(items) < limit:
+                    items.append(record["item"])
+        return total, items
+
+    def stats(self, session_id: str) -> dict[str, int]:
+        return {collection: self.count(session_id, collection) for collection in ARCHIVE_COLLECTIONS}
@@ -0,0 +1,551 @@
+from __future__ import annotations
+
+import atexit
+from collections import deque
+from dataclasses import dataclass, field
+import itertools
+import logging
+import os
+from pathlib import Path
+import pickle
+from threading import Lock, RLock, Timer
+import time
+
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from app.core.helpers import env_flag, env_int, env_ms
+from app.core.session_locks import current_write_scope
+from app.core.storage import resolve_part_format, save_manifest_digest, save_manifest_revision, write_save_payload
+from app.models.schemas import SaveFile
+
+logger = logging.getLogger("roleplay.storage")
+
+_DEFAULT_FLUSH_DELAY_MS = 250
+_DEFAULT_FLUSH_MAX_WAIT_MS = 2000
+_DEFAULT_REVISION_HISTORY = 8
+_DEFAULT_SYNC_FEED_SIZE = 256
+_WRITER_HISTORY = 256
+_entry_epochs = itertools.count(1)
+_MISSING = object()
+
+
+class SaveConflictError(RuntimeError):
+    def __init__(self, message: str, fields: list[str] | None = None) -> None:
+        super().__init__(message)
+        self.fields = fields or []
+
+
+def save_revision(save: SaveFile) -> int | None:
+    return save._revision
+
+
+def set_save_revision(save: SaveFile, revision: int | None) -> None:
+    save._revision = revision
+
+
+def save_part_fingerprint(save: SaveFile, fields: tuple[str, ...]) -> tuple[int, ...] | None:
+    # Cache entry epoch plus the revision at which each field last changed; None for saves that never went through the cache.
+    # In-place edits made after the last get/put are not reflected, so callers pair this with a cheap shape check.
+    stamps = save._part_stamps
+    if stamps is None:
+        return None
+    epoch, revisions = stamps
+    return (epoch, *(revisions.get(name, 0) for name in fields))
+
+
+def _dump(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _private_copy(name: str, previous: Any, value: Any, blob: bytes) -> Any:
+    # Game logs only grow at the tail, so the retained copy is extended rather than decoded again from the full blob.
+    if name == "game_logs" and isinstance(previous, list) and len(previous) <= len(value) and value[: len(previous)] == previous:
+        return previous + pickle.loads(_dump(value[len(previous) :]))
+    return pickle.loads(blob)
+
+
+def _restore(snapshot: dict[str, bytes]) -> SaveFile:
+    return SaveFile.model_construct(**{name: pickle.loads(blob) for name, blob in snapshot.items()})
+
+
+def _entity_changes(name: str, previous: Any, value: Any) -> dict[str, tuple[frozenset[str], frozenset[str]] | None]:
+    # (upserted ids, removed ids) per tracked list under `name`; None when the list has duplicate ids.
+    changes: dict[str, tuple[frozenset[str], frozenset[str]] | None] = {}
+    for path in SYNC_ENTITY_LISTS:
+        if path[0] != name:
+            continue
+        before, after = previous, value
+        for attr in path[1:]:
+            before, after = getattr(before, attr), getattr(after, attr)
+        key = ENTITY_LISTS[path]
+        old = {getattr(item, key): item for item in before}
+        new = {getattr(item, key): item for item in after}
+        if len(old) != len(before) or len(new) != len(after):
+            changes[".".join(path)] = None
+            continue
+        upserted = frozenset(entity_id for entity_id, item in new.items() if entity_id not in old or old[entity_id] != item)
+        changes[".".join(path)] = (upserted, frozenset(old.keys() - new.keys()))
+    return changes
+
+
+def _same_value(name: str, left: Any, right: Any) -> bool:
+    if name == "player_runtime_data":
+        return left.model_dump(exclude={"updated_at"}) == right.model_dump(exclude={"updated_at"})
+    return left == right
+
+
+# Lists merged entity by entity, keyed by the id field of their items; other lists changed on both sides conflict.
+ENTITY_LISTS: dict[tuple[str, ...], str] = {
+    ("role_pool",): "role_id",
+    ("quest_state", "quests"): "quest_id",
+    ("encounter_state", "encounters"): "encounter_id",
+    ("team_state", "members"): "role_id",
+    ("area_snapshot", "zones"): "zone_id",
+    ("area_snapshot", "sub_zones"): "sub_zone_id",
+}
+
+
+# Entity lists the change feed tracks by id, so /sync can send upserts and removals instead of the whole part.
+SYNC_ENTITY_LISTS: tuple[tuple[str, ...], ...] = (("role_pool",), ("quest_state", "quests"), ("encounter_state", "encounters"))
+
+
+class _MergeConflict(Exception):
+    pass
+
+
+def _merge_game_logs(base: list[Any], current: list[Any], incoming: list[Any]) -> list[Any] | None:
+    size = len(base)
+    if incoming[:size] != base or not _extends(base, current):
+        return None
+    seen = {item.id for item in current}
+    return current + [item for item in incoming[size:] if item.id not in seen]
+
+
+def _extends(base: list[Any], current: list[Any]) -> bool:
+    if not base or current[: len(base)] == base:
+        return True
+    # Retention may have trimmed the head since base was read: current must then start with a suffix of base.
+    last = base[-1]
+    for index, item in enumerate(current[: len(base)]):
+        if item.id == last.id and current[: index + 1] == base[len(base) - index - 1 :]:
+            return True
+    return False
+
+
+def _keyed(items: list[Any], key: str) -> dict[Any, Any]:
+    keyed = {getattr(item, key, None): item for item in items}
+    if len(keyed) != len(items):
+        raise _MergeConflict
+    return keyed
+
+
+def _merge_entities(path: tuple[str, ...], base: list[Any], current: list[Any], incoming: list[Any]) -> list[Any]:
+    key = ENTITY_LISTS[path]
+    base_map, current_map, incoming_map = _keyed(base, key), _keyed(current, key), _keyed(incoming, key)
+    merged: list[Any] = []
+    for entity_id, current_item in current_map.items():
+        if entity_id not in incoming_map:
+            # Removed by the incoming save: only allowed if the other side left the entity untouched.
+            if entity_id in base_map and current_item != base_map[entity_id]:
+                raise _MergeConflict
+            if entity_id in base_map:
+                continue
+            merged.append(current_item)
+        elif entity_id in base_map:
+            merged.append(_merge_value(path, base_map[entity_id], current_item, incoming_map[entity_id]))
+        elif current_item == incoming_map[entity_id]:
+            merged.append(current_item)
+        else:
+            raise _MergeConflict
+    for entity_id, incoming_item in incoming_map.items():
+        if entity_id in current_map:
+            continue
+        if entity_id in base_map:
+            # Removed concurrently: the incoming save may only have left it as it was.
+            if incoming_item != base_map[entity_id]:
+                raise _MergeConflict
+            continue
+        merged.append(incoming_item)
+    return merged
+
+
+def _merge_value(path: tuple[str, ...], base: Any, current: Any, incoming: Any) -> Any:
+    # Three-way merge of one value: each side's changes are kept unless both changed the same leaf differently.
+    if current == base or current == incoming:
+        return incoming
+    if incoming == base:
+        return current
+    if isinstance(base, list) and path in ENTITY_LISTS:
+        return _merge_entities(path, base, current, incoming)
+    if isinstance(base, BaseModel) and type(base) is type(current) is type(incoming):
+        for name in type(base).model_fields:
+            if name == "updated_at":
+                continue
+            setattr(incoming, name, _merge_value((*path, name), getattr(base, name), getattr(current, name), getattr(incoming, name)))
+        return incoming
+    raise _MergeConflict
+
+
+def merge_saves(base: SaveFile, current: SaveFile, incoming: SaveFile) -> SaveFile:
+    conflicts: list[str] = []
+    for name in SaveFile.model_fields:
+        if name == "updated_at":
+            continue
+        base_value, current_value, incoming_value = getattr(base, name), getattr(current, name), getattr(incoming, name)
+        if _same_value(name, current_value, base_value):
+            continue
+        if _same_value(name, incoming_value, base_value) or _same_value(name, incoming_value, current_value):
+            setattr(incoming, name, current_value)
+            continue
+        if name == "game_logs":
+            merged = _merge_game_logs(base_value, current_value, incoming_value)
+            if merged is not None:
+                incoming.game_logs = merged
+                continue
+        else:
+            try:
+                setattr(incoming, name, _merge_value((name,), base_value, current_value, incoming_value))
+                continue
+            except _MergeConflict:
+                pass
+        conflicts.append(name)
+    if conflicts:
+        raise SaveConflictError(f"save changed concurrently: {', '.join(conflicts)}", conflicts)
+    return incoming
+
+
+@dataclass(frozen=True)
+class _FeedItem:
+    revision: int
+    fields: frozenset[str]
+    log_count: int
+    last_log_id: str | None
+    entities: dict[str, tuple[frozenset[str], frozenset[str]] | None] = field(default_factory=dict)
+
+
+@dataclass
+class SaveChanges:
+    since: int
+    revision: int
+    fields: set[str]
+    log_count: int
+    last_log_id: str | None
+    # Per tracked entity list (`SYNC_ENTITY_LISTS`, dotted path): (upserted ids, removed ids), or None if unknown.
+    entities: dict[str, tuple[set[str], set[str]] | None] = field(default_factory=dict)
+
+
+@dataclass
+class CachedSave:
+    save: SaveFile
+    normalized: bool
+
+
+@dataclass
+class _CacheEntry:
+    snapshot: dict[str, bytes]
+    manifest_digest: str | None
+    normalized: bool = False
+    dirty: bool = False
+    revision: int = 0
+    dirty_since: float | None = None
+    changed: set[str] = field(default_factory=set)
+    history: deque[tuple[int, dict[str, bytes]]] = field(default_factory=deque)
+    writers: deque[tuple[int, object]] = field(default_factory=lambda: deque(maxlen=_WRITER_HISTORY))
+    feed: deque[_FeedItem] = field(default_factory=deque)
+    epoch: int = field(default_factory=lambda: next(_entry_epochs))
+    field_revisions: dict[str, int] = field(default_factory=dict)
+    # Decoded copies of the current snapshot, never handed out; unchanged fields are detected by equality against them.
+    values: dict[str, Any] = field(default_factory=dict)
+
+
+class SaveCache:
+    def __init__(
+        self,
+        flush_delay_s: float,
+        flush_max_wait_s: float,
+        history_limit: int = _DEFAULT_REVISION_HISTORY,
+        compact_json: bool = False,
+        feed_limit: int = _DEFAULT_SYNC_FEED_SIZE,
+        compression: str | None = None,
+    ) -> None:
+        self._lock = RLock()
+        self._flush_lock = Lock()
+        self._entries: dict[Path, _CacheEntry] = {}
+        self._timer: Timer | None = None
+        self._flush_delay_s = flush_delay_s
+        self._flush_max_wait_s = max(flush_max_wait_s, flush_delay_s)
+        self._history_limit = max(1, history_limit)
+        self._compact_json = compact_json
+        self._feed_limit = max(1, feed_limit)
+        self._part_format = resolve_part_format(compression)
+        self._merged = 0
+        self._conflicts = 0
+
+    @staticmethod
+    def _key(save_path: Path) -> Path:
+        return Path(save_path).expanduser().resolve()
+
+    def get(self, save_path: Path) -> CachedSave | None:
+        key = self._key(save_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.dirty and entry.manifest_digest != save_manifest_digest(key):
+                self._entries.pop(key, None)
+                return None
+            snapshot, normalized, revision = entry.snapshot, entry.normalized, entry.revision
+            stamps = (entry.epoch, entry.field_revisions)
+        save = _restore(snapshot)
+        set_save_revision(save, revision)
+        save._part_stamps = stamps
+        return CachedSave(save=save, normalized=normalized)
+
+    def put(
+        self,
+        save_path: Path,
+        save: SaveFile,
+        *,
+        normalized: bool,
+        dirty: bool = True,
+        manifest_digest: str | None = None,
+        expected_revision: int | None = None,
+        before_commit: Callable[[SaveFile], None] | None = None,
+    ) -> int:
+        key = self._key(save_path)
+        scope = current_write_scope()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                seed = expected_revision if expected_revision is not None else save_manifest_revision(key)
+                entry = _CacheEntry(snapshot={}, manifest_digest=None, revision=seed - 1 if not dirty else seed)
+                if dirty:
+                    entry.changed.update(SaveFile.model_fields)
+                self._entries[key] = entry
+            elif expected_revision is not None and expected_revision != entry.revision:
+                if not self._written_by(entry, scope, expected_revision):
+                    self._merge_into(entry, save, expected_revision)
+            if before_commit is not None:
+                # Runs on the merged save, under the lock, so nothing a concurrent writer kept can undo it.
+                before_commit(save)
+            snapshot, delta, entities = self._snapshot_delta(entry, save)
+            if not entry.snapshot:
+                entry.feed.clear()
+            if not delta:
+                # Nothing changed: keep the revision so /sync clients see no spurious change.
+                set_save_revision(save, entry.revision)
+                save._part_stamps = (entry.epoch, entry.field_revisions)
+                if not dirty and not entry.dirty:
+                    entry.normalized = entry.normalized or normalized
+                    entry.manifest_digest = manifest_digest if manifest_digest is not None else save_manifest_digest(key)
+                return entry.revision
+            entry.changed.update(delta)
+            entry.snapshot = snapshot
+            entry.normalized = normalized
+            entry.revision += 1
+            entry.field_revisions = {**entry.field_revisions, **{name: entry.revision for name in delta}}
+            entry.history.append((entry.revision, snapshot))
+            entry.writers.append((entry.revision, scope))
+            while len(entry.history) > self._history_limit:
+                entry.history.popleft()
+            logs = save.game_logs
+            entry.feed.append(_FeedItem(entry.revision, delta, len(logs), logs[-1].id if logs else None, entities))
+            while len(entry.feed) > self._feed_limit:
+                entry.feed.popleft()
+            revision = entry.revision
+            set_save_revision(save, revision)
+            save._part_stamps = (entry.epoch, entry.field_revisions)
+            if dirty:
+                entry.dirty = True
+                if entry.dirty_since is None:
+                    entry.dirty_since = time.monotonic()
+            elif not entry.dirty:
+                entry.manifest_digest = manifest_digest if manifest_digest is not None else save_manifest_digest(key)
+        if dirty:
+            self._schedule_flush()
+        return revision
+
+    @staticmethod
+    def _snapshot_delta(
+        entry: _CacheEntry, save: SaveFile
+    ) -> tuple[dict[str, bytes], frozenset[str], dict[str, tuple[frozenset[str], frozenset[str]] | None]]:
+        # Only fields that differ from the retained copy are pickled again; the new snapshot shares the other blobs
+        # with the previous one, so revision history holds one copy of each unchanged field.
+        snapshot = dict(entry.snapshot)
+        delta: set[str] = set()
+        entities: dict[str, tuple[frozenset[str], frozenset[str]] | None] = {}
+        for name in SaveFile.model_fields:
+            value = getattr(save, name)
+            previous = entry.values.get(name, _MISSING)
+            if previous is not _MISSING and value == previous:
+                continue
+            blob = _dump(value)
+            if entry.snapshot.get(name) == blob:
+                entry.values[name] = _private_copy(name, previous, value, blob)
+                continue
+            if previous is not _MISSING:
+                entities.update(_entity_changes(name, previous, value))
+            entry.values[name] = _private_copy(name, previous, value, blob)
+            snapshot[name] = blob
+            delta.add(name)
+        return snapshot, frozenset(delta), entities
+
+    @staticmethod
+    def _written_by(entry: _CacheEntry, scope: object, since_revision: int) -> bool:
+        later = [writer for revision, writer in entry.writers if revision > since_revision]
+        return len(later) == entry.revision - since_revision and all(writer == scope for writer in later)
+
+    def _merge_into(self, entry: _CacheEntry, save: SaveFile, expected_revision: int) -> None:
+        base = next((snapshot for revision, snapshot in entry.history if revision == expected_revision), None)
+        if base is None:
+            self._conflicts += 1
+            raise SaveConflictError(f"save revision {expected_revision} is stale (current {entry.revision})")
+        try:
+            merge_saves(_restore(base), _restore(entry.snapshot), save)
+        except SaveConflictError:
+            self._conflicts += 1
+            raise
+        self._merged += 1
+
+    def revision(self, save_path: Path) -> int | None:
+        with self._lock:
+            entry = self._entries.get(self._key(save_path))
+            return entry.revision if entry is not None else None
+
+    def changes_since(self, save_path: Path, since: int, until: int | None = None) -> SaveChanges | None:
+        with self._lock:
+            entry = self._entries.get(self._key(save_path))
+            if entry is None or not entry.feed:
+                return None
+            base = next((item for item in entry.feed if item.revision == since), None)
+            if base is None:
+                return None
+            upto = entry.revision if until is None else until
+            fields: set[str] = set()
+            entities: dict[str, tuple[set[str], set[str]] | None] = {}
+            for item in entry.feed:
+                if not since < item.revision <= upto:
+                    continue
+                fields.update(item.fields)
+                for path in SYNC_ENTITY_LISTS:
+                    if path[0] not in item.fields:
+                        continue
+                    dotted = ".".join(path)
+                    change = item.entities.get(dotted)
+                    folded = entities.setdefault(dotted, (set(), set()))
+                    if change is None or folded is None:
+                        entities[dotted] = None
+                        continue
+                    upserted, removed = change
+                    folded[0].difference_update(removed)
+                    folded[0].update(upserted)
+                    folded[1].difference_update(upserted)
+                    folded[1].update(removed)
+            return SaveChanges(
+                since=since,
+                revision=upto,
+                fields=fields,
+                log_count=base.log_count,
+                last_log_id=base.last_log_id,
+                entities=entities,
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "merged": self._merged, "conflicts": self._conflicts}
+
+    def invalidate(self, save_path: Path | None = None) -> None:
+        with self._lock:
+            if save_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(save_path), None)
+
+    def is_dirty(self, save_path: Path) -> bool:
+        with self._lock:
+            entry = self._entries.get(self._key(save_path))
+            return bool(entry is not None and entry.dirty)
+
+    def clean_digest(self, save_path: Path) -> str | None:
+        with self._lock:
+            entry = self._entries.get(self._key(save_path))
+            if entry is None or entry.dirty or not entry.normalized:
+                return None
+            return entry.manifest_digest
+
+    def _schedule_flush(self) -> None:
+        if self._flush_delay_s <= 0:
+            self.flush()
+            return
+        with self._lock:
+            oldest = min((item.dirty_since for item in self._entries.values() if item.dirty_since is not None), default=None)
+            delay = self._flush_delay_s
+            if oldest is not None:
+                delay = max(0.0, min(delay, oldest + self._flush_max_wait_s - time.monotonic()))
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = Timer(delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("save cache write-behind flush failed")
+
+    def flush(self, save_path: Path | None = None) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if save_path is None:
+                    keys = [key for key, entry in self._entries.items() if entry.dirty]
+                else:
+                    key = self._key(save_path)
+                    keys = [key] if key in self._entries and self._entries[key].dirty else []
+            for key in keys:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is None or not entry.dirty:
+                        continue
+                    snapshot, revision, changed = entry.snapshot, entry.revision, entry.changed
+                    entry.changed = set()
+                partial = entry.manifest_digest is not None and entry.manifest_digest == save_manifest_digest(key)
+                try:
+                    write_save_payload(
+                        key,
+                        _restore(snapshot),
+                        revision=revision,
+                        changed_fields=changed if partial else None,
+                        compact=self._compact_json,
+                        compression=self._part_format,
+                    )
+                except BaseException:
+                    with self._lock:
+                        entry.changed.update(changed)
+                    raise
+                digest = save_manifest_digest(key)
+                with self._lock:
+                    entry.manifest_digest = digest
+                    if entry.revision == revision:
+                        entry.dirty = False
+                        entry.dirty_since = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush()
+
+
+save_cache = SaveCache(
+    flush_delay_s=env_ms("ROLEPLAY_SAVE_FLUSH_DELAY_MS", _DEFAULT_FLUSH_DELAY_MS),
+    flush_max_wait_s=env_ms("ROLEPLAY_SAVE_FLUSH_MAX_WAIT_MS", _DEFAULT_FLUSH_MAX_WAIT_MS),
+    history_limit=env_int("ROLEPLAY_SAVE_REVISION_HISTORY", _DEFAULT_REVISION_HISTORY, minimum=1),
+    compact_json=env_flag("ROLEPLAY_SAVE_COMPACT_JSON", False),
+    feed_limit=env_int("ROLEPLAY_SYNC_FEED_SIZE", _DEFAULT_SYNC_FEED_SIZE, minimum=1),
+    compression=os.environ.get("ROLEPLAY_SAVE_COMPRESSION"),
+)
+atexit.register(save_cache.close)
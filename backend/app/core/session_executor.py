@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from typing import Any, Callable, TypeVar
+
+from app.core.helpers import env_int
+from app.core.session_locks import session_locks
+
+T = TypeVar("T")
+
+_DEFAULT_WORKER_THREADS = 8
+_DEFAULT_QUEUE_LIMIT = 64
+
+
+class ExecutorSaturatedError(RuntimeError):
+    pass
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    future: Future
+    session_key: str | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SessionExecutor:
+    def __init__(self, max_workers: int, queue_limit: int) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.queue_limit = max(1, int(queue_limit))
+        self._lock = Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        self._queues: dict[str, deque[_Job]] = {}
+        self._active_keys: set[str] = set()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._dispatched = 0
+        self._total_wait_s = 0.0
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="roleplay-worker")
+        return self._pool
+
+    def submit(self, session_key: str | None, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future:
+        job = _Job(fn=fn, args=args, kwargs=kwargs, future=Future(), session_key=session_key)
+        with self._lock:
+            if self._queued + self._running >= self.queue_limit:
+                self._rejected += 1
+                raise ExecutorSaturatedError(f"worker queue is full ({self.queue_limit} jobs in flight)")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+            pool = self._ensure_pool()
+            if session_key is None:
+                pool.submit(self._run_job, job)
+                return job.future
+            self._queues.setdefault(session_key, deque()).append(job)
+            if session_key in self._active_keys:
+                return job.future
+            self._active_keys.add(session_key)
+            pool.submit(self._run_next, session_key)
+        return job.future
+
+    async def run(self, session_key: str | None, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(session_key, fn, *args, **kwargs))
+
+    def _run_next(self, session_key: str) -> None:
+        with self._lock:
+            queue = self._queues.get(session_key)
+            job = queue.popleft() if queue else None
+        if job is not None:
+            self._run_job(job)
+        with self._lock:
+            queue = self._queues.get(session_key)
+            if queue:
+                self._ensure_pool().submit(self._run_next, session_key)
+                return
+            self._queues.pop(session_key, None)
+            self._active_keys.discard(session_key)
+
+    def _run_job(self, job: _Job) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._dispatched += 1
+            self._total_wait_s += time.monotonic() - job.enqueued_at
+            if not job.future.set_running_or_notify_cancel():
+                return
+            self._running += 1
+        try:
+            if job.session_key is None:
+                result = job.fn(*job.args, **job.kwargs)
+            else:
+                with session_locks.lock(job.session_key):
+                    result = job.fn(*job.args, **job.kwargs)
+        except BaseException as exc:
+            with self._lock:
+                self._running -= 1
+                self._failed += 1
+            job.future.set_exception(exc)
+            return
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+        job.future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "max_queued": self._max_queued,
+                "avg_wait_ms": round(self._total_wait_s * 1000 / self._dispatched, 2) if self._dispatched else 0.0,
+                "session_depths": {key: len(queue) for key, queue in self._queues.items() if queue},
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+session_executor = SessionExecutor(
+    max_workers=env_int("ROLEPLAY_WORKER_THREADS", _DEFAULT_WORKER_THREADS, minimum=1),
+    queue_limit=env_int("ROLEPLAY_WORKER_QUEUE_LIMIT", _DEFAULT_QUEUE_LIMIT, minimum=1),
+)
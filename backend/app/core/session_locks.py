@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock, RLock, get_ident
+from typing import Any, Iterator
+
+_write_scope: ContextVar[object | None] = ContextVar("roleplay_write_scope", default=None)
+
+
+def current_write_scope() -> object:
+    scope = _write_scope.get()
+    return scope if scope is not None else ("thread", get_ident())
+
+
+@dataclass
+class _SessionLock:
+    lock: RLock = field(default_factory=RLock)
+    holders: int = 0
+
+
+class SessionLockManager:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._locks: dict[str, _SessionLock] = {}
+        self._acquired = 0
+        self._contended = 0
+
+    @contextmanager
+    def lock(self, session_key: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(session_key, _SessionLock())
+            entry.holders += 1
+        try:
+            if not entry.lock.acquire(blocking=False):
+                with self._lock:
+                    self._contended += 1
+                entry.lock.acquire()
+            with self._lock:
+                self._acquired += 1
+            token = _write_scope.set(object()) if _write_scope.get() is None else None
+            try:
+                yield
+            finally:
+                if token is not None:
+                    _write_scope.reset(token)
+                entry.lock.release()
+        finally:
+            with self._lock:
+                entry.holders -= 1
+                if entry.holders <= 0:
+                    self._locks.pop(session_key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "active": len(self._locks),
+                "acquired": self._acquired,
+                "contended": self._contended,
+            }
+
+
+session_locks = SessionLockManager()
@@ -1,13 +1,21 @@
 ﻿from __future__ import annotations
 
 from dataclasses import dataclass
+import gzip
 import hashlib
+import importlib.util
 import json
 from pathlib import Path
 import tempfile
-from typing import Any
+from typing import Any, Callable
 
-from app.models.schemas import PathStatusResponse
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from app.core import json_codec
+from app.core.game_log_store import GAME_LOG_PART_FORMAT, GameLogStore
+from app.core.helpers import write_bytes_atomic
+from app.models.schemas import GameLogEntry, PathStatusResponse, SaveFile
 
 
 @dataclass
@@ -93,6 +101,9 @@ class StorageState:
         return path
 
     def set_save_path(self, raw_path: str) -> Path:
+        from app.core.save_cache import save_cache
+
+        save_cache.flush()
         path = Path(raw_path).expanduser().resolve()
         if path.exists() and path.is_dir():
             path = path / "current-save.json"
@@ -112,18 +123,71 @@ class StorageState:
         return PathStatusResponse(path=str(path), exists=exists, writable=writable)
 
 
-def write_json_atomic(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    temp = path.with_suffix(path.suffix + ".tmp")
-    temp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    temp.replace(path)
+def write_json_atomic(path: Path, payload: dict[str, Any], *, compact: bool = False) -> None:
+    write_bytes_atomic(path, json_codec.dumps(payload, compact=compact))
 
 
 def read_json(path: Path) -> dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    return json_codec.loads(path.read_bytes())
+
+
+# Part format -> file suffix. Formats other than "json" are compressed JSON text.
+PART_FORMAT_SUFFIXES: dict[str, str] = {"json": ".json", "json+gzip": ".json.gz", "json+zstd": ".json.zst"}
+
+
+def zstd_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def resolve_part_format(compression: str | None) -> str:
+    value = (compression or "").strip().lower()
+    if value in {"", "0", "none", "off", "json"}:
+        return "json"
+    if value in {"zstd", "json+zstd"} and zstd_available():
+        return "json+zstd"
+    if value in {"zstd", "json+zstd", "gzip", "gz", "json+gzip", "1", "on", "auto"}:
+        return "json+gzip"
+    raise ValueError(f"unknown save compression: {compression}")
+
+
+def _encode_part(raw: bytes, part_format: str) -> bytes:
+    if part_format == "json+gzip":
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if part_format == "json+zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def _read_part_file(path: Path, part_format: str) -> Any:
+    if part_format == "json":
+        return read_json(path)
+    return _decode_part(path.read_bytes(), part_format)
+
+
+def _decode_part(raw: bytes, part_format: str) -> Any:
+    return json_codec.loads(_part_bytes(raw, part_format))
+
+
+def _part_bytes(raw: bytes, part_format: str) -> bytes:
+    if part_format == "json+gzip":
+        raw = gzip.decompress(raw)
+    elif part_format == "json+zstd":
+        if not zstd_available():
+            raise ValueError("save bundle part is zstd-compressed but zstandard is not installed")
+        import zstandard
+
+        raw = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    elif part_format != "json":
+        raise ValueError(f"unknown save bundle part format: {part_format}")
+    return raw
 
 
 _SAVE_BUNDLE_FORMAT = "save_bundle_v1"
+_GAME_LOG_DIR = "game_logs"
+_LEGACY_GAME_LOG_FILE = "game_logs.json"
+_ARCHIVE_DIR = "archive"
 
 
 def _save_bundle_dir(save_path: Path) -> Path:
@@ -132,9 +196,8 @@ def _save_bundle_dir(save_path: Path) -> Path:
     return save_path.parent / f"{save_path.name}.bundle"
 
 
-def _json_hash(payload: Any) -> str:
-    content = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+def save_archive_dir(save_path: Path) -> Path:
+    return _save_bundle_dir(save_path) / _ARCHIVE_DIR
 
 
 def _load_bundle_manifest(bundle_dir: Path) -> dict[str, Any] | None:
@@ -147,138 +210,443 @@ def _load_bundle_manifest(bundle_dir: Path) -> dict[str, Any] | None:
     return data
 
 
-def _assemble_bundle(bundle_dir: Path, manifest: dict[str, Any]) -> dict[str, Any]:
-    parts = manifest.get("parts", {})
-    if not isinstance(parts, dict):
-        raise ValueError("invalid save bundle parts")
-
-    def _read_part(name: str, default: Any | None = None) -> Any:
-        rel = parts.get(name)
-        if not isinstance(rel, str):
-            if default is not None:
-                return default
+def save_manifest_digest(save_path: Path) -> str | None:
+    candidates = [_save_bundle_dir(save_path) / "manifest.json", save_path]
+    for path in candidates:
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            continue
+    return None
+
+
+def _manifest_revision(manifest: dict[str, Any]) -> int:
+    try:
+        return max(0, int(manifest.get("revision") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def save_manifest_revision(save_path: Path) -> int:
+    reader = open_save_bundle(save_path)
+    return reader.revision if reader is not None else 0
+
+
+_REQUIRED_BUNDLE_PARTS = {"meta", "map_snapshot", "area_snapshot", "player_data", "game_logs"}
+_OPTIONAL_BUNDLE_PART_DEFAULTS: dict[str, Any] = {
+    "role_pool": {"items": []},
+    "team_state": {},
+    "reputation_state": {},
+    "world_state": {},
+    "quest_state": {},
+    "encounter_state": {},
+    "fate_state": {},
+}
+
+# SaveFile field -> (bundle part, key inside the part or None for the whole part, raw default)
+_SAVE_FIELD_PARTS: dict[str, tuple[str, str | None, Any]] = {
+    "version": ("meta", "version", "1.2.0"),
+    "session_id": ("meta", "session_id", "sess_default"),
+    "updated_at": ("meta", "updated_at", None),
+    "game_log_settings": ("meta", "game_log_settings", {}),
+    "world_state": ("world_state", None, {}),
+    "map_snapshot": ("map_snapshot", None, {}),
+    "area_snapshot": ("area_snapshot", None, {}),
+    "player_static_data": ("player_data", "player_static_data", {}),
+    "player_runtime_data": ("player_data", "player_runtime_data", {}),
+    "game_logs": ("game_logs", "items", []),
+    "role_pool": ("role_pool", "items", []),
+    "team_state": ("team_state", None, {}),
+    "reputation_state": ("reputation_state", None, {}),
+    "quest_state": ("quest_state", None, {}),
+    "encounter_state": ("encounter_state", None, {}),
+    "fate_state": ("fate_state", None, {}),
+}
+
+_PART_FIELDS: dict[str, tuple[str, ...]] = {}
+for _field, (_part, _, _) in _SAVE_FIELD_PARTS.items():
+    _PART_FIELDS[_part] = _PART_FIELDS.get(_part, ()) + (_field,)
+
+_PART_NAMES = (
+    "meta",
+    "world_state",
+    "map_snapshot",
+    "area_snapshot",
+    "player_data",
+    "role_pool",
+    "team_state",
+    "reputation_state",
+    "quest_state",
+    "encounter_state",
+    "fate_state",
+)
+
+_field_adapters: dict[str, TypeAdapter] = {}
+
+
+def _field_adapter(field: str) -> TypeAdapter:
+    adapter = _field_adapters.get(field)
+    if adapter is None:
+        adapter = TypeAdapter(SaveFile.model_fields[field].annotation)
+        _field_adapters[field] = adapter
+    return adapter
+
+
+_part_adapters: dict[str, TypeAdapter] = {}
+
+
+def _part_adapter(name: str) -> TypeAdapter:
+    adapter = _part_adapters.get(name)
+    if adapter is None:
+        fields = _PART_FIELDS[name]
+        if _SAVE_FIELD_PARTS[fields[0]][1] is None:
+            adapter = _field_adapter(fields[0])
+        else:
+            keys = {_SAVE_FIELD_PARTS[field][1]: SaveFile.model_fields[field].annotation for field in fields}
+            adapter = TypeAdapter(TypedDict(f"{name}_part", keys, total=False))  # type: ignore[misc]
+        _part_adapters[name] = adapter
+    return adapter
+
+
+def _serialize_part(name: str, save: SaveFile, *, compact: bool) -> bytes:
+    fields = _PART_FIELDS[name]
+    if _SAVE_FIELD_PARTS[fields[0]][1] is None:
+        values = getattr(save, fields[0])
+    else:
+        values = {_SAVE_FIELD_PARTS[field][1]: getattr(save, field) for field in fields}
+    return _part_adapter(name).dump_json(values, indent=None if compact else 2)
+
+
+class SaveBundleReader:
+    def __init__(self, bundle_dir: Path, manifest: dict[str, Any], manifest_digest: str | None = None) -> None:
+        parts = manifest.get("parts", {})
+        if not isinstance(parts, dict):
+            raise ValueError("invalid save bundle parts")
+        formats = manifest.get("formats", {})
+        self.bundle_dir = bundle_dir
+        self.manifest_digest = manifest_digest
+        self.revision = _manifest_revision(manifest)
+        self._parts = parts
+        self._formats = formats if isinstance(formats, dict) else {}
+        self._raw_parts: dict[str, Any] = {}
+        self._fields: dict[str, Any] = {}
+
+    @property
+    def loaded_parts(self) -> list[str]:
+        return list(self._raw_parts)
+
+    def part_format(self, name: str) -> str:
+        return str(self._formats.get(name) or "json")
+
+    def game_log_store(self) -> GameLogStore | None:
+        rel = self._parts.get("game_logs")
+        if self.part_format("game_logs") != GAME_LOG_PART_FORMAT or not isinstance(rel, str):
+            return None
+        return GameLogStore(self.bundle_dir / rel)
+
+    def read_part(self, name: str) -> Any:
+        if name in self._raw_parts:
+            return self._raw_parts[name]
+        rel = self._parts.get(name)
+        store = self.game_log_store() if name == "game_logs" else None
+        if store is not None:
+            body = {"items": store.read_all()}
+        elif isinstance(rel, str):
+            body = _read_part_file(self.bundle_dir / rel, self.part_format(name))
+        elif name in _OPTIONAL_BUNDLE_PART_DEFAULTS:
+            body = json.loads(json.dumps(_OPTIONAL_BUNDLE_PART_DEFAULTS[name]))
+        else:
             raise ValueError(f"missing save bundle part: {name}")
-        return read_json(bundle_dir / rel)
-
-    meta = _read_part("meta")
-    map_snapshot = _read_part("map_snapshot")
-    area_snapshot = _read_part("area_snapshot")
-    player_data = _read_part("player_data")
-    game_logs = _read_part("game_logs")
-    role_pool = _read_part("role_pool", {"items": []})
-    team_state = _read_part("team_state", {})
-    reputation_state = _read_part("reputation_state", {})
-    world_state = _read_part("world_state", {})
-    quest_state = _read_part("quest_state", {})
-    encounter_state = _read_part("encounter_state", {})
-    fate_state = _read_part("fate_state", {})
-
-    return {
-        "version": meta.get("version", "1.2.0"),
-        "session_id": meta.get("session_id", "sess_default"),
-        "updated_at": meta.get("updated_at"),
-        "game_log_settings": meta.get("game_log_settings", {}),
-        "world_state": world_state,
-        "map_snapshot": map_snapshot,
-        "area_snapshot": area_snapshot,
-        "player_static_data": player_data.get("player_static_data", {}),
-        "player_runtime_data": player_data.get("player_runtime_data", {}),
-        "game_logs": game_logs.get("items", []),
-        "role_pool": role_pool.get("items", []),
-        "team_state": team_state,
-        "reputation_state": reputation_state,
-        "quest_state": quest_state,
-        "encounter_state": encounter_state,
-        "fate_state": fate_state,
-    }
+        self._raw_parts[name] = body
+        return body
+
+    def raw_field(self, field: str) -> Any:
+        part, key, default = _SAVE_FIELD_PARTS[field]
+        body = self.read_part(part)
+        if key is None:
+            return body
+        return body.get(key, default)
+
+    def load(self, field: str) -> Any:
+        if field in self._fields:
+            return self._fields[field]
+        raw = self.raw_field(field)
+        if raw is None:
+            value = SaveFile.model_fields[field].get_default(call_default_factory=True)
+        else:
+            value = _field_adapter(field).validate_python(raw)
+        self._fields[field] = value
+        return value
+
+    def tail_game_logs(self, limit: int) -> list[GameLogEntry]:
+        if "game_logs" in self._fields:
+            return self._fields["game_logs"][-limit:] if limit > 0 else []
+        store = self.game_log_store()
+        if store is None:
+            items = self.load("game_logs")
+            return items[-limit:] if limit > 0 else []
+        return _field_adapter("game_logs").validate_python(store.tail(limit))
+
+    def payload(self) -> dict[str, Any]:
+        for name in _REQUIRED_BUNDLE_PARTS:
+            self.read_part(name)
+        return {field: self.raw_field(field) for field in _SAVE_FIELD_PARTS}
+
+    def _raw_part_bytes(self, name: str) -> bytes | None:
+        rel = self._parts.get(name)
+        store = self.game_log_store() if name == "game_logs" else None
+        if store is not None:
+            return b'{"items":' + store.read_all_json() + b"}"
+        if isinstance(rel, str):
+            return _part_bytes((self.bundle_dir / rel).read_bytes(), self.part_format(name))
+        if name in _OPTIONAL_BUNDLE_PART_DEFAULTS:
+            return None
+        raise ValueError(f"missing save bundle part: {name}")
+
+    def model(self) -> SaveFile:
+        # Validate each part straight from its file bytes; SaveFile then wraps the validated models without a dict round trip.
+        values: dict[str, Any] = {}
+        for name, fields in _PART_FIELDS.items():
+            raw = self._raw_part_bytes(name)
+            if raw is None:
+                continue
+            body = _part_adapter(name).validate_json(raw)
+            for field in fields:
+                key, default = _SAVE_FIELD_PARTS[field][1], _SAVE_FIELD_PARTS[field][2]
+                if key is None:
+                    values[field] = body
+                elif key in body:
+                    values[field] = body[key]
+                elif default is not None:
+                    values[field] = default
+        return SaveFile.model_validate(values)
 
 
-def read_save_payload(save_path: Path) -> dict[str, Any] | None:
-    bundle_dir = _save_bundle_dir(save_path)
-    manifest = _load_bundle_manifest(bundle_dir)
-    if manifest is not None:
-        return _assemble_bundle(bundle_dir, manifest)
+def _assemble_bundle(bundle_dir: Path, manifest: dict[str, Any]) -> dict[str, Any]:
+    return SaveBundleReader(bundle_dir, manifest).payload()
 
-    if not save_path.exists() or not save_path.is_file():
+
+def _open_bundle_dir(bundle_dir: Path) -> SaveBundleReader | None:
+    manifest_path = bundle_dir / "manifest.json"
+    try:
+        raw = manifest_path.read_bytes()
+    except OSError:
+        return None
+    manifest = json_codec.loads(raw)
+    if manifest.get("format") != _SAVE_BUNDLE_FORMAT:
         return None
+    return SaveBundleReader(bundle_dir, manifest, hashlib.sha256(raw).hexdigest())
 
+
+def open_save_bundle(save_path: Path) -> SaveBundleReader | None:
+    reader = _open_bundle_dir(_save_bundle_dir(save_path))
+    if reader is not None:
+        return reader
+    if not save_path.exists() or not save_path.is_file():
+        return None
     raw = read_json(save_path)
-    if raw.get("format") == _SAVE_BUNDLE_FORMAT:
-        pointer_bundle = raw.get("bundle_dir")
-        if isinstance(pointer_bundle, str):
-            pointed = Path(pointer_bundle)
-            if not pointed.is_absolute():
-                pointed = save_path.parent / pointed
-            pointer_manifest = _load_bundle_manifest(pointed)
-            if pointer_manifest is not None:
-                return _assemble_bundle(pointed, pointer_manifest)
-    return raw
+    pointer_bundle = raw.get("bundle_dir") if raw.get("format") == _SAVE_BUNDLE_FORMAT else None
+    if not isinstance(pointer_bundle, str):
+        return None
+    pointed = Path(pointer_bundle)
+    if not pointed.is_absolute():
+        pointed = save_path.parent / pointed
+    return _open_bundle_dir(pointed)
+
+
+def read_save_payload(save_path: Path) -> dict[str, Any] | None:
+    reader = open_save_bundle(save_path)
+    if reader is not None:
+        return reader.payload()
+    if not save_path.exists() or not save_path.is_file():
+        return None
+    return read_json(save_path)
 
 
-def write_save_payload(save_path: Path, payload: dict[str, Any]) -> None:
+def read_save_file(save_path: Path) -> SaveFile | None:
+    reader = open_save_bundle(save_path)
+    if reader is not None:
+        return reader.model()
+    if not save_path.exists() or not save_path.is_file():
+        return None
+    return SaveFile.model_validate_json(save_path.read_bytes())
+
+
+def save_parts_for_fields(fields: set[str]) -> set[str]:
+    return {_SAVE_FIELD_PARTS[field][0] for field in fields if field in _SAVE_FIELD_PARTS}
+
+
+def _part_body(name: str, field_value: Callable[[str], Any]) -> Any:
+    if name == "meta":
+        return {
+            "version": field_value("version"),
+            "session_id": field_value("session_id"),
+            "updated_at": field_value("updated_at"),
+            "game_log_settings": field_value("game_log_settings"),
+        }
+    if name == "player_data":
+        return {
+            "player_static_data": field_value("player_static_data"),
+            "player_runtime_data": field_value("player_runtime_data"),
+        }
+    if name == "role_pool":
+        return {"items": field_value("role_pool")}
+    return field_value(name)
+
+
+def _write_bundle(
+    save_path: Path,
+    field_value: Callable[[str], Any],
+    part_content: Callable[[str], bytes],
+    sync_game_logs: Callable[[GameLogStore], Any],
+    *,
+    parts: set[str] | None,
+    revision: int | None,
+    compact: bool,
+    part_format: str = "json",
+) -> None:
     bundle_dir = _save_bundle_dir(save_path)
     bundle_dir.mkdir(parents=True, exist_ok=True)
 
-    parts: dict[str, tuple[str, Any]] = {
-        "meta": (
-            "meta.json",
-            {
-                "version": payload.get("version", "1.2.0"),
-                "session_id": payload.get("session_id", "sess_default"),
-                "updated_at": payload.get("updated_at"),
-                "game_log_settings": payload.get("game_log_settings", {}),
-            },
-        ),
-        "world_state": ("world_state.json", payload.get("world_state", {})),
-        "map_snapshot": ("map_snapshot.json", payload.get("map_snapshot", {})),
-        "area_snapshot": ("area_snapshot.json", payload.get("area_snapshot", {})),
-        "player_data": (
-            "player_data.json",
-            {
-                "player_static_data": payload.get("player_static_data", {}),
-                "player_runtime_data": payload.get("player_runtime_data", {}),
-            },
-        ),
-        "game_logs": ("game_logs.json", {"items": payload.get("game_logs", [])}),
-        "role_pool": ("role_pool.json", {"items": payload.get("role_pool", [])}),
-        "team_state": ("team_state.json", payload.get("team_state", {})),
-        "reputation_state": ("reputation_state.json", payload.get("reputation_state", {})),
-        "quest_state": ("quest_state.json", payload.get("quest_state", {})),
-        "encounter_state": ("encounter_state.json", payload.get("encounter_state", {})),
-        "fate_state": ("fate_state.json", payload.get("fate_state", {})),
-    }
-
     old_manifest = _load_bundle_manifest(bundle_dir) or {}
     old_hashes = old_manifest.get("hashes", {}) if isinstance(old_manifest.get("hashes"), dict) else {}
+    old_formats = old_manifest.get("formats", {}) if isinstance(old_manifest.get("formats"), dict) else {}
+
+    def unchanged(name: str, path: Path) -> bool:
+        return parts is not None and name not in parts and name in old_hashes and path.exists()
+
+    def same_format(name: str) -> bool:
+        return str(old_formats.get(name) or "json") == part_format
 
     new_hashes: dict[str, str] = {}
     part_map: dict[str, str] = {}
-    for name, (rel_path, body) in parts.items():
+    game_log_store = GameLogStore(bundle_dir / _GAME_LOG_DIR)
+    part_map["game_logs"] = _GAME_LOG_DIR
+    if unchanged("game_logs", game_log_store.root) and old_formats.get("game_logs") == GAME_LOG_PART_FORMAT:
+        new_hashes["game_logs"] = old_hashes["game_logs"]
+    else:
+        sync_game_logs(game_log_store)
+        new_hashes["game_logs"] = game_log_store.signature()
+    formats = {"game_logs": GAME_LOG_PART_FORMAT}
+    stale_files: list[Path] = []
+    for name in _PART_NAMES:
+        rel_path = name + PART_FORMAT_SUFFIXES[part_format]
         part_map[name] = rel_path
+        if part_format != "json":
+            formats[name] = part_format
         part_path = bundle_dir / rel_path
-        digest = _json_hash(body)
+        stale_files.extend(bundle_dir / (name + suffix) for fmt, suffix in PART_FORMAT_SUFFIXES.items() if fmt != part_format)
+        if same_format(name) and unchanged(name, part_path):
+            new_hashes[name] = old_hashes[name]
+            continue
+        content = part_content(name)
+        digest = hashlib.sha256(content).hexdigest()
         new_hashes[name] = digest
-        if old_hashes.get(name) == digest and part_path.exists():
+        if same_format(name) and old_hashes.get(name) == digest and part_path.exists():
             continue
-        write_json_atomic(part_path, body)
+        write_bytes_atomic(part_path, _encode_part(content, part_format))
 
     manifest = {
         "format": _SAVE_BUNDLE_FORMAT,
-        "version": 1,
-        "updated_at": payload.get("updated_at"),
+        "version": 2,
+        "revision": revision if revision is not None else _manifest_revision(old_manifest) + 1,
+        "updated_at": field_value("updated_at"),
         "parts": part_map,
+        "formats": formats,
         "hashes": new_hashes,
     }
-    write_json_atomic(bundle_dir / "manifest.json", manifest)
+    write_json_atomic(bundle_dir / "manifest.json", manifest, compact=compact)
+    (bundle_dir / _LEGACY_GAME_LOG_FILE).unlink(missing_ok=True)
+    for path in stale_files:
+        path.unlink(missing_ok=True)
 
     pointer = {
         "format": _SAVE_BUNDLE_FORMAT,
         "version": 1,
         "bundle_dir": bundle_dir.name,
-        "session_id": payload.get("session_id", "sess_default"),
-        "updated_at": payload.get("updated_at"),
+        "session_id": field_value("session_id"),
+        "updated_at": field_value("updated_at"),
     }
-    write_json_atomic(save_path, pointer)
+    write_json_atomic(save_path, pointer, compact=compact)
+
+
+def write_save_payload(
+    save_path: Path,
+    payload: dict[str, Any] | SaveFile,
+    *,
+    revision: int | None = None,
+    changed_fields: set[str] | None = None,
+    compact: bool = False,
+    compression: str | None = None,
+) -> None:
+    if isinstance(payload, SaveFile):
+        save = payload
+
+        def field_value(field: str) -> Any:
+            return _field_adapter(field).dump_python(getattr(save, field), mode="json")
+
+        def part_content(name: str) -> bytes:
+            return _serialize_part(name, save, compact=compact)
+
+        def sync_game_logs(store: GameLogStore) -> Any:
+            # Only entries past the stored prefix are dumped; the full list only when the store is rewritten.
+            logs = save.game_logs
+            adapter = _field_adapter("game_logs")
+            return store.sync_from(len(logs), lambda idx: logs[idx].id, lambda start: adapter.dump_python(logs[start:], mode="json"))
+
+    else:
+
+        def field_value(field: str) -> Any:
+            return payload.get(field, _SAVE_FIELD_PARTS[field][2])
+
+        def part_content(name: str) -> bytes:
+            return json_codec.dumps(_part_body(name, field_value), compact=compact)
+
+        def sync_game_logs(store: GameLogStore) -> Any:
+            return store.sync(field_value("game_logs"))
+
+    parts = save_parts_for_fields(changed_fields) if changed_fields is not None else None
+    _write_bundle(save_path, field_value, part_content, sync_game_logs, parts=parts, revision=revision, compact=compact, part_format=resolve_part_format(compression))
+
+
+def compact_game_logs(save_path: Path) -> bool:
+    reader = open_save_bundle(save_path)
+    store = reader.game_log_store() if reader is not None else None
+    if store is None:
+        return False
+    store.compact()
+    return True
+
+
+def migrate_save_bundle(save_path: Path) -> bool:
+    reader = open_save_bundle(save_path)
+    if reader is not None:
+        if reader.part_format("game_logs") == GAME_LOG_PART_FORMAT:
+            return False
+        write_save_payload(save_path, reader.payload())
+        return True
+    if not save_path.exists() or not save_path.is_file():
+        return False
+    raw = read_json(save_path)
+    if raw.get("format") == _SAVE_BUNDLE_FORMAT:
+        return False
+    write_save_payload(save_path, raw)
+    return True
+
+
+def migrate_save_compression(save_path: Path, compression: str | None, *, compact: bool = False) -> bool:
+    reader = open_save_bundle(save_path)
+    if reader is None:
+        if not migrate_save_bundle(save_path):
+            return False
+        reader = open_save_bundle(save_path)
+        if reader is None:
+            return False
+    target = resolve_part_format(compression)
+    if all(reader.part_format(name) == target for name in _PART_NAMES):
+        return False
+    write_save_payload(save_path, reader.payload(), revision=reader.revision, compact=compact, compression=compression)
+    return True
 
 
 storage_state = StorageState()
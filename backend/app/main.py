@@ -1,12 +1,28 @@
+from contextlib import asynccontextmanager
 import logging
 import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routes import router
+from app.core.llm_fanout import llm_fanout
+from app.core.save_cache import SaveConflictError, save_cache
+from app.core.session_executor import ExecutorSaturatedError, session_executor
+from app.services.ai_adapter import llm_client_registry
 
-app = FastAPI(title="Roleplay Web API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    session_executor.shutdown()
+    llm_fanout.shutdown(wait=False)
+    await llm_client_registry.aclose()
+    save_cache.close()
+
+
+app = FastAPI(title="Roleplay Web API", version="0.1.0", lifespan=lifespan)
 logger = logging.getLogger("roleplay.api")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
@@ -22,6 +38,16 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(_: Request, exc: ExecutorSaturatedError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(SaveConflictError)
+async def save_conflict_handler(_: Request, exc: SaveConflictError) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": str(exc), "fields": exc.fields})
+
+
 @app.middleware("http")
 async def api_log_middleware(request, call_next):
     started = time.perf_counter()
@@ -3,7 +3,7 @@
 from datetime import datetime, timezone
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 
 class UIConfig(BaseModel):
@@ -904,6 +904,8 @@ class SaveFile(BaseModel):
     encounter_state: EncounterState = Field(default_factory=lambda: EncounterState())
     fate_state: FateState = Field(default_factory=lambda: FateState())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    _revision: int | None = PrivateAttr(default=None)
+    _part_stamps: tuple[int, dict[str, int]] | None = PrivateAttr(default=None)
 
 
 class SaveImportRequest(BaseModel):
@@ -945,6 +947,7 @@ class RenderNode(BaseModel):
     name: str
     x: int
     y: int
+    sub_zone_count: int = 0
 
 
 class RenderSubNode(BaseModel):
@@ -971,6 +974,63 @@ class RenderMapResponse(BaseModel):
     player_marker: dict[str, int]
 
 
+class MapViewRequest(BaseModel):
+    session_id: str = Field(..., min_length=1)
+    min_x: int
+    min_y: int
+    max_x: int
+    max_y: int
+    zoom: float = Field(default=1.0, gt=0, le=64)
+
+
+class MapViewResponse(BaseModel):
+    session_id: str
+    map_revision: int
+    zoom: float
+    lod: Literal["zones", "sub_zones"]
+    viewport: dict[str, int]
+    nodes: list[RenderNode] = Field(default_factory=list)
+    sub_nodes: list[RenderSubNode] = Field(default_factory=list)
+    circles: list[RenderCircle] = Field(default_factory=list)
+    player_marker: dict[str, int] | None = None
+
+
+class WorldMapQueryRequest(BaseModel):
+    session_id: str = Field(..., min_length=1)
+    mode: Literal["nearest", "radius", "bbox"] = "nearest"
+    x: int | None = None
+    y: int | None = None
+    k: int = Field(default=5, ge=1, le=100)
+    radius_m: int = Field(default=500, ge=0, le=100000)
+    min_x: int | None = None
+    min_y: int | None = None
+    max_x: int | None = None
+    max_y: int | None = None
+    touching: bool = False
+    include_sub_zones: bool = True
+
+
+class WorldMapQueryHit(BaseModel):
+    entity_type: Literal["zone", "sub_zone"]
+    entity_id: str
+    zone_id: str
+    name: str
+    x: int
+    y: int
+    z: int = 0
+    radius_m: int
+    distance_m: float
+
+
+class WorldMapQueryResponse(BaseModel):
+    session_id: str
+    mode: Literal["nearest", "radius", "bbox"]
+    map_revision: int
+    origin: dict[str, int]
+    zones: list[WorldMapQueryHit] = Field(default_factory=list)
+    sub_zones: list[WorldMapQueryHit] = Field(default_factory=list)
+
+
 class MovementLog(BaseModel):
     id: str
     summary: str
@@ -1015,6 +1075,30 @@ class GameLogListResponse(BaseModel):
     items: list[GameLogEntry] = Field(default_factory=list)
 
 
+class SyncEntityDelta(BaseModel):
+    upserted: list[dict[str, Any]] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    session_id: str
+    since: int | None = None
+    revision: int
+    full: bool
+    parts: dict[str, Any] = Field(default_factory=dict)
+    game_logs_appended: list[GameLogEntry] = Field(default_factory=list)
+    entity_changes: dict[str, SyncEntityDelta] = Field(default_factory=dict)
+
+
+class ArchiveQueryResponse(BaseModel):
+    session_id: str
+    collection: Literal["game_logs", "quests", "encounters", "fate_archive", "dialogue_logs"]
+    owner_id: str | None = None
+    total: int = 0
+    offset: int = 0
+    items: list[dict[str, Any]] = Field(default_factory=list)
+
+
 class GameLogSettingsResponse(BaseModel):
     session_id: str
     settings: GameLogSettings
@@ -1204,6 +1288,7 @@ class FatePhase(BaseModel):
     triggered_at: str | None = None
     bound_quest_id: str | None = None
     completed_at: str | None = None
+    completion_logged: bool = False
 
 
 class FateLine(BaseModel):
@@ -1246,6 +1331,42 @@ class TokenUsageResponse(BaseModel):
     sources: TokenUsageSources = Field(default_factory=TokenUsageSources)
 
 
+class RuntimeExecutorResponse(BaseModel):
+    max_workers: int
+    queue_limit: int
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    max_queued: int = 0
+    avg_wait_ms: float = 0.0
+    session_depths: dict[str, int] = Field(default_factory=dict)
+
+
+class RuntimeLlmClientsResponse(BaseModel):
+    max_clients: int
+    clients: int = 0
+    http2: bool = False
+    keepalive_s: int
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+
+
+class RuntimeLlmCacheResponse(BaseModel):
+    enabled: bool
+    root: str
+    entries: int = 0
+    max_entries: int
+    ttl_s: int
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evicted: int = 0
+    namespaces: dict[str, dict[str, int]] = Field(default_factory=dict)
+
+
 class WorldClockInitRequest(BaseModel):
     session_id: str = Field(..., min_length=1)
     calendar: str = Field(default="fantasy_default", min_length=1)
@@ -1737,6 +1858,7 @@ class EntityIndexResponse(BaseModel):
 
 class ConsistencyRunRequest(BaseModel):
     session_id: str = Field(..., min_length=1)
+    full: bool = False
 
 
 class ConsistencyStatusResponse(BaseModel):
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+import re
+from threading import Lock
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+import weakref
 
-from openai import AsyncOpenAI, OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
+from app.core.helpers import env_flag, env_int
 from app.models.schemas import ChatConfig, ModelCapabilityInfo
 
 DEFAULT_BASE_URLS = {
@@ -102,20 +116,186 @@ def has_ai_config(config: ChatConfig | None) -> bool:
     return bool((config.api_key or "").strip() and (config.model or "").strip())
 
 
-def create_sync_client(config: ChatConfig, client_cls: type[OpenAI] = OpenAI) -> OpenAI:
-    kwargs: dict[str, Any] = {"api_key": config.api_key}
-    base_url = resolve_base_url(config.provider, config.base_url_override)
+def _http2_enabled() -> bool:
+    raw = (os.environ.get("ROLEPLAY_LLM_HTTP2") or "").strip().lower()
+    if raw in {"0", "false", "off", "no"}:
+        return False
+    return importlib.util.find_spec("h2") is not None
+
+
+def key_fingerprint(api_key: str | None) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class _PooledClient:
+    client: Any
+    http_client: Any = None
+    loop: asyncio.AbstractEventLoop | None = None
+
+
+class LlmClientRegistry:
+    def __init__(self, max_clients: int, keepalive_s: int, http2: bool) -> None:
+        self.max_clients = max(1, int(max_clients))
+        self.keepalive_s = max(1, int(keepalive_s))
+        self.http2 = http2
+        self._lock = Lock()
+        self._clients: OrderedDict[tuple[Any, ...], _PooledClient] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=float(self.keepalive_s))
+
+    def get_sync(self, client_cls: type[OpenAI], provider: str, base_url: str | None, api_key: str) -> OpenAI:
+        key = ("sync", client_cls, provider, base_url or "", key_fingerprint(api_key))
+        with self._lock:
+            entry = self._take(key)
+            if entry is not None:
+                return entry.client
+            http_client = DefaultHttpxClient(http2=self.http2, limits=self._limits())
+            client = client_cls(**_client_kwargs(api_key, base_url), http_client=http_client)
+            evicted = self._put(key, _PooledClient(client=client, http_client=http_client))
+        _retire_entries(evicted)
+        return client
+
+    def get_async(self, client_cls: type[AsyncOpenAI], provider: str, base_url: str | None, api_key: str) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        key = ("async", id(loop), client_cls, provider, base_url or "", key_fingerprint(api_key))
+        with self._lock:
+            entry = self._take(key)
+            if entry is not None and entry.loop is loop:
+                return entry.client
+            http_client = DefaultAsyncHttpxClient(http2=self.http2, limits=self._limits())
+            client = client_cls(**_client_kwargs(api_key, base_url), http_client=http_client)
+            evicted = self._put(key, _PooledClient(client=client, http_client=http_client, loop=loop))
+        _retire_entries(evicted)
+        return client
+
+    def _take(self, key: tuple[Any, ...]) -> _PooledClient | None:
+        entry = self._clients.get(key)
+        if entry is None or (entry.loop is not None and entry.loop.is_closed()):
+            self._misses += 1
+            return None
+        self._clients.move_to_end(key)
+        self._hits += 1
+        return entry
+
+    def _put(self, key: tuple[Any, ...], entry: _PooledClient) -> list[_PooledClient]:
+        evicted: list[_PooledClient] = []
+        stale = self._clients.pop(key, None)
+        if stale is not None:
+            evicted.append(stale)
+        for other_key in [k for k, v in self._clients.items() if v.loop is not None and v.loop.is_closed()]:
+            evicted.append(self._clients.pop(other_key))
+        self._clients[key] = entry
+        while len(self._clients) > self.max_clients:
+            _, oldest = self._clients.popitem(last=False)
+            evicted.append(oldest)
+        self._evicted += len(evicted)
+        return evicted
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_clients": self.max_clients,
+                "clients": len(self._clients),
+                "http2": self.http2,
+                "keepalive_s": self.keepalive_s,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evicted": self._evicted,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        _close_entries(entries)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        loop = asyncio.get_running_loop()
+        for entry in entries:
+            if entry.loop is loop:
+                try:
+                    await entry.client.close()
+                except Exception:
+                    pass
+        _close_entries([entry for entry in entries if entry.loop is not loop])
+
+
+def _client_kwargs(api_key: str | None, base_url: str | None) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"api_key": api_key}
     if base_url:
         kwargs["base_url"] = base_url
-    return client_cls(**kwargs)
+    return kwargs
+
+
+def _close_entries(entries: list[_PooledClient]) -> None:
+    for entry in entries:
+        if entry.loop is None:
+            try:
+                entry.client.close()
+            except Exception:
+                pass
+        elif not entry.loop.is_closed():
+            try:
+                asyncio.run_coroutine_threadsafe(entry.client.close(), entry.loop)
+            except RuntimeError:
+                pass
+
+
+def _close_transport(http_client: Any, loop: asyncio.AbstractEventLoop | None) -> None:
+    if loop is None:
+        try:
+            http_client.close()
+        except Exception:
+            pass
+    elif not loop.is_closed():
+        try:
+            asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+        except RuntimeError:
+            pass
+
+
+def _retire_entries(entries: list[_PooledClient]) -> None:
+    # An evicted client may still be serving a call on another thread or task; its transport is closed once the last user drops it.
+    for entry in entries:
+        if entry.http_client is not None:
+            weakref.finalize(entry.client, _close_transport, entry.http_client, entry.loop)
+
+
+def _is_sdk_client_cls(client_cls: Any, base: type) -> bool:
+    return isinstance(client_cls, type) and issubclass(client_cls, base)
+
+
+llm_client_registry = LlmClientRegistry(
+    max_clients=env_int("ROLEPLAY_LLM_CLIENT_POOL_SIZE", 16, minimum=1),
+    keepalive_s=env_int("ROLEPLAY_LLM_KEEPALIVE_S", 60, minimum=1),
+    http2=_http2_enabled(),
+)
+
+
+def _sync_client(provider: str, api_key: str, base_url_override: str | None, client_cls: type[OpenAI]) -> OpenAI:
+    base_url = resolve_base_url(provider, base_url_override)
+    if _is_sdk_client_cls(client_cls, OpenAI):
+        return llm_client_registry.get_sync(client_cls, provider, base_url, api_key)
+    return client_cls(**_client_kwargs(api_key, base_url))
+
+
+def create_sync_client(config: ChatConfig, client_cls: type[OpenAI] = OpenAI) -> OpenAI:
+    return _sync_client(config.provider, config.api_key, config.base_url_override, client_cls)
 
 
 def create_async_client(config: ChatConfig, client_cls: type[AsyncOpenAI] = AsyncOpenAI) -> AsyncOpenAI:
-    kwargs: dict[str, Any] = {"api_key": config.api_key}
     base_url = resolve_base_url(config.provider, config.base_url_override)
-    if base_url:
-        kwargs["base_url"] = base_url
-    return client_cls(**kwargs)
+    if _is_sdk_client_cls(client_cls, AsyncOpenAI):
+        return llm_client_registry.get_async(client_cls, config.provider, base_url, config.api_key)
+    return client_cls(**_client_kwargs(config.api_key, base_url))
 
 
 def build_completion_options(config: ChatConfig) -> dict[str, Any]:
@@ -143,12 +323,335 @@ def build_completion_options(config: ChatConfig) -> dict[str, Any]:
     return options
 
 
+def chat_completion_kwargs(
+    config: ChatConfig,
+    messages: list[dict[str, Any]],
+    *,
+    json_mode: bool = True,
+    **overrides: Any,
+) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"model": (config.model or "").strip(), **build_completion_options(config)}
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+    kwargs["messages"] = messages
+    kwargs.update(overrides)
+    return kwargs
+
+
+def create_chat_completion(
+    config: ChatConfig,
+    messages: list[dict[str, Any]],
+    *,
+    client_cls: type[OpenAI] = OpenAI,
+    json_mode: bool = True,
+    **overrides: Any,
+) -> Any:
+    client = create_sync_client(config, client_cls=client_cls)
+    return client.chat.completions.create(**chat_completion_kwargs(config, messages, json_mode=json_mode, **overrides))
+
+
+async def acreate_chat_completion(
+    config: ChatConfig,
+    messages: list[dict[str, Any]],
+    *,
+    client_cls: type[AsyncOpenAI] = AsyncOpenAI,
+    json_mode: bool = True,
+    **overrides: Any,
+) -> Any:
+    client = create_async_client(config, client_cls=client_cls)
+    return await client.chat.completions.create(**chat_completion_kwargs(config, messages, json_mode=json_mode, **overrides))
+
+
+async def astream_chat_completion(
+    config: ChatConfig,
+    messages: list[dict[str, Any]],
+    *,
+    on_delta: Callable[[str], None],
+    client_cls: type[AsyncOpenAI] = AsyncOpenAI,
+    json_mode: bool = True,
+    **overrides: Any,
+) -> tuple[str, Any]:
+    client = create_async_client(config, client_cls=client_cls)
+    stream = await client.chat.completions.create(
+        **chat_completion_kwargs(
+            config,
+            messages,
+            json_mode=json_mode,
+            stream=True,
+            stream_options={"include_usage": True},
+            **overrides,
+        )
+    )
+    parts: list[str] = []
+    usage = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        for choice in getattr(chunk, "choices", None) or []:
+            text = getattr(choice.delta, "content", None)
+            if text:
+                parts.append(text)
+                on_delta(text)
+    return "".join(parts), usage
+
+
+class JsonStringFieldStream:
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, fields: tuple[str, ...], separator: str = "\n") -> None:
+        self.fields = fields
+        self.separator = separator
+        self._buffer = ""
+        self._emitted: dict[str, int] = {}
+        self._order: list[str] = []
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        out: list[str] = []
+        for field_name in self.fields:
+            value = self._partial_value(field_name)
+            if value is None:
+                continue
+            sent = self._emitted.get(field_name, 0)
+            if len(value) <= sent:
+                continue
+            if field_name not in self._order:
+                if any(self._emitted.get(name, 0) for name in self._order):
+                    out.append(self.separator)
+                self._order.append(field_name)
+            out.append(value[sent:])
+            self._emitted[field_name] = len(value)
+        return "".join(out)
+
+    def _partial_value(self, field_name: str) -> str | None:
+        match = re.search(r'"%s"\s*:\s*"' % re.escape(field_name), self._buffer)
+        if match is None:
+            return None
+        chars: list[str] = []
+        idx = match.end()
+        end = len(self._buffer)
+        while idx < end:
+            char = self._buffer[idx]
+            if char == '"':
+                break
+            if char != "\\":
+                chars.append(char)
+                idx += 1
+                continue
+            if idx + 1 >= end:
+                break
+            code = self._buffer[idx + 1]
+            if code == "u":
+                if idx + 6 > end:
+                    break
+                try:
+                    chars.append(chr(int(self._buffer[idx + 2 : idx + 6], 16)))
+                except ValueError:
+                    pass
+                idx += 6
+                continue
+            chars.append(self._ESCAPES.get(code, code))
+            idx += 2
+        return "".join(chars)
+
+
+def completion_text(response: Any) -> str:
+    return (response.choices[0].message.content or "").strip()
+
+
+LLM_CACHE_FORMAT = "llm_response_v1"
+
+
+def _normalize_messages(messages: list[dict[str, Any]]) -> list[dict[str, str]]:
+    return [{"role": str(item.get("role") or ""), "content": " ".join(str(item.get("content") or "").split())} for item in messages]
+
+
+def completion_cache_key(config: ChatConfig, namespace: str, kwargs: dict[str, Any], key_extra: Any = None) -> str:
+    payload = {
+        "format": LLM_CACHE_FORMAT,
+        "namespace": namespace,
+        "provider": config.provider,
+        "base_url": resolve_base_url(config.provider, config.base_url_override) or "",
+        "options": {key: value for key, value in kwargs.items() if key != "messages"},
+        "messages": _normalize_messages(list(kwargs.get("messages") or [])),
+    }
+    if key_extra is not None:
+        # State the prompt does not show but the answer must vary with (e.g. quests the player already turned down).
+        payload["extra"] = key_extra
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cached_response(content: str) -> Any:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=None), finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0),
+        cached=True,
+    )
+
+
+class LlmResponseCache:
+    def __init__(self, *, enabled: bool, ttl_s: int, max_entries: int, root: Path | None = None) -> None:
+        self.enabled = enabled
+        self.ttl_s = max(1, int(ttl_s))
+        self.max_entries = max(1, int(max_entries))
+        self._root = root
+        self._lock = Lock()
+        self._indexes: dict[Path, OrderedDict[str, float]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evicted = 0
+        self._namespaces: dict[str, dict[str, int]] = {}
+
+    def root(self) -> Path:
+        if self._root is not None:
+            return self._root
+        raw = (os.environ.get("ROLEPLAY_LLM_CACHE_DIR") or "").strip()
+        if raw:
+            return Path(raw).expanduser()
+        from app.core.storage import storage_state
+
+        return storage_state.save_path.parent / "llm-cache"
+
+    @staticmethod
+    def _path(root: Path, key: str) -> Path:
+        return root / key[:2] / f"{key}.json"
+
+    def _index(self, root: Path) -> OrderedDict[str, float]:
+        index = self._indexes.get(root)
+        if index is not None:
+            return index
+        found: list[tuple[float, str, float]] = []
+        if root.exists():
+            for path in root.glob("*/*.json"):
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                    found.append((path.stat().st_mtime, path.stem, float(data["created_at"])))
+                except Exception:
+                    path.unlink(missing_ok=True)
+        index = OrderedDict((key, created_at) for _, key, created_at in sorted(found))
+        self._indexes[root] = index
+        return index
+
+    def _count(self, namespace: str, field: str) -> None:
+        counters = self._namespaces.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, namespace: str, key: str) -> str | None:
+        root = self.root()
+        with self._lock:
+            index = self._index(root)
+            created_at = index.get(key)
+            content = None
+            if created_at is not None:
+                path = self._path(root, key)
+                if time.time() - created_at > self.ttl_s:
+                    index.pop(key, None)
+                    path.unlink(missing_ok=True)
+                else:
+                    try:
+                        content = str(json.loads(path.read_text(encoding="utf-8"))["content"])
+                        index.move_to_end(key)
+                        os.utime(path)
+                    except Exception:
+                        index.pop(key, None)
+                        path.unlink(missing_ok=True)
+            if content is None:
+                self._misses += 1
+                self._count(namespace, "misses")
+            else:
+                self._hits += 1
+                self._count(namespace, "hits")
+            return content
+
+    def put(self, namespace: str, key: str, content: str) -> None:
+        root = self.root()
+        created_at = time.time()
+        path = self._path(root, key)
+        with self._lock:
+            index = self._index(root)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(".tmp")
+            temp.write_text(
+                json.dumps({"format": LLM_CACHE_FORMAT, "namespace": namespace, "created_at": created_at, "content": content}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            temp.replace(path)
+            index.pop(key, None)
+            index[key] = created_at
+            self._stores += 1
+            while len(index) > self.max_entries:
+                oldest, _ = index.popitem(last=False)
+                self._path(root, oldest).unlink(missing_ok=True)
+                self._evicted += 1
+
+    def clear(self) -> None:
+        root = self.root()
+        with self._lock:
+            index = self._index(root)
+            for key in list(index):
+                self._path(root, key).unlink(missing_ok=True)
+            index.clear()
+
+    def stats(self) -> dict[str, Any]:
+        root = self.root()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "root": str(root),
+                "entries": len(self._index(root)),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "evicted": self._evicted,
+                "namespaces": {name: dict(counters) for name, counters in self._namespaces.items()},
+            }
+
+
+llm_response_cache = LlmResponseCache(
+    enabled=env_flag("ROLEPLAY_LLM_CACHE", True),
+    ttl_s=env_int("ROLEPLAY_LLM_CACHE_TTL_S", 86400, minimum=1),
+    max_entries=env_int("ROLEPLAY_LLM_CACHE_MAX_ENTRIES", 2000, minimum=1),
+)
+
+
+def cached_completion(
+    config: ChatConfig,
+    namespace: str,
+    create: Callable[..., Any],
+    *,
+    bypass: bool = False,
+    accept: Callable[[str], Any] | None = None,
+    key_extra: Any = None,
+    **kwargs: Any,
+) -> Any:
+    if not llm_response_cache.enabled:
+        return create(**kwargs)
+    key = completion_cache_key(config, namespace, kwargs, key_extra)
+    if not bypass:
+        content = llm_response_cache.get(namespace, key)
+        if content is not None:
+            return _cached_response(content)
+    response = create(**kwargs)
+    content = completion_text(response)
+    if content:
+        try:
+            accepted = accept is None or accept(content)
+        except Exception:
+            accepted = False
+        if accepted:
+            try:
+                llm_response_cache.put(namespace, key, content)
+            except OSError:
+                pass
+    return response
+
+
 def discover_models(provider: str, api_key: str, base_url_override: str | None = None) -> list[ModelCapabilityInfo]:
-    kwargs: dict[str, Any] = {"api_key": api_key}
-    base_url = resolve_base_url(provider, base_url_override)
-    if base_url:
-        kwargs["base_url"] = base_url
-    client = OpenAI(**kwargs)
+    client = _sync_client(provider, api_key, base_url_override, OpenAI)
     result = client.models.list()
     data = getattr(result, "data", result)
     items: list[ModelCapabilityInfo] = []
@@ -1,12 +1,17 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any
+from typing import Any, Callable
 
 from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 
+from app.core.helpers import env_flag
 from app.core.prompt_keys import PromptKeys
+from app.core.session_executor import session_executor
 from app.core.prompt_table import prompt_table
 from app.models.schemas import (
     AreaDiscoverInteractionsRequest,
@@ -36,6 +41,7 @@ from app.models.schemas import (
     PlayerUnequipRequest,
     RoleBuff,
     RoleRelationSetRequest,
+    SaveFile,
     TeamDebugGenerateRequest,
     TeamInviteRequest,
     TeamLeaveRequest,
@@ -46,6 +52,7 @@ from app.services.ai_adapter import build_completion_options, create_async_clien
 from app.services.world_service import (
     _active_encounter_for_current_sub_zone,
     _build_scene_context_payload,
+    _ensure_area_snapshot,
     _new_scene_event,
     _parse_player_intent,
     _record_sub_zone_chat_turn,
@@ -54,7 +61,6 @@ from app.services.world_service import (
     add_player_item,
     add_player_skill,
     add_player_spell,
-    advance_public_scene_in_save,
     apply_speech_time,
     build_main_turn_context_json,
     consume_spell_slots,
@@ -81,7 +87,15 @@ from app.services.world_service import (
     move_to_zone,
     save_current,
 )
-from app.services.encounter_service import act_on_encounter, advance_active_encounter_from_main_chat_in_save, advance_active_encounter_in_save, escape_encounter, get_encounter_debug_overview, rejoin_encounter
+from app.services.encounter_service import aact_on_encounter, act_on_encounter, advance_active_encounter_in_save, escape_encounter, get_encounter_debug_overview, rejoin_encounter
+from app.services.encounter_runtime_v2 import (
+    MainChatEncounterStep,
+    agenerate_background_tick,
+    ai_resolve_encounter_async,
+    begin_main_chat_encounter_step,
+    finish_main_chat_encounter_step,
+    plan_background_tick,
+)
 from app.services.consistency_service import (
     build_entity_index,
     build_global_story_snapshot,
@@ -89,6 +103,17 @@ from app.services.consistency_service import (
     collect_consistency_issues,
     reconcile_consistency,
 )
+from app.services.public_scene_runtime_v2 import (
+    PublicSceneRound,
+    adopt_speculative_actions,
+    agenerate_public_scene_actions,
+    apply_public_scene_actions,
+    aresolve_public_scene_round,
+    finish_public_scene_round,
+    plan_public_scene_round,
+)
+from app.services.name_matcher import entity_mentions
+from app.services.save_index import find_role
 from app.services.team_service import generate_debug_teammate, get_team_state, invite_npc_to_team, leave_npc_from_team, team_chat
 
 logger = logging.getLogger("roleplay.tools")
@@ -193,24 +218,16 @@ def _find_zone_target(save, text: str):
     clean = (text or "").strip()
     if not clean:
         return None
-    for zone in save.map_snapshot.zones:
-        if zone.zone_id and zone.zone_id in clean:
-            return zone
-        if zone.name and zone.name in clean:
-            return zone
-    return None
+    mentions = entity_mentions(save, clean)
+    return next((zone for zone in save.map_snapshot.zones if mentions.contains(zone.zone_id) or mentions.contains(zone.name)), None)
 
 
 def _find_sub_zone_target(save, text: str):
     clean = (text or "").strip()
     if not clean:
         return None
-    for sub_zone in save.area_snapshot.sub_zones:
-        if sub_zone.sub_zone_id and sub_zone.sub_zone_id in clean:
-            return sub_zone
-        if sub_zone.name and sub_zone.name in clean:
-            return sub_zone
-    return None
+    mentions = entity_mentions(save, clean)
+    return next((item for item in save.area_snapshot.sub_zones if mentions.contains(item.sub_zone_id) or mentions.contains(item.name)), None)
 
 
 def _find_named_role(save, text: str, *, team_only: bool = False, visible_only: bool = False):
@@ -222,12 +239,11 @@ def _find_named_role(save, text: str, *, team_only: bool = False, visible_only:
         allowed_ids = {item.role_id for item in save.team_state.members}
     elif visible_only:
         allowed_ids = {item.role_id for item in _visible_public_roles(save)}
+    mentions = entity_mentions(save, clean)
     for role in save.role_pool:
         if allowed_ids is not None and role.role_id not in allowed_ids:
             continue
-        if role.role_id and role.role_id in clean:
-            return role
-        if role.name and role.name in clean:
+        if mentions.contains(role.role_id) or mentions.contains(role.name):
             return role
     return None
 
@@ -248,16 +264,12 @@ def _find_addressed_scene_actor(save, addressed_role_name: str):
     return None
 
 
-def _find_inventory_item(items: list[InventoryItem], text: str):
+def _find_inventory_item(save, items: list[InventoryItem], text: str):
     clean = (text or "").strip()
     if not clean:
         return None
-    for item in items:
-        if item.item_id and item.item_id in clean:
-            return item
-        if item.name and item.name in clean:
-            return item
-    return None
+    mentions = entity_mentions(save, clean)
+    return next((item for item in items if mentions.contains(item.item_id) or mentions.contains(item.name)), None)
 
 
 def _encounter_scene_events(encounter, *, reply: str, include_situation: bool = True) -> list[Any]:
@@ -376,21 +388,17 @@ def route_main_turn_intent(session_id: str, parsed_intent: dict[str, object], co
                 "skip_encounter_main_chat_advance": True,
             }
         if active_encounter.player_presence == "engaged" and merged:
-            result = act_on_encounter(
-                active_encounter.encounter_id,
-                EncounterActRequest(
-                    session_id=session_id,
-                    player_prompt=display_text or merged,
-                    config=config,
-                ),
-            )
-            tool_events.append(ToolEvent(tool_name="encounter_act", ok=True, summary=f"encounter {result.status}", payload={"time_spent_min": result.time_spent_min}))
+            # Left to the caller: `aact_on_encounter` awaits the step resolution outside this job.
             return {
                 "handled": True,
-                "reply": Message(role="assistant", content=result.reply),
+                "encounter_act": (
+                    active_encounter.encounter_id,
+                    EncounterActRequest(session_id=session_id, player_prompt=display_text or merged, config=config),
+                ),
+                "reply": None,
                 "tool_events": tool_events,
-                "scene_events": _encounter_scene_events(result.encounter, reply=result.reply),
-                "time_spent_min": result.time_spent_min,
+                "scene_events": [],
+                "time_spent_min": 0,
                 "skip_encounter_main_chat_advance": True,
             }
 
@@ -429,7 +437,7 @@ def route_main_turn_intent(session_id: str, parsed_intent: dict[str, object], co
         if owner_role is not None:
             owner = InventoryOwnerRef(owner_type="role", role_id=owner_role.role_id)
             owner_items = owner_role.profile.dnd5e_sheet.backpack.items
-        item = _find_inventory_item(owner_items, merged)
+        item = _find_inventory_item(save, owner_items, merged)
         if item is not None:
             if _contains_any_token(merged, ["装备", "穿上", "拿上", "equip"]):
                 slot = "armor" if item.slot_type == "armor" or _contains_any_token(merged, ["护甲", "盔甲", "armor"]) else "weapon"
@@ -1052,7 +1060,7 @@ def _tools_schema() -> list[dict[str, Any]]:
     ]
 
 
-async def _handle_tool_call(payload: ChatRequest, tool_call: Any) -> tuple[dict[str, Any], ToolEvent]:
+def _run_tool_call(payload: ChatRequest, tool_call: Any) -> tuple[dict[str, Any], ToolEvent]:
     tool_name = getattr(getattr(tool_call, "function", None), "name", "")
     arg_text = getattr(getattr(tool_call, "function", None), "arguments", "") or "{}"
     tool_call_id = getattr(tool_call, "id", "")
@@ -1575,7 +1583,7 @@ async def _handle_tool_call(payload: ChatRequest, tool_call: Any) -> tuple[dict[
                 event,
             )
         save = get_current_save(default_session_id=payload.session_id)
-        role = next((item for item in save.role_pool if item.role_id == role_id), None)
+        role = find_role(save, role_id)
         if role is None:
             event = ToolEvent(tool_name="get_role_inventory", ok=False, summary="role not found")
             return (
@@ -2194,35 +2202,96 @@ async def _handle_tool_call(payload: ChatRequest, tool_call: Any) -> tuple[dict[
     )
 
 
-async def chat_once(payload: ChatRequest) -> tuple[Message, Usage, list[ToolEvent]]:
+async def _handle_tool_call(payload: ChatRequest, tool_call: Any) -> tuple[dict[str, Any], ToolEvent]:
+    return await session_executor.run(payload.session_id, _run_tool_call, payload, tool_call)
+
+
+async def _stream_chat_round(
+    client: AsyncOpenAI, payload: ChatRequest, messages: list[dict[str, Any]], on_delta: Callable[[str], None]
+) -> tuple[str, list[Any], Usage, bool]:
+    stream = await client.chat.completions.create(
+        model=payload.config.model,
+        **build_completion_options(payload.config),
+        messages=messages,
+        tools=_tools_schema(),
+        tool_choice="auto",
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    parts: list[str] = []
+    calls: dict[int, dict[str, str]] = {}
+    usage = Usage()
+    forwarded = False
+    async for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = _build_usage(chunk.usage)
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = choice.delta
+            text = getattr(delta, "content", None)
+            if text:
+                parts.append(text)
+                # A round that calls tools is not the reply; stop forwarding its text once a tool call shows up.
+                if not calls:
+                    on_delta(text)
+                    forwarded = True
+            for call in getattr(delta, "tool_calls", None) or []:
+                entry = calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                entry["id"] = call.id or entry["id"]
+                function = getattr(call, "function", None)
+                if function is not None:
+                    entry["name"] += function.name or ""
+                    entry["arguments"] += function.arguments or ""
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=entry["id"],
+            type="function",
+            function=Function(name=entry["name"], arguments=entry["arguments"]),
+        )
+        for _, entry in sorted(calls.items())
+    ]
+    return "".join(parts), tool_calls, usage, forwarded
+
+
+async def chat_once(
+    payload: ChatRequest,
+    on_delta: Callable[[str], None] | None = None,
+    on_reset: Callable[[], None] | None = None,
+) -> tuple[Message, Usage, list[ToolEvent]]:
     client = _client(payload)
     messages = _build_messages(payload)
     usage_sum = Usage()
     tool_events: list[ToolEvent] = []
 
     for _ in range(4):
-        response = await client.chat.completions.create(
-            model=payload.config.model,
-            **build_completion_options(payload.config),
-            messages=messages,
-            tools=_tools_schema(),
-            tool_choice="auto",
-        )
-        usage_sum = _sum_usage(usage_sum, _build_usage(response.usage))
-        choice = response.choices[0].message
+        if on_delta is None:
+            response = await client.chat.completions.create(
+                model=payload.config.model,
+                **build_completion_options(payload.config),
+                messages=messages,
+                tools=_tools_schema(),
+                tool_choice="auto",
+            )
+            usage_sum = _sum_usage(usage_sum, _build_usage(response.usage))
+            choice = response.choices[0].message
+            content = choice.content or ""
+            tool_calls = getattr(choice, "tool_calls", None) or []
+        else:
+            content, tool_calls, usage, forwarded = await _stream_chat_round(client, payload, messages, on_delta)
+            usage_sum = _sum_usage(usage_sum, usage)
+            if tool_calls and forwarded and on_reset is not None:
+                on_reset()
         assistant_entry: dict[str, Any] = {
             "role": "assistant",
-            "content": choice.content or "",
+            "content": content,
         }
-        if getattr(choice, "tool_calls", None):
-            assistant_entry["tool_calls"] = choice.tool_calls
+        if tool_calls:
+            assistant_entry["tool_calls"] = tool_calls
         messages.append(assistant_entry)
 
-        if not getattr(choice, "tool_calls", None):
-            content = choice.content or ""
+        if not tool_calls:
             return Message(role="assistant", content=content), usage_sum, tool_events
 
-        for call in choice.tool_calls:
+        for call in tool_calls:
             tool_msg, event = await _handle_tool_call(payload, call)
             tool_events.append(event)
             messages.append(tool_msg)
@@ -2230,9 +2299,7 @@ async def chat_once(payload: ChatRequest) -> tuple[Message, Usage, list[ToolEven
     return Message(role="assistant", content="Tool call limit reached. Please simplify your request."), usage_sum, tool_events
 
 
-async def resolve_main_chat_turn(payload: ChatRequest) -> tuple[Message, Usage, list[ToolEvent], list[Any], int, str | None]:
-    last_user = next((m for m in reversed(payload.messages) if m.role == "user"), None)
-    parsed_intent: dict[str, object] = _parse_player_intent(last_user.content) if last_user is not None else {}
+def _route_main_turn(payload: ChatRequest, last_user: Message | None, parsed_intent: dict[str, object]) -> dict[str, Any]:
     routed = route_main_turn_intent(payload.session_id, parsed_intent, payload.config) if last_user is not None else {
         "handled": False,
         "reply": None,
@@ -2249,6 +2316,203 @@ async def resolve_main_chat_turn(payload: ChatRequest) -> tuple[Message, Usage,
         active_encounter = _active_encounter_for_current_sub_zone(save)
         if active_encounter is None or active_encounter.status != "active" or active_encounter.player_presence != "engaged":
             raise ValueError("PASSIVE_TURN_REQUIRES_ACTIVE_ENCOUNTER")
+    return routed
+
+
+def _begin_main_chat_finalize(
+    payload: ChatRequest,
+    last_user: Message,
+    routed: dict[str, Any],
+    reply: Message,
+    time_spent_min: int,
+    scene_events: list[Any],
+) -> tuple[SaveFile, MainChatEncounterStep | None, PublicSceneRound | None]:
+    save = get_current_save(default_session_id=payload.session_id)
+    if save.session_id != payload.session_id:
+        save.session_id = payload.session_id
+    if not bool(routed.get("skip_encounter_main_chat_advance")):
+        encounter_events, encounter_step = begin_main_chat_encounter_step(
+            save,
+            session_id=payload.session_id,
+            player_text=last_user.content,
+            gm_narration=reply.content,
+            config=payload.config,
+        )
+        scene_events.extend(encounter_events)
+        if encounter_step is not None:
+            # The encounter resolution is awaited on the event loop; the scene round is planned once it is applied.
+            return save, encounter_step, None
+    return save, None, _plan_main_chat_scene_round(payload, save, last_user, reply, time_spent_min, scene_events, None, None)
+
+
+def _plan_main_chat_scene_round(
+    payload: ChatRequest,
+    save: SaveFile,
+    last_user: Message,
+    reply: Message,
+    time_spent_min: int,
+    scene_events: list[Any],
+    encounter_step: MainChatEncounterStep | None,
+    encounter_resolved: dict[str, object] | None,
+) -> PublicSceneRound | None:
+    if encounter_step is not None:
+        scene_events.extend(
+            finish_main_chat_encounter_step(
+                save,
+                encounter_step,
+                encounter_resolved,
+                session_id=payload.session_id,
+                player_text=last_user.content,
+                gm_narration=reply.content,
+                time_spent_min=time_spent_min,
+            )
+        )
+    scene_context = _build_scene_context_payload(
+        save,
+        player_text=last_user.content,
+        gm_narration=reply.content,
+        recent_turn_count=4,
+    )
+    _ensure_area_snapshot(save)
+    return plan_public_scene_round(
+        save,
+        session_id=payload.session_id,
+        player_text=last_user.content,
+        gm_summary=reply.content,
+        scene_context=scene_context,
+    )
+
+
+def _complete_main_chat_finalize(
+    payload: ChatRequest,
+    save: SaveFile,
+    last_user: Message,
+    parsed_intent: dict[str, object],
+    reply: Message,
+    time_spent_min: int,
+    scene_events: list[Any],
+    background_tick: dict[str, object] | None = None,
+) -> str | None:
+    background_advanced = advance_active_encounter_in_save(
+        save,
+        session_id=payload.session_id,
+        minutes_elapsed=time_spent_min,
+        config=payload.config,
+        generated=background_tick,
+    )
+    if background_advanced is not None:
+        scene_events.append(
+            _new_scene_event(
+                "encounter_background",
+                background_advanced.latest_outcome_summary or background_advanced.scene_summary or background_advanced.description,
+                metadata={"encounter_id": background_advanced.encounter_id, "encounter_title": background_advanced.title},
+            )
+        )
+    archived_sub_zone_turn_id = _record_sub_zone_chat_turn(
+        save,
+        source="main_chat",
+        player_mode=("passive" if bool(parsed_intent.get("passive_turn")) else "active"),
+        player_action=str(parsed_intent["action_text"]),
+        player_speech=str(parsed_intent["speech_text"]),
+        player_action_check=(parsed_intent["action_check"] if isinstance(parsed_intent["action_check"], dict) else None),
+        gm_narration=reply.content,
+        events=scene_events,
+    )
+    # The save was loaded before the turn's LLM calls; concurrent writes to other entities are merged in, and a write to
+    # the same entity surfaces as SaveConflictError (409) instead of being overwritten.
+    save_current(save)
+    return archived_sub_zone_turn_id
+
+
+def _plan_speculative_scene_round(payload: ChatRequest, last_user: Message) -> tuple[SaveFile, PublicSceneRound | None]:
+    # Drafted before the GM narration exists; adopt_speculative_actions only reuses actors whose prompt inputs still match.
+    save = get_current_save(default_session_id=payload.session_id)
+    _ensure_area_snapshot(save)
+    scene_context = _build_scene_context_payload(save, player_text=last_user.content, gm_narration="", recent_turn_count=4)
+    return save, plan_public_scene_round(
+        save,
+        session_id=payload.session_id,
+        player_text=last_user.content,
+        gm_summary="",
+        scene_context=scene_context,
+    )
+
+
+async def _speculate_public_scene(payload: ChatRequest, last_user: Message) -> PublicSceneRound | None:
+    # Planned on the unkeyed lane: the draft only reads the save, and must not queue behind the turn's own jobs.
+    save, draft = await session_executor.run(None, _plan_speculative_scene_round, payload, last_user)
+    if draft is not None:
+        await agenerate_public_scene_actions(save, draft, config=payload.config)
+    return draft
+
+
+async def _settle_speculation(speculation: asyncio.Future, scene_round: PublicSceneRound | None) -> None:
+    if scene_round is None:
+        speculation.cancel()
+        return
+    try:
+        draft = await speculation
+    except Exception:
+        logger.warning("speculative scene generation failed", exc_info=True)
+        return
+    if draft is not None:
+        adopted = adopt_speculative_actions(scene_round, draft)
+        logger.info("speculative scene actions adopted=%d discarded=%d", len(adopted), len(draft.generated_actor_ids) - len(adopted))
+
+
+async def _advance_public_scene_async(
+    payload: ChatRequest,
+    save: SaveFile,
+    scene_round: PublicSceneRound,
+    scene_events: list[Any],
+    on_stage: Callable[[str, dict[str, Any]], None] | None = None,
+) -> None:
+    if on_stage is not None:
+        loop = asyncio.get_running_loop()
+        # The apply/finish stages run on worker threads; each event they append is streamed from the loop right away.
+        scene_round.on_event = lambda event: loop.call_soon_threadsafe(_emit_scene_events, on_stage, [event])
+    await agenerate_public_scene_actions(save, scene_round, config=payload.config)
+    await session_executor.run(payload.session_id, apply_public_scene_actions, save, scene_round, config=payload.config)
+    resolution_text = await aresolve_public_scene_round(scene_round, config=payload.config)
+    scene_events.extend(
+        await session_executor.run(payload.session_id, finish_public_scene_round, save, scene_round, resolution_text, config=payload.config)
+    )
+
+
+_STAGE_BY_SCENE_EVENT_KIND = {
+    "team_public_reaction": "team_reaction",
+    "encounter_started": "encounter_update",
+    "encounter_progress": "encounter_update",
+    "encounter_resolution": "encounter_update",
+    "encounter_background": "encounter_update",
+    "encounter_situation_update": "encounter_update",
+}
+
+
+def _emit_scene_events(on_stage: Callable[[str, dict[str, Any]], None] | None, events: list[Any]) -> None:
+    if on_stage is None:
+        return
+    for event in events:
+        on_stage(_STAGE_BY_SCENE_EVENT_KIND.get(str(getattr(event, "kind", "")), "scene_event"), event.model_dump(mode="json"))
+
+
+async def resolve_main_chat_turn(
+    payload: ChatRequest,
+    on_delta: Callable[[str], None] | None = None,
+    on_stage: Callable[[str, dict[str, Any]], None] | None = None,
+) -> tuple[Message, Usage, list[ToolEvent], list[Any], int, str | None]:
+    last_user = next((m for m in reversed(payload.messages) if m.role == "user"), None)
+    parsed_intent: dict[str, object] = _parse_player_intent(last_user.content) if last_user is not None else {}
+    routed = await session_executor.run(payload.session_id, _route_main_turn, payload, last_user, parsed_intent)
+    if routed.get("encounter_act") is not None:
+        result = await aact_on_encounter(*routed["encounter_act"])
+        routed["tool_events"].append(ToolEvent(tool_name="encounter_act", ok=True, summary=f"encounter {result.status}", payload={"time_spent_min": result.time_spent_min}))
+        routed.update(
+            reply=Message(role="assistant", content=result.reply),
+            scene_events=_encounter_scene_events(result.encounter, reply=result.reply),
+            time_spent_min=result.time_spent_min,
+        )
+    speculation: asyncio.Future | None = None
     if bool(routed.get("handled")):
         time_spent_min = int(routed.get("time_spent_min") or 0)
         reply = routed.get("reply") or Message(role="assistant", content="")
@@ -2256,63 +2520,85 @@ async def resolve_main_chat_turn(payload: ChatRequest) -> tuple[Message, Usage,
         tool_events = list(routed.get("tool_events") or [])
         scene_events: list[Any] = list(routed.get("scene_events") or [])
     else:
-        time_spent_min = apply_speech_time(payload.session_id, last_user.content, payload.config) if last_user is not None else 0
-        reply, usage, tool_events = await chat_once(payload)
+        time_spent_min = (
+            await session_executor.run(payload.session_id, apply_speech_time, payload.session_id, last_user.content, payload.config)
+            if last_user is not None
+            else 0
+        )
+        if last_user is not None and env_flag("ROLEPLAY_SPECULATIVE_SCENE", False):
+            # Actor drafts overlap the GM reply; drafts whose inputs, narration included, changed are generated again.
+            speculation = asyncio.ensure_future(_speculate_public_scene(payload, last_user))
+        on_reset = (lambda: on_stage("delta_reset", {})) if on_stage is not None else None
+        try:
+            reply, usage, tool_events = await chat_once(payload, on_delta, on_reset)
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
         tool_events = [*list(routed.get("tool_events") or []), *tool_events]
         scene_events = []
+    if on_stage is not None:
+        on_stage("narration", {"reply": reply.model_dump(mode="json"), "time_spent_min": time_spent_min})
+    _emit_scene_events(on_stage, scene_events)
     archived_sub_zone_turn_id: str | None = None
     if last_user is not None:
-        save = get_current_save(default_session_id=payload.session_id)
-        if save.session_id != payload.session_id:
-            save.session_id = payload.session_id
-        if not bool(routed.get("skip_encounter_main_chat_advance")):
-            encounter_events = advance_active_encounter_from_main_chat_in_save(
-                save,
-                session_id=payload.session_id,
-                player_text=last_user.content,
-                gm_narration=reply.content,
-                time_spent_min=time_spent_min,
-                config=payload.config,
+        emitted = len(scene_events)
+        try:
+            save, encounter_step, scene_round = await session_executor.run(
+                payload.session_id,
+                _begin_main_chat_finalize,
+                payload,
+                last_user,
+                routed,
+                reply,
+                time_spent_min,
+                scene_events,
             )
-            scene_events.extend(encounter_events)
-        scene_context = _build_scene_context_payload(
-            save,
-            player_text=last_user.content,
-            gm_narration=reply.content,
-            recent_turn_count=4,
-        )
-        public_events = advance_public_scene_in_save(
-            save,
-            session_id=payload.session_id,
-            player_text=last_user.content,
-            gm_summary=reply.content,
-            scene_context=scene_context,
-            config=payload.config,
-        )
-        scene_events.extend(public_events)
-        background_advanced = advance_active_encounter_in_save(
-            save,
-            session_id=payload.session_id,
-            minutes_elapsed=time_spent_min,
-            config=payload.config,
-        )
-        if background_advanced is not None:
-            scene_events.append(
-                _new_scene_event(
-                    "encounter_background",
-                    background_advanced.latest_outcome_summary or background_advanced.scene_summary or background_advanced.description,
-                    metadata={"encounter_id": background_advanced.encounter_id, "encounter_title": background_advanced.title},
+            if encounter_step is not None:
+                encounter_resolved = await ai_resolve_encounter_async(save, encounter_step.encounter, encounter_step.request)
+                scene_round = await session_executor.run(
+                    payload.session_id,
+                    _plan_main_chat_scene_round,
+                    payload,
+                    save,
+                    last_user,
+                    reply,
+                    time_spent_min,
+                    scene_events,
+                    encounter_step,
+                    encounter_resolved,
                 )
-            )
-        archived_sub_zone_turn_id = _record_sub_zone_chat_turn(
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
+        _emit_scene_events(on_stage, scene_events[emitted:])
+        emitted = len(scene_events)
+        if speculation is not None:
+            await _settle_speculation(speculation, scene_round)
+        # The tick prompt is built before the scene stages touch the save; its call overlaps the scene round.
+        tick_plan = plan_background_tick(save, minutes_elapsed=time_spent_min, config=payload.config)
+        background = asyncio.ensure_future(agenerate_background_tick(tick_plan, payload.config)) if tick_plan is not None else None
+        try:
+            if scene_round is not None:
+                await _advance_public_scene_async(payload, save, scene_round, scene_events, on_stage)
+                emitted = len(scene_events)
+            background_tick = await background if background is not None else None
+        except BaseException:
+            if background is not None:
+                background.cancel()
+            raise
+        archived_sub_zone_turn_id = await session_executor.run(
+            payload.session_id,
+            _complete_main_chat_finalize,
+            payload,
             save,
-            source="main_chat",
-            player_mode=("passive" if bool(parsed_intent.get("passive_turn")) else "active"),
-            player_action=str(parsed_intent["action_text"]),
-            player_speech=str(parsed_intent["speech_text"]),
-            player_action_check=(parsed_intent["action_check"] if isinstance(parsed_intent["action_check"], dict) else None),
-            gm_narration=reply.content,
-            events=scene_events,
+            last_user,
+            parsed_intent,
+            reply,
+            time_spent_min,
+            scene_events,
+            background_tick,
         )
-        save_current(save)
+        _emit_scene_events(on_stage, scene_events[emitted:])
     return reply, usage, tool_events, scene_events, time_spent_min, archived_sub_zone_turn_id
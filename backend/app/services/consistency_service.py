@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
+import pickle
+from threading import Lock
+from typing import Any, Callable, TypeVar
 
+from app.core.save_cache import save_part_fingerprint
 from app.models.schemas import (
     ConsistencyIssue,
     EntityIndexResponse,
@@ -16,6 +22,17 @@ from app.models.schemas import (
     StoryQuestSummary,
     WorldState,
 )
+from app.services.name_matcher import entity_mentions
+from app.services.save_index import find_encounter, find_item, find_quest, find_role, find_sub_zone, find_zone, invalidate_entity_index
+
+T = TypeVar("T")
+_SNAPSHOT_CACHE_SIZE = 128
+_CHECK_STATE_CACHE_SIZE = 32
+_TERMINAL_QUEST_STATUSES = {"completed", "failed", "rejected", "superseded", "invalidated"}
+_TERMINAL_ENCOUNTER_STATUSES = {"resolved", "expired", "invalidated"}
+_TERMINAL_FATE_STATUSES = {"completed", "superseded", "invalidated"}
+_STORY_FIELDS = ("area_snapshot", "player_static_data", "role_pool", "team_state", "quest_state", "encounter_state", "fate_state", "game_logs")
+_NPC_KNOWLEDGE_FIELDS = ("area_snapshot", "player_static_data", "role_pool", "quest_state")
 
 
 def _utc_now() -> str:
@@ -65,6 +82,7 @@ def bump_world_revision(save, *, world_changed: bool, map_changed: bool, session
     if map_changed:
         state.map_revision += 1
     state.last_world_rebuild_at = _utc_now()
+    invalidate_entity_index(save, save.area_snapshot, save.map_snapshot)
     if session_id is not None:
         append_consistency_log(
             save,
@@ -84,13 +102,13 @@ def bump_world_revision(save, *, world_changed: bool, map_changed: bool, session
 def _zone_name(save, zone_id: str | None) -> str:
     if not zone_id:
         return ""
-    return next((z.name for z in save.area_snapshot.zones if z.zone_id == zone_id), zone_id)
+    return getattr(find_zone(save.area_snapshot, zone_id), "name", zone_id)
 
 
 def _sub_zone_name(save, sub_zone_id: str | None) -> str:
     if not sub_zone_id:
         return ""
-    return next((z.name for z in save.area_snapshot.sub_zones if z.sub_zone_id == sub_zone_id), sub_zone_id)
+    return getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", sub_zone_id)
 
 
 def _player_relation_tag(role, player_id: str) -> str | None:
@@ -112,7 +130,158 @@ def _current_local_roles(save) -> list:
     return save.role_pool[:]
 
 
+class _SnapshotCache:
+    # Snapshots are stored pickled and every get returns a fresh copy, so callers may mutate what they receive.
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._snapshots: OrderedDict[tuple[Any, ...], bytes] = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, key: tuple[Any, ...], build: Callable[[], T]) -> T:
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached is not None:
+                self._snapshots.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(cached)
+        snapshot = build()
+        blob = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.builds += 1
+            self._snapshots[key] = blob
+            while len(self._snapshots) > _SNAPSHOT_CACHE_SIZE:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+
+snapshot_cache = _SnapshotCache()
+
+
+def _revision_key(save, kind: str) -> tuple[Any, ...]:
+    world_state = ensure_world_state(save)
+    return (kind, save.session_id, world_state.world_revision, world_state.map_revision)
+
+
+def _area_part(save) -> tuple[Any, ...]:
+    area = save.area_snapshot
+    return (
+        area.current_zone_id,
+        area.current_sub_zone_id,
+        tuple((item.zone_id, item.name) for item in area.zones),
+        tuple((item.sub_zone_id, item.name) for item in area.sub_zones),
+    )
+
+
+def _quest_part(save) -> tuple[Any, ...]:
+    return tuple(
+        (item.quest_id, item.title, item.status, item.source, item.zone_id, item.issuer_role_id) for item in save.quest_state.quests
+    )
+
+
+def _story_parts(save) -> tuple[Any, ...]:
+    player = save.player_static_data
+    sheet = player.dnd5e_sheet
+    clock = save.area_snapshot.clock
+    fate = save.fate_state.current_fate
+    return (
+        _area_part(save),
+        clock.model_dump_json() if clock is not None else None,
+        (player.player_id, player.name, sheet.level, sheet.hit_points.current, sheet.hit_points.maximum),
+        tuple(item.name for item in sheet.backpack.items[:20]),
+        tuple(
+            (role.role_id, role.name, role.zone_id, role.sub_zone_id, _player_relation_tag(role, player.player_id))
+            for role in save.role_pool
+        ),
+        tuple(item.role_id for item in save.team_state.members),
+        _quest_part(save),
+        tuple((item.encounter_id, item.status) for item in save.encounter_state.encounters),
+        (fate.fate_id, fate.current_phase_id) if fate is not None else None,
+        tuple(item.id for item in save.game_logs[-10:]),
+    )
+
+
+def _last_id(items: list[Any], attr: str) -> Any:
+    return getattr(items[-1], attr) if items else None
+
+
+def _entity_states(save) -> tuple[Any, ...]:
+    # Per-entity ids, zones and statuses: in-place edits to any role, quest or encounter, not just the last one.
+    return (
+        tuple((role.role_id, role.name, role.zone_id, role.sub_zone_id) for role in save.role_pool),
+        tuple((quest.quest_id, quest.status) for quest in save.quest_state.quests),
+        tuple((encounter.encounter_id, encounter.status) for encounter in save.encounter_state.encounters),
+    )
+
+
+def _story_shape(save) -> tuple[Any, ...]:
+    # Cheap companion to the part stamps: catches in-place edits made since the last get/put without the content walk.
+    area = save.area_snapshot
+    player = save.player_static_data
+    sheet = player.dnd5e_sheet
+    fate = save.fate_state.current_fate
+    return (
+        area.current_zone_id,
+        area.current_sub_zone_id,
+        len(area.zones),
+        len(area.sub_zones),
+        area.clock.model_dump_json() if area.clock is not None else None,
+        (player.player_id, player.name, sheet.level, sheet.hit_points.current, sheet.hit_points.maximum, len(sheet.backpack.items)),
+        _entity_states(save),
+        tuple(item.role_id for item in save.team_state.members),
+        (fate.fate_id, fate.current_phase_id) if fate is not None else None,
+        (len(save.game_logs), _last_id(save.game_logs, "id")),
+    )
+
+
+def _npc_knowledge_shape(save, role) -> tuple[Any, ...]:
+    area = save.area_snapshot
+    return (
+        area.current_zone_id,
+        area.current_sub_zone_id,
+        len(area.zones),
+        len(area.sub_zones),
+        _entity_states(save),
+        (role.role_id, role.name, role.zone_id, role.sub_zone_id, role.background),
+        _player_relation_tag(role, save.player_static_data.player_id),
+        (len(role.dialogue_logs), _last_id(role.dialogue_logs, "id")),
+    )
+
+
+def _npc_knowledge_parts(save, role) -> tuple[Any, ...]:
+    return (
+        _area_part(save),
+        tuple((item.role_id, item.zone_id) for item in save.role_pool),
+        _quest_part(save),
+        (role.role_id, role.name, role.zone_id, role.sub_zone_id, role.background),
+        _player_relation_tag(role, save.player_static_data.player_id),
+        tuple((item.id, item.world_time_text, item.speaker_name, item.content) for item in role.dialogue_logs[-8:]),
+    )
+
+
 def build_global_story_snapshot(save) -> GlobalStorySnapshot:
+    # Saves served by save_cache are keyed on part stamps plus an O(1) shape; other saves fall back to the content walk.
+    stamps = save_part_fingerprint(save, _STORY_FIELDS)
+    parts = (stamps, _story_shape(save)) if stamps is not None else _story_parts(save)
+    key = (*_revision_key(save, "story"), parts)
+    return snapshot_cache.get(key, lambda: _build_global_story_snapshot(save))
+
+
+def build_npc_knowledge_snapshot(save, npc_role_id: str) -> NpcKnowledgeSnapshot:
+    role = find_role(save, npc_role_id)
+    if role is None:
+        raise KeyError("ROLE_NOT_FOUND")
+    stamps = save_part_fingerprint(save, _NPC_KNOWLEDGE_FIELDS)
+    parts = (stamps, _npc_knowledge_shape(save, role)) if stamps is not None else _npc_knowledge_parts(save, role)
+    key = (*_revision_key(save, "npc"), parts)
+    return snapshot_cache.get(key, lambda: _build_npc_knowledge_snapshot(save, role))
+
+
+def _build_global_story_snapshot(save) -> GlobalStorySnapshot:
     world_state = ensure_world_state(save)
     player = save.player_static_data
     sheet = player.dnd5e_sheet
@@ -165,11 +334,8 @@ def build_global_story_snapshot(save) -> GlobalStorySnapshot:
     )
 
 
-def build_npc_knowledge_snapshot(save, npc_role_id: str) -> NpcKnowledgeSnapshot:
+def _build_npc_knowledge_snapshot(save, role) -> NpcKnowledgeSnapshot:
     world_state = ensure_world_state(save)
-    role = next((item for item in save.role_pool if item.role_id == npc_role_id), None)
-    if role is None:
-        raise KeyError("ROLE_NOT_FOUND")
     local_roles = [item for item in save.role_pool if item.zone_id == role.zone_id]
     local_role_ids = [item.role_id for item in local_roles if item.role_id != role.role_id]
     local_zone_ids = sorted({item.zone_id for item in local_roles if item.zone_id})
@@ -243,17 +409,17 @@ def build_entity_index(save, scope: str = "global") -> EntityIndexResponse:
 
 def _entity_exists(save, ref: EntityRef) -> bool:
     if ref.entity_type == "zone":
-        return any(item.zone_id == ref.entity_id for item in save.area_snapshot.zones)
+        return find_zone(save.area_snapshot, ref.entity_id) is not None
     if ref.entity_type == "sub_zone":
-        return any(item.sub_zone_id == ref.entity_id for item in save.area_snapshot.sub_zones)
+        return find_sub_zone(save.area_snapshot, ref.entity_id) is not None
     if ref.entity_type == "npc":
-        return any(item.role_id == ref.entity_id for item in save.role_pool)
+        return find_role(save, ref.entity_id) is not None
     if ref.entity_type == "item":
-        return any(item.item_id == ref.entity_id for item in save.player_static_data.dnd5e_sheet.backpack.items)
+        return find_item(save.player_static_data.dnd5e_sheet.backpack, ref.entity_id) is not None
     if ref.entity_type == "quest":
-        return any(item.quest_id == ref.entity_id for item in save.quest_state.quests)
+        return find_quest(save.quest_state, ref.entity_id) is not None
     if ref.entity_type == "encounter":
-        return any(item.encounter_id == ref.entity_id for item in save.encounter_state.encounters)
+        return find_encounter(save.encounter_state, ref.entity_id) is not None
     if ref.entity_type == "fate":
         if save.fate_state.current_fate is not None and save.fate_state.current_fate.fate_id == ref.entity_id:
             return True
@@ -265,13 +431,13 @@ def _entity_exists(save, ref: EntityRef) -> bool:
     return False
 
 
-def validate_entity_refs(save, refs: list[EntityRef]) -> list[ConsistencyIssue]:
+def validate_entity_refs(save, refs: list[EntityRef], exists: Callable[[EntityRef], bool] | None = None) -> list[ConsistencyIssue]:
     issues: list[ConsistencyIssue] = []
     for ref in refs:
-        if _entity_exists(save, ref):
-            continue
         if not ref.required:
             continue
+        if exists(ref) if exists is not None else _entity_exists(save, ref):
+            continue
         issues.append(
             ConsistencyIssue(
                 issue_id=_new_id("ci"),
@@ -285,10 +451,10 @@ def validate_entity_refs(save, refs: list[EntityRef]) -> list[ConsistencyIssue]:
     return issues
 
 
-def _issues_for_quest(save, quest) -> list[ConsistencyIssue]:
+def _issues_for_quest(save, quest, exists: Callable[[EntityRef], bool] | None = None) -> list[ConsistencyIssue]:
     issues: list[ConsistencyIssue] = []
     world_state = ensure_world_state(save)
-    if quest.status in {"completed", "failed", "rejected", "superseded", "invalidated"}:
+    if quest.status in _TERMINAL_QUEST_STATUSES:
         return issues
     if quest.source_world_revision != world_state.world_revision or quest.source_map_revision != world_state.map_revision:
         issues.append(
@@ -301,14 +467,14 @@ def _issues_for_quest(save, quest) -> list[ConsistencyIssue]:
                 message="任务引用的世界版本已过期",
             )
         )
-    issues.extend(validate_entity_refs(save, quest.entity_refs))
+    issues.extend(validate_entity_refs(save, quest.entity_refs, exists))
     return issues
 
 
-def _issues_for_encounter(save, encounter) -> list[ConsistencyIssue]:
+def _issues_for_encounter(save, encounter, exists: Callable[[EntityRef], bool] | None = None) -> list[ConsistencyIssue]:
     issues: list[ConsistencyIssue] = []
     world_state = ensure_world_state(save)
-    if encounter.status in {"resolved", "expired", "invalidated"}:
+    if encounter.status in _TERMINAL_ENCOUNTER_STATUSES:
         return issues
     if encounter.source_world_revision != world_state.world_revision or encounter.source_map_revision != world_state.map_revision:
         issues.append(
@@ -321,16 +487,16 @@ def _issues_for_encounter(save, encounter) -> list[ConsistencyIssue]:
                 message="遭遇引用的世界版本已过期",
             )
         )
-    issues.extend(validate_entity_refs(save, encounter.entity_refs))
+    issues.extend(validate_entity_refs(save, encounter.entity_refs, exists))
     return issues
 
 
-def _issues_for_fate(save, fate: FateLine | None) -> list[ConsistencyIssue]:
+def _issues_for_fate(save, fate: FateLine | None, exists: Callable[[EntityRef], bool] | None = None) -> list[ConsistencyIssue]:
     if fate is None:
         return []
     issues: list[ConsistencyIssue] = []
     world_state = ensure_world_state(save)
-    if fate.status in {"completed", "superseded", "invalidated"}:
+    if fate.status in _TERMINAL_FATE_STATUSES:
         return issues
     if fate.source_world_revision != world_state.world_revision or fate.source_map_revision != world_state.map_revision:
         issues.append(
@@ -343,13 +509,33 @@ def _issues_for_fate(save, fate: FateLine | None) -> list[ConsistencyIssue]:
                 message="命运线引用的世界版本已过期",
             )
         )
-    issues.extend(validate_entity_refs(save, fate.bound_entity_refs))
+    issues.extend(validate_entity_refs(save, fate.bound_entity_refs, exists))
     for phase in fate.phases:
-        issues.extend(validate_entity_refs(save, phase.bound_entity_refs))
+        issues.extend(validate_entity_refs(save, phase.bound_entity_refs, exists))
+    return issues
+
+
+def _issues_for_relations(save, role, role_ids: set[str] | frozenset[str]) -> list[ConsistencyIssue]:
+    issues: list[ConsistencyIssue] = []
+    for relation in role.relations:
+        if relation.target_role_id == save.player_static_data.player_id:
+            continue
+        if relation.target_role_id in role_ids:
+            continue
+        issues.append(
+            ConsistencyIssue(
+                issue_id=_new_id("ci"),
+                severity="warning",
+                issue_type="missing_relation_target",
+                entity_type="npc",
+                entity_id=role.role_id,
+                message=f"NPC {role.role_id} 存在指向无效目标的关系",
+            )
+        )
     return issues
 
 
-def collect_consistency_issues(save) -> list[ConsistencyIssue]:
+def _full_consistency_sweep(save) -> list[ConsistencyIssue]:
     issues: list[ConsistencyIssue] = []
     ensure_world_state(save)
     issues.extend(_issues_for_fate(save, save.fate_state.current_fate))
@@ -359,25 +545,158 @@ def collect_consistency_issues(save) -> list[ConsistencyIssue]:
         issues.extend(_issues_for_encounter(save, encounter))
     role_ids = {item.role_id for item in save.role_pool}
     for role in save.role_pool:
-        for relation in role.relations:
-            if relation.target_role_id == save.player_static_data.player_id:
-                continue
-            if relation.target_role_id in role_ids:
-                continue
-            issues.append(
-                ConsistencyIssue(
-                    issue_id=_new_id("ci"),
-                    severity="warning",
-                    issue_type="missing_relation_target",
-                    entity_type="npc",
-                    entity_id=role.role_id,
-                    message=f"NPC {role.role_id} 存在指向无效目标的关系",
-                )
-            )
+        issues.extend(_issues_for_relations(save, role, role_ids))
     return issues
 
 
-def reconcile_consistency(save, *, session_id: str, reason: str = "manual") -> tuple[list[ConsistencyIssue], bool]:
+def _entity_id_sets(save) -> dict[str, frozenset[str]]:
+    fate = save.fate_state.current_fate
+    return {
+        "zone": frozenset(item.zone_id for item in save.area_snapshot.zones),
+        "sub_zone": frozenset(item.sub_zone_id for item in save.area_snapshot.sub_zones),
+        "npc": frozenset(item.role_id for item in save.role_pool),
+        "item": frozenset(item.item_id for item in save.player_static_data.dnd5e_sheet.backpack.items),
+        "quest": frozenset(item.quest_id for item in save.quest_state.quests),
+        "encounter": frozenset(item.encounter_id for item in save.encounter_state.encounters),
+        "fate": frozenset([*([fate.fate_id] if fate is not None else []), *(item.fate_id for item in save.fate_state.archive)]),
+        "fate_phase": frozenset(item.phase_id for item in fate.phases) if fate is not None else frozenset(),
+    }
+
+
+def _required_refs(refs: list[EntityRef]) -> tuple[tuple[str, str], ...]:
+    return tuple((ref.entity_type, ref.entity_id) for ref in refs if ref.required)
+
+
+def _consistency_subjects(save) -> list[tuple[tuple[str, str, int], Any, tuple[Any, ...], tuple[tuple[str, str], ...]]]:
+    subjects: list[tuple[tuple[str, str, int], Any, tuple[Any, ...], tuple[tuple[str, str], ...]]] = []
+    seen: dict[tuple[str, str], int] = {}
+
+    def add(kind: str, entity_id: str, item: Any, fingerprint: tuple[Any, ...], refs: tuple[tuple[str, str], ...]) -> None:
+        occurrence = seen.get((kind, entity_id), 0)
+        seen[(kind, entity_id)] = occurrence + 1
+        subjects.append(((kind, entity_id, occurrence), item, fingerprint, refs))
+
+    fate = save.fate_state.current_fate
+    if fate is not None:
+        refs = _required_refs([*fate.bound_entity_refs, *(ref for phase in fate.phases for ref in phase.bound_entity_refs)])
+        add("fate", fate.fate_id, fate, (fate.status, fate.source_world_revision, fate.source_map_revision, refs), refs)
+    for quest in save.quest_state.quests:
+        refs = _required_refs(quest.entity_refs)
+        add("quest", quest.quest_id, quest, (quest.status, quest.source_world_revision, quest.source_map_revision, refs), refs)
+    for encounter in save.encounter_state.encounters:
+        refs = _required_refs(encounter.entity_refs)
+        add("encounter", encounter.encounter_id, encounter, (encounter.status, encounter.source_world_revision, encounter.source_map_revision, refs), refs)
+    for role in save.role_pool:
+        refs = tuple(("npc", item.target_role_id) for item in role.relations)
+        add("relations", role.role_id, role, refs, refs)
+    return subjects
+
+
+@dataclass
+class _CheckState:
+    revisions: tuple[Any, ...]
+    entities: dict[str, frozenset[str]]
+    subjects: dict[tuple[str, str, int], tuple[tuple[Any, ...], tuple[tuple[str, str], ...], list[ConsistencyIssue]]]
+    referrers: dict[tuple[str, str], set[tuple[str, str, int]]]
+
+
+@dataclass
+class ConsistencyCheck:
+    issues_by_subject: dict[tuple[str, str, int], list[ConsistencyIssue]]
+    order: list[tuple[str, str, int]]
+    full: bool
+    rechecked: int
+
+    @property
+    def issues(self) -> list[ConsistencyIssue]:
+        return [issue for key in self.order for issue in self.issues_by_subject[key]]
+
+    def issues_for(self, kind: str, entity_id: str, occurrence: int = 0) -> list[ConsistencyIssue]:
+        return self.issues_by_subject.get((kind, entity_id, occurrence), [])
+
+
+class ConsistencyEngine:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._states: OrderedDict[str, _CheckState] = OrderedDict()
+        self.full_sweeps = 0
+        self.incremental_runs = 0
+        self.rechecked = 0
+
+    def check(self, save, *, full: bool = False) -> ConsistencyCheck:
+        world_state = ensure_world_state(save)
+        revisions = (world_state.world_revision, world_state.map_revision, save.player_static_data.player_id)
+        entities = _entity_id_sets(save)
+        with self._lock:
+            previous = self._states.get(save.session_id)
+        if full or previous is None or previous.revisions != revisions:
+            previous = None
+            affected: set[tuple[str, str, int]] = set()
+        else:
+            affected = set()
+            for entity_type, ids in entities.items():
+                for entity_id in ids.symmetric_difference(previous.entities.get(entity_type, frozenset())):
+                    affected.update(previous.referrers.get((entity_type, entity_id), ()))
+
+        def exists(ref: EntityRef) -> bool:
+            return ref.entity_id in entities.get(ref.entity_type, frozenset())
+
+        subjects: dict[tuple[str, str, int], tuple[tuple[Any, ...], tuple[tuple[str, str], ...], list[ConsistencyIssue]]] = {}
+        referrers: dict[tuple[str, str], set[tuple[str, str, int]]] = {}
+        order: list[tuple[str, str, int]] = []
+        rechecked = 0
+        for key, item, fingerprint, refs in _consistency_subjects(save):
+            cached = previous.subjects.get(key) if previous is not None else None
+            if cached is not None and cached[0] == fingerprint and key not in affected:
+                issues = cached[2]
+            else:
+                rechecked += 1
+                kind = key[0]
+                if kind == "fate":
+                    issues = _issues_for_fate(save, item, exists)
+                elif kind == "quest":
+                    issues = _issues_for_quest(save, item, exists)
+                elif kind == "encounter":
+                    issues = _issues_for_encounter(save, item, exists)
+                else:
+                    issues = _issues_for_relations(save, item, entities["npc"])
+            subjects[key] = (fingerprint, refs, issues)
+            for ref in refs:
+                referrers.setdefault(ref, set()).add(key)
+            order.append(key)
+        with self._lock:
+            self._states[save.session_id] = _CheckState(revisions=revisions, entities=entities, subjects=subjects, referrers=referrers)
+            self._states.move_to_end(save.session_id)
+            while len(self._states) > _CHECK_STATE_CACHE_SIZE:
+                self._states.popitem(last=False)
+            if previous is None:
+                self.full_sweeps += 1
+            else:
+                self.incremental_runs += 1
+            self.rechecked += rechecked
+        return ConsistencyCheck(
+            issues_by_subject={key: value[2] for key, value in subjects.items()},
+            order=order,
+            full=previous is None,
+            rechecked=rechecked,
+        )
+
+    def reset(self, session_id: str | None = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._states.clear()
+            else:
+                self._states.pop(session_id, None)
+
+
+consistency_engine = ConsistencyEngine()
+
+
+def collect_consistency_issues(save, *, full: bool = False) -> list[ConsistencyIssue]:
+    return consistency_engine.check(save, full=full).issues
+
+
+def reconcile_consistency(save, *, session_id: str, reason: str = "manual", full: bool = False) -> tuple[list[ConsistencyIssue], bool]:
     changed = False
     world_state = ensure_world_state(save)
 
@@ -392,8 +711,9 @@ def reconcile_consistency(save, *, session_id: str, reason: str = "manual") -> t
         if len(role.relations) != before:
             changed = True
 
+    check = consistency_engine.check(save, full=full)
     current_fate = save.fate_state.current_fate
-    fate_issues = _issues_for_fate(save, current_fate)
+    fate_issues = check.issues_for("fate", current_fate.fate_id) if current_fate is not None else []
     if current_fate is not None and fate_issues:
         archived = current_fate.model_copy(deep=True)
         archived.status = "superseded"
@@ -414,11 +734,14 @@ def reconcile_consistency(save, *, session_id: str, reason: str = "manual") -> t
         )
         changed = True
 
+    seen_quests: dict[str, int] = {}
     for quest in save.quest_state.quests:
-        issues = _issues_for_quest(save, quest)
+        occurrence = seen_quests.get(quest.quest_id, 0)
+        seen_quests[quest.quest_id] = occurrence + 1
+        issues = check.issues_for("quest", quest.quest_id, occurrence)
         if not issues:
             continue
-        if quest.status in {"completed", "failed", "rejected", "superseded", "invalidated"}:
+        if quest.status in _TERMINAL_QUEST_STATUSES:
             continue
         quest.status = "superseded" if quest.source == "fate" else "invalidated"
         quest.invalidated_reason = reason
@@ -437,9 +760,12 @@ def reconcile_consistency(save, *, session_id: str, reason: str = "manual") -> t
         changed = True
 
     pending_ids: list[str] = []
+    seen_encounters: dict[str, int] = {}
     for encounter in save.encounter_state.encounters:
-        issues = _issues_for_encounter(save, encounter)
-        if issues and encounter.status not in {"resolved", "expired", "invalidated"}:
+        occurrence = seen_encounters.get(encounter.encounter_id, 0)
+        seen_encounters[encounter.encounter_id] = occurrence + 1
+        issues = check.issues_for("encounter", encounter.encounter_id, occurrence)
+        if issues and encounter.status not in _TERMINAL_ENCOUNTER_STATUSES:
             encounter.status = "invalidated"
             encounter.invalidated_reason = reason
             append_consistency_log(
@@ -459,7 +785,7 @@ def reconcile_consistency(save, *, session_id: str, reason: str = "manual") -> t
         save.encounter_state.pending_ids = pending_ids
         changed = True
 
-    issues = collect_consistency_issues(save)
+    issues = consistency_engine.check(save).issues
     world_state.last_consistency_check_at = _utc_now()
     if changed:
         append_consistency_log(
@@ -545,27 +871,26 @@ def extract_entity_refs_from_fate(fate: FateLine) -> list[EntityRef]:
 
 
 def player_mentions_unknown_npc(save, npc_role_id: str, player_message: str) -> bool:
+    mentions = entity_mentions(save, player_message or "")
+    if not mentions.matches:
+        return False
     snapshot = build_npc_knowledge_snapshot(save, npc_role_id)
-    mentioned_non_local = False
     for role in save.role_pool:
         if role.role_id == npc_role_id:
             continue
-        if role.name and role.name in player_message and role.role_id not in snapshot.known_local_npc_ids:
-            mentioned_non_local = True
-            break
-    if mentioned_non_local:
-        return True
+        if mentions.contains(role.name) and role.role_id not in snapshot.known_local_npc_ids:
+            return True
     for quest in save.quest_state.quests:
         if quest.status not in {"invalidated", "superseded"}:
             continue
         for ref in quest.entity_refs:
-            if ref.entity_type == "npc" and ref.label and ref.label in player_message:
+            if ref.entity_type == "npc" and mentions.contains(ref.label):
                 return True
     if save.fate_state.current_fate is None:
         return False
     if save.fate_state.current_fate.invalidated_reason:
         for ref in save.fate_state.current_fate.bound_entity_refs:
-            if ref.entity_type == "npc" and ref.label and ref.label in player_message:
+            if ref.entity_type == "npc" and mentions.contains(ref.label):
                 return True
     return False
 
@@ -3,12 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from math import ceil
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from app.core.prompt_keys import PromptKeys
 from app.core.prompt_table import prompt_table
 from app.models.schemas import ChatConfig, EncounterActRequest, EncounterDebugOverviewResponse, EncounterEntry, EncounterResolution
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import acreate_chat_completion, build_completion_options, completion_text, create_sync_client, has_ai_config
+from app.services.save_index import find_role, find_team_member, find_temporary_npc
 from app.services.world_service import _new_scene_event, _parse_player_intent
 
 
@@ -87,14 +88,14 @@ def _actor_label(save, encounter: EncounterEntry, actor_role_id: str = "", actor
     if actor_name:
         return actor_name
     if actor_role_id:
-        role = next((item for item in save.role_pool if item.role_id == actor_role_id), None)
+        role = find_role(save, actor_role_id)
         if role is not None and role.name:
             return role.name
-        temp = next((item for item in (encounter.temporary_npcs or []) if item.encounter_npc_id == actor_role_id), None)
+        temp = find_temporary_npc(encounter, actor_role_id)
         if temp is not None and temp.name:
             return temp.name
     if encounter.npc_role_id:
-        role = next((item for item in save.role_pool if item.role_id == encounter.npc_role_id), None)
+        role = find_role(save, encounter.npc_role_id)
         if role is not None and role.name:
             return role.name
     first_temp = next((item for item in (encounter.temporary_npcs or []) if item.name), None)
@@ -166,17 +167,8 @@ def resolve_fallback_reply(save, encounter: EncounterEntry, player_prompt: str,
     return reply, minutes
 
 
-def ai_resolve_encounter(encounter: EncounterEntry, req: EncounterActRequest, *, assessment: SituationAssessment | None = None) -> dict[str, object] | None:
+def _encounter_step_messages(save, encounter: EncounterEntry, req: EncounterActRequest, assessment: SituationAssessment | None) -> list[dict[str, str]]:
     legacy = _legacy()
-    config = req.config
-    if config is None:
-        return None
-    api_key = (config.openai_api_key or "").strip()
-    model = (config.model or "").strip()
-    if not api_key or not model:
-        return None
-    save = legacy.get_current_save(default_session_id=req.session_id)
-    fallback_reply, fallback_minutes = resolve_fallback_reply(save, encounter, req.player_prompt, assessment=assessment)
     team_members, visible_npcs = legacy._visible_participant_text(save, encounter)
     prompt = prompt_table.render(
         PromptKeys.ENCOUNTER_STEP_USER,
@@ -193,47 +185,89 @@ def ai_resolve_encounter(encounter: EncounterEntry, req: EncounterActRequest, *,
         team_members=team_members,
         visible_npcs=visible_npcs,
     )
+    return [
+        {"role": "system", "content": prompt_table.get_text("encounter.resolve.system", "你只输出 JSON。所有文本字段使用简体中文。")},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_encounter_step(
+    save,
+    encounter: EncounterEntry,
+    req: EncounterActRequest,
+    content: str,
+    assessment: SituationAssessment | None,
+) -> dict[str, object]:
+    legacy = _legacy()
+    fallback_reply, fallback_minutes = resolve_fallback_reply(save, encounter, req.player_prompt, assessment=assessment)
+    parsed = legacy._extract_json_content(content)
+    minutes = max(1, min(30, int(parsed.get("time_spent_min") or fallback_minutes or 1)))
+    step_kind = str(parsed.get("step_kind") or "gm_update").strip().lower()
+    if step_kind not in {"gm_update", "resolution"}:
+        step_kind = "gm_update"
+    reply, next_scene_summary = concretize_encounter_reply(
+        save,
+        encounter,
+        req.player_prompt,
+        reply=str(parsed.get("reply") or fallback_reply),
+        scene_summary=str(parsed.get("scene_summary") or encounter.scene_summary or encounter.description),
+        specific_change=str(parsed.get("specific_change") or ""),
+        specific_threat=str(parsed.get("specific_threat") or ""),
+        opened_opportunity=str(parsed.get("opened_opportunity") or ""),
+        assessment=assessment,
+    )
+    termination_updates = parsed.get("termination_updates")
+    if not isinstance(termination_updates, list):
+        termination_updates = []
+    return {
+        "reply": reply,
+        "time_spent_min": minutes,
+        "scene_summary": next_scene_summary,
+        "specific_change": legacy._force_chinese_text(parsed.get("specific_change"), "", limit=180),
+        "specific_threat": legacy._force_chinese_text(parsed.get("specific_threat"), "", limit=180),
+        "opened_opportunity": legacy._force_chinese_text(parsed.get("opened_opportunity"), "", limit=180),
+        "situation_delta_hint": legacy._clamp(int(parsed.get("situation_delta_hint") or 0), -8, 8),
+        "step_kind": step_kind,
+        "termination_updates": termination_updates,
+    }
+
+
+def ai_resolve_encounter(encounter: EncounterEntry, req: EncounterActRequest, *, assessment: SituationAssessment | None = None) -> dict[str, object] | None:
+    legacy = _legacy()
+    config = req.config
+    if config is None:
+        return None
+    api_key = (config.openai_api_key or "").strip()
+    model = (config.model or "").strip()
+    if not api_key or not model:
+        return None
+    save = legacy.get_current_save(default_session_id=req.session_id)
     try:
         client = create_sync_client(config, client_cls=OpenAI)
         resp = client.chat.completions.create(
             model=model,
             **build_completion_options(config),
             response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": prompt_table.get_text("encounter.resolve.system", "你只输出 JSON。所有文本字段使用简体中文。")},
-                {"role": "user", "content": prompt},
-            ],
-        )
-        parsed = legacy._extract_json_content((resp.choices[0].message.content or "").strip())
-        minutes = max(1, min(30, int(parsed.get("time_spent_min") or fallback_minutes or 1)))
-        step_kind = str(parsed.get("step_kind") or "gm_update").strip().lower()
-        if step_kind not in {"gm_update", "resolution"}:
-            step_kind = "gm_update"
-        reply, next_scene_summary = concretize_encounter_reply(
-            save,
-            encounter,
-            req.player_prompt,
-            reply=str(parsed.get("reply") or fallback_reply),
-            scene_summary=str(parsed.get("scene_summary") or encounter.scene_summary or encounter.description),
-            specific_change=str(parsed.get("specific_change") or ""),
-            specific_threat=str(parsed.get("specific_threat") or ""),
-            opened_opportunity=str(parsed.get("opened_opportunity") or ""),
-            assessment=assessment,
+            messages=_encounter_step_messages(save, encounter, req, assessment),
         )
-        termination_updates = parsed.get("termination_updates")
-        if not isinstance(termination_updates, list):
-            termination_updates = []
-        return {
-            "reply": reply,
-            "time_spent_min": minutes,
-            "scene_summary": next_scene_summary,
-            "specific_change": legacy._force_chinese_text(parsed.get("specific_change"), "", limit=180),
-            "specific_threat": legacy._force_chinese_text(parsed.get("specific_threat"), "", limit=180),
-            "opened_opportunity": legacy._force_chinese_text(parsed.get("opened_opportunity"), "", limit=180),
-            "situation_delta_hint": legacy._clamp(int(parsed.get("situation_delta_hint") or 0), -8, 8),
-            "step_kind": step_kind,
-            "termination_updates": termination_updates,
-        }
+        return _parse_encounter_step(save, encounter, req, (resp.choices[0].message.content or "").strip(), assessment)
+    except Exception:
+        return None
+
+
+async def ai_resolve_encounter_async(
+    save,
+    encounter: EncounterEntry,
+    req: EncounterActRequest,
+    *,
+    assessment: SituationAssessment | None = None,
+) -> dict[str, object] | None:
+    # Takes the caller's save instead of loading one, so it can run on the event loop between executor jobs.
+    if not has_ai_config(req.config):
+        return None
+    try:
+        resp = await acreate_chat_completion(req.config, _encounter_step_messages(save, encounter, req, assessment), client_cls=AsyncOpenAI)
+        return _parse_encounter_step(save, encounter, req, completion_text(resp), assessment)
     except Exception:
         return None
 
@@ -298,8 +332,8 @@ def apply_active_encounter_situation_delta_in_save(
     if applied == 0:
         return []
 
-    team_member = next((item for item in getattr(save.team_state, "members", []) if item.role_id == actor_role_id), None)
-    temp_npc = next((item for item in getattr(encounter, "temporary_npcs", []) or [] if item.encounter_npc_id == actor_role_id), None)
+    team_member = find_team_member(save.team_state, actor_role_id)
+    temp_npc = find_temporary_npc(encounter, actor_role_id)
     if team_member is not None:
         step_kind = "team_reaction"
         actor_type = "team"
@@ -377,56 +411,111 @@ def apply_active_encounter_situation_delta_in_save(
     return events
 
 
-def advance_active_encounter_in_save(save, *, session_id: str, minutes_elapsed: int, config: ChatConfig | None = None) -> EncounterEntry | None:
+def _background_tick_encounter(save, minutes_elapsed: int) -> EncounterEntry | None:
     legacy = _legacy()
-    state = legacy._state(save)
-    encounter = legacy._current_active_encounter(state)
+    encounter = legacy._current_active_encounter(legacy._state(save))
     if encounter is None or encounter.player_presence != "away" or encounter.status not in {"active", "escaped"}:
         return None
     if minutes_elapsed <= 0:
         return None
-    if encounter.presented_at is None:
-        legacy._initialize_encounter_state(save, encounter)
+    return encounter
+
 
+def _background_tick_assessment(encounter: EncounterEntry, minutes_elapsed: int) -> tuple[int, SituationAssessment]:
+    legacy = _legacy()
     background_delta = -legacy._clamp(max(1, minutes_elapsed // 10), 1, 6)
     assessment = assess_situation_change(encounter.situation_value, background_delta, legacy._clamp(encounter.situation_value + background_delta, 0, 100))
+    return background_delta, assessment
+
+
+def _background_tick_messages(save, encounter: EncounterEntry, assessment: SituationAssessment, minutes_elapsed: int) -> list[dict[str, str]]:
+    legacy = _legacy()
     team_members, visible_npcs = legacy._visible_participant_text(save, encounter)
+    prompt = prompt_table.render(
+        PromptKeys.ENCOUNTER_BACKGROUND_TICK_USER,
+        "",
+        title=encounter.title,
+        description=encounter.description,
+        direction=assessment.direction,
+        scene_summary=encounter.scene_summary or encounter.description,
+        termination_conditions=legacy._termination_conditions_text(encounter),
+        recent_steps=legacy._recent_steps_text(encounter),
+        minutes_elapsed=minutes_elapsed,
+        team_members=team_members,
+        visible_npcs=visible_npcs,
+    )
+    return [
+        {"role": "system", "content": prompt_table.get_text("encounter.generate.system", "你只输出 JSON。所有文本字段使用简体中文。")},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def plan_background_tick(save, *, minutes_elapsed: int, config: ChatConfig | None = None) -> tuple[str, list[dict[str, str]]] | None:
+    # Builds the tick prompt up front so the call can run on the event loop while later stages mutate the save.
+    # None leaves generation to `advance_active_encounter_in_save` (no away encounter or AI config, or one that still
+    # needs its situation initialized).
+    encounter = _background_tick_encounter(save, minutes_elapsed)
+    if encounter is None or encounter.presented_at is None or not has_ai_config(config):
+        return None
+    _, assessment = _background_tick_assessment(encounter, minutes_elapsed)
+    return encounter.encounter_id, _background_tick_messages(save, encounter, assessment, minutes_elapsed)
+
+
+async def agenerate_background_tick(plan: tuple[str, list[dict[str, str]]], config: ChatConfig) -> dict[str, object]:
+    # A failed call yields an empty payload, so the tick falls back to the default text instead of calling again.
+    encounter_id, messages = plan
+    try:
+        resp = await acreate_chat_completion(config, messages, client_cls=AsyncOpenAI)
+        parsed = _legacy()._extract_json_content(completion_text(resp))
+    except Exception:
+        parsed = {}
+    return {"encounter_id": encounter_id, "parsed": parsed}
+
+
+def advance_active_encounter_in_save(
+    save,
+    *,
+    session_id: str,
+    minutes_elapsed: int,
+    config: ChatConfig | None = None,
+    generated: dict[str, object] | None = None,
+) -> EncounterEntry | None:
+    legacy = _legacy()
+    state = legacy._state(save)
+    encounter = _background_tick_encounter(save, minutes_elapsed)
+    if encounter is None:
+        return None
+    if encounter.presented_at is None:
+        legacy._initialize_encounter_state(save, encounter)
+
+    background_delta, assessment = _background_tick_assessment(encounter, minutes_elapsed)
     raw_reply = f"你离开现场后，《{encounter.title}》仍在后台推进。"
     raw_scene_summary = encounter.scene_summary or encounter.description
-    if config is not None:
+    parsed: dict | None = None
+    if generated is not None and generated.get("encounter_id") == encounter.encounter_id:
+        parsed = generated.get("parsed") if isinstance(generated.get("parsed"), dict) else {}
+    elif config is not None:
         api_key = (config.openai_api_key or "").strip()
         model = (config.model or "").strip()
         if api_key and model:
             try:
                 client = create_sync_client(config, client_cls=OpenAI)
-                prompt = prompt_table.render(
-                    PromptKeys.ENCOUNTER_BACKGROUND_TICK_USER,
-                    "",
-                    title=encounter.title,
-                    description=encounter.description,
-                    direction=assessment.direction,
-                    scene_summary=encounter.scene_summary or encounter.description,
-                    termination_conditions=legacy._termination_conditions_text(encounter),
-                    recent_steps=legacy._recent_steps_text(encounter),
-                    minutes_elapsed=minutes_elapsed,
-                    team_members=team_members,
-                    visible_npcs=visible_npcs,
-                )
                 resp = client.chat.completions.create(
                     model=model,
                     **build_completion_options(config),
                     response_format={"type": "json_object"},
-                    messages=[
-                        {"role": "system", "content": prompt_table.get_text("encounter.generate.system", "你只输出 JSON。所有文本字段使用简体中文。")},
-                        {"role": "user", "content": prompt},
-                    ],
+                    messages=_background_tick_messages(save, encounter, assessment, minutes_elapsed),
                 )
                 parsed = legacy._extract_json_content((resp.choices[0].message.content or "").strip())
-                raw_reply = str(parsed.get("reply") or raw_reply)
-                raw_scene_summary = str(parsed.get("scene_summary") or raw_scene_summary)
-                legacy._apply_termination_updates(encounter, parsed.get("termination_updates"))
             except Exception:
-                pass
+                parsed = None
+    if parsed:
+        try:
+            raw_reply = str(parsed.get("reply") or raw_reply)
+            raw_scene_summary = str(parsed.get("scene_summary") or raw_scene_summary)
+            legacy._apply_termination_updates(encounter, parsed.get("termination_updates"))
+        except Exception:
+            pass
 
     reply, next_scene_summary = concretize_encounter_reply(
         save,
@@ -459,24 +548,32 @@ def advance_active_encounter_in_save(save, *, session_id: str, minutes_elapsed:
     return encounter
 
 
-def advance_active_encounter_from_main_chat_in_save(
+@dataclass
+class MainChatEncounterStep:
+    encounter: EncounterEntry
+    request: EncounterActRequest
+    display_text: str
+
+
+def begin_main_chat_encounter_step(
     save,
     *,
     session_id: str,
     player_text: str,
     gm_narration: str,
-    time_spent_min: int,
     config: ChatConfig | None = None,
-) -> list:
+) -> tuple[list, MainChatEncounterStep | None]:
+    # Records the player's step; the step returned still needs a resolution (`ai_resolve_encounter_async` or the sync
+    # call) and `finish_main_chat_encounter_step`. Escapes finish here and return their events with no step.
     legacy = _legacy()
     state = legacy._state(save)
     encounter = legacy._current_active_encounter(state)
     if encounter is None or encounter.status != "active" or encounter.player_presence != "engaged":
-        return []
+        return [], None
     if encounter.zone_id and save.area_snapshot.current_zone_id and encounter.zone_id != save.area_snapshot.current_zone_id:
-        return []
+        return [], None
     if encounter.sub_zone_id and save.area_snapshot.current_sub_zone_id and encounter.sub_zone_id != save.area_snapshot.current_sub_zone_id:
-        return []
+        return [], None
     if encounter.presented_at is None:
         legacy._initialize_encounter_state(save, encounter)
 
@@ -499,7 +596,7 @@ def advance_active_encounter_from_main_chat_in_save(
         state.active_encounter_id = encounter.encounter_id
         legacy._append_game_log(save, session_id, "encounter_escape", reply, {"encounter_id": encounter.encounter_id, "from_main_chat": True})
         legacy._touch_state(state)
-        return [_new_scene_event("encounter_progress", reply, metadata={"encounter_id": encounter.encounter_id, "encounter_title": encounter.title, "status": encounter.status})]
+        return [_new_scene_event("encounter_progress", reply, metadata={"encounter_id": encounter.encounter_id, "encounter_title": encounter.title, "status": encounter.status})], None
 
     legacy._append_step(
         encounter,
@@ -509,15 +606,29 @@ def advance_active_encounter_from_main_chat_in_save(
         actor_name=save.player_static_data.name,
         content=display_text or gm_narration or "玩家继续应对当前遭遇。",
     )
-    resolved = legacy._ai_resolve_encounter(
-        encounter,
-        EncounterActRequest(
-            session_id=session_id,
-            encounter_id=encounter.encounter_id,
-            player_prompt=f"{display_text}\nGM叙事：{gm_narration}".strip(),
-            config=config,
-        ),
+    request = EncounterActRequest(
+        session_id=session_id,
+        encounter_id=encounter.encounter_id,
+        player_prompt=f"{display_text}\nGM叙事：{gm_narration}".strip(),
+        config=config,
     )
+    return [], MainChatEncounterStep(encounter=encounter, request=request, display_text=display_text)
+
+
+def finish_main_chat_encounter_step(
+    save,
+    step: MainChatEncounterStep,
+    resolved: dict[str, object] | None,
+    *,
+    session_id: str,
+    player_text: str,
+    gm_narration: str,
+    time_spent_min: int,
+) -> list:
+    legacy = _legacy()
+    state = legacy._state(save)
+    encounter = step.encounter
+    display_text = step.display_text
     if resolved is None:
         reply, _ = legacy._resolve_fallback_reply(encounter, display_text or gm_narration)
         next_scene_summary, termination_updates, step_kind = legacy._fallback_step_updates(encounter, display_text or gm_narration)
@@ -596,6 +707,30 @@ def advance_active_encounter_from_main_chat_in_save(
     ]
 
 
+def advance_active_encounter_from_main_chat_in_save(
+    save,
+    *,
+    session_id: str,
+    player_text: str,
+    gm_narration: str,
+    time_spent_min: int,
+    config: ChatConfig | None = None,
+) -> list:
+    events, step = begin_main_chat_encounter_step(save, session_id=session_id, player_text=player_text, gm_narration=gm_narration, config=config)
+    if step is None:
+        return events
+    resolved = _legacy()._ai_resolve_encounter(step.encounter, step.request)
+    return finish_main_chat_encounter_step(
+        save,
+        step,
+        resolved,
+        session_id=session_id,
+        player_text=player_text,
+        gm_narration=gm_narration,
+        time_spent_min=time_spent_min,
+    )
+
+
 def get_encounter_debug_overview(session_id: str) -> EncounterDebugOverviewResponse:
     legacy = _legacy()
     save = legacy.get_current_save(default_session_id=session_id)
@@ -10,6 +10,7 @@ from typing import Any
 from openai import OpenAI
 
 from app.core.prompt_keys import PromptKeys
+from app.core.session_executor import session_executor
 from app.core.prompt_table import prompt_table
 from app.models.schemas import (
     ActionCheckResponse,
@@ -49,9 +50,12 @@ from app.services.consistency_service import (
     extract_entity_refs_from_encounter,
     validate_entity_refs,
 )
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import build_completion_options, create_sync_client, has_ai_config
 from app.services.world_service import _advance_clock, _default_world_clock, _new_scene_event, _parse_player_intent, get_current_save, save_current
 from app.services.reputation_service import apply_sub_zone_reputation_delta, get_current_sub_zone_reputation
+from app.services.save_index import find_encounter, find_fate_phase, find_role, find_sub_zone, find_team_member, find_temporary_npc, find_zone
+
+_UNRESOLVED = object()
 
 
 def _utc_now() -> str:
@@ -94,7 +98,7 @@ def _pending_entries(state: EncounterState) -> list[EncounterEntry]:
 
 
 def _find_encounter(state: EncounterState, encounter_id: str) -> EncounterEntry:
-    encounter = next((item for item in state.encounters if item.encounter_id == encounter_id), None)
+    encounter = find_encounter(state, encounter_id)
     if encounter is None:
         raise KeyError("ENCOUNTER_NOT_FOUND")
     return encounter
@@ -103,7 +107,7 @@ def _find_encounter(state: EncounterState, encounter_id: str) -> EncounterEntry:
 def _current_active_encounter(state: EncounterState) -> EncounterEntry | None:
     if not state.active_encounter_id:
         return None
-    encounter = next((item for item in state.encounters if item.encounter_id == state.active_encounter_id), None)
+    encounter = find_encounter(state, state.active_encounter_id)
     if encounter is None or encounter.status not in {"active", "escaped"}:
         return None
     return encounter
@@ -192,14 +196,14 @@ def _encounter_actor_label(save, encounter: EncounterEntry, actor_role_id: str =
     if actor_name:
         return actor_name
     if actor_role_id:
-        role = next((item for item in save.role_pool if item.role_id == actor_role_id), None)
+        role = find_role(save, actor_role_id)
         if role is not None and role.name:
             return role.name
-        temp_npc = next((item for item in getattr(encounter, "temporary_npcs", []) or [] if item.encounter_npc_id == actor_role_id), None)
+        temp_npc = find_temporary_npc(encounter, actor_role_id)
         if temp_npc is not None and temp_npc.name:
             return temp_npc.name
     if encounter.npc_role_id:
-        role = next((item for item in save.role_pool if item.role_id == encounter.npc_role_id), None)
+        role = find_role(save, encounter.npc_role_id)
         if role is not None and role.name:
             return role.name
     first_temp = next((item for item in getattr(encounter, "temporary_npcs", []) or [] if item.name), None)
@@ -248,7 +252,7 @@ def _visible_participant_text(save, encounter: EncounterEntry) -> tuple[str, str
     team_members = [member.name for member in getattr(save.team_state, "members", []) if member.status == "active"]
     npc_names: list[str] = []
     if encounter.npc_role_id:
-        role = next((item for item in save.role_pool if item.role_id == encounter.npc_role_id), None)
+        role = find_role(save, encounter.npc_role_id)
         if role is not None:
             npc_names.append(role.name)
     npc_names.extend(temp.name for temp in getattr(encounter, "temporary_npcs", []) or [] if temp.name)
@@ -487,7 +491,7 @@ def _apply_outcome_package(save, session_id: str, encounter: EncounterEntry, pac
         if entry is not None:
             applied_summaries.append(f"区域声望 {package.reputation_delta:+d} -> {entry.score}/100")
     for change in package.npc_relation_deltas:
-        role = next((item for item in save.role_pool if item.role_id == change.target_id), None)
+        role = find_role(save, change.target_id)
         if role is None:
             continue
         relation = next((item for item in role.relations if item.target_role_id == save.player_static_data.player_id), None)
@@ -507,7 +511,7 @@ def _apply_outcome_package(save, session_id: str, encounter: EncounterEntry, pac
             relation.note = "遭遇结算"
         applied_summaries.append(f"{role.name} 关系 {change.delta:+d}")
     for change in package.team_deltas:
-        member = next((item for item in getattr(save.team_state, "members", []) if item.role_id == change.target_id), None)
+        member = find_team_member(save.team_state, change.target_id)
         if member is None:
             continue
         member.affinity = _clamp(member.affinity + change.delta * 3, 0, 100)
@@ -658,8 +662,8 @@ def _encounter_should_resolve(encounter: EncounterEntry) -> bool:
 def _current_area_text(save) -> str:
     zone_id = save.area_snapshot.current_zone_id
     sub_zone_id = save.area_snapshot.current_sub_zone_id
-    zone_name = next((item.name for item in save.area_snapshot.zones if item.zone_id == zone_id), zone_id or "当前区域")
-    sub_name = next((item.name for item in save.area_snapshot.sub_zones if item.sub_zone_id == sub_zone_id), sub_zone_id or "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", zone_id or "当前区域")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", sub_zone_id or "附近")
     return f"{zone_name} / {sub_name}"
 
 
@@ -698,8 +702,8 @@ def _sanitize_allowed_id(value: Any, allowed_ids: set[str]) -> str:
 def _current_area_data(save) -> tuple[str, str, str | None, str | None]:
     zone_id = save.area_snapshot.current_zone_id
     sub_zone_id = save.area_snapshot.current_sub_zone_id
-    zone_name = next((item.name for item in save.area_snapshot.zones if item.zone_id == zone_id), "当前区域")
-    sub_name = next((item.name for item in save.area_snapshot.sub_zones if item.sub_zone_id == sub_zone_id), "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", "当前区域")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", "附近")
     return zone_name, sub_name, zone_id, sub_zone_id
 
 
@@ -715,7 +719,7 @@ def _current_fate_phase(save):
     fate = save.fate_state.current_fate
     if fate is None:
         return None
-    return next((phase for phase in fate.phases if phase.phase_id == fate.current_phase_id), None)
+    return find_fate_phase(fate, fate.current_phase_id)
 
 
 def _random_should_trigger(trigger_kind: str, force_enabled: bool) -> bool:
@@ -960,7 +964,7 @@ def _ai_generate_encounter_guarded(save, trigger_kind: str, config: ChatConfig |
         if typ == "npc":
             if not npc_role_id:
                 return None
-            npc_name = next((item.name for item in save.role_pool if item.role_id == npc_role_id), npc_role_id)
+            npc_name = getattr(find_role(save, npc_role_id), "name", npc_role_id)
             if npc_name not in title:
                 title = f"{npc_name}: {title}"
             entity_refs.append(EntityRef(entity_type="npc", entity_id=npc_role_id, label=npc_name))
@@ -1374,9 +1378,7 @@ def _legacy_unused_fallback_step_updates_v1(encounter: EncounterEntry, player_pr
     return scene_summary, updates, step_kind
 
 
-def act_on_encounter(encounter_id: str, req: EncounterActRequest) -> EncounterActResponse:
-    save = get_current_save(default_session_id=req.session_id)
-    save.session_id = req.session_id
+def _begin_encounter_act(save, encounter_id: str, req: EncounterActRequest) -> EncounterEntry:
     state = _state(save)
     encounter = _find_encounter(state, encounter_id)
     if encounter.invalidated_reason or encounter.status == "invalidated":
@@ -1403,7 +1405,34 @@ def act_on_encounter(encounter_id: str, req: EncounterActRequest) -> EncounterAc
         actor_name=save.player_static_data.name,
         content=req.player_prompt.strip(),
     )
-    resolved = _ai_resolve_encounter(encounter, req)
+    return encounter
+
+
+def _preview_encounter_act(encounter_id: str, req: EncounterActRequest) -> tuple[Any, EncounterEntry]:
+    # The loaded copy is never saved; it only carries the state the step prompt is built from.
+    save = get_current_save(default_session_id=req.session_id)
+    save.session_id = req.session_id
+    return save, _begin_encounter_act(save, encounter_id, req)
+
+
+async def aact_on_encounter(encounter_id: str, req: EncounterActRequest) -> EncounterActResponse:
+    # The step is resolved on the event loop against a preview of the act; only loading and applying use a worker.
+    from app.services.encounter_runtime_v2 import ai_resolve_encounter_async
+
+    if not has_ai_config(req.config):
+        return await session_executor.run(req.session_id, act_on_encounter, encounter_id, req)
+    save, encounter = await session_executor.run(req.session_id, _preview_encounter_act, encounter_id, req)
+    resolved = await ai_resolve_encounter_async(save, encounter, req)
+    return await session_executor.run(req.session_id, act_on_encounter, encounter_id, req, resolved=resolved)
+
+
+def act_on_encounter(encounter_id: str, req: EncounterActRequest, *, resolved: Any = _UNRESOLVED) -> EncounterActResponse:
+    save = get_current_save(default_session_id=req.session_id)
+    save.session_id = req.session_id
+    state = _state(save)
+    encounter = _begin_encounter_act(save, encounter_id, req)
+    if resolved is _UNRESOLVED:
+        resolved = _ai_resolve_encounter(encounter, req)
     if resolved is None:
         reply, time_spent_min = _resolve_fallback_reply(encounter, req.player_prompt)
         next_scene_summary, termination_updates, step_kind = _fallback_step_updates(encounter, req.player_prompt)
@@ -1944,10 +1973,17 @@ def _fallback_step_updates(encounter: EncounterEntry, player_prompt: str) -> tup
     return fallback_step_updates(encounter, player_prompt)
 
 
-def advance_active_encounter_in_save(save, *, session_id: str, minutes_elapsed: int, config: ChatConfig | None = None) -> EncounterEntry | None:
+def advance_active_encounter_in_save(
+    save,
+    *,
+    session_id: str,
+    minutes_elapsed: int,
+    config: ChatConfig | None = None,
+    generated: dict[str, object] | None = None,
+) -> EncounterEntry | None:
     from app.services.encounter_runtime_v2 import advance_active_encounter_in_save as runtime_v2
 
-    return runtime_v2(save, session_id=session_id, minutes_elapsed=minutes_elapsed, config=config)
+    return runtime_v2(save, session_id=session_id, minutes_elapsed=minutes_elapsed, config=config, generated=generated)
 
 
 def apply_active_encounter_situation_delta_in_save(
@@ -2095,8 +2131,8 @@ def _legacy_unused_apply_active_encounter_situation_delta_in_save_v2(
     if applied == 0:
         return []
 
-    team_member = next((item for item in getattr(save.team_state, "members", []) if item.role_id == actor_role_id), None)
-    temp_npc = next((item for item in getattr(encounter, "temporary_npcs", []) or [] if item.encounter_npc_id == actor_role_id), None)
+    team_member = find_team_member(save.team_state, actor_role_id)
+    temp_npc = find_temporary_npc(encounter, actor_role_id)
     if team_member is not None:
         step_kind = "team_reaction"
         actor_type = "team"
@@ -19,6 +19,7 @@ from app.models.schemas import (
 )
 from app.services.consistency_service import ensure_world_state
 from app.services.quest_service import publish_draft_to_save
+from app.services.save_index import find_fate_phase, find_quest, find_role
 from app.services.world_service import get_current_save, save_current
 
 
@@ -133,7 +134,7 @@ def _default_fate_line(save) -> FateLine:
 
 
 def _find_phase(fate: FateLine, phase_id: str) -> FatePhase | None:
-    return next((phase for phase in fate.phases if phase.phase_id == phase_id), None)
+    return find_fate_phase(fate, phase_id)
 
 
 def _phase_quest_draft(save, fate: FateLine, phase: FatePhase) -> QuestDraft:
@@ -234,7 +235,7 @@ def _condition_satisfied(save, fate: FateLine, condition: FateTriggerCondition)
 
     if condition.kind == "met_npc":
         npc_role_id = str(payload.get("npc_role_id") or "").strip()
-        role = next((item for item in save.role_pool if item.role_id == npc_role_id), None)
+        role = find_role(save, npc_role_id)
         if role is None:
             return False
         return bool(role.dialogue_logs) or any(rel.target_role_id == save.player_static_data.player_id for rel in role.relations)
@@ -281,7 +282,7 @@ def _condition_satisfied(save, fate: FateLine, condition: FateTriggerCondition)
 def _sync_phase_from_quest(save, phase: FatePhase) -> None:
     if not phase.bound_quest_id:
         return
-    quest = next((item for item in save.quest_state.quests if item.quest_id == phase.bound_quest_id), None)
+    quest = find_quest(save.quest_state, phase.bound_quest_id)
     if quest is None:
         return
     if quest.status == "pending_offer":
@@ -371,11 +372,13 @@ def evaluate_fate_state(req: FateEvaluateRequest) -> FateEvaluateResponse:
         advanced = True
 
     for phase in fate.phases:
-        already_logged = any(
+        # Recorded on the phase: retention may move the completion log out of the live game logs.
+        phase.completion_logged = phase.completion_logged or any(
             log.kind == "fate_phase_completed" and str(log.payload.get("phase_id") or "") == phase.phase_id
             for log in save.game_logs
         )
-        if phase.status == "completed" and phase.completed_at is not None and not already_logged:
+        if phase.status == "completed" and phase.completed_at is not None and not phase.completion_logged:
+            phase.completion_logged = True
             _append_game_log(
                 save,
                 req.session_id,
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Iterable
+import weakref
+
+from app.core.save_cache import save_part_fingerprint
+
+_MATCHER_CACHE_SIZE = 8
+_MENTION_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class MentionTarget:
+    kind: str
+    entity_id: str
+    field: str
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    text: str
+    start: int
+    end: int
+    targets: tuple[MentionTarget, ...]
+
+
+class NameMatcher:
+    def __init__(self, entries: Iterable[tuple[str, MentionTarget]]) -> None:
+        targets: dict[str, list[MentionTarget]] = {}
+        for pattern, target in entries:
+            if pattern:
+                targets.setdefault(pattern, []).append(target)
+        self.patterns: list[str] = list(targets)
+        self.targets: list[tuple[MentionTarget, ...]] = [tuple(targets[pattern]) for pattern in self.patterns]
+        self.vocabulary: frozenset[str] = frozenset(self.patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (index,)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def scan(self, text: str) -> list[NameMatch]:
+        matches: list[NameMatch] = []
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                pattern = self.patterns[index]
+                matches.append(NameMatch(text=pattern, start=pos + 1 - len(pattern), end=pos + 1, targets=self.targets[index]))
+        return matches
+
+
+@dataclass
+class EntityMentions:
+    text: str
+    matches: list[NameMatch]
+    vocabulary: frozenset[str]
+    hits: frozenset[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.hits = frozenset(match.text for match in self.matches)
+
+    def contains(self, value: str) -> bool:
+        if not value:
+            return False
+        if value in self.vocabulary:
+            return value in self.hits
+        return value in self.text
+
+    def entity_ids(self, kind: str) -> list[str]:
+        found: dict[str, None] = {}
+        for match in sorted(self.matches, key=lambda item: (item.start, -item.end)):
+            for target in match.targets:
+                if target.kind == kind:
+                    found.setdefault(target.entity_id, None)
+        return list(found)
+
+
+def _npc_refs(refs) -> Iterable[tuple[str, MentionTarget]]:
+    for ref in refs:
+        if ref.entity_type == "npc" and ref.label:
+            yield ref.label, MentionTarget("npc_ref", ref.entity_id, "label")
+
+
+def save_vocabulary(save) -> tuple[tuple[str, MentionTarget], ...]:
+    entries: list[tuple[str, MentionTarget]] = []
+
+    def add(kind: str, entity_id: str, name: str) -> None:
+        if entity_id:
+            entries.append((entity_id, MentionTarget(kind, entity_id, "id")))
+        if name:
+            entries.append((name, MentionTarget(kind, entity_id, "name")))
+
+    for role in save.role_pool:
+        add("role", role.role_id, role.name)
+        for item in role.profile.dnd5e_sheet.backpack.items:
+            add("item", item.item_id, item.name)
+    for item in save.player_static_data.dnd5e_sheet.backpack.items:
+        add("item", item.item_id, item.name)
+    for zone in save.map_snapshot.zones:
+        add("zone", zone.zone_id, zone.name)
+    for sub_zone in save.area_snapshot.sub_zones:
+        add("sub_zone", sub_zone.sub_zone_id, sub_zone.name)
+    for encounter in save.encounter_state.encounters:
+        for temp in encounter.temporary_npcs or []:
+            add("encounter_npc", temp.encounter_npc_id, temp.name)
+    for quest in save.quest_state.quests:
+        entries.extend(_npc_refs(quest.entity_refs))
+    if save.fate_state.current_fate is not None:
+        entries.extend(_npc_refs(save.fate_state.current_fate.bound_entity_refs))
+    return tuple(entries)
+
+
+_VOCABULARY_PARTS = ("role_pool", "player_static_data", "map_snapshot", "area_snapshot", "encounter_state", "quest_state", "fate_state")
+
+
+def _vocabulary_shape(save) -> tuple:
+    # Ids and names of every directly named entity, so in-place renames and additions on an unsaved copy change the
+    # key; only quest and fate NPC labels rely on the part stamps.
+    fate = save.fate_state.current_fate
+    return (
+        tuple((role.role_id, role.name, tuple((item.item_id, item.name) for item in role.profile.dnd5e_sheet.backpack.items)) for role in save.role_pool),
+        tuple((item.item_id, item.name) for item in save.player_static_data.dnd5e_sheet.backpack.items),
+        tuple((zone.zone_id, zone.name) for zone in save.map_snapshot.zones),
+        tuple((sub_zone.sub_zone_id, sub_zone.name) for sub_zone in save.area_snapshot.sub_zones),
+        tuple((temp.encounter_npc_id, temp.name) for encounter in save.encounter_state.encounters for temp in encounter.temporary_npcs or []),
+        len(save.quest_state.quests),
+        fate.fate_id if fate is not None else "",
+    )
+
+
+class _MentionCache:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._matchers: OrderedDict[tuple, tuple[weakref.ref | None, NameMatcher]] = OrderedDict()
+        self._mentions: OrderedDict[tuple[int, str], tuple[NameMatcher, EntityMentions]] = OrderedDict()
+        self.builds = 0
+
+    def matcher_for(self, save) -> NameMatcher:
+        # Keyed on the save's part stamps (shared by every copy of a revision) or, for saves outside the cache, on the
+        # object itself, plus the id/name shape that catches in-place edits since. Building the automaton is the costly part.
+        fingerprint = save_part_fingerprint(save, _VOCABULARY_PARTS)
+        owner = weakref.ref(save) if fingerprint is None else None
+        key = (fingerprint if fingerprint is not None else ("object", id(save)), _vocabulary_shape(save))
+        with self._lock:
+            cached = self._matchers.get(key)
+            if cached is not None and (cached[0] is None or cached[0]() is save):
+                self._matchers.move_to_end(key)
+                return cached[1]
+        matcher = NameMatcher(save_vocabulary(save))
+        with self._lock:
+            self.builds += 1
+            self._matchers[key] = (owner, matcher)
+            while len(self._matchers) > _MATCHER_CACHE_SIZE:
+                self._matchers.popitem(last=False)
+        return matcher
+
+    def mentions(self, matcher: NameMatcher, text: str) -> EntityMentions:
+        key = (id(matcher), text)
+        with self._lock:
+            cached = self._mentions.get(key)
+            if cached is not None and cached[0] is matcher:
+                self._mentions.move_to_end(key)
+                return cached[1]
+        result = EntityMentions(text=text, matches=matcher.scan(text), vocabulary=matcher.vocabulary)
+        with self._lock:
+            self._mentions[key] = (matcher, result)
+            while len(self._mentions) > _MENTION_CACHE_SIZE:
+                self._mentions.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matchers.clear()
+            self._mentions.clear()
+
+
+mention_cache = _MentionCache()
+
+
+def entity_mentions(save, text: str) -> EntityMentions:
+    return mention_cache.mentions(mention_cache.matcher_for(save), text)
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 import json
+import time
+from typing import Any, Callable
 
 from openai import OpenAI
 
+from app.core.llm_fanout import llm_fanout
 from app.core.prompt_keys import PromptKeys
 from app.core.prompt_table import prompt_table
 from app.models.schemas import ChatConfig, NpcRoleCard, PublicSceneActorCandidate, PublicSceneState, SceneEvent, StoryNpcSummary
 from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.name_matcher import entity_mentions
 
 
 def _legacy():
@@ -16,10 +21,11 @@ def _legacy():
     return legacy
 
 
-def _matched_actor_ids(text: str, actors: list[dict[str, object]]) -> list[str]:
+def _matched_actor_ids(save, text: str, actors: list[dict[str, object]]) -> list[str]:
     clean_text = str(text or "").strip()
     if not clean_text:
         return []
+    mentions = entity_mentions(save, clean_text)
     matches: list[str] = []
     seen: set[str] = set()
     for actor in actors:
@@ -27,7 +33,7 @@ def _matched_actor_ids(text: str, actors: list[dict[str, object]]) -> list[str]:
         actor_name = str(actor.get("name") or "").strip()
         if not actor_id or not actor_name:
             continue
-        if actor_name in clean_text and actor_id not in seen:
+        if mentions.contains(actor_name) and actor_id not in seen:
             seen.add(actor_id)
             matches.append(actor_id)
     return matches
@@ -77,7 +83,7 @@ def candidate_rows(
 
     incoming_names = [str(name).strip() for name in (incoming_target_candidates or []) if str(name).strip()]
     incoming_text = "\n".join(incoming_names + [player_text]).strip()
-    for actor_id in _matched_actor_ids(incoming_text, visible_rows):
+    for actor_id in _matched_actor_ids(save, incoming_text, visible_rows):
         candidate = next((item for item in visible_rows if item.get("actor_id") == actor_id), None)
         if candidate is not None:
             add(candidate, 1, "incoming_player_interaction")
@@ -163,7 +169,7 @@ def _build_incoming_map(save, actors: list[dict[str, object]], *, parsed_intent:
     incoming: dict[str, dict[str, str]] = {}
     referenced_names = [str(item).strip() for item in list(parsed_intent.get("incoming_target_candidates") or []) if str(item).strip()]
     incoming_text = "\n".join([display_text, *referenced_names]).strip()
-    for actor_id in _matched_actor_ids(incoming_text, actors):
+    for actor_id in _matched_actor_ids(save, incoming_text, actors):
         incoming[actor_id] = {
             "source_actor_id": save.player_static_data.player_id,
             "source_actor_name": save.player_static_data.name,
@@ -257,7 +263,7 @@ def _fallback_actor_action(save, actor: dict[str, object], *, player_text: str,
     }
 
 
-def _ai_actor_action(
+def _actor_action_messages(
     save,
     actor: dict[str, object],
     *,
@@ -265,15 +271,9 @@ def _ai_actor_action(
     gm_summary: str,
     scene_context: dict[str, object] | None,
     incoming_interaction: dict[str, str] | None,
-    config: ChatConfig | None,
-) -> dict[str, object] | None:
+    config: ChatConfig,
+) -> list[dict[str, str]]:
     legacy = _legacy()
-    if config is None:
-        return None
-    api_key = (config.openai_api_key or "").strip()
-    model = (config.model or "").strip()
-    if not api_key or not model:
-        return None
     try:
         world_time_text, _ = legacy._world_time_payload(scene_context.get("world_time") if isinstance(scene_context, dict) else None)  # type: ignore[arg-type]
     except Exception:
@@ -291,20 +291,19 @@ def _ai_actor_action(
         incoming_interaction_json=json.dumps(incoming_interaction or {}, ensure_ascii=False),
         scene_context_json=legacy._scene_context_json(scene_context),
     )
-    try:
-        client = legacy.create_sync_client(config, client_cls=legacy.OpenAI)
-        response = client.chat.completions.create(
-            model=model,
-            **legacy.build_completion_options(config),
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": config.gm_prompt},
-                {"role": "user", "content": prompt},
-            ],
-        )
-        parsed = legacy._extract_json_content((response.choices[0].message.content or "").strip())
-    except Exception:
-        return None
+    return [
+        {"role": "system", "content": config.gm_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_actor_action(
+    actor: dict[str, object],
+    parsed: dict[str, Any],
+    *,
+    incoming_interaction: dict[str, str] | None,
+) -> dict[str, object] | None:
+    legacy = _legacy()
     payload = {
         "response_mode": str(parsed.get("response_mode") or ("respond" if incoming_interaction else "none")).strip().lower(),
         "incoming_from_actor_id": str((incoming_interaction or {}).get("source_actor_id") or ""),
@@ -344,6 +343,60 @@ def _ai_actor_action(
     return payload
 
 
+def _actor_action_completion(config: ChatConfig, messages: list[dict[str, str]]) -> str:
+    legacy = _legacy()
+    client = legacy.create_sync_client(config, client_cls=legacy.OpenAI)
+    response = client.chat.completions.create(
+        model=(config.model or "").strip(),
+        **legacy.build_completion_options(config),
+        response_format={"type": "json_object"},
+        messages=messages,
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+async def _actor_action_completion_async(config: ChatConfig, messages: list[dict[str, str]]) -> str:
+    legacy = _legacy()
+    response = await legacy.acreate_chat_completion(config, messages, client_cls=legacy.AsyncOpenAI)
+    return legacy.completion_text(response)
+
+
+def _round_resolution_messages(
+    result_rows: list[dict[str, object]],
+    *,
+    player_text: str,
+    gm_summary: str,
+    scene_context: dict[str, object] | None,
+    predicted_situation_value: int,
+    direction: str,
+    config: ChatConfig,
+) -> list[dict[str, str]]:
+    legacy = _legacy()
+    prompt = prompt_table.render(
+        PromptKeys.SCENE_ROUND_RESOLVE_USER,
+        "",
+        player_text=player_text,
+        gm_summary=gm_summary,
+        direction=direction,
+        predicted_situation_value=predicted_situation_value,
+        scene_context_json=legacy._scene_context_json(scene_context),
+        result_rows_json=json.dumps(result_rows, ensure_ascii=False),
+    )
+    return [
+        {"role": "system", "content": config.gm_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_round_resolution(content: str) -> str | None:
+    legacy = _legacy()
+    parsed = legacy._extract_json_content(content)
+    text = str(parsed.get("resolution_text") or "").strip()[:720]
+    if not text or legacy._looks_too_vague(text):
+        return None
+    return text
+
+
 def _ai_round_resolution(
     result_rows: list[dict[str, object]],
     *,
@@ -361,15 +414,14 @@ def _ai_round_resolution(
     model = (config.model or "").strip()
     if not api_key or not model:
         return None
-    prompt = prompt_table.render(
-        PromptKeys.SCENE_ROUND_RESOLVE_USER,
-        "",
+    messages = _round_resolution_messages(
+        result_rows,
         player_text=player_text,
         gm_summary=gm_summary,
-        direction=direction,
+        scene_context=scene_context,
         predicted_situation_value=predicted_situation_value,
-        scene_context_json=legacy._scene_context_json(scene_context),
-        result_rows_json=json.dumps(result_rows, ensure_ascii=False),
+        direction=direction,
+        config=config,
     )
     try:
         client = legacy.create_sync_client(config, client_cls=legacy.OpenAI)
@@ -377,16 +429,38 @@ def _ai_round_resolution(
             model=model,
             **legacy.build_completion_options(config),
             response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": config.gm_prompt},
-                {"role": "user", "content": prompt},
-            ],
+            messages=messages,
         )
-        parsed = legacy._extract_json_content((response.choices[0].message.content or "").strip())
-        text = str(parsed.get("resolution_text") or "").strip()[:720]
-        if not text or legacy._looks_too_vague(text):
-            return None
-        return text
+        return _parse_round_resolution((response.choices[0].message.content or "").strip())
+    except Exception:
+        return None
+
+
+async def _ai_round_resolution_async(
+    result_rows: list[dict[str, object]],
+    *,
+    player_text: str,
+    gm_summary: str,
+    scene_context: dict[str, object] | None,
+    predicted_situation_value: int,
+    direction: str,
+    config: ChatConfig | None,
+) -> str | None:
+    legacy = _legacy()
+    if not result_rows or not legacy.has_ai_config(config):
+        return None
+    messages = _round_resolution_messages(
+        result_rows,
+        player_text=player_text,
+        gm_summary=gm_summary,
+        scene_context=scene_context,
+        predicted_situation_value=predicted_situation_value,
+        direction=direction,
+        config=config,
+    )
+    try:
+        response = await legacy.acreate_chat_completion(config, messages, client_cls=legacy.AsyncOpenAI)
+        return _parse_round_resolution(legacy.completion_text(response))
     except Exception:
         return None
 
@@ -409,19 +483,54 @@ def _compose_actor_content(payload: dict[str, object]) -> str:
     return "\n".join(part for part in lines if part).strip()[:720]
 
 
-def advance_public_scene_in_save(
+@dataclass
+class PublicSceneRound:
+    session_id: str
+    display_text: str
+    gm_summary: str
+    scene_context: dict[str, object] | None
+    candidates: list[dict[str, object]]
+    incoming_map: dict[str, dict[str, str]]
+    reputation_score: int
+    active_encounter: Any = None
+    actor_payloads: dict[str, dict[str, object]] = field(default_factory=dict)
+    action_plans: dict[str, dict[str, int | bool | str]] = field(default_factory=dict)
+    generated_actor_ids: set[str] = field(default_factory=set)
+    scene_events: list[SceneEvent] = field(default_factory=list)
+    result_rows: list[dict[str, object]] = field(default_factory=list)
+    total_situation_delta: int = 0
+    reputation_delta_total: int = 0
+    predicted_situation_value: int = 0
+    situation_before: int = 0
+    direction: str = "hold"
+    trend: str = "stable"
+    fallback_resolution_text: str = ""
+    # Called with each reported event (the first 10) as soon as the stage appends it; may run on a worker thread.
+    on_event: Callable[[SceneEvent], None] | None = None
+    published_count: int = 0
+
+
+def _publish_scene_events(scene_round: PublicSceneRound) -> None:
+    if scene_round.on_event is None:
+        return
+    pending = scene_round.scene_events[scene_round.published_count : 10]
+    scene_round.published_count += len(pending)
+    for event in pending:
+        scene_round.on_event(event)
+
+
+def plan_public_scene_round(
     save,
     session_id: str,
     player_text: str,
     gm_summary: str = "",
     scene_context: dict[str, object] | None = None,
-    config: ChatConfig | None = None,
-) -> list[SceneEvent]:
+) -> PublicSceneRound | None:
     legacy = _legacy()
     intent = legacy._parse_player_intent(player_text)
     display_text = str(intent.get("display_text") or player_text).strip()
     if not bool(intent.get("passive_turn")) and not legacy._public_behavior_triggered(str(intent.get("action_text") or ""), str(intent.get("speech_text") or ""), str(intent.get("raw_text") or "")):
-        return []
+        return None
     if scene_context is None:
         from app.services.world_service import _build_scene_context_payload
 
@@ -437,32 +546,172 @@ def advance_public_scene_in_save(
         incoming_target_candidates=[str(item) for item in list(intent.get("incoming_target_candidates") or [])],
     )
     if not candidates:
-        return []
-    incoming_map = _build_incoming_map(save, candidates, parsed_intent=intent, display_text=display_text)
-    scene_events: list[SceneEvent] = []
-    result_rows: list[dict[str, object]] = []
+        return None
+    return PublicSceneRound(
+        session_id=session_id,
+        display_text=display_text,
+        gm_summary=gm_summary,
+        scene_context=scene_context,
+        candidates=candidates,
+        incoming_map=_build_incoming_map(save, candidates, parsed_intent=intent, display_text=display_text),
+        reputation_score=reputation_score,
+        active_encounter=active_encounter,
+    )
+
+
+def _resolved_actor_payload(save, scene_round: PublicSceneRound, actor: dict[str, object], payload: dict[str, object] | None) -> dict[str, object]:
+    return payload or _fallback_actor_action(
+        save,
+        actor,
+        player_text=scene_round.display_text,
+        gm_summary=scene_round.gm_summary,
+        incoming_interaction=scene_round.incoming_map.get(str(actor.get("actor_id") or "")),
+    )
+
+
+def _actor_action_requests(save, scene_round: PublicSceneRound, config: ChatConfig | None) -> list[tuple[dict[str, object], list[dict[str, str]] | None]]:
+    legacy = _legacy()
+    requests: list[tuple[dict[str, object], list[dict[str, str]] | None]] = []
+    for actor in scene_round.candidates:
+        if str(actor.get("actor_id") or "") in scene_round.actor_payloads:
+            continue
+        messages = None
+        if legacy.has_ai_config(config):
+            messages = _actor_action_messages(
+                save,
+                actor,
+                player_text=scene_round.display_text,
+                gm_summary=scene_round.gm_summary,
+                scene_context=scene_round.scene_context,
+                incoming_interaction=scene_round.incoming_map.get(str(actor.get("actor_id") or "")),
+                config=config,  # type: ignore[arg-type]
+            )
+        requests.append((actor, messages))
+    return requests
+
+
+def _merge_actor_actions(save, scene_round: PublicSceneRound, requests, contents: list[str | None]) -> list[str]:
+    legacy = _legacy()
+    needs_plan: list[str] = []
+    for (actor, _), content in zip(requests, contents):
+        actor_id = str(actor.get("actor_id") or "")
+        payload = None
+        if content is not None:
+            try:
+                payload = _parse_actor_action(
+                    actor,
+                    legacy._extract_json_content(content),
+                    incoming_interaction=scene_round.incoming_map.get(actor_id),
+                )
+            except Exception:
+                payload = None
+        if payload is not None:
+            scene_round.generated_actor_ids.add(actor_id)
+        payload = _resolved_actor_payload(save, scene_round, actor, payload)
+        scene_round.actor_payloads[actor_id] = payload
+        if bool(payload.get("needs_check")):
+            needs_plan.append(actor_id)
+    return needs_plan
+
+
+def _plan_request(scene_round: PublicSceneRound, actor_id: str) -> tuple[str, str]:
+    payload = scene_round.actor_payloads[actor_id]
+    return str(payload.get("action_type") or "check"), str(payload.get("action_prompt") or _compose_actor_content(payload))
+
+
+def _merge_action_plans(scene_round: PublicSceneRound, actor_ids: list[str], plans: list[dict[str, int | bool | str] | None]) -> None:
+    from app.services.world_service import _fallback_action_plan
+
+    for actor_id, plan in zip(actor_ids, plans):
+        scene_round.action_plans[actor_id] = plan or _fallback_action_plan(*_plan_request(scene_round, actor_id))
+
+
+def generate_public_scene_actions(save, scene_round: PublicSceneRound, *, config: ChatConfig | None = None) -> None:
+    from app.services.world_service import _ai_action_plan
+
+    started = time.monotonic()
+    requests = _actor_action_requests(save, scene_round, config)
+    jobs = [lambda messages=messages: _actor_action_completion(config, messages) for _, messages in requests if messages is not None]  # type: ignore[arg-type]
+    provider = config.provider if config is not None else ""
+    results = iter(llm_fanout.run(jobs, provider=provider))
+    contents = [next(results) if messages is not None else None for _, messages in requests]
+    needs_plan = _merge_actor_actions(save, scene_round, requests, contents)
+    if not needs_plan or config is None:
+        return
+    remaining = max(0.0, llm_fanout.deadline_s - (time.monotonic() - started))
+    plan_jobs = [lambda request=_plan_request(scene_round, actor_id): _ai_action_plan(*request, config) for actor_id in needs_plan]
+    _merge_action_plans(scene_round, needs_plan, llm_fanout.run(plan_jobs, provider=provider, deadline_s=remaining))
+
+
+async def agenerate_public_scene_actions(save, scene_round: PublicSceneRound, *, config: ChatConfig | None = None) -> None:
+    legacy = _legacy()
+    started = time.monotonic()
+    requests = _actor_action_requests(save, scene_round, config)
+    factories = [lambda messages=messages: _actor_action_completion_async(config, messages) for _, messages in requests if messages is not None]  # type: ignore[arg-type]
+    provider = config.provider if config is not None else ""
+    results = iter(await llm_fanout.arun(factories, provider=provider))
+    contents = [next(results) if messages is not None else None for _, messages in requests]
+    needs_plan = _merge_actor_actions(save, scene_round, requests, contents)
+    if not needs_plan:
+        return
+    remaining = max(0.0, llm_fanout.deadline_s - (time.monotonic() - started))
+    plan_factories = [lambda request=_plan_request(scene_round, actor_id): legacy._ai_action_plan_async(*request, config) for actor_id in needs_plan]
+    _merge_action_plans(scene_round, needs_plan, await llm_fanout.arun(plan_factories, provider=provider, deadline_s=remaining))
+
+
+def _actor_inputs(scene_round: PublicSceneRound, actor: dict[str, object]) -> tuple[str, ...]:
+    # Everything the actor prompt reads, narration included: a draft written against another narration is generated again.
+    actor_id = str(actor.get("actor_id") or "")
+    encounter = scene_round.active_encounter
+    return (
+        actor_id,
+        str(actor.get("name") or ""),
+        str(actor.get("actor_type") or "npc"),
+        str(actor.get("priority_reason") or ""),
+        _legacy()._actor_roleplay_brief(actor),
+        json.dumps(scene_round.incoming_map.get(actor_id) or {}, ensure_ascii=False, sort_keys=True),
+        scene_round.display_text,
+        scene_round.gm_summary,
+        json.dumps(scene_round.scene_context or {}, ensure_ascii=False, sort_keys=True),
+        str(getattr(encounter, "encounter_id", "") or ""),
+        str(getattr(encounter, "status", "") or ""),
+    )
+
+
+def adopt_speculative_actions(scene_round: PublicSceneRound, draft: PublicSceneRound) -> list[str]:
+    drafted = {_actor_inputs(draft, actor): str(actor.get("actor_id") or "") for actor in draft.candidates}
+    adopted: list[str] = []
+    for actor in scene_round.candidates:
+        actor_id = str(actor.get("actor_id") or "")
+        draft_id = drafted.get(_actor_inputs(scene_round, actor))
+        if draft_id is None or draft_id not in draft.generated_actor_ids or actor_id in scene_round.actor_payloads:
+            continue
+        payload = draft.actor_payloads[draft_id]
+        plan = draft.action_plans.get(draft_id)
+        if bool(payload.get("needs_check")) and plan is None:
+            continue
+        scene_round.actor_payloads[actor_id] = dict(payload)
+        if plan is not None:
+            scene_round.action_plans[actor_id] = dict(plan)
+        scene_round.generated_actor_ids.add(actor_id)
+        adopted.append(actor_id)
+    return adopted
+
+
+def apply_public_scene_actions(save, scene_round: PublicSceneRound, *, config: ChatConfig | None = None) -> None:
+    legacy = _legacy()
+    display_text = scene_round.display_text
+    active_encounter = scene_round.active_encounter
+    reputation_score = scene_round.reputation_score
+    scene_events = scene_round.scene_events
+    result_rows = scene_round.result_rows
     total_situation_delta = 0
     reputation_delta_total = 0
     seen_risks: set[tuple[str, str, str]] = set()
 
-    for actor in candidates:
+    for actor in scene_round.candidates:
         actor_id = str(actor.get("actor_id") or "")
-        incoming = incoming_map.get(actor_id)
-        payload = _ai_actor_action(
-            save,
-            actor,
-            player_text=display_text,
-            gm_summary=gm_summary,
-            scene_context=scene_context,
-            incoming_interaction=incoming,
-            config=config,
-        ) or _fallback_actor_action(
-            save,
-            actor,
-            player_text=display_text,
-            gm_summary=gm_summary,
-            incoming_interaction=incoming,
-        )
+        payload = _resolved_actor_payload(save, scene_round, actor, scene_round.actor_payloads.get(actor_id))
         risk_key = (str(payload.get("risk_source") or ""), str(payload.get("risk_object") or ""), str(payload.get("risk_location") or ""))
         if risk_key in seen_risks:
             payload["risk_object"] = f"{actor.get('name') or '该角色'}眼前那一处最容易出事的地方"
@@ -491,6 +740,7 @@ def advance_public_scene_in_save(
                 action_type=str(payload.get("action_type") or "check"),
                 action_prompt=str(payload.get("action_prompt") or action_content),
                 config=config,
+                plan=scene_round.action_plans.get(actor_id),
             )
         situation_delta = legacy._clamp(int(payload.get("situation_delta_hint") or 0) + legacy._check_bonus(action_result), -20, 20)
         total_situation_delta += situation_delta
@@ -525,6 +775,7 @@ def advance_public_scene_in_save(
                 "relation_delta": applied_relation_delta,
             }
         )
+        _publish_scene_events(scene_round)
 
     predicted_situation_value = legacy._predict_situation_value(save, total_situation_delta)
     direction = "hold"
@@ -544,15 +795,59 @@ def advance_public_scene_in_save(
     else:
         resolution_lines.append(f"这一轮之后，局势值停在 {predicted_situation_value}/100，现场暂时维持僵持，没有继续恶化，但还没有真正突破。")
     fallback_resolution_text = "\n".join(line for line in resolution_lines if line).strip()[:720]
-    resolution_text = _ai_round_resolution(
-        result_rows,
-        player_text=display_text,
-        gm_summary=gm_summary,
-        scene_context=scene_context,
-        predicted_situation_value=predicted_situation_value,
-        direction=direction,
+    scene_round.total_situation_delta = total_situation_delta
+    scene_round.reputation_delta_total = reputation_delta_total
+    scene_round.predicted_situation_value = predicted_situation_value
+    scene_round.situation_before = situation_before
+    scene_round.direction = direction
+    scene_round.trend = trend
+    scene_round.fallback_resolution_text = fallback_resolution_text
+
+
+def resolve_public_scene_round(scene_round: PublicSceneRound, *, config: ChatConfig | None = None) -> str | None:
+    return _ai_round_resolution(
+        scene_round.result_rows,
+        player_text=scene_round.display_text,
+        gm_summary=scene_round.gm_summary,
+        scene_context=scene_round.scene_context,
+        predicted_situation_value=scene_round.predicted_situation_value,
+        direction=scene_round.direction,
         config=config,
-    ) or fallback_resolution_text
+    )
+
+
+async def aresolve_public_scene_round(scene_round: PublicSceneRound, *, config: ChatConfig | None = None) -> str | None:
+    return await _ai_round_resolution_async(
+        scene_round.result_rows,
+        player_text=scene_round.display_text,
+        gm_summary=scene_round.gm_summary,
+        scene_context=scene_round.scene_context,
+        predicted_situation_value=scene_round.predicted_situation_value,
+        direction=scene_round.direction,
+        config=config,
+    )
+
+
+def finish_public_scene_round(
+    save,
+    scene_round: PublicSceneRound,
+    resolution_text: str | None,
+    *,
+    config: ChatConfig | None = None,
+) -> list[SceneEvent]:
+    legacy = _legacy()
+    session_id = scene_round.session_id
+    active_encounter = scene_round.active_encounter
+    scene_events = scene_round.scene_events
+    result_rows = scene_round.result_rows
+    total_situation_delta = scene_round.total_situation_delta
+    reputation_delta_total = scene_round.reputation_delta_total
+    reputation_score = scene_round.reputation_score
+    predicted_situation_value = scene_round.predicted_situation_value
+    situation_before = scene_round.situation_before
+    direction = scene_round.direction
+    trend = scene_round.trend
+    resolution_text = resolution_text or scene_round.fallback_resolution_text
     if active_encounter is not None:
         from app.services.encounter_service import apply_active_encounter_situation_delta_in_save
 
@@ -603,6 +898,7 @@ def advance_public_scene_in_save(
             },
         )
     )
+    _publish_scene_events(scene_round)
     if active_encounter is None and any(item.kind == "public_actor_action" for item in scene_events):
         try:
             from app.models.schemas import EncounterCheckRequest
@@ -624,4 +920,28 @@ def advance_public_scene_in_save(
                 )
         except Exception:
             pass
+    _publish_scene_events(scene_round)
     return scene_events[:10]
+
+
+def advance_public_scene_in_save(
+    save,
+    session_id: str,
+    player_text: str,
+    gm_summary: str = "",
+    scene_context: dict[str, object] | None = None,
+    config: ChatConfig | None = None,
+) -> list[SceneEvent]:
+    scene_round = plan_public_scene_round(
+        save,
+        session_id=session_id,
+        player_text=player_text,
+        gm_summary=gm_summary,
+        scene_context=scene_context,
+    )
+    if scene_round is None:
+        return []
+    generate_public_scene_actions(save, scene_round, config=config)
+    apply_public_scene_actions(save, scene_round, config=config)
+    resolution_text = resolve_public_scene_round(scene_round, config=config)
+    return finish_public_scene_round(save, scene_round, resolution_text, config=config)
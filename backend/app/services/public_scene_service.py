@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 import json
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from app.core.prompt_keys import PromptKeys
 from app.core.prompt_table import prompt_table
@@ -20,14 +20,16 @@ from app.models.schemas import (
     SceneEvent,
     StoryNpcSummary,
 )
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import acreate_chat_completion, build_completion_options, completion_text, create_sync_client, has_ai_config
 from app.services.reputation_service import (
     apply_reputation_relation_bias,
     apply_sub_zone_reputation_delta,
     get_current_sub_zone_reputation,
 )
+from app.services.save_index import find_team_member
 from app.services.world_service import (
     _active_encounter_for_current_sub_zone,
+    _ai_action_plan_async,
     _append_npc_dialogue,
     _build_npc_roleplay_brief,
     _extract_json_content,
@@ -64,7 +66,7 @@ def _team_role_map(save: SaveFile) -> dict[str, NpcRoleCard]:
 
 
 def _team_member_by_role_id(save: SaveFile, role_id: str):
-    return next((item for item in getattr(save.team_state, "members", []) if item.role_id == role_id), None)
+    return find_team_member(save.team_state, role_id)
 
 
 def _encounter_temp_npcs(save: SaveFile) -> list[EncounterTemporaryNpc]:
@@ -176,7 +178,17 @@ def _actor_check(
     action_type: str,
     action_prompt: str,
     config: ChatConfig | None,
+    plan: dict[str, int | bool | str] | None = None,
 ) -> ActionCheckResponse | None:
+    planned: dict[str, object] = {}
+    if plan is not None:
+        planned = {
+            "planned_ability_used": plan["ability_used"],
+            "planned_dc": plan["dc"],
+            "planned_time_spent_min": plan["time_spent_min"],
+            "planned_requires_check": plan["requires_check"],
+            "planned_check_task": plan["check_task"],
+        }
     try:
         return action_check(
             ActionCheckRequest(
@@ -187,6 +199,7 @@ def _actor_check(
                 allow_backend_roll=True,
                 resolution_context="embedded",
                 config=config,
+                **planned,
             )
         )
     except Exception:
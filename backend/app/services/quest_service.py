@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import json
 from typing import Any
@@ -22,7 +23,7 @@ from app.models.schemas import (
     QuestState,
     QuestStateResponse,
 )
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import build_completion_options, cached_completion, create_sync_client
 from app.services.consistency_service import (
     build_entity_index,
     build_global_story_snapshot,
@@ -30,7 +31,8 @@ from app.services.consistency_service import (
     extract_entity_refs_from_quest_like,
     validate_entity_refs,
 )
-from app.services.world_service import get_current_save, save_current
+from app.services.save_index import find_quest, find_sub_zone, find_zone
+from app.services.world_service import get_current_save, open_clean_save_bundle, save_current
 
 
 def _utc_now() -> str:
@@ -71,7 +73,7 @@ def _sort_pending(quests: list[QuestEntry]) -> list[QuestEntry]:
 def _tracked_quest(state: QuestState) -> QuestEntry | None:
     tracked_id = state.tracked_quest_id
     if tracked_id:
-        quest = next((q for q in state.quests if q.quest_id == tracked_id), None)
+        quest = find_quest(state, tracked_id)
         if quest is not None:
             return quest
     return next((q for q in state.quests if q.is_tracked), None)
@@ -251,8 +253,8 @@ def _fallback_rewards(source: str) -> list[QuestReward]:
 
 def _fallback_quest_draft(save, source: str) -> QuestDraft:
     zone_id, sub_zone_id = _current_area_refs(save)
-    zone_name = next((z.name for z in save.area_snapshot.zones if z.zone_id == zone_id), "当前地区")
-    sub_name = next((z.name for z in save.area_snapshot.sub_zones if z.sub_zone_id == sub_zone_id), "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", "当前地区")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", "附近")
     if source == "fate":
         return QuestDraft(
             source="fate",
@@ -287,8 +289,8 @@ def _ai_generate_quest_draft(save, source: str, config: ChatConfig | None) -> Qu
         return None
 
     zone_id, sub_zone_id = _current_area_refs(save)
-    zone_name = next((z.name for z in save.area_snapshot.zones if z.zone_id == zone_id), "当前地区")
-    sub_name = next((z.name for z in save.area_snapshot.sub_zones if z.sub_zone_id == sub_zone_id), "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", "当前地区")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", "附近")
     offer_mode = "accept_only" if source == "fate" else "accept_reject"
     default_prompt = (
         "你是跑团任务设计器，只输出 JSON。"
@@ -372,6 +374,11 @@ def _ai_generate_quest_draft(save, source: str, config: ChatConfig | None) -> Qu
         return None
 
 
+def _quest_json_has_text(content: str) -> bool:
+    parsed = _extract_json_content(content)
+    return bool(str(parsed.get("title") or "").strip() and str(parsed.get("description") or "").strip())
+
+
 def _ai_generate_quest_draft_guarded(save, source: str, config: ChatConfig | None) -> QuestDraft | None:
     if config is None:
         return None
@@ -381,8 +388,8 @@ def _ai_generate_quest_draft_guarded(save, source: str, config: ChatConfig | Non
         return None
 
     zone_id, sub_zone_id = _current_area_refs(save)
-    zone_name = next((z.name for z in save.area_snapshot.zones if z.zone_id == zone_id), "current_area")
-    sub_name = next((z.name for z in save.area_snapshot.sub_zones if z.sub_zone_id == sub_zone_id), "nearby")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", "current_area")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", "nearby")
     offer_mode = "accept_only" if source == "fate" else "accept_reject"
     snapshot = build_global_story_snapshot(save)
     entity_index = build_entity_index(save, scope="current_zone")
@@ -435,7 +442,13 @@ def _ai_generate_quest_draft_guarded(save, source: str, config: ChatConfig | Non
     )
     try:
         client = create_sync_client(config, client_cls=OpenAI)
-        resp = client.chat.completions.create(
+        resp = cached_completion(
+            config,
+            "quest.draft",
+            client.chat.completions.create,
+            accept=_quest_json_has_text,
+            # Closed quests drop out of the prompt; keying on them keeps a rejected or finished quest from being re-offered.
+            key_extra=sorted(quest.quest_id for quest in save.quest_state.quests if quest.status not in {"pending_offer", "active"}),
             model=model,
             **build_completion_options(config),
             response_format={"type": "json_object"},
@@ -527,7 +540,7 @@ def _resolve_publish_draft(save, req: QuestPublishRequest) -> QuestDraft:
 
 
 def _find_quest(state: QuestState, quest_id: str) -> QuestEntry:
-    quest = next((item for item in state.quests if item.quest_id == quest_id), None)
+    quest = find_quest(state, quest_id)
     if quest is None:
         raise KeyError("QUEST_NOT_FOUND")
     return quest
@@ -571,6 +584,13 @@ def publish_draft_to_save(save, session_id: str, draft: QuestDraft) -> QuestEntr
 
 
 def get_quest_state(session_id: str) -> QuestStateResponse:
+    reader = open_clean_save_bundle(session_id)
+    if reader is not None:
+        state = reader.load("quest_state")
+        before = state.model_dump(mode="json")
+        _sync_tracking(state)
+        if state.model_dump(mode="json") == before:
+            return _build_state_response(session_id, state)
     save = get_current_save(default_session_id=session_id)
     if save.session_id != session_id:
         save.session_id = session_id
@@ -724,7 +744,39 @@ def track_quest(session_id: str, quest_id: str) -> QuestMutationResponse:
     )
 
 
-def _objective_completed(save, quest: QuestEntry, obj: QuestObjective) -> bool:
+@dataclass
+class _QuestLookup:
+    talked_role_ids: set[str] = field(default_factory=set)
+    backpack_item_ids: set[str] = field(default_factory=set)
+    backpack_item_names: set[str] = field(default_factory=set)
+    resolved_encounter_ids: set[str] = field(default_factory=set)
+    resolved_encounter_types: set[str] = field(default_factory=set)
+    resolved_fate_phase_ids: set[str] = field(default_factory=set)
+    resolved_quest_ids: set[str] = field(default_factory=set)
+    completed_quest_ids: set[str] = field(default_factory=set)
+
+
+def _build_quest_lookup(save) -> _QuestLookup:
+    lookup = _QuestLookup()
+    player_id = save.player_static_data.player_id
+    for role in save.role_pool:
+        if role.dialogue_logs or any(rel.target_role_id == player_id for rel in role.relations):
+            lookup.talked_role_ids.add(role.role_id)
+    for item in save.player_static_data.dnd5e_sheet.backpack.items:
+        lookup.backpack_item_ids.add(item.item_id)
+        lookup.backpack_item_names.add(item.name.strip().lower())
+    for entry in save.encounter_state.encounters:
+        if entry.status != "resolved":
+            continue
+        lookup.resolved_encounter_ids.add(entry.encounter_id)
+        lookup.resolved_encounter_types.add(entry.type)
+        lookup.resolved_fate_phase_ids.update(entry.related_fate_phase_ids)
+        lookup.resolved_quest_ids.update(entry.related_quest_ids)
+    lookup.completed_quest_ids = {item.quest_id for item in save.quest_state.quests if item.status == "completed"}
+    return lookup
+
+
+def _objective_completed(save, quest: QuestEntry, obj: QuestObjective, lookup: _QuestLookup) -> bool:
     target = obj.target_ref
     if obj.kind == "reach_zone":
         zone_id = str(target.get("zone_id") or quest.zone_id or "").strip()
@@ -735,41 +787,27 @@ def _objective_completed(save, quest: QuestEntry, obj: QuestObjective) -> bool:
 
     if obj.kind == "talk_to_npc":
         npc_id = str(target.get("npc_role_id") or "").strip()
-        role = next((item for item in save.role_pool if item.role_id == npc_id), None)
-        if role is None:
-            return False
-        return bool(role.dialogue_logs) or any(rel.target_role_id == save.player_static_data.player_id for rel in role.relations)
+        return npc_id in lookup.talked_role_ids
 
     if obj.kind == "obtain_item":
         item_id = str(target.get("item_id") or "").strip()
         item_name = str(target.get("item_name") or "").strip().lower()
-        for item in save.player_static_data.dnd5e_sheet.backpack.items:
-            if item_id and item.item_id == item_id:
-                return True
-            if item_name and item.name.strip().lower() == item_name:
-                return True
-        return False
+        return bool(item_id and item_id in lookup.backpack_item_ids) or bool(item_name and item_name in lookup.backpack_item_names)
 
     if obj.kind == "resolve_encounter":
         encounter_id = str(target.get("encounter_id") or "").strip()
         encounter_type = str(target.get("encounter_type") or "").strip().lower()
         related_fate_phase_id = str(target.get("fate_phase_id") or quest.fate_phase_id or "").strip()
-        for entry in save.encounter_state.encounters:
-            if entry.status != "resolved":
-                continue
-            if encounter_id and entry.encounter_id == encounter_id:
-                return True
-            if encounter_type and entry.type == encounter_type:
-                return True
-            if related_fate_phase_id and related_fate_phase_id in entry.related_fate_phase_ids:
-                return True
-            if quest.quest_id in entry.related_quest_ids:
-                return True
-        return False
+        return (
+            bool(encounter_id and encounter_id in lookup.resolved_encounter_ids)
+            or bool(encounter_type and encounter_type in lookup.resolved_encounter_types)
+            or bool(related_fate_phase_id and related_fate_phase_id in lookup.resolved_fate_phase_ids)
+            or quest.quest_id in lookup.resolved_quest_ids
+        )
 
     if obj.kind == "complete_quest":
         target_quest_id = str(target.get("quest_id") or "").strip()
-        return any(item.quest_id == target_quest_id and item.status == "completed" for item in save.quest_state.quests)
+        return target_quest_id in lookup.completed_quest_ids
 
     keyword = str(target.get("keyword") or "").strip()
     if not keyword:
@@ -777,8 +815,8 @@ def _objective_completed(save, quest: QuestEntry, obj: QuestObjective) -> bool:
     return any(keyword in log.message for log in save.game_logs[-20:])
 
 
-def _update_objective(save, quest: QuestEntry, obj: QuestObjective) -> bool:
-    done = _objective_completed(save, quest, obj)
+def _update_objective(save, quest: QuestEntry, obj: QuestObjective, lookup: _QuestLookup) -> bool:
+    done = _objective_completed(save, quest, obj, lookup)
     if done:
         obj.progress_current = obj.progress_target
         obj.status = "completed"
@@ -790,6 +828,49 @@ def _update_objective(save, quest: QuestEntry, obj: QuestObjective) -> bool:
     return False
 
 
+def _evaluate_quest_in_save(save, session_id: str, state: QuestState, quest: QuestEntry, lookup: _QuestLookup) -> bool:
+    all_completed = True
+    for obj in quest.objectives:
+        if not _update_objective(save, quest, obj, lookup):
+            all_completed = False
+
+    if not all_completed or quest.status == "completed":
+        return False
+    quest.status = "completed"
+    quest.completed_at = _utc_now()
+    quest.is_tracked = False
+    if state.tracked_quest_id == quest.quest_id:
+        state.tracked_quest_id = None
+    _append_quest_log(quest, "complete", f"任务【{quest.title}】已完成")
+    _append_game_log(
+        save,
+        session_id,
+        "quest_complete",
+        f"完成任务【{quest.title}】",
+        {"quest_id": quest.quest_id, "source": quest.source, "title": quest.title},
+    )
+    _sync_tracking(state)
+    lookup.completed_quest_ids.add(quest.quest_id)
+    return True
+
+
+def _after_quest_completion(session_id: str, config: ChatConfig | None) -> None:
+    try:
+        from app.models.schemas import FateEvaluateRequest
+        from app.services.fate_service import evaluate_fate_state
+
+        evaluate_fate_state(FateEvaluateRequest(session_id=session_id, config=config))
+    except Exception:
+        pass
+    try:
+        from app.models.schemas import EncounterCheckRequest
+        from app.services.encounter_service import check_for_encounter
+
+        check_for_encounter(EncounterCheckRequest(session_id=session_id, trigger_kind="quest_rule", config=config))
+    except Exception:
+        pass
+
+
 def evaluate_quest(req: QuestEvaluateRequest) -> QuestMutationResponse:
     save = get_current_save(default_session_id=req.session_id)
     save.session_id = req.session_id
@@ -800,47 +881,13 @@ def evaluate_quest(req: QuestEvaluateRequest) -> QuestMutationResponse:
     if quest.invalidated_reason:
         raise ValueError("QUEST_INVALIDATED")
 
-    was_completed = quest.status == "completed"
-    all_completed = True
-    for obj in quest.objectives:
-        if not _update_objective(save, quest, obj):
-            all_completed = False
-
-    chat_feedback = f"任务【{quest.title}】尚未完成。"
-    if all_completed and quest.status != "completed":
-        quest.status = "completed"
-        quest.completed_at = _utc_now()
-        quest.is_tracked = False
-        if state.tracked_quest_id == quest.quest_id:
-            state.tracked_quest_id = None
-        _append_quest_log(quest, "complete", f"任务【{quest.title}】已完成")
-        _append_game_log(
-            save,
-            req.session_id,
-            "quest_complete",
-            f"完成任务【{quest.title}】",
-            {"quest_id": quest.quest_id, "source": quest.source, "title": quest.title},
-        )
-        _sync_tracking(state)
-        chat_feedback = f"任务【{quest.title}】已完成。"
+    completed_now = _evaluate_quest_in_save(save, req.session_id, state, quest, _build_quest_lookup(save))
+    chat_feedback = f"任务【{quest.title}】已完成。" if completed_now else f"任务【{quest.title}】尚未完成。"
     _touch_state(state)
     save_current(save)
 
-    if all_completed and not was_completed:
-        try:
-            from app.models.schemas import FateEvaluateRequest
-            from app.services.fate_service import evaluate_fate_state
-
-            evaluate_fate_state(FateEvaluateRequest(session_id=req.session_id, config=req.config))
-        except Exception:
-            pass
-        try:
-            from app.models.schemas import EncounterCheckRequest
-            from app.services.encounter_service import check_for_encounter
-
-            check_for_encounter(EncounterCheckRequest(session_id=req.session_id, trigger_kind="quest_rule", config=req.config))
-        except Exception:
-            pass
+    if completed_now:
+        _after_quest_completion(req.session_id, req.config)
 
     return QuestMutationResponse(
         session_id=req.session_id,
@@ -854,12 +901,23 @@ def evaluate_quest(req: QuestEvaluateRequest) -> QuestMutationResponse:
 
 def evaluate_all_quests(req: QuestEvaluateAllRequest) -> QuestStateResponse:
     save = get_current_save(default_session_id=req.session_id)
-    active_ids = [quest.quest_id for quest in save.quest_state.quests if quest.status == "active"]
-    for quest_id in active_ids:
-        try:
-            evaluate_quest(QuestEvaluateRequest(session_id=req.session_id, quest_id=quest_id, config=req.config))
-        except Exception:
-            continue
+    state = _quest_state(save)
+    active = [quest for quest in state.quests if quest.status == "active" and not quest.invalidated_reason]
+    if not active:
+        return get_quest_state(req.session_id)
+
+    save.session_id = req.session_id
+    lookup = _build_quest_lookup(save)
+    completed_any = False
+    for quest in active:
+        if _evaluate_quest_in_save(save, req.session_id, state, quest, lookup):
+            completed_any = True
+    _touch_state(state)
+    save_current(save)
+
+    if not completed_any:
+        return _build_state_response(req.session_id, state)
+    _after_quest_completion(req.session_id, req.config)
     return get_quest_state(req.session_id)
 
 
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import cos, floor, sin, sqrt
+
+_GOLDEN_ANGLE = 2.399963229728653
+_GAP_M = 1.0
+_PACKING_DENSITY = 0.3
+
+
+@dataclass
+class LayoutResult:
+    positions: list[tuple[int, int]]
+    iterations: int
+    converged: bool
+
+
+def _cell_size(radii: list[float]) -> float:
+    return max(1.0, 2.0 * max(radii) + _GAP_M)
+
+
+def _cell_of(x: float, y: float, cell: float) -> tuple[int, int]:
+    return floor(x / cell), floor(y / cell)
+
+
+def _overlapping_pairs(
+    xs: list[float],
+    ys: list[float],
+    radii: list[float],
+    grid: dict[tuple[int, int], list[int]],
+    cell: float,
+    active: list[int],
+) -> list[tuple[int, int, float, float, float, float]]:
+    pairs: list[tuple[int, int, float, float, float, float]] = []
+    seen: set[tuple[int, int]] = set()
+    for i in active:
+        cx, cy = _cell_of(xs[i], ys[i], cell)
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for j in grid.get((nx, ny), ()):
+                    if j == i:
+                        continue
+                    a, b = (i, j) if i < j else (j, i)
+                    if (a, b) in seen:
+                        continue
+                    seen.add((a, b))
+                    dx = xs[b] - xs[a]
+                    dy = ys[b] - ys[a]
+                    min_d = radii[a] + radii[b] + _GAP_M
+                    d2 = dx * dx + dy * dy
+                    if d2 < min_d * min_d:
+                        pairs.append((a, b, dx, dy, sqrt(d2), min_d))
+    return pairs
+
+
+def _positions(xs: list[float], ys: list[float]) -> list[tuple[int, int]]:
+    return [(int(x), int(y)) for x, y in zip(xs, ys)]
+
+
+def _overlaps_placed(
+    x: float, y: float, radius: float, radii: list[float], xs: list[float], ys: list[float], grid: dict[tuple[int, int], list[int]], cell: float
+) -> bool:
+    cx, cy = _cell_of(x, y, cell)
+    for nx in (cx - 1, cx, cx + 1):
+        for ny in (cy - 1, cy, cy + 1):
+            for j in grid.get((nx, ny), ()):
+                min_d = radius + radii[j] + _GAP_M
+                dx, dy = xs[j] - x, ys[j] - y
+                if dx * dx + dy * dy < min_d * min_d:
+                    return True
+    return False
+
+
+def _spiral_place(xs: list[float], ys: list[float], radii: list[float], fixed: set[int], cell: float) -> None:
+    # Fallback for layouts too dense to relax: place circles one by one (pinned first), each at the first free spot on a
+    # golden-angle spiral around its relaxed position. The spiral only grows outward, so every circle finds room.
+    grid: dict[tuple[int, int], list[int]] = {}
+    order = [idx for idx in range(len(xs)) if idx in fixed] + [idx for idx in range(len(xs)) if idx not in fixed]
+    for idx in order:
+        x, y = xs[idx], ys[idx]
+        if idx not in fixed:
+            step = radii[idx] / 2 + _GAP_M
+            k = 0
+            while _overlaps_placed(x, y, radii[idx], radii, xs, ys, grid, cell):
+                k += 1
+                angle = _GOLDEN_ANGLE * k
+                x = float(round(xs[idx] + step * sqrt(k) * cos(angle)))
+                y = float(round(ys[idx] + step * sqrt(k) * sin(angle)))
+            xs[idx], ys[idx] = x, y
+        grid.setdefault(_cell_of(x, y, cell), []).append(idx)
+
+
+def _expand_to_fit(xs: list[float], ys: list[float], radii: list[float], fixed: set[int]) -> None:
+    # Relaxation only makes room by pushing neighbours apart, which crawls when the circles need more area than their
+    # bounding box offers. Scale the layout out from the pinned anchor first so relative placement is kept.
+    pad = max(radii)
+    width = max(xs) - min(xs) + 2 * pad
+    height = max(ys) - min(ys) + 2 * pad
+    needed = sum(3.141592653589793 * (radius + _GAP_M) ** 2 for radius in radii) / _PACKING_DENSITY
+    if width * height >= needed:
+        return
+    scale = sqrt(needed / (width * height))
+    anchors = [idx for idx in range(len(xs)) if idx in fixed] or list(range(len(xs)))
+    ox = sum(xs[idx] for idx in anchors) / len(anchors)
+    oy = sum(ys[idx] for idx in anchors) / len(anchors)
+    for idx in range(len(xs)):
+        if idx not in fixed:
+            xs[idx] = float(round(ox + (xs[idx] - ox) * scale))
+            ys[idx] = float(round(oy + (ys[idx] - oy) * scale))
+
+
+def _has_overlaps(xs: list[float], ys: list[float], radii: list[float], fixed: set[int], cell: float) -> bool:
+    grid: dict[tuple[int, int], list[int]] = {}
+    for idx in range(len(xs)):
+        grid.setdefault(_cell_of(xs[idx], ys[idx], cell), []).append(idx)
+    pairs = _overlapping_pairs(xs, ys, radii, grid, cell, list(range(len(xs))))
+    return any(a not in fixed or b not in fixed for a, b, *_ in pairs)
+
+
+def resolve_overlaps(
+    circles: list[tuple[float, float, float]],
+    *,
+    pinned: set[int] | None = None,
+    max_iterations: int = 1000,
+    stall_iterations: int = 20,
+) -> LayoutResult:
+    xs = [float(round(x)) for x, _, _ in circles]
+    ys = [float(round(y)) for _, y, _ in circles]
+    radii = [float(r) for _, _, r in circles]
+    if len(circles) < 2:
+        return LayoutResult(positions=_positions(xs, ys), iterations=0, converged=True)
+    fixed = pinned if pinned is not None else {0}
+    cell = _cell_size(radii)
+    _expand_to_fit(xs, ys, radii, fixed)
+    grid: dict[tuple[int, int], list[int]] = {}
+    for idx in range(len(xs)):
+        grid.setdefault(_cell_of(xs[idx], ys[idx], cell), []).append(idx)
+    active = list(range(len(xs)))
+    window_start: int | None = None
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        pairs = _overlapping_pairs(xs, ys, radii, grid, cell, active)
+        # Hand over to spiral placement once a window of iterations no longer removes a quarter of the overlaps.
+        if iteration % stall_iterations == 1:
+            if window_start is not None and len(pairs) > window_start * 0.75:
+                break
+            window_start = len(pairs)
+        shifts: dict[int, list[float]] = {}
+        for a, b, dx, dy, d, min_d in pairs:
+            a_fixed, b_fixed = a in fixed, b in fixed
+            if a_fixed and b_fixed:
+                continue
+            if d == 0:
+                angle = _GOLDEN_ANGLE * (b + iteration)
+                dx, dy, d = cos(angle), sin(angle), 1.0
+                overlap = min_d + 2 * _GAP_M
+            else:
+                overlap = min_d - d + 2 * _GAP_M
+            ux, uy = dx / d, dy / d
+            share_a = 0.0 if a_fixed else (1.0 if b_fixed else 0.5)
+            share_b = 1.0 - share_a
+            if share_a:
+                shift = shifts.setdefault(a, [0.0, 0.0])
+                shift[0] -= ux * overlap * share_a
+                shift[1] -= uy * overlap * share_a
+            if share_b:
+                shift = shifts.setdefault(b, [0.0, 0.0])
+                shift[0] += ux * overlap * share_b
+                shift[1] += uy * overlap * share_b
+        active = []
+        for idx, (sx, sy) in shifts.items():
+            nx, ny = float(round(xs[idx] + sx)), float(round(ys[idx] + sy))
+            if nx == xs[idx] and ny == ys[idx]:
+                continue
+            old_cell, new_cell = _cell_of(xs[idx], ys[idx], cell), _cell_of(nx, ny, cell)
+            if old_cell != new_cell:
+                grid[old_cell].remove(idx)
+                grid.setdefault(new_cell, []).append(idx)
+            xs[idx], ys[idx] = nx, ny
+            active.append(idx)
+        if not active and not shifts:
+            return LayoutResult(positions=_positions(xs, ys), iterations=iteration, converged=True)
+        if not active:
+            break
+    if _has_overlaps(xs, ys, radii, fixed, cell):
+        _spiral_place(xs, ys, radii, fixed, cell)
+    return LayoutResult(positions=_positions(xs, ys), iterations=iteration, converged=not _has_overlaps(xs, ys, radii, fixed, cell))
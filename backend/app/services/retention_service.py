@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.helpers import env_flag, env_int
+from app.core.save_archive import SaveArchive
+from app.core.storage import save_archive_dir, storage_state
+from app.models.schemas import ArchiveQueryResponse, FateLine, SaveFile
+
+_TERMINAL_QUEST_STATUSES = {"completed", "failed", "rejected", "superseded", "invalidated"}
+_TERMINAL_ENCOUNTER_STATUSES = {"resolved", "expired", "invalidated"}
+
+ArchiveRecord = tuple[str, str, dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    enabled: bool = True
+    game_logs: int = 1000
+    quests: int = 100
+    encounters: int = 100
+    fate_archive: int = 20
+    dialogue_logs: int = 100
+
+    @classmethod
+    def from_env(cls) -> RetentionPolicy:
+        return cls(
+            enabled=env_flag("ROLEPLAY_RETENTION", True),
+            game_logs=env_int("ROLEPLAY_RETAIN_GAME_LOGS", 1000, minimum=10),
+            quests=env_int("ROLEPLAY_RETAIN_QUESTS", 100, minimum=1),
+            encounters=env_int("ROLEPLAY_RETAIN_ENCOUNTERS", 100, minimum=1),
+            fate_archive=env_int("ROLEPLAY_RETAIN_FATES", 20, minimum=1),
+            dialogue_logs=env_int("ROLEPLAY_RETAIN_NPC_DIALOGUE", 100, minimum=20),
+        )
+
+
+retention_policy = RetentionPolicy.from_env()
+
+
+def _overflow(count: int, limit: int) -> int:
+    # Trim back to the limit only once a quarter over it, so archiving (and the game log rewrite it causes) is batched.
+    if count <= limit + max(1, limit // 4):
+        return 0
+    return count - limit
+
+
+def _pinned_ids(save: SaveFile) -> set[str]:
+    pinned = {save.quest_state.tracked_quest_id or "", save.encounter_state.active_encounter_id or "", *save.encounter_state.pending_ids}
+    fate = save.fate_state.current_fate
+    if fate is not None:
+        pinned.update(phase.bound_quest_id or "" for phase in fate.phases)
+        pinned.update(_fate_condition_ids(save, fate))
+    for quest in save.quest_state.quests:
+        if quest.status in _TERMINAL_QUEST_STATUSES:
+            continue
+        for objective in quest.objectives:
+            pinned.update(str(value) for value in objective.target_ref.values())
+    for encounter in save.encounter_state.encounters:
+        if encounter.status not in _TERMINAL_ENCOUNTER_STATUSES:
+            pinned.update(encounter.related_quest_ids)
+    pinned.discard("")
+    return pinned
+
+
+def _fate_condition_ids(save: SaveFile, fate: FateLine) -> set[str]:
+    # Open phase conditions are checked against the live quest and encounter lists only.
+    ids: set[str] = set()
+    phase_ids: set[str] = set()
+    encounter_types: set[str] = set()
+    for phase in fate.phases:
+        if phase.status == "completed":
+            continue
+        phase_ids.add(phase.phase_id)
+        for condition in phase.trigger_conditions:
+            payload = condition.payload
+            if condition.kind == "completed_quest":
+                ids.add(str(payload.get("quest_id") or ""))
+            elif condition.kind == "resolved_encounter":
+                ids.add(str(payload.get("encounter_id") or ""))
+                target = next((item for item in fate.phases if item.index == int(payload.get("phase_index") or 0)), None)
+                if target is not None:
+                    phase_ids.add(target.phase_id)
+                elif payload.get("encounter_type") and not payload.get("encounter_id"):
+                    encounter_types.add(str(payload["encounter_type"]).strip().lower())
+    encounters = save.encounter_state.encounters
+    ids.update(item.encounter_id for item in encounters if phase_ids.intersection(item.related_fate_phase_ids))
+    for encounter_type in encounter_types:
+        resolved = [item for item in encounters if item.status == "resolved" and item.type == encounter_type]
+        ids.update(item.encounter_id for item in resolved[-1:])
+    return ids
+
+
+def _terminal_candidates(items: list[Any], key: str, terminal: set[str], pinned: set[str]) -> list[Any]:
+    return [item for item in items if item.status in terminal and getattr(item, key) not in pinned]
+
+
+def _split_terminal(items: list[Any], key: str, terminal: set[str], limit: int, pinned: set[str]) -> tuple[list[Any], list[Any]]:
+    candidates = _terminal_candidates(items, key, terminal, pinned)
+    overflow = _overflow(len(candidates), limit)
+    if not overflow:
+        return items, []
+    cold_ids = {id(item) for item in candidates[:overflow]}
+    return [item for item in items if id(item) not in cold_ids], candidates[:overflow]
+
+
+def _records(items: list[Any], key: str, owner: str = "") -> list[ArchiveRecord]:
+    return [(owner, str(getattr(item, key)), item.model_dump(mode="json")) for item in items]
+
+
+def retention_due(save: SaveFile, policy: RetentionPolicy | None = None) -> bool:
+    policy = policy or retention_policy
+    if not policy.enabled:
+        return False
+    if _overflow(len(save.game_logs), policy.game_logs) or _overflow(len(save.fate_state.archive), policy.fate_archive):
+        return True
+    if any(_overflow(len(role.dialogue_logs), policy.dialogue_logs) for role in save.role_pool):
+        return True
+    pinned = _pinned_ids(save)
+    quests = _terminal_candidates(save.quest_state.quests, "quest_id", _TERMINAL_QUEST_STATUSES, pinned)
+    encounters = _terminal_candidates(save.encounter_state.encounters, "encounter_id", _TERMINAL_ENCOUNTER_STATUSES, pinned)
+    return bool(_overflow(len(quests), policy.quests) or _overflow(len(encounters), policy.encounters))
+
+
+def split_cold_items(save: SaveFile, policy: RetentionPolicy | None = None) -> dict[str, list[ArchiveRecord]]:
+    policy = policy or retention_policy
+    cold: dict[str, list[ArchiveRecord]] = {}
+    if not policy.enabled:
+        return cold
+
+    overflow = _overflow(len(save.game_logs), policy.game_logs)
+    if overflow:
+        cold["game_logs"] = _records(save.game_logs[:overflow], "id")
+        save.game_logs = save.game_logs[overflow:]
+
+    pinned = _pinned_ids(save)
+    save.quest_state.quests, quests = _split_terminal(save.quest_state.quests, "quest_id", _TERMINAL_QUEST_STATUSES, policy.quests, pinned)
+    if quests:
+        cold["quests"] = _records(quests, "quest_id")
+    save.encounter_state.encounters, encounters = _split_terminal(
+        save.encounter_state.encounters, "encounter_id", _TERMINAL_ENCOUNTER_STATUSES, policy.encounters, pinned
+    )
+    if encounters:
+        cold["encounters"] = _records(encounters, "encounter_id")
+
+    overflow = _overflow(len(save.fate_state.archive), policy.fate_archive)
+    if overflow:
+        cold["fate_archive"] = _records(save.fate_state.archive[:overflow], "fate_id")
+        save.fate_state.archive = save.fate_state.archive[overflow:]
+
+    dialogue: list[ArchiveRecord] = []
+    for role in save.role_pool:
+        overflow = _overflow(len(role.dialogue_logs), policy.dialogue_logs)
+        if overflow:
+            dialogue.extend(_records(role.dialogue_logs[:overflow], "id", role.role_id))
+            role.dialogue_logs = role.dialogue_logs[overflow:]
+    if dialogue:
+        cold["dialogue_logs"] = dialogue
+    return cold
+
+
+def archive_cold_items(session_id: str, save_path: Path, cold: dict[str, list[ArchiveRecord]]) -> dict[str, int]:
+    if not cold:
+        return {}
+    archive = SaveArchive(save_archive_dir(save_path))
+    return {collection: archive.append(session_id, collection, records) for collection, records in cold.items()}
+
+
+def query_archive(session_id: str, collection: str, owner_id: str | None = None, offset: int = 0, limit: int = 50) -> ArchiveQueryResponse:
+    safe_offset = max(0, int(offset or 0))
+    safe_limit = max(1, min(int(limit or 50), 200))
+    total, items = SaveArchive(save_archive_dir(storage_state.save_path)).query(
+        session_id, collection, owner=owner_id or None, offset=safe_offset, limit=safe_limit
+    )
+    return ArchiveQueryResponse(
+        session_id=session_id,
+        collection=collection,  # type: ignore[arg-type]
+        owner_id=owner_id or None,
+        total=total,
+        offset=safe_offset,
+        items=items,
+    )
@@ -16,6 +16,7 @@ from app.models.schemas import (
     SceneEvent,
     TeamMember,
 )
+from app.services.save_index import find_sub_zone, find_zone
 
 
 def _utc_now() -> str:
@@ -79,8 +80,8 @@ def _entity_refs(entity_type: str, entity_id: str, label: str) -> list[EntityRef
 def _seed_desire_templates(role: NpcRoleCard, save: SaveFile) -> list[dict[str, object]]:
     sub_zone_id = role.sub_zone_id or save.area_snapshot.current_sub_zone_id or ""
     zone_id = role.zone_id or save.area_snapshot.current_zone_id or ""
-    sub_zone_name = next((item.name for item in save.area_snapshot.sub_zones if item.sub_zone_id == sub_zone_id), sub_zone_id or "附近")
-    zone_name = next((item.name for item in save.area_snapshot.zones if item.zone_id == zone_id), zone_id or "当前区域")
+    sub_zone_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", sub_zone_id or "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", zone_id or "当前区域")
     like_text = role.likes[0] if role.likes else "线索"
     return [
         {
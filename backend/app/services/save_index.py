@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from threading import RLock
+from typing import Any
+import weakref
+
+
+@dataclass
+class _ListIndex:
+    items: list[Any]
+    size: int
+    tail: int | None
+    positions: dict[Any, int]
+
+
+@dataclass
+class _OwnerIndex:
+    ref: weakref.ref
+    lists: dict[tuple[str, str], _ListIndex] = field(default_factory=dict)
+
+
+_lock = RLock()
+_owners: dict[int, _OwnerIndex] = {}
+_stats = {"hits": 0, "rebuilds": 0}
+
+
+def _forget(owner_id: int, ref: weakref.ref) -> None:
+    with _lock:
+        entry = _owners.get(owner_id)
+        if entry is not None and entry.ref is ref:
+            _owners.pop(owner_id, None)
+
+
+def _owner_entry(owner: Any) -> _OwnerIndex:
+    owner_id = id(owner)
+    entry = _owners.get(owner_id)
+    if entry is not None and entry.ref() is owner:
+        return entry
+    ref = weakref.ref(owner, lambda dead, owner_id=owner_id: _forget(owner_id, dead))
+    entry = _OwnerIndex(ref=ref)
+    _owners[owner_id] = entry
+    return entry
+
+
+def _signature(items: list[Any]) -> tuple[int, int | None]:
+    return len(items), id(items[-1]) if items else None
+
+
+def _build(items: list[Any], attr: str) -> _ListIndex:
+    positions: dict[Any, int] = {}
+    for pos, item in enumerate(items):
+        positions.setdefault(getattr(item, attr, None), pos)
+    size, tail = _signature(items)
+    _stats["rebuilds"] += 1
+    return _ListIndex(items=items, size=size, tail=tail, positions=positions)
+
+
+def lookup(owner: Any, list_name: str, attr: str, key: Any) -> Any | None:
+    if owner is None or key is None:
+        return None
+    items = getattr(owner, list_name, None)
+    if not items:
+        return None
+    with _lock:
+        entry = _owner_entry(owner)
+        cache_key = (list_name, attr)
+        index = entry.lists.get(cache_key)
+        if index is None or index.items is not items or (index.size, index.tail) != _signature(items):
+            index = entry.lists[cache_key] = _build(items, attr)
+        pos = index.positions.get(key)
+        if pos is not None and (pos >= len(items) or getattr(items[pos], attr, None) != key):
+            index = entry.lists[cache_key] = _build(items, attr)
+            pos = index.positions.get(key)
+        if pos is None:
+            # The signature only sees the list, its length and its tail; a replaced middle element or an in-place id
+            # change is found by a scan, which also refreshes the map.
+            if not any(getattr(item, attr, None) == key for item in items):
+                return None
+            index = entry.lists[cache_key] = _build(items, attr)
+            pos = index.positions[key]
+        _stats["hits"] += 1
+        return items[pos]
+
+
+def invalidate_entity_index(*owners: Any) -> None:
+    with _lock:
+        for owner in owners:
+            entry = _owners.get(id(owner))
+            if entry is not None and entry.ref() is owner:
+                entry.lists.clear()
+
+
+def entity_index_stats() -> dict[str, int]:
+    with _lock:
+        return {"owners": len(_owners), **_stats}
+
+
+def find_role(save: Any, role_id: str | None) -> Any | None:
+    return lookup(save, "role_pool", "role_id", role_id)
+
+
+def find_zone(snapshot: Any, zone_id: str | None) -> Any | None:
+    return lookup(snapshot, "zones", "zone_id", zone_id)
+
+
+def find_sub_zone(snapshot: Any, sub_zone_id: str | None) -> Any | None:
+    return lookup(snapshot, "sub_zones", "sub_zone_id", sub_zone_id)
+
+
+def find_quest(state: Any, quest_id: str | None) -> Any | None:
+    return lookup(state, "quests", "quest_id", quest_id)
+
+
+def find_encounter(state: Any, encounter_id: str | None) -> Any | None:
+    return lookup(state, "encounters", "encounter_id", encounter_id)
+
+
+def find_item(inventory: Any, item_id: str | None) -> Any | None:
+    return lookup(inventory, "items", "item_id", item_id)
+
+
+def find_fate_phase(fate: Any, phase_id: str | None) -> Any | None:
+    return lookup(fate, "phases", "phase_id", phase_id)
+
+
+def find_team_member(state: Any, role_id: str | None) -> Any | None:
+    return lookup(state, "members", "role_id", role_id)
+
+
+def find_temporary_npc(encounter: Any, encounter_npc_id: str | None) -> Any | None:
+    return lookup(encounter, "temporary_npcs", "encounter_npc_id", encounter_npc_id)
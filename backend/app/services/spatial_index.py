@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import heapq
+from math import floor, sqrt
+from threading import Lock
+from typing import Any, Callable, Iterable
+import weakref
+
+from app.core.save_cache import save_part_fingerprint
+
+_INDEX_CACHE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class SpatialEntry:
+    key: str
+    x: float
+    y: float
+    z: float = 0.0
+    radius: float = 0.0
+    group: str | None = None
+
+
+class SpatialGrid:
+    def __init__(self, entries: Iterable[SpatialEntry], cell_size: float | None = None) -> None:
+        self.entries: list[SpatialEntry] = list(entries)
+        self.max_radius = max((entry.radius for entry in self.entries), default=0.0)
+        self._groups: dict[str | None, list[SpatialEntry]] = {}
+        for entry in self.entries:
+            self._groups.setdefault(entry.group, []).append(entry)
+        if self.entries:
+            min_x = min(entry.x for entry in self.entries)
+            max_x = max(entry.x for entry in self.entries)
+            min_y = min(entry.y for entry in self.entries)
+            max_y = max(entry.y for entry in self.entries)
+        else:
+            min_x = max_x = min_y = max_y = 0.0
+        if cell_size is None:
+            area = max(1.0, (max_x - min_x) * (max_y - min_y))
+            cell_size = max(1.0, 2.0 * sqrt(area / max(1, len(self.entries))))
+        self.cell = float(cell_size)
+        self._bounds = (self._cell(min_x), self._cell(min_y), self._cell(max_x), self._cell(max_y))
+        self._cells: dict[tuple[int, int], list[SpatialEntry]] = {}
+        for entry in self.entries:
+            self._cells.setdefault((self._cell(entry.x), self._cell(entry.y)), []).append(entry)
+
+    def _cell(self, value: float) -> int:
+        return floor(value / self.cell)
+
+    def _ring(self, cx: int, cy: int, ring: int) -> Iterable[SpatialEntry]:
+        if ring == 0:
+            yield from self._cells.get((cx, cy), ())
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield from self._cells.get((gx, cy - ring), ())
+            yield from self._cells.get((gx, cy + ring), ())
+        for gy in range(cy - ring + 1, cy + ring):
+            yield from self._cells.get((cx - ring, gy), ())
+            yield from self._cells.get((cx + ring, gy), ())
+
+    def group(self, group: str | None) -> list[SpatialEntry]:
+        return list(self._groups.get(group, ()))
+
+    def nearest(self, x: float, y: float, *, k: int = 1, group: str | None = None) -> list[tuple[float, SpatialEntry]]:
+        if k <= 0 or not self.entries:
+            return []
+        cx, cy = self._cell(x), self._cell(y)
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        last_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        best: list[tuple[float, str, int, SpatialEntry]] = []
+        for ring in range(last_ring + 1):
+            for entry in self._ring(cx, cy, ring):
+                if group is not None and entry.group != group:
+                    continue
+                dx, dy = entry.x - x, entry.y - y
+                best.append((sqrt(dx * dx + dy * dy), entry.key, len(best), entry))
+            if len(best) >= k and heapq.nsmallest(k, best)[-1][0] <= ring * self.cell:
+                break
+        return [(item[0], item[3]) for item in heapq.nsmallest(k, best)]
+
+    def within_radius(self, x: float, y: float, radius: float, *, touching: bool = False) -> list[tuple[float, SpatialEntry]]:
+        reach = radius + (self.max_radius if touching else 0.0)
+        hits: list[tuple[float, SpatialEntry]] = []
+        for entry in self._in_cells(x - reach, y - reach, x + reach, y + reach):
+            dx, dy = entry.x - x, entry.y - y
+            dist = sqrt(dx * dx + dy * dy)
+            if dist <= radius + (entry.radius if touching else 0.0):
+                hits.append((dist, entry))
+        hits.sort(key=lambda item: (item[0], item[1].key))
+        return hits
+
+    def in_bbox(self, min_x: float, min_y: float, max_x: float, max_y: float, *, touching: bool = False) -> list[SpatialEntry]:
+        pad = self.max_radius if touching else 0.0
+        hits: list[SpatialEntry] = []
+        for entry in self._in_cells(min_x - pad, min_y - pad, max_x + pad, max_y + pad):
+            grow = entry.radius if touching else 0.0
+            if min_x - grow <= entry.x <= max_x + grow and min_y - grow <= entry.y <= max_y + grow:
+                hits.append(entry)
+        hits.sort(key=lambda entry: (entry.y, entry.x, entry.key))
+        return hits
+
+    def _in_cells(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Iterable[SpatialEntry]:
+        lo_x, lo_y = max(self._cell(min_x), self._bounds[0]), max(self._cell(min_y), self._bounds[1])
+        hi_x, hi_y = min(self._cell(max_x), self._bounds[2]), min(self._cell(max_y), self._bounds[3])
+        if (hi_x - lo_x + 1) * (hi_y - lo_y + 1) > len(self._cells):
+            for (gx, gy), items in self._cells.items():
+                if lo_x <= gx <= hi_x and lo_y <= gy <= hi_y:
+                    yield from items
+            return
+        for gx in range(lo_x, hi_x + 1):
+            for gy in range(lo_y, hi_y + 1):
+                yield from self._cells.get((gx, gy), ())
+
+
+class _GridCache:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._grids: OrderedDict[tuple[Any, ...], tuple[weakref.ref | None, SpatialGrid]] = OrderedDict()
+        self.builds = 0
+
+    def get(
+        self,
+        kind: str,
+        part: Any,
+        fingerprint: tuple[int, ...] | None,
+        shape: tuple[Any, ...],
+        rows: Callable[[], Iterable[tuple[Any, ...]]],
+    ) -> SpatialGrid:
+        # Keyed on the save part's stamp (shared by every copy of a revision) or, outside the cache, on the part object,
+        # plus a constant-size shape check; the rows are only walked on a miss.
+        owner = weakref.ref(part) if fingerprint is None else None
+        key = (kind, fingerprint if fingerprint is not None else ("object", id(part)), shape)
+        with self._lock:
+            cached = self._grids.get(key)
+            if cached is not None and (cached[0] is None or cached[0]() is part):
+                self._grids.move_to_end(key)
+                return cached[1]
+        grid = SpatialGrid(SpatialEntry(*row) for row in rows())
+        with self._lock:
+            self.builds += 1
+            self._grids[key] = (owner, grid)
+            while len(self._grids) > _INDEX_CACHE_SIZE:
+                self._grids.popitem(last=False)
+        return grid
+
+
+grid_cache = _GridCache()
+
+
+def _map_revision(save) -> int:
+    return getattr(getattr(save, "world_state", None), "map_revision", 0)
+
+
+def zone_grid(save) -> SpatialGrid:
+    snapshot = save.map_snapshot
+    zones = snapshot.zones
+    shape = (_map_revision(save), len(zones), zones[-1].zone_id if zones else "")
+    return grid_cache.get(
+        "zones",
+        snapshot,
+        save_part_fingerprint(save, ("map_snapshot",)),
+        shape,
+        lambda: ((zone.zone_id, zone.x, zone.y, zone.z, zone.radius_m) for zone in zones),
+    )
+
+
+def sub_zone_grid(save) -> SpatialGrid:
+    snapshot = save.area_snapshot
+    sub_zones = snapshot.sub_zones
+    shape = (_map_revision(save), len(sub_zones), sub_zones[-1].sub_zone_id if sub_zones else "")
+    return grid_cache.get(
+        "sub_zones",
+        snapshot,
+        save_part_fingerprint(save, ("area_snapshot",)),
+        shape,
+        lambda: ((sub.sub_zone_id, sub.coord.x, sub.coord.y, sub.coord.z, sub.radius_m, sub.zone_id) for sub in sub_zones),
+    )
@@ -7,6 +7,7 @@ from typing import Any, Iterable
 
 from openai import OpenAI
 
+from app.core.llm_fanout import llm_fanout
 from app.core.prompt_keys import PromptKeys
 from app.core.prompt_table import prompt_table
 from app.core.token_usage import token_usage_store
@@ -28,8 +29,9 @@ from app.models.schemas import (
     TeamState,
     TeamStateResponse,
 )
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import build_completion_options, cached_completion, create_sync_client, has_ai_config
 from app.services.consistency_service import build_npc_knowledge_snapshot
+from app.services.save_index import find_role, find_sub_zone, find_team_member, find_zone
 from app.services.world_service import (
     _ability_mod,
     _ability_score_with_seed,
@@ -89,20 +91,20 @@ def _current_player_area(save) -> tuple[str | None, str | None]:
 
 def _current_player_area_names(save) -> tuple[str, str]:
     zone_id, sub_zone_id = _current_player_area(save)
-    zone_name = next((item.name for item in save.area_snapshot.zones if item.zone_id == zone_id), zone_id or "当前区域")
-    sub_name = next((item.name for item in save.area_snapshot.sub_zones if item.sub_zone_id == sub_zone_id), sub_zone_id or "附近")
+    zone_name = getattr(find_zone(save.area_snapshot, zone_id), "name", zone_id or "当前区域")
+    sub_name = getattr(find_sub_zone(save.area_snapshot, sub_zone_id), "name", sub_zone_id or "附近")
     return zone_name, sub_name
 
 
 def _find_role(save, role_id: str) -> NpcRoleCard:
-    role = next((item for item in save.role_pool if item.role_id == role_id), None)
+    role = find_role(save, role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     return role
 
 
 def _find_member(state: TeamState, role_id: str) -> TeamMember | None:
-    return next((item for item in state.members if item.role_id == role_id), None)
+    return find_team_member(state, role_id)
 
 
 def _append_game_log(save, session_id: str, kind: str, message: str, payload: dict[str, str | int | float | bool] | None = None) -> None:
@@ -128,7 +130,7 @@ def _restore_area_presence(save, role: NpcRoleCard, member: TeamMember) -> None:
     role.state = "idle"
     if not member.origin_sub_zone_id:
         return
-    sub = next((item for item in save.area_snapshot.sub_zones if item.sub_zone_id == member.origin_sub_zone_id), None)
+    sub = find_sub_zone(save.area_snapshot, member.origin_sub_zone_id)
     if sub is None:
         return
     if not any(item.npc_id == role.role_id for item in sub.npcs):
@@ -212,7 +214,7 @@ def sync_team_members_with_player_in_save(save) -> bool:
     zone_id, sub_zone_id = _current_player_area(save)
     changed = False
     for member in state.members:
-        role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+        role = find_role(save, member.role_id)
         if role is None:
             continue
         if role.zone_id != zone_id:
@@ -244,7 +246,7 @@ def get_team_state(session_id: str) -> TeamStateResponse:
 
 def _remove_member_from_team_in_save(save, member: TeamMember, reason: str) -> tuple[TeamMember, NpcRoleCard | None]:
     state = ensure_team_state(save)
-    role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+    role = find_role(save, member.role_id)
     if role is not None:
         if member.is_debug:
             _remove_area_presence(save, role.role_id)
@@ -726,7 +728,11 @@ def _ai_team_role_spec(save, prompt: str, config, source: str) -> dict[str, Any]
     )
     try:
         client = create_sync_client(config, client_cls=OpenAI)
-        resp = client.chat.completions.create(
+        resp = cached_completion(
+            config,
+            "team.role_spec",
+            client.chat.completions.create,
+            accept=_extract_json_content,
             model=model,
             **build_completion_options(config),
             response_format={"type": "json_object"},
@@ -1127,7 +1133,7 @@ def team_chat(req: TeamChatRequest) -> TeamChatResponse:
     replies: list[TeamChatReply] = []
     leave_ids: list[str] = []
     for member in list(state.members):
-        role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+        role = find_role(save, member.role_id)
         if role is None:
             continue
         _append_npc_dialogue(
@@ -1247,83 +1253,112 @@ def _build_reaction(role: NpcRoleCard, trigger_kind: str, player_text: str, summ
         return (f"{role.name} 点了点头，似乎更愿意继续跟着你。", 1, 1)
     return (f"{role.name} 记下了这件事，但暂时没有多说什么。", 0, 0)
 
-def _ai_team_public_reply(save, role: NpcRoleCard, player_text: str, scene_summary: str, scene_context, config) -> tuple[str, str, int, int] | None:
-    if config is None:
-        return None
-    api_key = (config.openai_api_key or "").strip()
-    model = (config.model or "").strip()
-    if not api_key or not model:
-        return None
-    try:
-        client = create_sync_client(config, client_cls=OpenAI)
-        zone_name, sub_name = _current_player_area_names(save)
-        prompt = prompt_table.render(
-            PromptKeys.TEAM_PUBLIC_REACTION_USER,
-            "你要扮演公开区域中的一名队友，只输出 JSON。",
-            roleplay_brief=_build_npc_roleplay_brief(role),
-            scene_summary=scene_summary or "公开区域中的即时互动",
-            player_text=player_text,
-            gm_summary=scene_summary,
-            area_text=f"{zone_name} / {sub_name}",
-            context=_build_npc_prompt_context(role, save.area_snapshot.clock, recent_count=8, save=save),
-            scene_context_json=json.dumps(scene_context or {}, ensure_ascii=False),
-        )
-        resp = client.chat.completions.create(
-            model=model,
-            **build_completion_options(config),
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": config.gm_prompt},
-                {"role": "user", "content": prompt},
-            ],
-        )
-        usage = resp.usage
-        token_usage_store.add(
-            save.session_id,
-            "chat",
-            getattr(usage, "prompt_tokens", 0) or 0,
-            getattr(usage, "completion_tokens", 0) or 0,
-        )
-        parsed = json.loads((resp.choices[0].message.content or "{}").strip())
-        action_reaction = str(parsed.get("action_reaction") or "").strip()
-        speech_reply = str(parsed.get("speech_reply") or "").strip()
-        content = _compose_npc_reply(action_reaction, speech_reply).strip()
-        if not content:
-            return None
-        response_mode = "speech" if speech_reply else "action"
-        affinity_delta = max(-3, min(3, int(parsed.get("affinity_delta") or 0)))
-        trust_delta = max(-3, min(3, int(parsed.get("trust_delta") or 0)))
-        return content[:120], response_mode, affinity_delta, trust_delta
-    except Exception:
+def _team_public_reply_messages(save, role: NpcRoleCard, player_text: str, scene_summary: str, scene_context, config) -> list[dict[str, str]]:
+    zone_name, sub_name = _current_player_area_names(save)
+    prompt = prompt_table.render(
+        PromptKeys.TEAM_PUBLIC_REACTION_USER,
+        "你要扮演公开区域中的一名队友，只输出 JSON。",
+        roleplay_brief=_build_npc_roleplay_brief(role),
+        scene_summary=scene_summary or "公开区域中的即时互动",
+        player_text=player_text,
+        gm_summary=scene_summary,
+        area_text=f"{zone_name} / {sub_name}",
+        context=_build_npc_prompt_context(role, save.area_snapshot.clock, recent_count=8, save=save),
+        scene_context_json=json.dumps(scene_context or {}, ensure_ascii=False),
+    )
+    return [
+        {"role": "system", "content": config.gm_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_team_public_reply(save, resp) -> tuple[str, str, int, int] | None:
+    usage = resp.usage
+    token_usage_store.add(
+        save.session_id,
+        "chat",
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+    parsed = json.loads((resp.choices[0].message.content or "{}").strip())
+    action_reaction = str(parsed.get("action_reaction") or "").strip()
+    speech_reply = str(parsed.get("speech_reply") or "").strip()
+    content = _compose_npc_reply(action_reaction, speech_reply).strip()
+    if not content:
         return None
+    response_mode = "speech" if speech_reply else "action"
+    affinity_delta = max(-3, min(3, int(parsed.get("affinity_delta") or 0)))
+    trust_delta = max(-3, min(3, int(parsed.get("trust_delta") or 0)))
+    return content[:120], response_mode, affinity_delta, trust_delta
+
+
+def _team_public_reply_completion(config, messages: list[dict[str, str]]):
+    client = create_sync_client(config, client_cls=OpenAI)
+    return client.chat.completions.create(
+        model=(config.model or "").strip(),
+        **build_completion_options(config),
+        response_format={"type": "json_object"},
+        messages=messages,
+    )
 
 
-def generate_team_public_replies_in_save(
-    save,
-    *,
-    session_id: str,
-    player_text: str,
-    scene_summary: str,
-    scene_context=None,
-    config=None,
-    exclude_role_ids: set[str] | None = None,
-    max_replies: int = 2,
-) -> list[TeamReaction]:
+def _team_public_reply_targets(save, *, exclude_role_ids: set[str] | None, max_replies: int) -> list[tuple[Any, NpcRoleCard]]:
     state = ensure_team_state(save)
     if not state.members:
         return []
     sync_team_members_with_player_in_save(save)
     excluded = exclude_role_ids or set()
-    created: list[TeamReaction] = []
+    targets: list[tuple[Any, NpcRoleCard]] = []
     for member in list(state.members):
         if member.role_id in excluded:
             continue
-        if len(created) >= max(0, max_replies):
+        if len(targets) >= max(0, max_replies):
             break
-        role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+        role = find_role(save, member.role_id)
         if role is None:
             continue
-        generated = _ai_team_public_reply(save, role, player_text, scene_summary, scene_context, config)
+        targets.append((member, role))
+    return targets
+
+
+def _team_public_reply_requests(
+    save,
+    targets: list[tuple[Any, NpcRoleCard]],
+    player_text: str,
+    scene_summary: str,
+    scene_context,
+    config,
+) -> list[list[dict[str, str]] | None]:
+    if not has_ai_config(config):
+        return [None for _ in targets]
+    requests: list[list[dict[str, str]] | None] = []
+    for _, role in targets:
+        try:
+            requests.append(_team_public_reply_messages(save, role, player_text, scene_summary, scene_context, config))
+        except Exception:
+            requests.append(None)
+    return requests
+
+
+def _merge_team_public_reply(save, resp) -> tuple[str, str, int, int] | None:
+    if resp is None:
+        return None
+    try:
+        return _parse_team_public_reply(save, resp)
+    except Exception:
+        return None
+
+
+def _apply_team_public_replies(
+    save,
+    *,
+    session_id: str,
+    targets: list[tuple[Any, NpcRoleCard]],
+    generated_replies: list[tuple[str, str, int, int] | None],
+) -> list[TeamReaction]:
+    state = ensure_team_state(save)
+    created: list[TeamReaction] = []
+    for (member, role), generated in zip(targets, generated_replies):
         if generated is None:
             content = f"{role.name} 先侧过脸看了看四周，手指在衣摆边轻轻收紧，暂时没有抢着出声。"
             response_mode = "action"
@@ -1370,6 +1405,27 @@ def generate_team_public_replies_in_save(
     return created
 
 
+def generate_team_public_replies_in_save(
+    save,
+    *,
+    session_id: str,
+    player_text: str,
+    scene_summary: str,
+    scene_context=None,
+    config=None,
+    exclude_role_ids: set[str] | None = None,
+    max_replies: int = 2,
+) -> list[TeamReaction]:
+    targets = _team_public_reply_targets(save, exclude_role_ids=exclude_role_ids, max_replies=max_replies)
+    if not targets:
+        return []
+    requests = _team_public_reply_requests(save, targets, player_text, scene_summary, scene_context, config)
+    jobs = [lambda messages=messages: _team_public_reply_completion(config, messages) for messages in requests if messages is not None]
+    responses = iter(llm_fanout.run(jobs, provider=config.provider if config is not None else ""))
+    generated_replies = [_merge_team_public_reply(save, next(responses) if messages is not None else None) for messages in requests]
+    return _apply_team_public_replies(save, session_id=session_id, targets=targets, generated_replies=generated_replies)
+
+
 def apply_team_reactions_in_save(
     save,
     *,
@@ -1389,7 +1445,7 @@ def apply_team_reactions_in_save(
     for member in list(state.members):
         if member.role_id in excluded:
             continue
-        role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+        role = find_role(save, member.role_id)
         if role is None:
             continue
         content, affinity_delta, trust_delta = _build_reaction(role, trigger_kind, player_text, summary)
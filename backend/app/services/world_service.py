@@ -1,16 +1,35 @@
 ﻿from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import hashlib
 import json
 from math import ceil, sqrt
 import random
 import re
+from typing import Any, Callable, TypeVar
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from app.core.prompt_keys import PromptKeys
-from app.core.storage import read_save_payload, storage_state, write_save_payload
+from app.core.save_cache import (
+    ENTITY_LISTS,
+    SYNC_ENTITY_LISTS,
+    SaveConflictError,
+    save_cache,
+    save_part_fingerprint,
+    save_revision,
+    set_save_revision,
+)
+from app.core.session_executor import session_executor
+from app.core.storage import (
+    SaveBundleReader,
+    open_save_bundle,
+    read_save_file,
+    save_manifest_digest,
+    save_manifest_revision,
+    storage_state,
+)
 from app.core.token_usage import token_usage_store
 from app.core.prompt_table import prompt_table
 from app.models.schemas import (
@@ -78,6 +97,8 @@ from app.models.schemas import (
     RoleBuff,
     Dnd5eAbilityScores,
     Dnd5eAbilityModifiers,
+    MapViewRequest,
+    MapViewResponse,
     RenderMapRequest,
     RenderCircle,
     RenderMapResponse,
@@ -86,15 +107,29 @@ from app.models.schemas import (
     SaveFile,
     SceneEvent,
     SubZoneChatContext,
+    SyncEntityDelta,
+    SyncResponse,
     SubZoneChatTurn,
     SubZoneChatTurnEvent,
     WorldClock,
     WorldClockInitRequest,
     WorldClockInitResponse,
+    WorldMapQueryHit,
+    WorldMapQueryRequest,
+    WorldMapQueryResponse,
     Zone,
     ZoneSubZoneSeed,
 )
-from app.services.ai_adapter import build_completion_options, create_sync_client
+from app.services.ai_adapter import (
+    JsonStringFieldStream,
+    acreate_chat_completion,
+    astream_chat_completion,
+    build_completion_options,
+    cached_completion,
+    completion_text,
+    create_sync_client,
+    has_ai_config,
+)
 from app.services.consistency_service import (
     build_npc_knowledge_snapshot,
     bump_world_revision,
@@ -103,6 +138,10 @@ from app.services.consistency_service import (
     player_mentions_unknown_npc,
     reconcile_consistency,
 )
+from app.services.region_layout import resolve_overlaps
+from app.services.retention_service import archive_cold_items, retention_due, split_cold_items
+from app.services.save_index import find_encounter, find_item, find_role, find_sub_zone, find_temporary_npc, find_zone
+from app.services.spatial_index import SpatialEntry, SpatialGrid, sub_zone_grid, zone_grid
 
 
 class AIRegionGenerationError(RuntimeError):
@@ -121,6 +160,8 @@ class NpcChatGenerationError(RuntimeError):
     pass
 
 
+T = TypeVar("T")
+
 _ACTION_PENALTY_RULES: dict[str, str] = {
     "attack": "hit_points.current",
     "check": "hit_points.current",
@@ -168,6 +209,9 @@ def _new_game_log(session_id: str, kind: str, message: str, payload: dict[str, s
 
 _SUB_ZONE_CHAT_TURN_LIMIT = 20
 _SUB_ZONE_CHAT_EVENT_LIMIT = 5
+_LOAD_ATTEMPTS = 5
+_MAP_VIEW_SUB_ZONE_MIN_ZOOM = 0.2
+_MAP_VIEW_PARTS = ("map_snapshot", "area_snapshot", "player_runtime_data", "world_state")
 _PASSIVE_TURN_DISPLAY_TEXT = "【自动推进】玩家本轮选择观察与等待，不主动行动。"
 
 
@@ -175,7 +219,7 @@ def _current_sub_zone(save: SaveFile) -> AreaSubZone | None:
     sub_zone_id = save.area_snapshot.current_sub_zone_id
     if not sub_zone_id:
         return None
-    return next((item for item in save.area_snapshot.sub_zones if item.sub_zone_id == sub_zone_id), None)
+    return find_sub_zone(save.area_snapshot, sub_zone_id)
 
 
 def _ensure_sub_zone_chat_context(sub_zone: AreaSubZone | None) -> SubZoneChatContext | None:
@@ -239,7 +283,7 @@ def _active_encounter_for_current_sub_zone(save: SaveFile):
     state = getattr(save, "encounter_state", None)
     if state is None or not state.active_encounter_id:
         return None
-    encounter = next((item for item in state.encounters if item.encounter_id == state.active_encounter_id), None)
+    encounter = find_encounter(state, state.active_encounter_id)
     if encounter is None or encounter.status not in {"active", "escaped"}:
         return None
     current_sub_zone = save.area_snapshot.current_sub_zone_id
@@ -283,7 +327,7 @@ def _serialize_recent_sub_zone_turns(sub_zone: AreaSubZone | None, *, limit: int
 def _visible_team_roles(save: SaveFile) -> list[dict[str, str]]:
     items: list[dict[str, str]] = []
     for member in getattr(save.team_state, "members", []):
-        role = next((item for item in save.role_pool if item.role_id == member.role_id), None)
+        role = find_role(save, member.role_id)
         if role is None:
             continue
         items.append({"role_id": role.role_id, "name": role.name})
@@ -293,7 +337,7 @@ def _visible_team_roles(save: SaveFile) -> list[dict[str, str]]:
 def build_main_turn_context_payload(save: SaveFile, player_message: str, *, recent_turn_count: int = 8) -> dict[str, object]:
     _ensure_area_snapshot(save)
     sub_zone = _current_sub_zone(save)
-    zone = next((item for item in save.area_snapshot.zones if item.zone_id == save.area_snapshot.current_zone_id), None)
+    zone = find_zone(save.area_snapshot, save.area_snapshot.current_zone_id)
     active_encounter = _active_encounter_for_current_sub_zone(save)
     active_quest = next((item for item in save.quest_state.quests if item.status == "active" and item.is_tracked), None)
     if active_quest is None:
@@ -485,8 +529,8 @@ def _recompute_player_derived(profile: PlayerStaticData) -> None:
     sheet.ability_modifiers = base_mod
     sheet.current_ability_modifiers = current_mod
 
-    equipped_weapon = next((i for i in sheet.backpack.items if i.item_id == sheet.equipment_slots.weapon_item_id), None)
-    equipped_armor = next((i for i in sheet.backpack.items if i.item_id == sheet.equipment_slots.armor_item_id), None)
+    equipped_weapon = find_item(sheet.backpack, sheet.equipment_slots.weapon_item_id)
+    equipped_armor = find_item(sheet.backpack, sheet.equipment_slots.armor_item_id)
     weapon_attack_bonus = int(equipped_weapon.attack_bonus if equipped_weapon is not None else 0)
     armor_bonus = int(equipped_armor.armor_bonus if equipped_armor is not None else 0)
     buff_ac = _sum_buff_delta(buffs, "ac_delta")
@@ -881,8 +925,8 @@ def _spell_slots_total(sheet) -> int:
 
 
 def _ensure_npc_role_complete(save: SaveFile, role: NpcRoleCard) -> bool:
-    zone_name = next((item.name for item in save.area_snapshot.zones if item.zone_id == role.zone_id), role.zone_id or "当前区域")
-    sub = next((item for item in save.area_snapshot.sub_zones if item.sub_zone_id == role.sub_zone_id), None)
+    zone_name = getattr(find_zone(save.area_snapshot, role.zone_id), "name", role.zone_id or "当前区域")
+    sub = find_sub_zone(save.area_snapshot, role.sub_zone_id)
     sub_name = sub.name if sub is not None else (role.sub_zone_id or "附近")
     sub_desc = sub.description if sub is not None else ""
     flavor = _build_npc_flavor(role.role_id, zone_name, sub_name, sub_desc)
@@ -1005,7 +1049,7 @@ def _ensure_role_pool_from_area(save: SaveFile) -> bool:
 
     for sub in save.area_snapshot.sub_zones:
         if not sub.npcs:
-            zone_name = next((z.name for z in save.area_snapshot.zones if z.zone_id == sub.zone_id), sub.zone_id)
+            zone_name = getattr(find_zone(save.area_snapshot, sub.zone_id), "name", sub.zone_id)
             npc_id, npc_name = _build_npc_identity(zone_name, sub.name, sub.sub_zone_id, 0)
             sub.npcs.append(AreaNpc(npc_id=npc_id, name=npc_name, state="idle"))
             changed = True
@@ -1013,7 +1057,7 @@ def _ensure_role_pool_from_area(save: SaveFile) -> bool:
         for npc in sub.npcs:
             role = role_map.get(npc.npc_id)
             if role is None:
-                zone_name = next((z.name for z in save.area_snapshot.zones if z.zone_id == sub.zone_id), sub.zone_id)
+                zone_name = getattr(find_zone(save.area_snapshot, sub.zone_id), "name", sub.zone_id)
                 flavor = _build_npc_flavor(npc.npc_id, zone_name, sub.name, sub.description)
                 role = NpcRoleCard(
                     role_id=npc.npc_id,
@@ -1082,15 +1126,25 @@ def _ensure_role_pool_from_area(save: SaveFile) -> bool:
     return changed
 
 
-def get_current_save(default_session_id: str = "sess_default") -> SaveFile:
-    payload = read_save_payload(storage_state.save_path)
-    if payload is None:
-        save = _empty_save(default_session_id)
-        ensure_world_state(save)
-        save_current(save)
-        return save
+def _load_current_save(default_session_id: str) -> SaveFile:
+    save_path = storage_state.save_path
+    cached = save_cache.get(save_path)
+    if cached is not None and cached.normalized:
+        return cached.save
+    if cached is not None:
+        save = cached.save
+        manifest_digest = None
+    else:
+        manifest_digest = save_manifest_digest(save_path)
+        loaded = read_save_file(save_path)
+        if loaded is None:
+            save = _empty_save(default_session_id)
+            ensure_world_state(save)
+            save_current(save)
+            return save
+        save = loaded
+        set_save_revision(save, save_manifest_revision(save_path))
 
-    save = SaveFile.model_validate(payload)
     ensure_world_state(save)
     if not save.player_runtime_data.session_id:
         save.player_runtime_data.session_id = save.session_id
@@ -1120,16 +1174,74 @@ def get_current_save(default_session_id: str = "sess_default") -> SaveFile:
         if _ensure_npc_role_complete(save, role):
             changed = True
     _, reconciled = reconcile_consistency(save, session_id=save.session_id or default_session_id, reason="load")
-    if changed or reconciled:
-        save_current(save)
+    if changed or reconciled or retention_due(save):
+        _store_save(save, normalized=True)
+    else:
+        save_cache.put(
+            save_path,
+            save,
+            normalized=True,
+            dirty=False,
+            manifest_digest=manifest_digest,
+            expected_revision=save_revision(save),
+        )
     return save
 
 
-def save_current(save: SaveFile) -> None:
+def get_current_save(default_session_id: str = "sess_default") -> SaveFile:
+    # Normalizing races with writers to the same save; reload and normalize again a bounded number of times.
+    return retry_save_conflicts(_load_current_save, default_session_id, attempts=_LOAD_ATTEMPTS)
+
+
+def _store_save(save: SaveFile, *, normalized: bool) -> None:
     ensure_world_state(save)
     save.updated_at = _utc_now()
     save.player_runtime_data.updated_at = save.updated_at
-    write_save_payload(storage_state.save_path, save.model_dump(mode="json"))
+    save_path = storage_state.save_path
+
+    def archive_cold(merged: SaveFile) -> None:
+        # Split after the merge with concurrent writes, and write the segments before the trim commits:
+        # a failed archive write then leaves the items live, and the archive dedupe makes the retry idempotent.
+        archive_cold_items(merged.session_id, save_path, split_cold_items(merged))
+
+    save_cache.put(
+        save_path,
+        save,
+        normalized=normalized,
+        expected_revision=save_revision(save),
+        before_commit=archive_cold,
+    )
+
+
+def save_current(save: SaveFile) -> None:
+    _store_save(save, normalized=False)
+
+
+def retry_save_conflicts(fn: Callable[..., T], *args: Any, attempts: int = 3, **kwargs: Any) -> T:
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except SaveConflictError:
+            if attempt == attempts - 1:
+                raise
+    raise SaveConflictError("save retry attempts exhausted")
+
+
+def flush_current_save() -> None:
+    save_cache.flush(storage_state.save_path)
+
+
+def open_clean_save_bundle(session_id: str) -> SaveBundleReader | None:
+    save_path = storage_state.save_path
+    digest = save_cache.clean_digest(save_path)
+    if digest is None:
+        return None
+    reader = open_save_bundle(save_path)
+    if reader is None or reader.manifest_digest != digest:
+        return None
+    if reader.load("session_id") != session_id:
+        return None
+    return reader
 
 
 def clear_current_save(session_id: str) -> SaveFile:
@@ -1144,6 +1256,11 @@ def import_save(save: SaveFile) -> SaveFile:
 
 
 def get_player_static(session_id: str) -> PlayerStaticData:
+    reader = open_clean_save_bundle(session_id)
+    if reader is not None:
+        profile = reader.load("player_static_data")
+        _recompute_player_derived(profile)
+        return profile
     save = get_current_save(default_session_id=session_id)
     _recompute_player_derived(save.player_static_data)
     save_current(save)
@@ -1160,6 +1277,11 @@ def set_player_static(session_id: str, payload: PlayerStaticData) -> PlayerStati
 
 
 def get_player_runtime(session_id: str) -> PlayerRuntimeData:
+    reader = open_clean_save_bundle(session_id)
+    if reader is not None:
+        runtime = reader.load("player_runtime_data")
+        if runtime.session_id == session_id:
+            return runtime
     save = get_current_save(default_session_id=session_id)
     if save.player_runtime_data.session_id != session_id:
         save.player_runtime_data.session_id = session_id
@@ -1178,13 +1300,13 @@ def set_player_runtime(session_id: str, payload: PlayerRuntimeData) -> PlayerRun
 
 
 def _get_player_item(profile: PlayerStaticData, item_id: str):
-    return next((item for item in profile.dnd5e_sheet.backpack.items if item.item_id == item_id), None)
+    return find_item(profile.dnd5e_sheet.backpack, item_id)
 
 
 def _resolve_inventory_owner(save: SaveFile, owner: InventoryOwnerRef) -> tuple[str, str, PlayerStaticData, NpcRoleCard | None]:
     if owner.owner_type == "player":
         return save.player_static_data.player_id, save.player_static_data.name, save.player_static_data, None
-    role = next((item for item in save.role_pool if item.role_id == owner.role_id), None)
+    role = find_role(save, owner.role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     _ensure_npc_role_complete(save, role)
@@ -1192,7 +1314,7 @@ def _resolve_inventory_owner(save: SaveFile, owner: InventoryOwnerRef) -> tuple[
 
 
 def _get_inventory_item_for_owner(profile: PlayerStaticData, item_id: str) -> InventoryItem:
-    item = next((entry for entry in profile.dnd5e_sheet.backpack.items if entry.item_id == item_id), None)
+    item = find_item(profile.dnd5e_sheet.backpack, item_id)
     if item is None:
         raise KeyError("ITEM_NOT_FOUND")
     return item
@@ -1341,7 +1463,7 @@ def inventory_unequip(payload: InventoryUnequipRequest) -> InventoryMutationResp
     equipped_id = _unequip_profile_item(profile, payload.slot)
     equipped_name = None
     if equipped_id:
-        equipped_name = next((item.name for item in profile.dnd5e_sheet.backpack.items if item.item_id == equipped_id), None)
+        equipped_name = getattr(find_item(profile.dnd5e_sheet.backpack, equipped_id), "name", None)
     _recompute_player_derived(profile)
     if role is not None:
         role.profile = profile
@@ -1513,7 +1635,7 @@ def add_player_item(session_id: str, payload: PlayerItemAddRequest) -> PlayerSta
     save = get_current_save(default_session_id=session_id)
     save.session_id = session_id
     items = save.player_static_data.dnd5e_sheet.backpack.items
-    existing = next((it for it in items if it.item_id == payload.item.item_id), None)
+    existing = find_item(save.player_static_data.dnd5e_sheet.backpack, payload.item.item_id)
     if existing is not None:
         existing.quantity += payload.item.quantity
     else:
@@ -1527,7 +1649,7 @@ def remove_player_item(session_id: str, payload: PlayerItemRemoveRequest) -> Pla
     save = get_current_save(default_session_id=session_id)
     save.session_id = session_id
     items = save.player_static_data.dnd5e_sheet.backpack.items
-    found = next((it for it in items if it.item_id == payload.item_id), None)
+    found = find_item(save.player_static_data.dnd5e_sheet.backpack, payload.item_id)
     if found is None:
         raise KeyError("ITEM_NOT_FOUND")
     found.quantity -= payload.quantity
@@ -1638,7 +1760,59 @@ def add_game_log(req: GameLogAddRequest) -> GameLogEntry:
     return entry
 
 
+def sync_save_changes(session_id: str, since: int | None = None) -> SyncResponse:
+    save = get_current_save(default_session_id=session_id)
+    revision = save_revision(save) or 0
+    changes = save_cache.changes_since(storage_state.save_path, since, until=revision) if since is not None else None
+    if changes is None:
+        return SyncResponse(session_id=session_id, since=since, revision=revision, full=True, parts=save.model_dump(mode="json"))
+    fields = set(changes.fields)
+    appended: list[GameLogEntry] = []
+    if "game_logs" in fields:
+        count = changes.log_count
+        logs = save.game_logs
+        if count <= len(logs) and (count == 0 or logs[count - 1].id == changes.last_log_id):
+            appended = logs[count:]
+            fields.discard("game_logs")
+    entity_changes: dict[str, SyncEntityDelta] = {}
+    nested_excludes: dict[str, set[str]] = {}
+    for path in SYNC_ENTITY_LISTS:
+        dotted = ".".join(path)
+        change = changes.entities.get(dotted)
+        if path[0] not in fields or change is None:
+            continue
+        upserted, removed = change
+        items = save
+        for attr in path:
+            items = getattr(items, attr)
+        key = ENTITY_LISTS[path]
+        entity_changes[dotted] = SyncEntityDelta(
+            upserted=[item.model_dump(mode="json") for item in items if getattr(item, key) in upserted],
+            removed=sorted(removed),
+        )
+        if len(path) == 1:
+            fields.discard(path[0])
+        else:
+            nested_excludes.setdefault(path[0], set()).add(path[1])
+    parts = save.model_dump(mode="json", include=fields) if fields else {}
+    for name, excluded in nested_excludes.items():
+        parts[name] = getattr(save, name).model_dump(mode="json", exclude=excluded)
+    return SyncResponse(
+        session_id=session_id,
+        since=since,
+        revision=revision,
+        full=False,
+        parts=parts,
+        game_logs_appended=appended,
+        entity_changes=entity_changes,
+    )
+
+
 def get_game_logs(session_id: str, limit: int | None = None) -> GameLogListResponse:
+    reader = open_clean_save_bundle(session_id)
+    if reader is not None:
+        safe_limit = max(1, min(limit if limit is not None else reader.load("game_log_settings").ai_fetch_limit, 200))
+        return GameLogListResponse(session_id=session_id, items=reader.tail_game_logs(safe_limit))
     save = get_current_save(default_session_id=session_id)
     if save.session_id != session_id:
         save.session_id = session_id
@@ -1648,6 +1822,9 @@ def get_game_logs(session_id: str, limit: int | None = None) -> GameLogListRespo
 
 
 def get_game_log_settings(session_id: str) -> GameLogSettingsResponse:
+    reader = open_clean_save_bundle(session_id)
+    if reader is not None:
+        return GameLogSettingsResponse(session_id=session_id, settings=reader.load("game_log_settings"))
     save = get_current_save(default_session_id=session_id)
     return GameLogSettingsResponse(session_id=session_id, settings=save.game_log_settings)
 
@@ -1763,22 +1940,9 @@ def _is_sub_seed_quality_bad(seeds: list[ZoneSubZoneSeed], radius_m: int) -> boo
 
 
 def _enforce_non_overlap(zones: list[Zone]) -> None:
-    for i in range(len(zones)):
-        for j in range(i + 1, len(zones)):
-            a = zones[i]
-            b = zones[j]
-            dx = float(b.x - a.x)
-            dy = float(b.y - a.y)
-            d = sqrt(dx * dx + dy * dy)
-            min_d = float(a.radius_m + b.radius_m + 1)
-            if d >= min_d:
-                continue
-            if d == 0:
-                b.x += int(min_d)
-                continue
-            push = (min_d - d) / d
-            b.x = int(round(b.x + dx * push))
-            b.y = int(round(b.y + dy * push))
+    layout = resolve_overlaps([(zone.x, zone.y, zone.radius_m) for zone in zones])
+    for zone, (x, y) in zip(zones, layout.positions):
+        zone.x, zone.y = x, y
 
 
 def _extract_json_content(content: str) -> dict:
@@ -1879,7 +2043,11 @@ def _ai_discover_interactions(config: ChatConfig, sub_zone: AreaSubZone, intent:
         raise AIRegionGenerationError("discover_interactions: 缺少模型配置")
 
     client = create_sync_client(config, client_cls=OpenAI)
-    resp = client.chat.completions.create(
+    resp = cached_completion(
+        config,
+        "world.discover_interactions",
+        client.chat.completions.create,
+        accept=lambda content: _validate_discovered_interactions(_extract_json_content(content)),
         model=model,
         **build_completion_options(config),
         response_format={"type": "json_object"},
@@ -2153,6 +2321,120 @@ def render_map(req: RenderMapRequest) -> RenderMapResponse:
     )
 
 
+def map_view_etag(save: SaveFile, req: MapViewRequest) -> str:
+    # Derived from the map revision, the stamps of the parts the view reads and the viewport/LOD params,
+    # so revalidating a view never renders it.
+    if req.min_x > req.max_x or req.min_y > req.max_y:
+        raise ValueError("viewport min must not exceed max")
+    parts = save_part_fingerprint(save, _MAP_VIEW_PARTS) or (save_revision(save) or 0,)
+    lod = "sub_zones" if req.zoom >= _MAP_VIEW_SUB_ZONE_MIN_ZOOM else "zones"
+    key = (req.session_id, ensure_world_state(save).map_revision, parts, req.min_x, req.min_y, req.max_x, req.max_y, req.zoom, lod)
+    return f'W/"{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()}"'
+
+
+def render_map_view(req: MapViewRequest, save: SaveFile | None = None) -> MapViewResponse:
+    if req.min_x > req.max_x or req.min_y > req.max_y:
+        raise ValueError("viewport min must not exceed max")
+    if save is None:
+        save = get_current_save(default_session_id=req.session_id)
+    bounds = (req.min_x, req.min_y, req.max_x, req.max_y)
+    sub_grid = sub_zone_grid(save)
+    show_sub_zones = req.zoom >= _MAP_VIEW_SUB_ZONE_MIN_ZOOM
+    nodes: list[RenderNode] = []
+    circles: list[RenderCircle] = []
+    for entry in zone_grid(save).in_bbox(*bounds, touching=True):
+        zone = find_zone(save.map_snapshot, entry.key)
+        if zone is None:
+            continue
+        sub_zone_count = 0 if show_sub_zones else len(sub_grid.group(zone.zone_id))
+        nodes.append(RenderNode(zone_id=zone.zone_id, name=zone.name, x=zone.x, y=zone.y, sub_zone_count=sub_zone_count))
+        circles.append(RenderCircle(zone_id=zone.zone_id, center_x=zone.x, center_y=zone.y, radius_m=zone.radius_m))
+    sub_nodes: list[RenderSubNode] = []
+    if show_sub_zones:
+        for entry in sub_grid.in_bbox(*bounds):
+            sub = find_sub_zone(save.area_snapshot, entry.key)
+            if sub is None:
+                continue
+            sub_nodes.append(
+                RenderSubNode(sub_zone_id=sub.sub_zone_id, zone_id=sub.zone_id, name=sub.name, x=int(sub.coord.x), y=int(sub.coord.y))
+            )
+    position = save.player_runtime_data.current_position or save.map_snapshot.player_position
+    return MapViewResponse(
+        session_id=req.session_id,
+        map_revision=ensure_world_state(save).map_revision,
+        zoom=req.zoom,
+        lod="sub_zones" if show_sub_zones else "zones",
+        viewport={"min_x": req.min_x, "max_x": req.max_x, "min_y": req.min_y, "max_y": req.max_y},
+        nodes=nodes,
+        sub_nodes=sub_nodes,
+        circles=circles,
+        player_marker={"x": position.x, "y": position.y} if position is not None else None,
+    )
+
+
+def _query_grid(grid: SpatialGrid, req: WorldMapQueryRequest, x: int, y: int) -> list[tuple[float, SpatialEntry]]:
+    if req.mode == "nearest":
+        return grid.nearest(x, y, k=req.k)
+    if req.mode == "radius":
+        return grid.within_radius(x, y, req.radius_m, touching=req.touching)
+    hits = grid.in_bbox(req.min_x, req.min_y, req.max_x, req.max_y, touching=req.touching)  # type: ignore[arg-type]
+    return [(sqrt(float((entry.x - x) ** 2 + (entry.y - y) ** 2)), entry) for entry in hits]
+
+
+def query_world_map(req: WorldMapQueryRequest) -> WorldMapQueryResponse:
+    if req.mode == "bbox" and None in (req.min_x, req.min_y, req.max_x, req.max_y):
+        raise ValueError("bbox query requires min_x, min_y, max_x and max_y")
+    save = get_current_save(default_session_id=req.session_id)
+    position = save.player_runtime_data.current_position or save.map_snapshot.player_position
+    x = req.x if req.x is not None else (position.x if position else 0)
+    y = req.y if req.y is not None else (position.y if position else 0)
+    zones: list[WorldMapQueryHit] = []
+    for distance, entry in _query_grid(zone_grid(save), req, x, y):
+        zone = find_zone(save.map_snapshot, entry.key)
+        if zone is None:
+            continue
+        zones.append(
+            WorldMapQueryHit(
+                entity_type="zone",
+                entity_id=zone.zone_id,
+                zone_id=zone.zone_id,
+                name=zone.name,
+                x=zone.x,
+                y=zone.y,
+                z=zone.z,
+                radius_m=zone.radius_m,
+                distance_m=round(distance, 2),
+            )
+        )
+    sub_zones: list[WorldMapQueryHit] = []
+    if req.include_sub_zones:
+        for distance, entry in _query_grid(sub_zone_grid(save), req, x, y):
+            sub = find_sub_zone(save.area_snapshot, entry.key)
+            if sub is None:
+                continue
+            sub_zones.append(
+                WorldMapQueryHit(
+                    entity_type="sub_zone",
+                    entity_id=sub.sub_zone_id,
+                    zone_id=sub.zone_id,
+                    name=sub.name,
+                    x=int(sub.coord.x),
+                    y=int(sub.coord.y),
+                    z=int(sub.coord.z),
+                    radius_m=sub.radius_m,
+                    distance_m=round(distance, 2),
+                )
+            )
+    return WorldMapQueryResponse(
+        session_id=req.session_id,
+        mode=req.mode,
+        map_revision=ensure_world_state(save).map_revision,
+        origin={"x": x, "y": y},
+        zones=zones,
+        sub_zones=sub_zones,
+    )
+
+
 def _distance_m(from_zone: Zone, to_zone: Zone) -> float:
     dx = float(from_zone.x - to_zone.x)
     dy = float(from_zone.y - to_zone.y)
@@ -2168,7 +2450,7 @@ def _requires_encounter_escape_before_move(
     state = save.encounter_state
     if state is None or not state.active_encounter_id:
         return None
-    encounter = next((item for item in state.encounters if item.encounter_id == state.active_encounter_id), None)
+    encounter = find_encounter(state, state.active_encounter_id)
     if encounter is None or encounter.status != "active" or encounter.player_presence != "engaged":
         return None
     if encounter.zone_id and target_zone_id and encounter.zone_id != target_zone_id:
@@ -2220,11 +2502,11 @@ def move_to_zone(req: MoveRequest) -> MoveResponse:
     if save.session_id != req.session_id:
         raise ValueError("session mismatch with current save")
 
-    to_zone = next((z for z in save.map_snapshot.zones if z.zone_id == req.to_zone_id), None)
+    to_zone = find_zone(save.map_snapshot, req.to_zone_id)
     if to_zone is None:
         raise KeyError("zone not found")
 
-    from_zone = next((z for z in save.map_snapshot.zones if z.zone_id == req.from_zone_id), None)
+    from_zone = find_zone(save.map_snapshot, req.from_zone_id)
     if from_zone is None:
         current = save.player_runtime_data.current_position or save.map_snapshot.player_position
         if current is None:
@@ -2379,20 +2661,14 @@ def _infer_zone_type(tags: list[str]) -> str:
 
 
 def _select_default_sub_zone_id_for_zone(save: SaveFile, zone_id: str) -> str | None:
-    zone = next((item for item in save.area_snapshot.zones if item.zone_id == zone_id), None)
+    zone = find_zone(save.area_snapshot, zone_id)
     if zone is None:
         return None
-    candidates = [item for item in save.area_snapshot.sub_zones if item.zone_id == zone_id]
+    candidates = sub_zone_grid(save).group(zone_id)
     if not candidates:
         return None
-    ranked = sorted(
-        candidates,
-        key=lambda item: (
-            ((item.coord.x - zone.center.x) ** 2) + ((item.coord.y - zone.center.y) ** 2),
-            item.sub_zone_id,
-        ),
-    )
-    return ranked[0].sub_zone_id
+    best = min(candidates, key=lambda item: (((item.x - zone.center.x) ** 2) + ((item.y - zone.center.y) ** 2), item.key))
+    return best.key
 
 
 def _ensure_current_area_selection(save: SaveFile, preferred_zone_id: str | None = None) -> None:
@@ -2508,9 +2784,9 @@ def _ensure_area_snapshot(save: SaveFile) -> None:
 
 def _ensure_zone_subzone_placeholders(save: SaveFile, zone_id: str) -> str:
     snap = save.area_snapshot
-    zone = next((z for z in snap.zones if z.zone_id == zone_id), None)
+    zone = find_zone(snap, zone_id)
     if zone is None:
-        map_zone = next((z for z in save.map_snapshot.zones if z.zone_id == zone_id), None)
+        map_zone = find_zone(save.map_snapshot, zone_id)
         zone_name = map_zone.name if map_zone else zone_id
         zone_desc = map_zone.description if map_zone else "自动生成区块"
         zone_size = map_zone.size if map_zone else "medium"
@@ -2530,7 +2806,7 @@ def _ensure_zone_subzone_placeholders(save: SaveFile, zone_id: str) -> str:
         )
         snap.zones.append(zone)
 
-    map_zone = next((z for z in save.map_snapshot.zones if z.zone_id == zone_id), None)
+    map_zone = find_zone(save.map_snapshot, zone_id)
     seeds = (map_zone.sub_zones if map_zone and map_zone.sub_zones else _default_sub_zone_seeds(zone.size, zone.name))
     if _is_sub_seed_quality_bad(seeds, zone.radius_m):
         seeds = _default_sub_zone_seeds(zone.size, zone.name)
@@ -2539,7 +2815,7 @@ def _ensure_zone_subzone_placeholders(save: SaveFile, zone_id: str) -> str:
         sub_id = f"sub_{zone_id}_{sidx + 1}"
         if not first_sub_id:
             first_sub_id = sub_id
-        sub = next((s for s in snap.sub_zones if s.sub_zone_id == sub_id), None)
+        sub = find_sub_zone(snap, sub_id)
         if sub is None:
             sub = AreaSubZone(
                 sub_zone_id=sub_id,
@@ -2614,7 +2890,7 @@ def get_role_card(session_id: str, role_id: str) -> NpcRoleCard:
         save.session_id = session_id
     _ensure_area_snapshot(save)
     save_current(save)
-    role = next((r for r in save.role_pool if r.role_id == role_id), None)
+    role = find_role(save, role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     return role
@@ -3373,7 +3649,7 @@ def _new_scene_event(
 def _visible_public_roles(save: SaveFile) -> list[NpcRoleCard]:
     _ensure_area_snapshot(save)
     current_sub_zone_id = save.area_snapshot.current_sub_zone_id
-    current_sub = next((item for item in save.area_snapshot.sub_zones if item.sub_zone_id == current_sub_zone_id), None)
+    current_sub = find_sub_zone(save.area_snapshot, current_sub_zone_id)
     if current_sub is None:
         return []
     visible_ids = {npc.npc_id for npc in current_sub.npcs}
@@ -3416,6 +3692,56 @@ def _fallback_targeted_public_npc_reply(
     return action, speech, "met"
 
 
+def _targeted_public_npc_reply_messages(
+    save: SaveFile,
+    role: NpcRoleCard,
+    player_text: str,
+    scene_context: dict[str, object] | None,
+    config: ChatConfig,
+) -> list[dict[str, str]]:
+    knowledge = build_npc_knowledge_snapshot(save, role.role_id)
+    gm_summary = str((scene_context or {}).get("gm_narration") or "").strip()
+    world_time_text, _ = _world_time_payload(save.area_snapshot.clock)
+    prompt = prompt_table.render(
+        PromptKeys.NPC_PUBLIC_TARGETED_USER,
+        "你要扮演公开区域里被玩家喊话的NPC，只输出 JSON。",
+        roleplay_brief=_build_npc_roleplay_brief(role),
+        scene_summary=gm_summary or "公开区域中的即时互动",
+        world_time_text=world_time_text,
+        conversation_state=_npc_conversation_state_summary(role),
+        knowledge_rules="\n".join(f"- {item}" for item in knowledge.response_rules),
+        player_text=player_text,
+        context=_build_npc_prompt_context(role, save.area_snapshot.clock, recent_count=8, save=save),
+        scene_context_json=json.dumps(scene_context or {}, ensure_ascii=False),
+    )
+    return [
+        {"role": "system", "content": config.gm_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_targeted_public_npc_reply(role: NpcRoleCard, player_text: str, content: str) -> tuple[str, str, str] | None:
+    parsed = _extract_json_content(content)
+    action = str(parsed.get("action_reaction") or "").strip()
+    speech = str(parsed.get("speech_reply") or "").strip()
+    relation_tag = str(parsed.get("relation_tag") or "met").strip().lower()
+    if relation_tag not in {"ally", "friendly", "met", "neutral", "wary", "hostile"}:
+        relation_tag = "met"
+    action, speech = _normalize_npc_reply_parts(
+        role,
+        "",
+        player_text,
+        None,
+        action,
+        speech,
+        allow_action_repair=False,
+        allow_speech_repair=False,
+    )
+    if action or speech:
+        return action, speech, relation_tag
+    return None
+
+
 def _generate_targeted_public_npc_reply(
     save: SaveFile,
     role: NpcRoleCard,
@@ -3423,60 +3749,46 @@ def _generate_targeted_public_npc_reply(
     scene_context: dict[str, object] | None,
     config: ChatConfig | None,
 ) -> tuple[str, str, str]:
-    knowledge = build_npc_knowledge_snapshot(save, role.role_id)
-    gm_summary = str((scene_context or {}).get("gm_narration") or "").strip()
-    scene_context_json = json.dumps(scene_context or {}, ensure_ascii=False)
     if config is not None:
         api_key = (config.openai_api_key or "").strip()
         model = (config.model or "").strip()
         if api_key and model:
             try:
                 client = create_sync_client(config, client_cls=OpenAI)
-                world_time_text, _ = _world_time_payload(save.area_snapshot.clock)
-                prompt = prompt_table.render(
-                    PromptKeys.NPC_PUBLIC_TARGETED_USER,
-                    "你要扮演公开区域里被玩家喊话的NPC，只输出 JSON。",
-                    roleplay_brief=_build_npc_roleplay_brief(role),
-                    scene_summary=gm_summary or "公开区域中的即时互动",
-                    world_time_text=world_time_text,
-                    conversation_state=_npc_conversation_state_summary(role),
-                    knowledge_rules="\n".join(f"- {item}" for item in knowledge.response_rules),
-                    player_text=player_text,
-                    context=_build_npc_prompt_context(role, save.area_snapshot.clock, recent_count=8, save=save),
-                    scene_context_json=scene_context_json,
-                )
+                messages = _targeted_public_npc_reply_messages(save, role, player_text, scene_context, config)
                 resp = client.chat.completions.create(
                     model=model,
                     **build_completion_options(config),
                     response_format={"type": "json_object"},
-                    messages=[
-                        {"role": "system", "content": config.gm_prompt},
-                        {"role": "user", "content": prompt},
-                    ],
+                    messages=messages,
                 )
-                parsed = _extract_json_content((resp.choices[0].message.content or "").strip())
-                action = str(parsed.get("action_reaction") or "").strip()
-                speech = str(parsed.get("speech_reply") or "").strip()
-                relation_tag = str(parsed.get("relation_tag") or "met").strip().lower()
-                if relation_tag not in {"ally", "friendly", "met", "neutral", "wary", "hostile"}:
-                    relation_tag = "met"
-                action, speech = _normalize_npc_reply_parts(
-                    role,
-                    "",
-                    player_text,
-                    None,
-                    action,
-                    speech,
-                    allow_action_repair=False,
-                    allow_speech_repair=False,
-                )
-                if action or speech:
-                    return action, speech, relation_tag
+                reply = _parse_targeted_public_npc_reply(role, player_text, (resp.choices[0].message.content or "").strip())
+                if reply is not None:
+                    return reply
             except Exception:
                 pass
     return _fallback_targeted_public_npc_reply(role, player_text, scene_context)
 
 
+async def _generate_targeted_public_npc_reply_async(
+    save: SaveFile,
+    role: NpcRoleCard,
+    player_text: str,
+    scene_context: dict[str, object] | None,
+    config: ChatConfig | None,
+) -> tuple[str, str, str]:
+    if has_ai_config(config):
+        try:
+            messages = _targeted_public_npc_reply_messages(save, role, player_text, scene_context, config)
+            resp = await acreate_chat_completion(config, messages, client_cls=AsyncOpenAI)
+            reply = _parse_targeted_public_npc_reply(role, player_text, completion_text(resp))
+            if reply is not None:
+                return reply
+        except Exception:
+            pass
+    return _fallback_targeted_public_npc_reply(role, player_text, scene_context)
+
+
 def _generate_bystander_public_reactions(
     save: SaveFile,
     roles: list[NpcRoleCard],
@@ -3599,7 +3911,7 @@ def npc_greet(req: NpcGreetRequest) -> NpcGreetResponse:
     _ensure_area_snapshot(save)
     if save.area_snapshot.clock is None:
         save.area_snapshot.clock = _default_world_clock()
-    role = next((r for r in save.role_pool if r.role_id == req.npc_role_id), None)
+    role = find_role(save, req.npc_role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
 
@@ -3676,7 +3988,25 @@ def npc_greet(req: NpcGreetRequest) -> NpcGreetResponse:
     return NpcGreetResponse(session_id=req.session_id, npc_role_id=role.role_id, greeting=greeting)
 
 
-def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
+@dataclass
+class _NpcChatTurn:
+    req: NpcChatRequest
+    save: SaveFile
+    role: NpcRoleCard
+    time_spent_min: int
+    action_text: str
+    speech_text: str
+    player_text: str
+    action_check: dict[str, object] | None
+    recovered_talkative: int
+    knowledge: Any
+    messages: list[dict[str, str]] | None = None
+    action_reaction: str = ""
+    speech_reply: str = ""
+    relation_tag: str = "met"
+
+
+def _begin_npc_chat(req: NpcChatRequest) -> _NpcChatTurn:
     time_spent_min = apply_speech_time(req.session_id, req.player_message, req.config)
     save = get_current_save(default_session_id=req.session_id)
     if save.session_id != req.session_id:
@@ -3685,7 +4015,7 @@ def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
     if save.area_snapshot.clock is None:
         save.area_snapshot.clock = _default_world_clock()
 
-    role = next((r for r in save.role_pool if r.role_id == req.npc_role_id), None)
+    role = find_role(save, req.npc_role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     _ensure_npc_role_complete(save, role)
@@ -3705,19 +4035,23 @@ def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
         clock=save.area_snapshot.clock,
     )
 
-    recovered_talkative = _restore_npc_talkative(role, save.area_snapshot.clock)
-    action_reaction = ""
-    speech_reply = ""
-    relation_tag = "met"
-    allow_action_repair = False
-    allow_speech_repair = False
-    scene_events: list[SceneEvent] = []
-    knowledge = build_npc_knowledge_snapshot(save, role.role_id)
+    turn = _NpcChatTurn(
+        req=req,
+        save=save,
+        role=role,
+        time_spent_min=time_spent_min,
+        action_text=action_text,
+        speech_text=speech_text,
+        player_text=player_text,
+        action_check=action_check,
+        recovered_talkative=_restore_npc_talkative(role, save.area_snapshot.clock),
+        knowledge=build_npc_knowledge_snapshot(save, role.role_id),
+    )
     if role.talkative_current <= 0:
-        action_reaction = f"{role.name} 明显不想继续交谈，只是移开了视线。"
+        turn.action_reaction = f"{role.name} 明显不想继续交谈，只是移开了视线。"
     elif player_mentions_unknown_npc(save, role.role_id, player_text):
-        action_reaction = f"{role.name} 皱起眉，像是在确认你提到的是谁。"
-        speech_reply = npc_guard_reply()
+        turn.action_reaction = f"{role.name} 皱起眉，像是在确认你提到的是谁。"
+        turn.speech_reply = npc_guard_reply()
     else:
         if req.config is None:
             raise NpcChatConfigError("npc chat requires config with openai_api_key and model")
@@ -3725,107 +4059,122 @@ def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
         model = (req.config.model or "").strip()
         if not api_key or not model:
             raise NpcChatConfigError("npc chat requires openai_api_key and model")
-        try:
-            client = create_sync_client(req.config, client_cls=OpenAI)
-            world_time_text, _ = _world_time_payload(save.area_snapshot.clock)
-            context = _build_npc_prompt_context(role, save.area_snapshot.clock, save=save)
-            conversation_state = _npc_conversation_state_summary(role)
-            default_prompt = (
-                "你要扮演一个NPC与玩家进行单独交互。"
-                "必须保持人设一致，结合历史对话、当前世界时间、玩家动作与检定结果作答。"
-                "你只能基于当前合法世界事实回答；若玩家提到不存在、已失效或不在你知识范围内的人物/区域，明确表示不知道或不确认。"
-                "你只输出JSON，不要输出额外解释。"
-                "JSON schema: {\"action_reaction\":\"...\",\"speech_reply\":\"...\",\"relation_tag\":\"ally|friendly|met|neutral|wary|hostile\"}。"
-                "speech_reply 可以为空；NPC允许只做动作不说话。"
-                "action_reaction 必须始终先写，且至少包含神态+一个可见动作或站位变化，不能只写“显得警惕”“显得冷淡”这种概括。"
-                "如果玩家语言里包含问题、确认句或询问身份/关系/去向，speech_reply 必须直接回答该问题，不能只说“继续”“我在听”。"
-                "如果玩家是在追问你上一轮提到的概念、名词或事件，必须先解释那个概念本身，不能切回你自己的静态喜好。"
-                "\nNPC信息: name=$name, personality=$personality, speaking_style=$speaking_style, "
-                "appearance=$appearance, background=$background, cognition=$cognition, alignment=$alignment, secret=$secret, likes=$likes"
-                "\n当前世界时间: $world_time_text"
-                "\n当前健谈值: $talkative_current / $talkative_maximum"
-                "\n当前会话状态:\n$conversation_state"
-                "\n当前知识边界规则:\n$knowledge_rules"
-                "\n当前可知本地NPC IDs: $known_local_npc_ids"
-                "\n当前不可编造实体 IDs: $forbidden_entity_ids"
-                "\n历史对话(按时间顺序):\n$context"
-                "\n玩家动作: $player_action"
-                "\n玩家语言: $player_speech"
-                "\n玩家检定结果: $action_check_result"
-                "\n玩家刚刚完整输入: $player_text"
-            )
-            prompt = prompt_table.render(
-                PromptKeys.NPC_CHAT_USER,
-                default_prompt,
-                name=role.name,
-                roleplay_brief=_build_npc_roleplay_brief(role),
-                personality=role.personality,
-                speaking_style=role.speaking_style,
-                appearance=role.appearance,
-                background=role.background,
-                cognition=role.cognition,
-                alignment=role.alignment,
-                secret=role.secret,
-                likes=" / ".join(role.likes) or "无特殊偏好",
-                world_time_text=world_time_text,
-                talkative_current=role.talkative_current,
-                talkative_maximum=role.talkative_maximum,
-                conversation_state=conversation_state,
-                knowledge_rules="\n".join(f"- {item}" for item in knowledge.response_rules),
-                known_local_npc_ids=",".join(knowledge.known_local_npc_ids) or "none",
-                forbidden_entity_ids=",".join(knowledge.forbidden_entity_ids) or "none",
-                context=context,
-                player_action=action_text or "无",
-                player_speech=speech_text or "无",
-                action_check_result=json.dumps(action_check or {"status": "none"}, ensure_ascii=False),
-                player_text=player_text,
-            )
-            resp = client.chat.completions.create(
-                model=model,
-                **build_completion_options(req.config),
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": req.config.gm_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-            )
-            parsed = _extract_json_content((resp.choices[0].message.content or "").strip())
-            action_reaction = str(parsed.get("action_reaction") or "").strip()
-            speech_reply = str(parsed.get("speech_reply") or "").strip()
-            tag = str(parsed.get("relation_tag") or "").strip().lower()
-            if tag in {"ally", "friendly", "met", "neutral", "wary", "hostile"}:
-                relation_tag = tag
-            forbidden_role_names = [
-                item.name
-                for item in save.role_pool
-                if item.role_id not in knowledge.known_local_npc_ids and item.role_id != role.role_id
-            ]
-            generated_reply = _compose_npc_reply(action_reaction, speech_reply)
-            if any(name and name in generated_reply for name in forbidden_role_names):
-                raise NpcChatGenerationError("npc chat output referenced forbidden entity")
-            usage = resp.usage
-            token_usage_store.add(
-                req.session_id,
-                "chat",
-                getattr(usage, "prompt_tokens", 0) or 0,
-                getattr(usage, "completion_tokens", 0) or 0,
-            )
-        except NpcChatGenerationError:
-            raise
-        except ValueError as exc:
-            raise NpcChatGenerationError(f"npc chat output parse failed: {exc}") from exc
-        except Exception as exc:
-            raise NpcChatGenerationError(f"npc chat generation failed: {exc}") from exc
+        turn.messages = _npc_chat_messages(turn)
+    return turn
 
+
+def _npc_chat_messages(turn: _NpcChatTurn) -> list[dict[str, str]]:
+    role = turn.role
+    save = turn.save
+    knowledge = turn.knowledge
+    world_time_text, _ = _world_time_payload(save.area_snapshot.clock)
+    context = _build_npc_prompt_context(role, save.area_snapshot.clock, save=save)
+    conversation_state = _npc_conversation_state_summary(role)
+    default_prompt = (
+        "你要扮演一个NPC与玩家进行单独交互。"
+        "必须保持人设一致，结合历史对话、当前世界时间、玩家动作与检定结果作答。"
+        "你只能基于当前合法世界事实回答；若玩家提到不存在、已失效或不在你知识范围内的人物/区域，明确表示不知道或不确认。"
+        "你只输出JSON，不要输出额外解释。"
+        "JSON schema: {\"action_reaction\":\"...\",\"speech_reply\":\"...\",\"relation_tag\":\"ally|friendly|met|neutral|wary|hostile\"}。"
+        "speech_reply 可以为空；NPC允许只做动作不说话。"
+        "action_reaction 必须始终先写，且至少包含神态+一个可见动作或站位变化，不能只写“显得警惕”“显得冷淡”这种概括。"
+        "如果玩家语言里包含问题、确认句或询问身份/关系/去向，speech_reply 必须直接回答该问题，不能只说“继续”“我在听”。"
+        "如果玩家是在追问你上一轮提到的概念、名词或事件，必须先解释那个概念本身，不能切回你自己的静态喜好。"
+        "\nNPC信息: name=$name, personality=$personality, speaking_style=$speaking_style, "
+        "appearance=$appearance, background=$background, cognition=$cognition, alignment=$alignment, secret=$secret, likes=$likes"
+        "\n当前世界时间: $world_time_text"
+        "\n当前健谈值: $talkative_current / $talkative_maximum"
+        "\n当前会话状态:\n$conversation_state"
+        "\n当前知识边界规则:\n$knowledge_rules"
+        "\n当前可知本地NPC IDs: $known_local_npc_ids"
+        "\n当前不可编造实体 IDs: $forbidden_entity_ids"
+        "\n历史对话(按时间顺序):\n$context"
+        "\n玩家动作: $player_action"
+        "\n玩家语言: $player_speech"
+        "\n玩家检定结果: $action_check_result"
+        "\n玩家刚刚完整输入: $player_text"
+    )
+    prompt = prompt_table.render(
+        PromptKeys.NPC_CHAT_USER,
+        default_prompt,
+        name=role.name,
+        roleplay_brief=_build_npc_roleplay_brief(role),
+        personality=role.personality,
+        speaking_style=role.speaking_style,
+        appearance=role.appearance,
+        background=role.background,
+        cognition=role.cognition,
+        alignment=role.alignment,
+        secret=role.secret,
+        likes=" / ".join(role.likes) or "无特殊偏好",
+        world_time_text=world_time_text,
+        talkative_current=role.talkative_current,
+        talkative_maximum=role.talkative_maximum,
+        conversation_state=conversation_state,
+        knowledge_rules="\n".join(f"- {item}" for item in knowledge.response_rules),
+        known_local_npc_ids=",".join(knowledge.known_local_npc_ids) or "none",
+        forbidden_entity_ids=",".join(knowledge.forbidden_entity_ids) or "none",
+        context=context,
+        player_action=turn.action_text or "无",
+        player_speech=turn.speech_text or "无",
+        action_check_result=json.dumps(turn.action_check or {"status": "none"}, ensure_ascii=False),
+        player_text=turn.player_text,
+    )
+    return [
+        {"role": "system", "content": turn.req.config.gm_prompt},  # type: ignore[union-attr]
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _apply_npc_chat_output(turn: _NpcChatTurn, content: str, usage: Any) -> None:
+    try:
+        parsed = _extract_json_content(content)
+        turn.action_reaction = str(parsed.get("action_reaction") or "").strip()
+        turn.speech_reply = str(parsed.get("speech_reply") or "").strip()
+        tag = str(parsed.get("relation_tag") or "").strip().lower()
+        if tag in {"ally", "friendly", "met", "neutral", "wary", "hostile"}:
+            turn.relation_tag = tag
+        forbidden_role_names = [
+            item.name
+            for item in turn.save.role_pool
+            if item.role_id not in turn.knowledge.known_local_npc_ids and item.role_id != turn.role.role_id
+        ]
+        generated_reply = _compose_npc_reply(turn.action_reaction, turn.speech_reply)
+        if any(name and name in generated_reply for name in forbidden_role_names):
+            raise NpcChatGenerationError("npc chat output referenced forbidden entity")
+        token_usage_store.add(
+            turn.req.session_id,
+            "chat",
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+    except NpcChatGenerationError:
+        raise
+    except ValueError as exc:
+        raise NpcChatGenerationError(f"npc chat output parse failed: {exc}") from exc
+    except Exception as exc:
+        raise NpcChatGenerationError(f"npc chat generation failed: {exc}") from exc
+
+
+def _finish_npc_chat(turn: _NpcChatTurn) -> NpcChatResponse:
+    req = turn.req
+    save = turn.save
+    role = turn.role
+    action_text = turn.action_text
+    speech_text = turn.speech_text
+    player_text = turn.player_text
+    time_spent_min = turn.time_spent_min
+    relation_tag = turn.relation_tag
+    scene_events: list[SceneEvent] = []
     action_reaction, speech_reply = _normalize_npc_reply_parts(
         role,
         action_text,
         speech_text,
-        action_check,
-        action_reaction,
-        speech_reply,
-        allow_action_repair=allow_action_repair,
-        allow_speech_repair=allow_speech_repair,
+        turn.action_check,
+        turn.action_reaction,
+        turn.speech_reply,
+        allow_action_repair=False,
+        allow_speech_repair=False,
     )
     action_reaction = _normalize_logged_speaker_content("npc", role.name, action_reaction)
     speech_reply = _normalize_logged_speaker_content("npc", role.name, speech_reply)
@@ -3871,7 +4220,7 @@ def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
                 "npc_role_id": role.role_id,
                 "time_spent_min": time_spent_min,
                 "talkative_current": role.talkative_current,
-                "talkative_recovered": recovered_talkative,
+                "talkative_recovered": turn.recovered_talkative,
             },
         )
     )
@@ -3917,12 +4266,46 @@ def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
     )
 
 
+def npc_chat(req: NpcChatRequest) -> NpcChatResponse:
+    turn = _begin_npc_chat(req)
+    if turn.messages is not None:
+        try:
+            resp = create_sync_client(req.config, client_cls=OpenAI).chat.completions.create(  # type: ignore[arg-type]
+                model=(req.config.model or "").strip(),  # type: ignore[union-attr]
+                **build_completion_options(req.config),  # type: ignore[arg-type]
+                response_format={"type": "json_object"},
+                messages=turn.messages,
+            )
+        except Exception as exc:
+            raise NpcChatGenerationError(f"npc chat generation failed: {exc}") from exc
+        _apply_npc_chat_output(turn, (resp.choices[0].message.content or "").strip(), resp.usage)
+    return _finish_npc_chat(turn)
+
+
+async def astream_npc_chat(req: NpcChatRequest, on_delta: Callable[[str], None]) -> NpcChatResponse:
+    turn = await session_executor.run(req.session_id, _begin_npc_chat, req)
+    if turn.messages is not None:
+        fields = JsonStringFieldStream(("action_reaction", "speech_reply"))
+
+        def forward(text: str) -> None:
+            visible = fields.feed(text)
+            if visible:
+                on_delta(visible)
+
+        try:
+            content, usage = await astream_chat_completion(req.config, turn.messages, on_delta=forward, client_cls=AsyncOpenAI)  # type: ignore[arg-type]
+        except Exception as exc:
+            raise NpcChatGenerationError(f"npc chat generation failed: {exc}") from exc
+        _apply_npc_chat_output(turn, content.strip(), usage)
+    return await session_executor.run(req.session_id, _finish_npc_chat, turn)
+
+
 def upsert_player_relation(session_id: str, role_id: str, relation_tag: str, note: str = "") -> NpcRoleCard:
     save = get_current_save(default_session_id=session_id)
     if save.session_id != session_id:
         save.session_id = session_id
     _ensure_area_snapshot(save)
-    role = next((r for r in save.role_pool if r.role_id == role_id), None)
+    role = find_role(save, role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     player_id = save.player_static_data.player_id
@@ -3943,7 +4326,7 @@ def set_role_relation(session_id: str, role_id: str, payload: RoleRelationSetReq
     if save.session_id != session_id:
         save.session_id = session_id
     _ensure_area_snapshot(save)
-    role = next((r for r in save.role_pool if r.role_id == role_id), None)
+    role = find_role(save, role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
 
@@ -3965,10 +4348,10 @@ def _find_active_encounter_temp_npc(save: SaveFile, actor_role_id: str | None):
     state = getattr(save, "encounter_state", None)
     if state is None or not getattr(state, "active_encounter_id", None):
         return None
-    encounter = next((item for item in getattr(state, "encounters", []) if item.encounter_id == state.active_encounter_id), None)
+    encounter = find_encounter(state, state.active_encounter_id)
     if encounter is None or encounter.status not in {"active", "escaped"}:
         return None
-    return next((item for item in getattr(encounter, "temporary_npcs", []) if item.encounter_npc_id == actor_role_id), None)
+    return find_temporary_npc(encounter, actor_role_id)
 
 
 def _actor_kind(save: SaveFile, actor_role_id: str | None) -> str:
@@ -3988,7 +4371,7 @@ def _get_actor_profile(save: SaveFile, actor_role_id: str | None) -> tuple[str,
         profile = PlayerStaticData(role_type="npc", name=temp_npc.name or "遭遇角色")
         _recompute_player_derived(profile)
         return temp_npc.encounter_npc_id, profile
-    role = next((r for r in save.role_pool if r.role_id == actor_role_id), None)
+    role = find_role(save, actor_role_id)
     if role is None:
         raise KeyError("ROLE_NOT_FOUND")
     _recompute_player_derived(role.profile)
@@ -4088,6 +4471,29 @@ def _fallback_action_plan(action_type: str, action_prompt: str) -> dict[str, int
     )
 
 
+def _action_plan_messages(action_type: str, action_prompt: str) -> list[dict[str, str]]:
+    default_prompt = (
+        "你是跑团行动判定助手。基于玩家行动，返回JSON。"
+        "字段: ability_used(strength|dexterity|constitution|intelligence|wisdom|charisma),"
+        "dc(5-30),time_spent_min(>=1),requires_check(boolean),check_task(string)。"
+        "规则: 任何结果不明确、存在风险、需要说服/潜行/逃脱/破解/攻击/强行尝试的行为，都应 requires_check=true。"
+        "只有结果明显、无需悬念或风险的简单行为，才允许 requires_check=false。"
+        "check_task 要写清楚这次到底在判定什么。"
+        "action_type=attack/check/item_use。"
+        "action_type=$action_type, action_prompt=$action_prompt"
+    )
+    prompt = prompt_table.render(
+        "action.plan.user",
+        default_prompt,
+        action_type=action_type,
+        action_prompt=action_prompt,
+    )
+    return [
+        {"role": "system", "content": prompt_table.get_text("action.plan.system", "你只输出JSON。")},
+        {"role": "user", "content": prompt},
+    ]
+
+
 def _ai_action_plan(
     action_type: str,
     action_prompt: str,
@@ -4101,31 +4507,12 @@ def _ai_action_plan(
         return _fallback_action_plan(action_type, action_prompt)
 
     try:
-        default_prompt = (
-            "你是跑团行动判定助手。基于玩家行动，返回JSON。"
-            "字段: ability_used(strength|dexterity|constitution|intelligence|wisdom|charisma),"
-            "dc(5-30),time_spent_min(>=1),requires_check(boolean),check_task(string)。"
-            "规则: 任何结果不明确、存在风险、需要说服/潜行/逃脱/破解/攻击/强行尝试的行为，都应 requires_check=true。"
-            "只有结果明显、无需悬念或风险的简单行为，才允许 requires_check=false。"
-            "check_task 要写清楚这次到底在判定什么。"
-            "action_type=attack/check/item_use。"
-            "action_type=$action_type, action_prompt=$action_prompt"
-        )
-        prompt = prompt_table.render(
-            "action.plan.user",
-            default_prompt,
-            action_type=action_type,
-            action_prompt=action_prompt,
-        )
         client = create_sync_client(config, client_cls=OpenAI)
         resp = client.chat.completions.create(
             model=model,
             **build_completion_options(config),
             response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": prompt_table.get_text("action.plan.system", "你只输出JSON。")},
-                {"role": "user", "content": prompt},
-            ],
+            messages=_action_plan_messages(action_type, action_prompt),
         )
         content = (resp.choices[0].message.content or "").strip()
         parsed = _extract_json_content(content)
@@ -4134,6 +4521,20 @@ def _ai_action_plan(
         return _fallback_action_plan(action_type, action_prompt)
 
 
+async def _ai_action_plan_async(
+    action_type: str,
+    action_prompt: str,
+    config: ChatConfig | None,
+) -> dict[str, int | bool | str]:
+    if not has_ai_config(config):
+        return _fallback_action_plan(action_type, action_prompt)
+    try:
+        resp = await acreate_chat_completion(config, _action_plan_messages(action_type, action_prompt), client_cls=AsyncOpenAI)
+        return _normalize_action_plan(action_type, action_prompt, _extract_json_content(completion_text(resp)))
+    except Exception:
+        return _fallback_action_plan(action_type, action_prompt)
+
+
 def _planned_action_plan(req: ActionCheckRequest) -> dict[str, int | bool | str] | None:
     if (
         req.planned_ability_used is None
@@ -4453,7 +4854,7 @@ def action_check(req: ActionCheckRequest) -> ActionCheckResponse:
         try:
             npc_id = req.action_prompt.split("npc_id=", 1)[1].split(";", 1)[0].strip()
             if npc_id:
-                role = next((r for r in save.role_pool if r.role_id == npc_id), None)
+                role = find_role(save, npc_id)
                 if role is not None:
                     _upsert_npc_player_relation(role, save.player_static_data.player_id, relation_tag, "行动检定自动更新关系")
                     role.attitude_changes.append(f"{_utc_now()} action->{relation_tag}")
@@ -4554,7 +4955,7 @@ def move_to_sub_zone(req: AreaMoveSubZoneRequest) -> AreaMoveResult:
     if snap.clock is None:
         raise ValueError("AREA_CLOCK_NOT_INIT")
 
-    to_sub = next((s for s in snap.sub_zones if s.sub_zone_id == req.to_sub_zone_id), None)
+    to_sub = find_sub_zone(snap, req.to_sub_zone_id)
     if to_sub is None:
         raise KeyError("AREA_SUB_ZONE_NOT_FOUND")
     if not to_sub.key_interactions:
@@ -4568,16 +4969,16 @@ def move_to_sub_zone(req: AreaMoveSubZoneRequest) -> AreaMoveResult:
             )
         )
     if not to_sub.npcs:
-        zone_name = next((z.name for z in snap.zones if z.zone_id == to_sub.zone_id), to_sub.zone_id)
+        zone_name = getattr(find_zone(snap, to_sub.zone_id), "name", to_sub.zone_id)
         npc_id, npc_name = _build_npc_identity(zone_name, to_sub.name, to_sub.sub_zone_id, 0)
         to_sub.npcs.append(AreaNpc(npc_id=npc_id, name=npc_name, state="idle"))
     to_coord = to_sub.coord
 
-    from_sub = next((s for s in snap.sub_zones if s.sub_zone_id == snap.current_sub_zone_id), None)
+    from_sub = find_sub_zone(snap, snap.current_sub_zone_id)
     if from_sub is not None:
         from_point = AreaMovePoint(zone_id=from_sub.zone_id, sub_zone_id=from_sub.sub_zone_id, coord=from_sub.coord)
     else:
-        from_zone = next((z for z in snap.zones if z.zone_id == (snap.current_zone_id or to_sub.zone_id)), None)
+        from_zone = find_zone(snap, snap.current_zone_id or to_sub.zone_id)
         from_center = from_zone.center if from_zone is not None else Coord3D(x=0, y=0, z=0)
         from_point = AreaMovePoint(zone_id=(from_zone.zone_id if from_zone else to_sub.zone_id), coord=from_center)
 
@@ -4694,7 +5095,7 @@ def discover_interactions(req: AreaDiscoverInteractionsRequest) -> AreaDiscoverI
         raise ValueError("session mismatch with current save")
     _ensure_area_snapshot(save)
     snap = save.area_snapshot
-    target = next((s for s in snap.sub_zones if s.sub_zone_id == req.sub_zone_id), None)
+    target = find_sub_zone(snap, req.sub_zone_id)
     if target is None:
         raise KeyError("AREA_SUB_ZONE_NOT_FOUND")
 
@@ -4813,7 +5214,10 @@ def describe_behavior(session_id: str, movement_log: MovementLog, config: ChatCo
             default_prompt,
             movement_log_json=json.dumps(movement_log.model_dump(mode="json"), ensure_ascii=False),
         )
-        resp = client.chat.completions.create(
+        resp = cached_completion(
+            config,
+            "behavior.describe",
+            client.chat.completions.create,
             model=model,
             **build_completion_options(config),
             messages=[
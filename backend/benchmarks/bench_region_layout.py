@@ -0,0 +1,35 @@
+import argparse
+import random
+import time
+
+from app.services.region_layout import resolve_overlaps
+
+
+def _circles(count: int, spacing: int, seed: int) -> list[tuple[int, int, int]]:
+    rng = random.Random(seed)
+    span = int(count**0.5 * spacing)
+    return [(rng.randint(-span, span), rng.randint(-span, span), rng.choice([60, 120, 180, 240, 300])) for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time region overlap resolution on random maps.")
+    parser.add_argument("--counts", default="100,1000,3000")
+    parser.add_argument("--spacing", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for count in [int(item) for item in args.counts.split(",") if item.strip()]:
+        timings: list[float] = []
+        for seed in range(args.repeat):
+            circles = _circles(count, args.spacing, seed)
+            started = time.perf_counter()
+            result = resolve_overlaps(circles)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(
+            f"zones={count:>6} median={timings[len(timings) // 2]:8.1f}ms best={timings[0]:8.1f}ms "
+            f"iterations={result.iterations} converged={result.converged}"
+        )
+
+
+if __name__ == "__main__":
+    main()
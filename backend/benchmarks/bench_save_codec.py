@@ -0,0 +1,124 @@
+import argparse
+import gc
+import json
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable
+
+from app.core import json_codec
+from app.core.storage import (
+    _PART_NAMES,
+    _field_adapter,
+    _part_body,
+    _serialize_part,
+    read_save_file,
+    read_save_payload,
+    write_save_payload,
+)
+from app.models.schemas import (
+    AreaSnapshot,
+    AreaSubZone,
+    AreaZone,
+    Coord3D,
+    GameLogEntry,
+    NpcDialogueEntry,
+    NpcRoleCard,
+    PlayerStaticData,
+    SaveFile,
+)
+
+
+def _build_save(target_mb: float) -> SaveFile:
+    save = SaveFile(session_id="sess_bench")
+    zones = [AreaZone(zone_id=f"zone_{idx}", name=f"北境要塞{idx}", center=Coord3D(x=idx * 300, y=0, z=0), description="寒风呼啸的石墙与瞭望塔。" * 4) for idx in range(60)]
+    sub_zones = [
+        AreaSubZone(sub_zone_id=f"sub_{idx}", zone_id=f"zone_{idx % 60}", name=f"集市{idx}", coord=Coord3D(x=idx, y=idx, z=0), description="摊贩叫卖着皮毛与干肉。" * 4)
+        for idx in range(300)
+    ]
+    save.area_snapshot = AreaSnapshot(zones=zones, sub_zones=sub_zones)
+    save.game_logs = [GameLogEntry(id=f"glog_{idx}", session_id="sess_bench", kind="note", message=f"第{idx}回合：玩家在集市打听消息。") for idx in range(1000)]
+    idx = 0
+    while len(save.model_dump_json()) < target_mb * 1024 * 1024:
+        dialogue = [
+            NpcDialogueEntry(
+                id=f"dlg_{idx}_{turn}",
+                speaker="npc" if turn % 2 else "player",
+                speaker_role_id=f"npc_{idx}",
+                speaker_name=f"守卫{idx}",
+                content="今天城门很安静，没有可疑的人出入，不过北边的山路据说不太平。",
+                world_time_text="1024年3月14日 09:30",
+            )
+            for turn in range(40)
+        ]
+        save.role_pool.extend(
+            NpcRoleCard(
+                role_id=f"npc_{idx + offset}",
+                name=f"守卫{idx + offset}",
+                personality="沉默寡言，忠于城主，对外来者保持警惕。",
+                background="出身于北境的猎户家庭，年轻时参军。" * 3,
+                likes=["烈酒", "猎犬", "旧地图"],
+                profile=PlayerStaticData(role_type="npc"),
+                dialogue_logs=dialogue,
+            )
+            for offset in range(10)
+        )
+        idx += 10
+    return save
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the dict + json path with the direct JSON codec path for saves.")
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    save = _build_save(args.size_mb)
+    with tempfile.TemporaryDirectory() as tmp:
+        save_path = Path(tmp) / "current-save.json"
+        write_save_payload(save_path, save)
+
+        def field_value(field: str) -> object:
+            return _field_adapter(field).dump_python(getattr(save, field), mode="json")
+
+        rows = [
+            (
+                "read bundle",
+                lambda: SaveFile.model_validate(read_save_payload(save_path)),
+                lambda: read_save_file(save_path),
+            ),
+            (
+                "serialize parts",
+                lambda: [json.dumps(_part_body(name, field_value), ensure_ascii=False, indent=2).encode("utf-8") for name in _PART_NAMES],
+                lambda: [_serialize_part(name, save, compact=False) for name in _PART_NAMES],
+            ),
+            (
+                "response body",
+                lambda: json.dumps(save.model_dump(mode="json"), ensure_ascii=False).encode("utf-8"),
+                lambda: save.model_dump_json(),
+            ),
+        ]
+        print(f"save={len(save.model_dump_json()) / 1024 / 1024:.1f}MB roles={len(save.role_pool)} codec={json_codec.codec_name}")
+        for label, old, new in rows:
+            before = _time(old, args.repeat)
+            after = _time(new, args.repeat)
+            print(f"{label:<16} dict+json={before:8.1f}ms direct={after:8.1f}ms speedup={before / after:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import argparse
+from pathlib import Path
+
+from app.core.storage import _save_bundle_dir, migrate_save_compression, storage_state
+
+
+def _bundle_bytes(save_path: Path) -> int:
+    bundle_dir = _save_bundle_dir(save_path)
+    if not bundle_dir.exists():
+        return 0
+    return sum(path.stat().st_size for path in bundle_dir.rglob("*") if path.is_file())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite a save bundle with the given part compression. Stop the server first.")
+    parser.add_argument("save_path", nargs="?", default=None, help="save pointer file (defaults to the configured save path)")
+    parser.add_argument("--compression", default="gzip", help="none | gzip | zstd (zstd falls back to gzip without zstandard)")
+    parser.add_argument("--compact", action="store_true", help="drop JSON indentation before compressing")
+    args = parser.parse_args()
+    save_path = Path(args.save_path).expanduser().resolve() if args.save_path else storage_state.save_path
+    before = _bundle_bytes(save_path)
+    changed = migrate_save_compression(save_path, args.compression, compact=args.compact)
+    after = _bundle_bytes(save_path)
+    print(f"save={save_path} migrated={changed} bundle_bytes={before}->{after}")
+
+
+if __name__ == "__main__":
+    main()
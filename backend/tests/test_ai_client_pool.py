@@ -0,0 +1,97 @@
+import asyncio
+import gc
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI, OpenAI
+
+from app.main import app
+from app.models.schemas import ChatConfig
+from app.services.ai_adapter import LlmClientRegistry, create_async_client, create_sync_client
+
+
+def _config(api_key: str = "sk-one", provider: str = "openai") -> ChatConfig:
+    return ChatConfig(provider=provider, api_key=api_key, model="gpt-4o-mini", stream=False, gm_prompt="gm")
+
+
+class LlmClientRegistryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = LlmClientRegistry(max_clients=2, keepalive_s=30, http2=False)
+        self._patch = patch("app.services.ai_adapter.llm_client_registry", self.registry)
+        self._patch.start()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self.registry.close()
+
+    def test_sync_clients_are_reused_per_provider_url_and_key(self) -> None:
+        first = create_sync_client(_config())
+        again = create_sync_client(_config())
+        other_key = create_sync_client(_config(api_key="sk-two"))
+
+        self.assertIs(first, again)
+        self.assertIsNot(first, other_key)
+        self.assertEqual(str(create_sync_client(_config(provider="deepseek")).base_url).rstrip("/"), "https://api.deepseek.com")
+        stats = self.registry.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["clients"], 2)
+
+    def test_lru_eviction_closes_oldest_client_once_released(self) -> None:
+        first = create_sync_client(_config(api_key="sk-a"))
+        second = create_sync_client(_config(api_key="sk-b"))
+        create_sync_client(_config(api_key="sk-a"))
+        create_sync_client(_config(api_key="sk-c"))
+
+        self.assertIsNot(create_sync_client(_config(api_key="sk-b")), second)
+        self.assertFalse(second.is_closed())
+        self.assertFalse(first.is_closed())
+        self.assertEqual(self.registry.stats()["evicted"], 2)
+
+        transport = second._client
+        del second
+        gc.collect()
+        self.assertTrue(transport.is_closed)
+
+    def test_patched_client_classes_bypass_the_pool(self) -> None:
+        fake = SimpleNamespace()
+        with patch("app.services.world_service.OpenAI", return_value=fake) as mocked:
+            from app.services import world_service
+
+            self.assertIs(create_sync_client(_config(), client_cls=world_service.OpenAI), fake)
+        mocked.assert_called_once_with(api_key="sk-one")
+        self.assertEqual(self.registry.stats()["clients"], 0)
+
+    def test_async_clients_are_reused_within_a_loop_and_closed_on_shutdown(self) -> None:
+        async def scenario() -> tuple[AsyncOpenAI, AsyncOpenAI]:
+            first = create_async_client(_config())
+            second = create_async_client(_config())
+            await self.registry.aclose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertIs(first, second)
+        self.assertTrue(first.is_closed())
+        self.assertEqual(self.registry.stats()["clients"], 0)
+
+    def test_async_clients_from_closed_loops_are_not_reused(self) -> None:
+        async def build() -> AsyncOpenAI:
+            return create_async_client(_config())
+
+        first = asyncio.run(build())
+        second = asyncio.run(build())
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.stats()["clients"], 1)
+
+    def test_runtime_endpoint_reports_pool_stats(self) -> None:
+        self.assertIsInstance(create_sync_client(_config()), OpenAI)
+        with patch("app.api.routes.llm_client_registry", self.registry):
+            response = TestClient(app).get("/api/v1/runtime/llm-clients")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["clients"], 1)
+        self.assertEqual(response.json()["max_clients"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
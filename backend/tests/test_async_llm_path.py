@@ -0,0 +1,346 @@
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.storage import storage_state
+from app.models.schemas import (
+    AreaNpc,
+    AreaSnapshot,
+    AreaSubZone,
+    AreaZone,
+    ChatConfig,
+    ChatRequest,
+    Coord3D,
+    EncounterCheckResponse,
+    EncounterEntry,
+    Message,
+    NpcRoleCard,
+    PlayerRuntimeData,
+    PlayerStaticData,
+    Position,
+)
+from app.services.ai_adapter import acreate_chat_completion
+from app.services.chat_service import resolve_main_chat_turn
+from app.services.encounter_runtime_v2 import advance_active_encounter_in_save, agenerate_background_tick, plan_background_tick
+from app.services.public_scene_runtime_v2 import PublicSceneRound, adopt_speculative_actions
+from app.services.world_service import _ai_action_plan, _ai_action_plan_async, clear_current_save, get_current_save, save_current
+
+
+def _response(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=None))],
+        usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1),
+    )
+
+
+class _FakeAsyncCompletions:
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls: list[dict[str, object]] = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return _response(self.content)
+
+
+def _fake_async_client(content: str):
+    completions = _FakeAsyncCompletions(content)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+
+class AsyncLlmPathTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _config(self) -> ChatConfig:
+        return ChatConfig(openai_api_key="test-key", model="test-model", stream=False, gm_prompt="gm")
+
+    def _seed_public_scene(self, session_id: str) -> None:
+        save = clear_current_save(session_id)
+        save.area_snapshot = AreaSnapshot(
+            zones=[AreaZone(zone_id="zone_square", name="Square", center=Coord3D(x=0, y=0, z=0), sub_zone_ids=["sub_square_1"])],
+            sub_zones=[
+                AreaSubZone(
+                    sub_zone_id="sub_square_1",
+                    zone_id="zone_square",
+                    name="Center",
+                    coord=Coord3D(x=0, y=0, z=0),
+                    description="Open square",
+                    npcs=[AreaNpc(npc_id="npc_luna", name="Luna", state="idle")],
+                )
+            ],
+            current_zone_id="zone_square",
+            current_sub_zone_id="sub_square_1",
+            clock=save.area_snapshot.clock,
+        )
+        save.map_snapshot.player_position = Position(x=0, y=0, z=0, zone_id="zone_square")
+        save.player_runtime_data = PlayerRuntimeData(
+            session_id=session_id,
+            current_position=Position(x=0, y=0, z=0, zone_id="zone_square"),
+        )
+        save.role_pool = [
+            NpcRoleCard(
+                role_id="npc_luna",
+                name="Luna",
+                zone_id="zone_square",
+                sub_zone_id="sub_square_1",
+                personality="careful",
+                speaking_style="direct",
+                profile=PlayerStaticData(role_type="npc"),
+            )
+        ]
+        save_current(save)
+
+    def test_async_gateway_sends_json_completion(self) -> None:
+        client, completions = _fake_async_client("{}")
+        messages = [{"role": "user", "content": "hi"}]
+
+        asyncio.run(acreate_chat_completion(self._config(), messages, client_cls=lambda **_: client))
+
+        self.assertEqual(len(completions.calls), 1)
+        call = completions.calls[0]
+        self.assertEqual(call["model"], "test-model")
+        self.assertEqual(call["response_format"], {"type": "json_object"})
+        self.assertEqual(call["messages"], messages)
+
+    def test_async_action_plan_matches_sync_plan(self) -> None:
+        content = json.dumps({"ability_used": "dexterity", "dc": 14, "time_spent_min": 4, "requires_check": True, "check_task": "slip past"})
+        async_client, _ = _fake_async_client(content)
+        sync_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **_: _response(content))))
+
+        with patch("app.services.world_service.AsyncOpenAI", return_value=async_client):
+            async_plan = asyncio.run(_ai_action_plan_async("check", "sneak past the guard", self._config()))
+        with patch("app.services.world_service.OpenAI", return_value=sync_client):
+            sync_plan = _ai_action_plan("check", "sneak past the guard", self._config())
+
+        self.assertEqual(async_plan, sync_plan)
+        self.assertEqual(async_plan["ability_used"], "dexterity")
+
+    def test_main_turn_awaits_public_scene_generation(self) -> None:
+        sid = "sess_async_main_turn"
+        self._seed_public_scene(sid)
+        gm_client, gm_calls = _fake_async_client("The square falls silent.")
+        scene_client, scene_calls = _fake_async_client("{}")
+        payload = ChatRequest(
+            session_id=sid,
+            config=self._config(),
+            messages=[
+                Message(
+                    role="user",
+                    content='{"input_type":"player_intent_v1","action_description":"I clap loudly in the square","speech_description":"Everyone be quiet"}',
+                )
+            ],
+        )
+
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=gm_client),
+            patch("app.services.public_scene_service.AsyncOpenAI", return_value=scene_client),
+            patch("app.services.world_service.AsyncOpenAI", return_value=scene_client),
+            patch("app.services.public_scene_service.create_sync_client") as sync_scene_client,
+            patch("app.services.world_service.create_sync_client") as sync_world_client,
+            patch(
+                "app.services.encounter_service.check_for_encounter",
+                return_value=EncounterCheckResponse(generated=False),
+            ),
+        ):
+            reply, _, _, scene_events, _, archived_turn_id = asyncio.run(resolve_main_chat_turn(payload))
+
+        self.assertEqual(reply.content, "The square falls silent.")
+        self.assertEqual(len(gm_calls.calls), 1)
+        self.assertGreaterEqual(len(scene_calls.calls), 1)
+        sync_scene_client.assert_not_called()
+        sync_world_client.assert_not_called()
+        self.assertTrue(any(event.kind == "public_actor_action" for event in scene_events))
+        self.assertTrue(any(event.kind == "public_round_resolution" for event in scene_events))
+        self.assertIsNotNone(archived_turn_id)
+        recent_turns = get_current_save(sid).area_snapshot.sub_zones[0].chat_context.recent_turns
+        self.assertEqual(recent_turns[-1].turn_id, archived_turn_id)
+
+    def test_main_turn_awaits_active_encounter_resolution(self) -> None:
+        sid = "sess_async_encounter_turn"
+        self._seed_public_scene(sid)
+        save = get_current_save(sid)
+        save.encounter_state.encounters = [
+            EncounterEntry(
+                encounter_id="enc_async",
+                type="event",
+                status="active",
+                title="Fountain Brawl",
+                description="Two porters trade blows by the fountain.",
+                zone_id="zone_square",
+                sub_zone_id="sub_square_1",
+                player_presence="engaged",
+                scene_summary="The porters circle each other.",
+            )
+        ]
+        save.encounter_state.active_encounter_id = "enc_async"
+        save_current(save)
+        encounter_client, encounter_calls = _fake_async_client(
+            json.dumps({"reply": "两个搬运工被你喝住，暂时松开了拳头。", "scene_summary": "喷泉边的对峙暂时缓和。", "step_kind": "gm_update"}, ensure_ascii=False)
+        )
+        payload = ChatRequest(
+            session_id=sid,
+            config=self._config(),
+            messages=[Message(role="user", content='{"input_type":"player_intent_v1","action_description":"I step between the porters","speech_description":"Enough"}')],
+        )
+
+        with (
+            patch("app.services.encounter_runtime_v2.AsyncOpenAI", return_value=encounter_client),
+            patch("app.services.encounter_runtime_v2.create_sync_client") as sync_encounter_client,
+            patch("app.services.encounter_service.check_for_encounter", return_value=EncounterCheckResponse(generated=False)),
+        ):
+            reply, _, tool_events, _, _, _ = asyncio.run(resolve_main_chat_turn(payload))
+
+        sync_encounter_client.assert_not_called()
+        self.assertEqual(len(encounter_calls.calls), 1)
+        self.assertIn("搬运工", reply.content)
+        self.assertEqual(tool_events[-1].tool_name, "encounter_act")
+        steps = get_current_save(sid).encounter_state.encounters[0].steps
+        self.assertEqual([step.kind for step in steps[:2]], ["player_action", "gm_update"])
+
+    def test_background_tick_generated_on_loop_is_applied_without_sync_call(self) -> None:
+        sid = "sess_async_background_tick"
+        self._seed_public_scene(sid)
+        save = get_current_save(sid)
+        save.encounter_state.encounters = [
+            EncounterEntry(
+                encounter_id="enc_away",
+                type="event",
+                status="escaped",
+                title="Fountain Brawl",
+                description="Two porters trade blows by the fountain.",
+                player_presence="away",
+                presented_at="2026-01-01T00:00:00+00:00",
+            )
+        ]
+        save.encounter_state.active_encounter_id = "enc_away"
+        client, calls = _fake_async_client(json.dumps({"reply": "喷泉边的搬运工仍在推搡，围观的人越来越多。"}, ensure_ascii=False))
+
+        plan = plan_background_tick(save, minutes_elapsed=20, config=self._config())
+        with patch("app.services.encounter_runtime_v2.AsyncOpenAI", return_value=client):
+            generated = asyncio.run(agenerate_background_tick(plan, self._config()))
+        with patch("app.services.encounter_runtime_v2.create_sync_client") as sync_client:
+            advanced = advance_active_encounter_in_save(save, session_id=sid, minutes_elapsed=20, config=self._config(), generated=generated)
+
+        sync_client.assert_not_called()
+        self.assertEqual(len(calls.calls), 1)
+        self.assertEqual(advanced.background_tick_count, 1)
+        self.assertIn("搬运工", advanced.latest_outcome_summary)
+
+    def _speculative_turn(self, sid: str, actor_content: str, speculative: str = "1") -> tuple[list[bool], list[object], list[str]]:
+        self._seed_public_scene(sid)
+        actor_started = threading.Event()
+        narration_done: list[bool] = []
+        actor_calls: list[bool] = []
+        actor_prompts: list[str] = []
+
+        class _GmCompletions:
+            async def create(self, **kwargs):
+                await asyncio.to_thread(actor_started.wait, 2)
+                narration_done.append(True)
+                return _response("The square falls silent.")
+
+        async def actor_completion(config, messages):
+            actor_calls.append(bool(narration_done))
+            actor_prompts.append(messages[-1]["content"])
+            actor_started.set()
+            return actor_content
+
+        scene_client, _ = _fake_async_client("{}")
+        payload = ChatRequest(
+            session_id=sid,
+            config=self._config(),
+            messages=[
+                Message(
+                    role="user",
+                    content='{"input_type":"player_intent_v1","action_description":"I clap loudly in the square","speech_description":"Everyone be quiet"}',
+                )
+            ],
+        )
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=SimpleNamespace(chat=SimpleNamespace(completions=_GmCompletions()))),
+            patch("app.services.public_scene_runtime_v2._actor_action_completion_async", side_effect=actor_completion),
+            patch("app.services.chat_service.begin_main_chat_encounter_step", return_value=([], None)),
+            patch("app.services.public_scene_service.AsyncOpenAI", return_value=scene_client),
+            patch("app.services.world_service.AsyncOpenAI", return_value=scene_client),
+            patch("app.services.encounter_service.check_for_encounter", return_value=EncounterCheckResponse(generated=False)),
+            patch.dict("os.environ", {"ROLEPLAY_SPECULATIVE_SCENE": speculative}),
+        ):
+            _, _, _, scene_events, _, _ = asyncio.run(resolve_main_chat_turn(payload))
+        return actor_calls, scene_events, actor_prompts
+
+    def test_speculative_drafts_overlap_the_gm_reply_and_are_redone_with_its_narration(self) -> None:
+        content = json.dumps(
+            {
+                "response_mode": "none",
+                "external_action_narration": "Luna sets down her basket of apples and turns toward the player with both hands raised.",
+                "speech_line": "Quiet down, the fountain keeper is asleep.",
+                "visible_intent": "Calm the crowd near the fountain.",
+                "risk_source": "the crowd",
+                "risk_object": "the fountain keeper",
+                "risk_location": "the fountain",
+                "specific_threat": "The crowd at the fountain could wake the keeper and start a quarrel about the water rights.",
+                "needs_check": False,
+            },
+            ensure_ascii=False,
+        )
+        actor_calls, scene_events, actor_prompts = self._speculative_turn("sess_speculative_scene", content)
+
+        self.assertEqual(actor_calls, [False, True])
+        self.assertNotIn("The square falls silent.", actor_prompts[0])
+        self.assertIn("The square falls silent.", actor_prompts[1])
+        action = next(event for event in scene_events if event.kind == "public_actor_action")
+        self.assertEqual(action.metadata["speech_line"], "Quiet down, the fountain keeper is asleep.")
+
+    def test_speculative_fallback_actions_are_regenerated(self) -> None:
+        actor_calls, scene_events, actor_prompts = self._speculative_turn("sess_speculative_fallback", "not json")
+
+        self.assertEqual(actor_calls, [False, True])
+        self.assertIn("The square falls silent.", actor_prompts[1])
+        self.assertTrue(any(event.kind == "public_actor_action" for event in scene_events))
+
+    def test_speculation_is_off_by_default(self) -> None:
+        actor_calls, _, actor_prompts = self._speculative_turn("sess_speculative_off", "not json", speculative="")
+
+        self.assertEqual(actor_calls, [True])
+        self.assertIn("The square falls silent.", actor_prompts[0])
+
+    def test_only_actors_with_changed_inputs_are_regenerated(self) -> None:
+        def scene_round(incoming: dict[str, dict[str, str]]) -> PublicSceneRound:
+            actors = [{"actor_id": "npc_luna", "name": "Luna", "actor_type": "npc"}, {"actor_id": "npc_oren", "name": "Oren", "actor_type": "team"}]
+            return PublicSceneRound("sess", "I clap", "", {"gm_narration": ""}, actors, incoming, 50)
+
+        draft = scene_round({})
+        draft.actor_payloads = {"npc_luna": {"speech_line": "Hush."}, "npc_oren": {"speech_line": "Again?"}}
+        draft.generated_actor_ids = {"npc_luna", "npc_oren"}
+        final = scene_round({"npc_oren": {"source_actor_id": "npc_luna", "summary": "Luna shoves Oren"}})
+
+        self.assertEqual(adopt_speculative_actions(final, draft), ["npc_luna"])
+        self.assertEqual(set(final.actor_payloads), {"npc_luna"})
+
+        narrated = scene_round({})
+        narrated.gm_summary = "The square falls silent while Luna glares."
+        narrated.scene_context = {"gm_narration": narrated.gm_summary}
+        self.assertEqual(adopt_speculative_actions(narrated, draft), [])
+        rescened = scene_round({})
+        rescened.scene_context = {"gm_narration": "", "world_time": None}
+        self.assertEqual(adopt_speculative_actions(rescened, draft), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
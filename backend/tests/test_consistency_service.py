@@ -12,11 +12,14 @@ from app.models.schemas import (
     AreaZone,
     ChatConfig,
     Coord3D,
+    EncounterEntry,
+    EntityRef,
     FateGenerateRequest,
     NpcRoleCard,
     PlayerStaticData,
     Position,
     QuestDraft,
+    QuestEntry,
     QuestObjective,
     QuestPublishRequest,
     RegionGenerateRequest,
@@ -24,11 +27,17 @@ from app.models.schemas import (
     Zone,
     ZoneSubZoneSeed,
 )
-from app.services.consistency_service import build_npc_knowledge_snapshot
+from app.services.consistency_service import (
+    _full_consistency_sweep,
+    build_global_story_snapshot,
+    build_npc_knowledge_snapshot,
+    consistency_engine,
+    snapshot_cache,
+)
 from app.services.encounter_service import _ai_generate_encounter_guarded
 from app.services.fate_service import generate_fate
 from app.services.quest_service import _ai_generate_quest_draft_guarded, accept_quest, publish_quest
-from app.services.world_service import clear_current_save, generate_regions, get_current_save, save_current
+from app.services.world_service import _append_npc_dialogue, clear_current_save, flush_current_save, generate_regions, get_current_save, save_current
 
 
 class ConsistencyServiceTests(unittest.TestCase):
@@ -122,6 +131,7 @@ class ConsistencyServiceTests(unittest.TestCase):
         sid = "sess_world_bundle"
         save = clear_current_save(sid)
         save_current(save)
+        flush_current_save()
 
         bundle_dir = _save_bundle_dir(storage_state.save_path)
         manifest = read_json(bundle_dir / "manifest.json")
@@ -215,6 +225,110 @@ class ConsistencyServiceTests(unittest.TestCase):
         self.assertIn("npc_remote", snapshot.forbidden_entity_ids)
         self.assertTrue(snapshot.response_rules)
 
+    def test_snapshots_are_reused_until_their_parts_change(self) -> None:
+        sid = "sess_snapshot_cache"
+        self._seed_context(sid)
+        save = get_current_save(sid)
+        story = build_global_story_snapshot(save)
+        local = build_npc_knowledge_snapshot(save, "npc_local")
+        remote = build_npc_knowledge_snapshot(save, "npc_remote")
+        builds = snapshot_cache.builds
+
+        fresh_copy = get_current_save(sid)
+        cached_story = build_global_story_snapshot(fresh_copy)
+        self.assertEqual(cached_story, story)
+        self.assertIsNot(cached_story, story)
+        with (
+            patch("app.services.consistency_service._story_parts") as story_walk,
+            patch("app.services.consistency_service._npc_knowledge_parts") as npc_walk,
+        ):
+            self.assertEqual(build_global_story_snapshot(fresh_copy), story)
+            self.assertEqual(build_npc_knowledge_snapshot(fresh_copy, "npc_local"), local)
+        story_walk.assert_not_called()
+        npc_walk.assert_not_called()
+        self.assertEqual(snapshot_cache.builds, builds)
+
+        cached_story.available_npc_ids.append("npc_injected")
+        story.available_npc_ids.append("npc_injected")
+        self.assertNotIn("npc_injected", build_global_story_snapshot(fresh_copy).available_npc_ids)
+        story.available_npc_ids.pop()
+
+        _append_npc_dialogue(save.role_pool[0], "player", "player_001", "Player", "Any news from the guild?", save.area_snapshot.clock)
+        updated_local = build_npc_knowledge_snapshot(save, "npc_local")
+        self.assertNotEqual(updated_local, local)
+        self.assertIn("Any news from the guild?", updated_local.recent_dialogue_summary[-1])
+        self.assertEqual(build_npc_knowledge_snapshot(save, "npc_remote"), remote)
+        self.assertEqual(build_global_story_snapshot(save), story)
+
+        save.encounter_state.encounters.append(EncounterEntry(encounter_id="enc_cache", type="event", status="active", title="Fire", description="A fire"))
+        self.assertEqual(build_global_story_snapshot(save).recent_encounter_ids, ["enc_cache"])
+        self.assertEqual(snapshot_cache.builds, builds + 2)
+
+    def test_in_place_edits_before_the_tail_refresh_stamped_snapshots(self) -> None:
+        sid = "sess_snapshot_middle_edit"
+        self._seed_context(sid)
+        save = get_current_save(sid)
+        save.encounter_state.encounters.extend(
+            [
+                EncounterEntry(encounter_id="enc_first", type="event", status="active", title="Fire", description="A fire"),
+                EncounterEntry(encounter_id="enc_last", type="event", status="active", title="Flood", description="A flood"),
+            ]
+        )
+        save_current(save)
+        save = get_current_save(sid)
+        self.assertIn("enc_first", build_global_story_snapshot(save).recent_encounter_ids)
+        before = build_npc_knowledge_snapshot(save, "npc_local")
+
+        save.encounter_state.encounters[0].status = "expired"
+        self.assertNotIn("enc_first", build_global_story_snapshot(save).recent_encounter_ids)
+        remote = next(role for role in save.role_pool if role.role_id == "npc_remote")
+        remote.zone_id, remote.sub_zone_id = save.area_snapshot.current_zone_id, save.area_snapshot.current_sub_zone_id
+        self.assertIn("npc_remote", build_global_story_snapshot(save).available_npc_ids)
+        self.assertNotEqual(build_npc_knowledge_snapshot(save, "npc_local"), before)
+
+    def test_incremental_check_only_rechecks_subjects_touched_by_changes(self) -> None:
+        sid = "sess_incremental_check"
+        self._seed_context(sid)
+        save = get_current_save(sid)
+        for idx, role_id in enumerate(["npc_local", "npc_remote", "npc_remote"]):
+            save.quest_state.quests.append(
+                QuestEntry(
+                    quest_id=f"quest_inc_{idx}",
+                    title="Errand",
+                    description="Run an errand",
+                    status="active",
+                    entity_refs=[EntityRef(entity_type="npc", entity_id=role_id), EntityRef(entity_type="zone", entity_id="zone_old")],
+                )
+            )
+        save_current(save)
+        save = get_current_save(sid)
+        first = consistency_engine.check(save, full=True)
+        self.assertTrue(first.full)
+        self.assertEqual(first.issues, [])
+
+        unchanged = consistency_engine.check(get_current_save(sid))
+        self.assertFalse(unchanged.full)
+        self.assertEqual(unchanged.rechecked, 0)
+
+        save.role_pool = [role for role in save.role_pool if role.role_id != "npc_remote"]
+        check = consistency_engine.check(save)
+        self.assertFalse(check.full)
+        self.assertEqual(check.rechecked, 3)
+        self.assertEqual([issue.entity_id for issue in check.issues], ["npc_remote", "npc_remote", "npc_local"])
+        self.assertEqual(
+            [(issue.issue_type, issue.entity_id) for issue in check.issues],
+            [(issue.issue_type, issue.entity_id) for issue in _full_consistency_sweep(save)],
+        )
+
+        save.quest_state.quests[1].status = "completed"
+        check = consistency_engine.check(save)
+        self.assertEqual(check.rechecked, 1)
+        self.assertEqual([issue.entity_id for issue in check.issues], ["npc_remote", "npc_local"])
+
+        save.world_state.world_revision += 1
+        self.assertTrue(consistency_engine.check(save).full)
+        self.assertTrue(consistency_engine.check(save, full=True).full)
+
     def test_ai_quest_guard_drops_unknown_npc_reference(self) -> None:
         sid = "sess_ai_quest_guard"
         self._seed_context(sid)
@@ -0,0 +1,165 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.game_log_store import GAME_LOG_PART_FORMAT, GameLogStore
+from app.core.storage import (
+    _field_adapter,
+    _save_bundle_dir,
+    compact_game_logs,
+    migrate_save_bundle,
+    open_save_bundle,
+    read_json,
+    read_save_payload,
+    storage_state,
+    write_json_atomic,
+)
+from app.models.schemas import GameLogAddRequest
+from app.services.world_service import add_game_log, clear_current_save, flush_current_save, get_current_save, get_game_logs
+
+
+def _entries(start: int, count: int) -> list[dict[str, object]]:
+    return [
+        {"id": f"glog_{idx}", "session_id": "sess_logs", "kind": "test", "message": f"entry {idx}", "payload": {}}
+        for idx in range(start, start + count)
+    ]
+
+
+class GameLogStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name) / "game_logs"
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_append_rolls_over_segments_and_tail_reads_last_segments_only(self) -> None:
+        store = GameLogStore(self.root, segment_size=4)
+        store.sync(_entries(0, 6))
+        store.sync(_entries(0, 11))
+
+        self.assertEqual(store.count(), 11)
+        self.assertEqual(len(list(self.root.glob("segment_*.jsonl"))), 3)
+        with patch.object(GameLogStore, "_read_segment", autospec=True, side_effect=GameLogStore._read_segment) as mocked:
+            tail = GameLogStore(self.root, segment_size=4).tail(2)
+        self.assertEqual([item["id"] for item in tail], ["glog_9", "glog_10"])
+        self.assertEqual(mocked.call_count, 1)
+
+    def test_sync_appends_only_new_entries(self) -> None:
+        store = GameLogStore(self.root, segment_size=100)
+        store.sync(_entries(0, 3))
+        segment = next(self.root.glob("segment_*.jsonl"))
+        before = segment.read_bytes()
+
+        self.assertFalse(store.sync(_entries(0, 3)))
+        self.assertTrue(store.sync(_entries(0, 5)))
+
+        self.assertTrue(segment.read_bytes().startswith(before))
+        self.assertEqual([item["id"] for item in store.read_all()], [f"glog_{idx}" for idx in range(5)])
+
+    def test_changed_history_is_rewritten_and_orphans_removed(self) -> None:
+        store = GameLogStore(self.root, segment_size=2)
+        store.sync(_entries(0, 5))
+        store.sync(_entries(100, 3))
+
+        self.assertEqual([item["id"] for item in store.read_all()], ["glog_100", "glog_101", "glog_102"])
+        self.assertEqual(len(list(self.root.glob("segment_*.jsonl"))), 2)
+
+    def test_uncommitted_bytes_are_ignored_and_overwritten(self) -> None:
+        store = GameLogStore(self.root, segment_size=100)
+        store.sync(_entries(0, 2))
+        segment = next(self.root.glob("segment_*.jsonl"))
+        with segment.open("ab") as fh:
+            fh.write(b'{"id": "torn"')
+
+        reopened = GameLogStore(self.root, segment_size=100)
+        self.assertEqual(reopened.count(), 2)
+        reopened.sync(_entries(0, 3))
+        self.assertEqual([item["id"] for item in GameLogStore(self.root).read_all()], ["glog_0", "glog_1", "glog_2"])
+
+
+class GameLogBundleTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def test_bundle_stores_game_logs_as_segments(self) -> None:
+        sid = "sess_log_bundle"
+        clear_current_save(sid)
+        add_game_log(GameLogAddRequest(session_id=sid, kind="test", message="hello"))
+        flush_current_save()
+
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+        manifest = read_json(bundle_dir / "manifest.json")
+        self.assertEqual(manifest["formats"]["game_logs"], GAME_LOG_PART_FORMAT)
+        self.assertFalse((bundle_dir / "game_logs.json").exists())
+        self.assertEqual(get_current_save(sid).game_logs[-1].message, "hello")
+
+    def test_save_write_dumps_only_new_game_logs(self) -> None:
+        sid = "sess_log_append_only"
+        clear_current_save(sid)
+        for idx in range(5):
+            add_game_log(GameLogAddRequest(session_id=sid, kind="test", message=f"line {idx}"))
+        flush_current_save()
+
+        add_game_log(GameLogAddRequest(session_id=sid, kind="test", message="line 5"))
+        adapter = _field_adapter("game_logs")
+        with (
+            patch.object(adapter, "dump_python", wraps=adapter.dump_python) as mocked_dump,
+            patch.object(GameLogStore, "rewrite") as mocked_rewrite,
+        ):
+            flush_current_save()
+
+        mocked_rewrite.assert_not_called()
+        self.assertEqual([len(call.args[0]) for call in mocked_dump.call_args_list], [1])
+        self.assertEqual(len(get_current_save(sid).game_logs), 6)
+
+    def test_get_game_logs_tails_segment_store(self) -> None:
+        sid = "sess_log_tail"
+        clear_current_save(sid)
+        for idx in range(5):
+            add_game_log(GameLogAddRequest(session_id=sid, kind="test", message=f"line {idx}"))
+        get_current_save(sid)
+        flush_current_save()
+
+        with patch.object(GameLogStore, "read_all") as mocked_read_all:
+            result = get_game_logs(sid, limit=2)
+
+        mocked_read_all.assert_not_called()
+        self.assertEqual([item.message for item in result.items], ["line 3", "line 4"])
+
+    def test_migrate_converts_legacy_game_logs_part(self) -> None:
+        sid = "sess_log_migrate"
+        clear_current_save(sid)
+        flush_current_save()
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+        legacy_items = _entries(0, 3)
+        manifest = read_json(bundle_dir / "manifest.json")
+        manifest["parts"]["game_logs"] = "game_logs.json"
+        manifest.pop("formats", None)
+        write_json_atomic(bundle_dir / "game_logs.json", {"items": legacy_items})
+        write_json_atomic(bundle_dir / "manifest.json", manifest)
+        self.assertEqual(len(read_save_payload(storage_state.save_path)["game_logs"]), 3)
+
+        self.assertTrue(migrate_save_bundle(storage_state.save_path))
+        self.assertFalse(migrate_save_bundle(storage_state.save_path))
+
+        reader = open_save_bundle(storage_state.save_path)
+        self.assertEqual(reader.part_format("game_logs"), GAME_LOG_PART_FORMAT)
+        self.assertEqual([item.id for item in reader.load("game_logs")], ["glog_0", "glog_1", "glog_2"])
+        self.assertFalse((bundle_dir / "game_logs.json").exists())
+        self.assertTrue(compact_game_logs(storage_state.save_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.llm_fanout import FanOut
+from app.core.storage import storage_state
+from app.models.schemas import (
+    AreaNpc,
+    AreaSnapshot,
+    AreaSubZone,
+    AreaZone,
+    ChatConfig,
+    Coord3D,
+    NpcRoleCard,
+    PlayerRuntimeData,
+    PlayerStaticData,
+    Position,
+)
+from app.services.public_scene_runtime_v2 import _fallback_actor_action, generate_public_scene_actions, plan_public_scene_round
+from app.services.world_service import clear_current_save, get_current_save, save_current
+
+_ACTION = {
+    "response_mode": "none",
+    "external_action_narration": "She steps onto the fountain rim and raises both hands toward the crowd.",
+    "speech_line": "Give him a moment to finish.",
+    "visible_intent": "Calm the crowd around the fountain",
+    "risk_source": "crowd",
+    "risk_object": "fountain",
+    "risk_location": "square center",
+    "specific_threat": "The crowd could shove someone into the fountain basin.",
+    "target_label": "crowd",
+}
+
+
+class FanOutTests(unittest.TestCase):
+    def test_results_keep_input_order_and_respect_provider_cap(self) -> None:
+        fanout = FanOut(max_workers=8, provider_limit=2, deadline_ms=5000)
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def job(idx: int):
+            def run() -> int:
+                with lock:
+                    active["now"] += 1
+                    active["peak"] = max(active["peak"], active["now"])
+                time.sleep(0.02 * (6 - idx))
+                with lock:
+                    active["now"] -= 1
+                return idx
+
+            return run
+
+        try:
+            results = fanout.run([job(idx) for idx in range(6)], provider="openai")
+        finally:
+            fanout.shutdown()
+
+        self.assertEqual(results, list(range(6)))
+        self.assertEqual(active["peak"], 2)
+
+    def test_jobs_missing_the_deadline_or_failing_return_none(self) -> None:
+        fanout = FanOut(max_workers=4, provider_limit=4, deadline_ms=5000)
+        release = threading.Event()
+
+        def boom() -> str:
+            raise RuntimeError("provider down")
+
+        try:
+            started = time.monotonic()
+            results = fanout.run([lambda: "fast", lambda: release.wait(5) and "slow", boom], provider="openai", deadline_s=0.1)
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+            fanout.shutdown()
+
+        self.assertEqual(results, ["fast", None, None])
+        self.assertLess(elapsed, 2)
+
+    def test_async_fan_out_runs_concurrently_with_deadline(self) -> None:
+        fanout = FanOut(max_workers=1, provider_limit=3, deadline_ms=5000)
+
+        async def sleeper(value: str, delay: float) -> str:
+            await asyncio.sleep(delay)
+            return value
+
+        async def scenario() -> tuple[list[str | None], float]:
+            started = time.monotonic()
+            results = await fanout.arun(
+                [lambda: sleeper("a", 0.05), lambda: sleeper("b", 0.05), lambda: sleeper("c", 5)],
+                provider="openai",
+                deadline_s=0.3,
+            )
+            return results, time.monotonic() - started
+
+        results, elapsed = asyncio.run(scenario())
+        self.assertEqual(results, ["a", "b", None])
+        self.assertLess(elapsed, 1)
+
+
+class PublicSceneFanOutTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _seed(self, session_id: str, names: list[str]) -> None:
+        save = clear_current_save(session_id)
+        save.area_snapshot = AreaSnapshot(
+            zones=[AreaZone(zone_id="zone_square", name="Square", center=Coord3D(x=0, y=0, z=0), sub_zone_ids=["sub_square_1"])],
+            sub_zones=[
+                AreaSubZone(
+                    sub_zone_id="sub_square_1",
+                    zone_id="zone_square",
+                    name="Center",
+                    coord=Coord3D(x=0, y=0, z=0),
+                    description="Open square",
+                    npcs=[AreaNpc(npc_id=f"npc_{name.lower()}", name=name, state="idle") for name in names],
+                )
+            ],
+            current_zone_id="zone_square",
+            current_sub_zone_id="sub_square_1",
+            clock=save.area_snapshot.clock,
+        )
+        save.map_snapshot.player_position = Position(x=0, y=0, z=0, zone_id="zone_square")
+        save.player_runtime_data = PlayerRuntimeData(session_id=session_id, current_position=Position(x=0, y=0, z=0, zone_id="zone_square"))
+        save.role_pool = [
+            NpcRoleCard(
+                role_id=f"npc_{name.lower()}",
+                name=name,
+                zone_id="zone_square",
+                sub_zone_id="sub_square_1",
+                personality="careful",
+                speaking_style="direct",
+                profile=PlayerStaticData(role_type="npc"),
+            )
+            for name in names
+        ]
+        save_current(save)
+
+    def test_slow_actor_falls_back_and_merge_follows_candidate_order(self) -> None:
+        sid = "sess_scene_fanout"
+        self._seed(sid, ["Luna", "Mira", "Orin"])
+        save = get_current_save(sid)
+        scene_round = plan_public_scene_round(save, sid, "I clap loudly and shout at Luna and Mira to be quiet")
+        self.assertIsNotNone(scene_round)
+        actor_ids = [str(actor["actor_id"]) for actor in scene_round.candidates]
+        self.assertGreaterEqual(len(actor_ids), 2)
+        slow_actor = actor_ids[0]
+        release = threading.Event()
+
+        def create(**kwargs):
+            if kwargs["messages"][0]["content"] == slow_actor:
+                release.wait(5)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(_ACTION)))])
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        fanout = FanOut(max_workers=4, provider_limit=4, deadline_ms=300)
+        config = ChatConfig(openai_api_key="test-key", model="test-model", stream=False, gm_prompt="gm")
+        try:
+            with (
+                patch("app.services.public_scene_runtime_v2.llm_fanout", fanout),
+                patch("app.services.public_scene_service.create_sync_client", return_value=client),
+                patch(
+                    "app.services.public_scene_runtime_v2._actor_action_messages",
+                    side_effect=lambda _save, actor, **_: [{"role": "user", "content": str(actor["actor_id"])}],
+                ),
+            ):
+                generate_public_scene_actions(save, scene_round, config=config)
+        finally:
+            release.set()
+            fanout.shutdown()
+
+        self.assertEqual(list(scene_round.actor_payloads), actor_ids)
+        slow_candidate = scene_round.candidates[0]
+        expected_fallback = _fallback_actor_action(
+            save,
+            slow_candidate,
+            player_text=scene_round.display_text,
+            gm_summary=scene_round.gm_summary,
+            incoming_interaction=scene_round.incoming_map.get(slow_actor),
+        )
+        self.assertEqual(scene_round.actor_payloads[slow_actor], expected_fallback)
+        for actor_id in actor_ids[1:]:
+            self.assertEqual(scene_round.actor_payloads[actor_id]["speech_line"], _ACTION["speech_line"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.storage import storage_state
+from app.models.schemas import AreaSubZone, ChatConfig, Coord3D, QuestEntry
+from app.services.ai_adapter import LlmResponseCache, cached_completion, completion_cache_key
+from app.services.quest_service import _ai_generate_quest_draft_guarded
+from app.services.world_service import _ai_discover_interactions, clear_current_save, get_current_save
+
+
+def _config(model: str = "gpt-4o-mini") -> ChatConfig:
+    return ChatConfig(api_key="sk-test", model=model, stream=False, gm_prompt="gm")
+
+
+def _response(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=None))],
+        usage=SimpleNamespace(prompt_tokens=5, completion_tokens=7),
+    )
+
+
+class _Create:
+    def __init__(self, *contents: str) -> None:
+        self.contents = list(contents)
+        self.calls: list[dict[str, object]] = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        return _response(self.contents.pop(0))
+
+
+class LlmResponseCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+        self.cache = LlmResponseCache(enabled=True, ttl_s=60, max_entries=2, root=self.root)
+        self._patch = patch("app.services.ai_adapter.llm_response_cache", self.cache)
+        self._patch.start()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self._tmpdir.cleanup()
+
+    def _messages(self, text: str) -> list[dict[str, str]]:
+        return [{"role": "system", "content": "json only"}, {"role": "user", "content": text}]
+
+    def test_hits_share_normalized_messages_and_skip_the_model(self) -> None:
+        create = _Create('{"a": 1}')
+        first = cached_completion(_config(), "test.site", create, model="m", temperature=0.2, messages=self._messages("describe  the\nsquare"))
+        again = cached_completion(_config(), "test.site", create, model="m", temperature=0.2, messages=self._messages("describe the square "))
+
+        self.assertEqual(len(create.calls), 1)
+        self.assertEqual(again.choices[0].message.content, first.choices[0].message.content)
+        self.assertTrue(again.cached)
+        self.assertEqual((again.usage.prompt_tokens, again.usage.completion_tokens), (0, 0))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+        self.assertEqual(stats["namespaces"]["test.site"], {"hits": 1, "misses": 1})
+
+        key = completion_cache_key(_config(), "test.site", {"model": "m", "temperature": 0.2, "messages": self._messages("x")})
+        self.assertNotEqual(key, completion_cache_key(_config(), "test.site", {"model": "m", "temperature": 0.9, "messages": self._messages("x")}))
+        self.assertNotEqual(key, completion_cache_key(_config(), "other.site", {"model": "m", "temperature": 0.2, "messages": self._messages("x")}))
+
+    def test_rejected_and_bypassed_responses(self) -> None:
+        create = _Create("not json", '{"ok": true}', '{"ok": false}')
+        kwargs = {"model": "m", "messages": self._messages("quest")}
+
+        cached_completion(_config(), "test.site", create, accept=json.loads, **kwargs)
+        cached_completion(_config(), "test.site", create, accept=json.loads, **kwargs)
+        self.assertEqual(len(create.calls), 2)
+        fresh = cached_completion(_config(), "test.site", create, bypass=True, **kwargs)
+        self.assertEqual(fresh.choices[0].message.content, '{"ok": false}')
+        self.assertEqual(len(create.calls), 3)
+        self.assertEqual(cached_completion(_config(), "test.site", create, **kwargs).choices[0].message.content, '{"ok": false}')
+
+    def test_lru_eviction_ttl_and_reload_from_disk(self) -> None:
+        create = _Create("a", "b", "c", "a2")
+        for text in ["a", "b"]:
+            cached_completion(_config(), "test.site", create, model="m", messages=self._messages(text))
+        cached_completion(_config(), "test.site", create, model="m", messages=self._messages("a"))
+        cached_completion(_config(), "test.site", create, model="m", messages=self._messages("c"))
+        self.assertEqual(self.cache.stats()["evicted"], 1)
+        self.assertEqual(len(list(self.root.glob("*/*.json"))), 2)
+
+        reloaded = LlmResponseCache(enabled=True, ttl_s=60, max_entries=2, root=self.root)
+        key_a = completion_cache_key(_config(), "test.site", {"model": "m", "messages": self._messages("a")})
+        key_b = completion_cache_key(_config(), "test.site", {"model": "m", "messages": self._messages("b")})
+        self.assertEqual(reloaded.get("test.site", key_a), "a")
+        self.assertIsNone(reloaded.get("test.site", key_b))
+
+        with patch("app.services.ai_adapter.time.time", return_value=10**12):
+            self.assertIsNone(reloaded.get("test.site", key_a))
+        self.assertEqual(reloaded.stats()["entries"], 1)
+
+    def test_discover_interactions_reuses_accepted_response(self) -> None:
+        create = _Create(json.dumps({"interactions": [{"name": "Old well", "type": "item", "status": "ready"}]}))
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        sub_zone = AreaSubZone(sub_zone_id="sub_well", zone_id="zone_a", name="Well", coord=Coord3D(x=0, y=0, z=0), description="A quiet well")
+
+        with patch("app.services.world_service.create_sync_client", return_value=client):
+            first = _ai_discover_interactions(_config(), sub_zone, "look around")
+            second = _ai_discover_interactions(_config(), sub_zone, "look around")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["name"], "Old well")
+        self.assertEqual(len(create.calls), 1)
+
+    def test_quest_draft_is_not_replayed_after_the_quest_is_closed(self) -> None:
+        orig_save, orig_config = storage_state.save_path, storage_state.config_path
+        storage_state.set_save_path(str(self.root / "current-save.json"))
+        storage_state.set_config_path(str(self.root / "config.json"))
+        self.addCleanup(storage_state.set_config_path, str(orig_config))
+        self.addCleanup(storage_state.set_save_path, str(orig_save))
+        clear_current_save("sess_quest_cache")
+        save = get_current_save("sess_quest_cache")
+        create = _Create(*[json.dumps({"title": title, "description": "Find it."}) for title in ["Lost key", "Old bell"]])
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        with patch("app.services.quest_service.create_sync_client", return_value=client):
+            first = _ai_generate_quest_draft_guarded(save, "normal", _config())
+            self.assertEqual(_ai_generate_quest_draft_guarded(save, "normal", _config()).title, first.title)
+            save.quest_state.quests.append(QuestEntry(quest_id="quest_lost_key", title=first.title, description="Find it.", status="rejected"))
+            again = _ai_generate_quest_draft_guarded(save, "normal", _config())
+
+        self.assertEqual(len(create.calls), 2)
+        self.assertEqual(again.title, "Old bell")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.storage import storage_state
+from app.models.schemas import InventoryItem, NpcRoleCard, PlayerStaticData, SaveFile, Zone
+from app.services.chat_service import _find_inventory_item, _find_named_role, _find_zone_target
+from app.services.name_matcher import MentionTarget, NameMatcher, entity_mentions, mention_cache
+from app.services.world_service import clear_current_save, get_current_save, save_current
+
+
+def _role(role_id: str, name: str) -> NpcRoleCard:
+    return NpcRoleCard(role_id=role_id, name=name, profile=PlayerStaticData(role_type="npc"))
+
+
+class NameMatcherTests(unittest.TestCase):
+    def test_scan_reports_overlapping_spans(self) -> None:
+        matcher = NameMatcher((word, MentionTarget("word", word, "name")) for word in ["he", "she", "his", "hers"])
+        spans = sorted((match.text, match.start, match.end) for match in matcher.scan("ushers"))
+        self.assertEqual(spans, [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)])
+
+    def test_scan_agrees_with_substring_checks(self) -> None:
+        rng = random.Random(7)
+        alphabet = "ab露娜"
+        patterns = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(30)})
+        matcher = NameMatcher((pattern, MentionTarget("word", pattern, "name")) for pattern in patterns)
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            expected = sorted((p, i, i + len(p)) for p in patterns for i in range(len(text)) if text.startswith(p, i))
+            self.assertEqual(sorted((m.text, m.start, m.end) for m in matcher.scan(text)), expected)
+
+    def test_save_lookups_share_one_cached_automaton(self) -> None:
+        save = SaveFile(session_id="sess_names")
+        save.role_pool = [_role("npc_luna", "露娜"), _role("npc_mira", "米拉")]
+        save.map_snapshot.zones = [Zone(zone_id="zone_port", name="港口", x=0, y=0, description="harbor")]
+        save.player_static_data.dnd5e_sheet.backpack.items = [InventoryItem(item_id="item_rope", name="绳索")]
+        text = "带上绳索，和米拉一起去港口"
+
+        mentions = entity_mentions(save, text)
+        self.assertEqual(mentions.entity_ids("role"), ["npc_mira"])
+        self.assertEqual([(m.text, m.start) for m in mentions.matches if m.text == "港口"], [("港口", 11)])
+        builds = mention_cache.builds
+
+        self.assertEqual(_find_named_role(save, text).role_id, "npc_mira")
+        self.assertEqual(_find_zone_target(save, text).zone_id, "zone_port")
+        self.assertEqual(_find_inventory_item(save, save.player_static_data.dnd5e_sheet.backpack.items, text).item_id, "item_rope")
+        self.assertEqual(mention_cache.builds, builds)
+
+        save.role_pool.append(_role("npc_oren", "奥伦"))
+        self.assertEqual(_find_named_role(save, "奥伦在哪").role_id, "npc_oren")
+        self.assertEqual(mention_cache.builds, builds + 1)
+
+        save.role_pool[0].name = "露娜莉"
+        self.assertEqual(_find_named_role(save, "露娜莉在哪").role_id, "npc_luna")
+        save.player_static_data.dnd5e_sheet.backpack.items[0] = InventoryItem(item_id="item_torch", name="火把")
+        self.assertEqual(_find_inventory_item(save, save.player_static_data.dnd5e_sheet.backpack.items, "点燃火把").item_id, "item_torch")
+
+    def test_cached_save_copies_reuse_the_automaton_without_walking_the_vocabulary(self) -> None:
+        orig_save, orig_config = storage_state.save_path, storage_state.config_path
+        with tempfile.TemporaryDirectory() as tmp:
+            storage_state.set_save_path(str(Path(tmp) / "current-save.json"))
+            storage_state.set_config_path(str(Path(tmp) / "config.json"))
+            try:
+                sid = "sess_names_cached"
+                save = clear_current_save(sid)
+                save.role_pool = [_role("npc_luna", "露娜"), _role("npc_mira", "米拉")]
+                save_current(save)
+                self.assertEqual(_find_named_role(get_current_save(sid), "米拉在吗").role_id, "npc_mira")
+                builds = mention_cache.builds
+
+                with patch("app.services.name_matcher.save_vocabulary") as mocked_vocabulary:
+                    self.assertEqual(_find_named_role(get_current_save(sid), "露娜在吗").role_id, "npc_luna")
+                mocked_vocabulary.assert_not_called()
+
+                save = get_current_save(sid)
+                save.role_pool[1].name = "米拉贝尔"
+                save_current(save)
+                self.assertEqual(_find_named_role(get_current_save(sid), "米拉贝尔在吗").role_id, "npc_mira")
+                self.assertEqual(mention_cache.builds, builds + 1)
+            finally:
+                storage_state.set_save_path(str(orig_save))
+                storage_state.set_config_path(str(orig_config))
+
+
+if __name__ == "__main__":
+    unittest.main()
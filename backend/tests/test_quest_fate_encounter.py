@@ -1,6 +1,7 @@
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from app.core.storage import _save_bundle_dir, read_json, storage_state
 from app.models.schemas import (
@@ -17,6 +18,7 @@ from app.models.schemas import (
     PlayerStaticData,
     QuestActionRequest,
     QuestDraft,
+    QuestEntry,
     QuestEvaluateAllRequest,
     QuestObjective,
     QuestPublishRequest,
@@ -24,8 +26,9 @@ from app.models.schemas import (
 )
 from app.services.encounter_service import act_on_encounter, check_for_encounter, present_encounter
 from app.services.fate_service import evaluate_fate_state, generate_fate
+from app.services import quest_service
 from app.services.quest_service import accept_quest, evaluate_all_quests, publish_quest, reject_quest
-from app.services.world_service import clear_current_save, get_current_save, save_current
+from app.services.world_service import clear_current_save, flush_current_save, get_current_save, save_current
 
 
 class QuestFateEncounterTests(unittest.TestCase):
@@ -81,6 +84,7 @@ class QuestFateEncounterTests(unittest.TestCase):
         sid = 'sess_bundle_new_parts'
         save = clear_current_save(sid)
         save_current(save)
+        flush_current_save()
 
         bundle_dir = _save_bundle_dir(storage_state.save_path)
         manifest = read_json(bundle_dir / 'manifest.json')
@@ -181,6 +185,46 @@ class QuestFateEncounterTests(unittest.TestCase):
         self.assertEqual(quest.status, 'completed')
         self.assertTrue(any(log.kind == 'encounter_resolution_text' for log in updated.game_logs))
 
+    def test_evaluate_all_quests_loads_and_saves_once(self) -> None:
+        sid = 'sess_quest_batch'
+        self._seed_context(sid)
+        save = get_current_save(sid)
+        save.role_pool[0].relations.append(RoleRelation(target_role_id=save.player_static_data.player_id, relation_tag='met', note='已接触'))
+
+        def quest(quest_id: str, kind: str, target_ref: dict[str, str]) -> QuestEntry:
+            return QuestEntry(
+                quest_id=quest_id,
+                status='active',
+                title=quest_id,
+                description=quest_id,
+                objectives=[QuestObjective(objective_id=f'obj_{quest_id}', kind=kind, title=quest_id, target_ref=target_ref)],
+            )
+
+        save.quest_state.quests = [
+            quest('quest_talk', 'talk_to_npc', {'npc_role_id': 'npc_clerk'}),
+            quest('quest_chain', 'complete_quest', {'quest_id': 'quest_talk'}),
+            quest('quest_item', 'obtain_item', {'item_name': 'Silver Key'}),
+            *[quest(f'quest_wait_{idx}', 'reach_zone', {'zone_id': 'zone_far'}) for idx in range(6)],
+        ]
+        save_current(save)
+
+        with (
+            patch('app.services.quest_service.get_current_save', wraps=quest_service.get_current_save) as mocked_get,
+            patch('app.services.quest_service.save_current', wraps=quest_service.save_current) as mocked_save,
+            patch('app.services.quest_service._after_quest_completion') as mocked_after,
+            patch('app.services.quest_service.get_quest_state', side_effect=lambda session_id: None),
+        ):
+            evaluate_all_quests(QuestEvaluateAllRequest(session_id=sid))
+
+        self.assertEqual(mocked_get.call_count, 1)
+        self.assertEqual(mocked_save.call_count, 1)
+        mocked_after.assert_called_once()
+        statuses = {item.quest_id: item.status for item in get_current_save(sid).quest_state.quests}
+        self.assertEqual(statuses['quest_talk'], 'completed')
+        self.assertEqual(statuses['quest_chain'], 'completed')
+        self.assertEqual(statuses['quest_item'], 'active')
+        self.assertEqual(sum(1 for status in statuses.values() if status == 'active'), 7)
+
 
 if __name__ == '__main__':
     unittest.main()
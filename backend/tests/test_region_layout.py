@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from app.models.schemas import Zone
+from app.services.region_layout import resolve_overlaps
+from app.services.world_service import _enforce_non_overlap
+
+
+def _overlaps(positions: list[tuple[int, int]], radii: list[int]) -> int:
+    count = 0
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            dx = positions[i][0] - positions[j][0]
+            dy = positions[i][1] - positions[j][1]
+            if dx * dx + dy * dy < (radii[i] + radii[j] + 1) ** 2:
+                count += 1
+    return count
+
+
+class RegionLayoutTests(unittest.TestCase):
+    def test_dense_random_layout_converges_without_overlaps(self) -> None:
+        rng = random.Random(3)
+        circles = [(rng.randint(-4000, 4000), rng.randint(-4000, 4000), rng.choice([60, 150, 300])) for _ in range(400)]
+        result = resolve_overlaps(circles)
+        self.assertTrue(result.converged)
+        self.assertEqual(_overlaps(result.positions, [r for _, _, r in circles]), 0)
+        self.assertEqual(result.positions[0], (circles[0][0], circles[0][1]))
+
+    def test_layout_denser_than_its_bounding_box_still_converges(self) -> None:
+        rng = random.Random(0)
+        span = int(1000**0.5 * 100)
+        circles = [(rng.randint(-span, span), rng.randint(-span, span), rng.choice([60, 120, 180, 240, 300])) for _ in range(1000)]
+        result = resolve_overlaps(circles)
+        self.assertTrue(result.converged)
+        self.assertLess(result.iterations, 1000)
+        self.assertEqual(_overlaps(result.positions, [r for _, _, r in circles]), 0)
+        self.assertEqual(result.positions[0], (circles[0][0], circles[0][1]))
+
+    def test_enforce_non_overlap_separates_stacked_zones(self) -> None:
+        zones = [
+            Zone(zone_id=f"zone_{idx}", name=f"Zone {idx}", x=0, y=0, radius_m=120, description="stacked")
+            for idx in range(6)
+        ]
+        _enforce_non_overlap(zones)
+        self.assertEqual((zones[0].x, zones[0].y), (0, 0))
+        self.assertEqual(_overlaps([(zone.x, zone.y) for zone in zones], [zone.radius_m for zone in zones]), 0)
+
+    def test_separated_zones_are_left_in_place(self) -> None:
+        circles = [(0, 0, 100), (500, 0, 100), (0, 500, 100)]
+        result = resolve_overlaps(circles)
+        self.assertEqual(result.positions, [(0, 0), (500, 0), (0, 500)])
+        self.assertEqual(result.iterations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
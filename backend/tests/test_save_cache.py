@@ -0,0 +1,199 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core import storage
+from app.core.game_log_store import GameLogStore
+from app.core.save_cache import SaveCache
+from app.core.storage import _save_bundle_dir, open_save_bundle, read_json, storage_state, write_save_payload
+from app.models.schemas import QuestState
+from app.services.quest_service import get_quest_state
+from app.services.world_service import (
+    clear_current_save,
+    flush_current_save,
+    get_current_save,
+    get_player_static,
+    save_current,
+)
+
+
+class SaveCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def test_repeated_reads_are_served_without_disk_reads(self) -> None:
+        sid = "sess_cache_hit"
+        clear_current_save(sid)
+        get_current_save(sid)
+
+        with patch("app.services.world_service.read_save_file") as mocked_read:
+            first = get_current_save(sid)
+            second = get_current_save(sid)
+
+        mocked_read.assert_not_called()
+        self.assertEqual(first.session_id, sid)
+        self.assertIsNot(first, second)
+
+    def test_mutations_without_save_do_not_leak_into_cache(self) -> None:
+        sid = "sess_cache_isolation"
+        clear_current_save(sid)
+        save = get_current_save(sid)
+        save.player_static_data.name = "Unsaved Name"
+
+        self.assertNotEqual(get_current_save(sid).player_static_data.name, "Unsaved Name")
+
+    def test_writes_are_coalesced_until_flush(self) -> None:
+        sid = "sess_cache_write_behind"
+        clear_current_save(sid)
+        flush_current_save()
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+
+        save = get_current_save(sid)
+        save.player_static_data.name = "First"
+        save_current(save)
+        save.player_static_data.name = "Second"
+        save_current(save)
+        with patch("app.core.save_cache.write_save_payload", wraps=write_save_payload) as mocked_write:
+            flush_current_save()
+
+        self.assertEqual(mocked_write.call_count, 1)
+        player = read_json(bundle_dir / "player_data.json")
+        self.assertEqual(player["player_static_data"]["name"], "Second")
+
+    def test_external_bundle_change_invalidates_clean_entry(self) -> None:
+        sid = "sess_cache_external"
+        clear_current_save(sid)
+        payload = get_current_save(sid).model_dump(mode="json")
+        flush_current_save()
+        payload["player_static_data"]["name"] = "Edited Outside"
+        write_save_payload(storage_state.save_path, payload)
+
+        self.assertEqual(get_current_save(sid).player_static_data.name, "Edited Outside")
+
+    def test_zero_delay_cache_writes_through(self) -> None:
+        cache = SaveCache(flush_delay_s=0, flush_max_wait_s=0)
+        save = clear_current_save("sess_cache_write_through")
+        flush_current_save()
+        save.player_static_data.name = "Written Through"
+
+        cache.put(storage_state.save_path, save, normalized=False)
+
+        self.assertFalse(cache.is_dirty(storage_state.save_path))
+        player = read_json(_save_bundle_dir(storage_state.save_path) / "player_data.json")
+        self.assertEqual(player["player_static_data"]["name"], "Written Through")
+
+    def test_unchanged_put_keeps_revision_and_shares_blobs(self) -> None:
+        cache = SaveCache(flush_delay_s=60, flush_max_wait_s=60)
+        save = clear_current_save("sess_cache_unchanged")
+        first = cache.put(storage_state.save_path, save, normalized=True)
+        before = cache._entries[cache._key(storage_state.save_path)].snapshot
+
+        self.assertEqual(cache.put(storage_state.save_path, save, normalized=True, dirty=False), first)
+        save.player_static_data.name = "Renamed"
+        second = cache.put(storage_state.save_path, save, normalized=True, expected_revision=first)
+
+        entry = cache._entries[cache._key(storage_state.save_path)]
+        self.assertEqual(second, first + 1)
+        self.assertIs(entry.snapshot["role_pool"], before["role_pool"])
+        self.assertIsNot(entry.snapshot["player_static_data"], before["player_static_data"])
+        self.assertEqual(cache.changes_since(storage_state.save_path, first).fields, {"player_static_data"})
+        cache.invalidate()
+
+    def _clean_bundle(self, sid: str) -> None:
+        clear_current_save(sid)
+        get_current_save(sid)
+        flush_current_save()
+
+    def test_bundle_reader_loads_parts_on_demand(self) -> None:
+        self._clean_bundle("sess_reader_parts")
+
+        reader = open_save_bundle(storage_state.save_path)
+        self.assertIsNotNone(reader)
+        quest_state = reader.load("quest_state")
+
+        self.assertIsInstance(quest_state, QuestState)
+        self.assertEqual(reader.loaded_parts, ["quest_state"])
+        self.assertEqual(reader.load("session_id"), "sess_reader_parts")
+        self.assertEqual(sorted(reader.loaded_parts), ["meta", "quest_state"])
+
+    def test_state_getters_read_single_part_when_bundle_is_clean(self) -> None:
+        sid = "sess_reader_getters"
+        self._clean_bundle(sid)
+
+        with patch("app.core.storage.read_json", wraps=read_json) as mocked_read:
+            profile = get_player_static(sid)
+            quests = get_quest_state(sid)
+
+        read_names = sorted({call.args[0].name for call in mocked_read.call_args_list})
+        self.assertEqual(read_names, ["meta.json", "player_data.json", "quest_state.json"])
+        self.assertEqual(profile.player_id, get_current_save(sid).player_static_data.player_id)
+        self.assertEqual(quests.session_id, sid)
+
+    def test_state_getters_use_full_load_while_save_is_dirty(self) -> None:
+        sid = "sess_reader_dirty"
+        self._clean_bundle(sid)
+        save = get_current_save(sid)
+        save.player_static_data.name = "Pending Write"
+        save_current(save)
+
+        self.assertEqual(get_player_static(sid).name, "Pending Write")
+
+    def test_flush_serializes_only_changed_parts_once(self) -> None:
+        sid = "sess_partial_flush"
+        self._clean_bundle(sid)
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+        role_pool_mtime = (bundle_dir / "role_pool.json").stat().st_mtime_ns
+        save = get_current_save(sid)
+        save.quest_state.tracked_quest_id = "quest_partial"
+        save_current(save)
+
+        with (
+            patch("app.core.storage._serialize_part", wraps=storage._serialize_part) as mocked_dump,
+            patch.object(GameLogStore, "sync_from", wraps=GameLogStore.sync_from, autospec=True) as mocked_sync,
+        ):
+            flush_current_save()
+
+        dumped = [call.args[0] for call in mocked_dump.call_args_list]
+        self.assertEqual(dumped.count("quest_state"), 1)
+        self.assertNotIn("role_pool", dumped)
+        mocked_sync.assert_not_called()
+        self.assertEqual((bundle_dir / "role_pool.json").stat().st_mtime_ns, role_pool_mtime)
+        self.assertEqual(read_json(bundle_dir / "quest_state.json")["tracked_quest_id"], "quest_partial")
+        self.assertEqual(get_current_save(sid).quest_state.tracked_quest_id, "quest_partial")
+
+    def test_missing_part_file_is_rebuilt_on_partial_flush(self) -> None:
+        sid = "sess_partial_missing"
+        self._clean_bundle(sid)
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+        save = get_current_save(sid)
+        (bundle_dir / "role_pool.json").unlink()
+        save.quest_state.tracked_quest_id = "quest_full"
+        save_current(save)
+        flush_current_save()
+
+        self.assertTrue((bundle_dir / "role_pool.json").exists())
+
+    def test_compact_json_option(self) -> None:
+        cache = SaveCache(flush_delay_s=0, flush_max_wait_s=0, compact_json=True)
+        save = clear_current_save("sess_compact_json")
+        flush_current_save()
+        cache.put(storage_state.save_path, save, normalized=False)
+
+        content = (_save_bundle_dir(storage_state.save_path) / "quest_state.json").read_text(encoding="utf-8")
+        self.assertNotIn("\n", content)
+        self.assertEqual(read_json(_save_bundle_dir(storage_state.save_path) / "quest_state.json"), save.quest_state.model_dump(mode="json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core import json_codec
+from app.core.storage import migrate_save_compression, read_save_file, read_save_payload, storage_state
+from app.main import app
+from app.models.schemas import GameLogAddRequest, NpcRoleCard, PlayerStaticData, SaveFile
+from app.services.world_service import add_game_log, clear_current_save, flush_current_save, get_current_save, save_current
+
+
+class SaveCodecTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def test_direct_bundle_read_matches_dict_validation(self) -> None:
+        sid = "sess_codec_read"
+        save = clear_current_save(sid)
+        save.role_pool = [NpcRoleCard(role_id="npc_codec", name="米拉", personality="谨慎", profile=PlayerStaticData(role_type="npc"))]
+        save_current(save)
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="城门打开了"))
+        flush_current_save()
+
+        expected = SaveFile.model_validate(read_save_payload(storage_state.save_path))
+        self.assertEqual(read_save_file(storage_state.save_path), expected)
+        migrate_save_compression(storage_state.save_path, "gzip")
+        self.assertEqual(read_save_file(storage_state.save_path), expected)
+
+        legacy_path = Path(self._tmpdir.name) / "legacy-save.json"
+        legacy_path.write_bytes(expected.model_dump_json().encode("utf-8"))
+        self.assertEqual(read_save_file(legacy_path), expected)
+        self.assertIsNone(read_save_file(Path(self._tmpdir.name) / "missing.json"))
+
+    def test_codec_round_trip_and_save_responses(self) -> None:
+        payload = {"name": "守卫", "items": [1, 2.5, None, True]}
+        self.assertEqual(json_codec.loads(json_codec.dumps(payload)), payload)
+        self.assertNotIn(b"\\u", json_codec.dumps(payload, compact=True))
+
+        sid = "sess_codec_route"
+        clear_current_save(sid)
+        response = TestClient(app).get("/api/v1/saves/current")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.json(), get_current_save(sid).model_dump(mode="json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
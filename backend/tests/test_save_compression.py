@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.save_cache import save_cache
+from app.core.storage import (
+    _save_bundle_dir,
+    migrate_save_compression,
+    open_save_bundle,
+    read_json,
+    read_save_payload,
+    resolve_part_format,
+    storage_state,
+)
+from app.models.schemas import NpcRoleCard, PlayerStaticData
+from app.services.world_service import clear_current_save, flush_current_save, get_current_save, save_current
+
+
+class SaveCompressionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _seed(self, sid: str) -> None:
+        save = clear_current_save(sid)
+        save.role_pool = [
+            NpcRoleCard(role_id=f"npc_{idx}", name=f"守卫{idx}", personality="沉默寡言，忠于城主。" * 8, profile=PlayerStaticData(role_type="npc"))
+            for idx in range(30)
+        ]
+        save_current(save)
+        flush_current_save()
+
+    def test_migration_compresses_parts_and_reads_stay_transparent(self) -> None:
+        sid = "sess_compress_migrate"
+        self._seed(sid)
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+        plain_payload = read_save_payload(storage_state.save_path)
+        plain_size = (bundle_dir / "role_pool.json").stat().st_size
+
+        self.assertTrue(migrate_save_compression(storage_state.save_path, "gzip"))
+        self.assertFalse(migrate_save_compression(storage_state.save_path, "gzip"))
+
+        manifest = read_json(bundle_dir / "manifest.json")
+        self.assertEqual(manifest["parts"]["role_pool"], "role_pool.json.gz")
+        self.assertEqual(manifest["formats"]["role_pool"], "json+gzip")
+        self.assertFalse((bundle_dir / "role_pool.json").exists())
+        self.assertLess((bundle_dir / "role_pool.json.gz").stat().st_size * 5, plain_size)
+        self.assertEqual(read_save_payload(storage_state.save_path), plain_payload)
+        self.assertEqual(open_save_bundle(storage_state.save_path).load("role_pool")[3].name, "守卫3")
+
+        self.assertTrue(migrate_save_compression(storage_state.save_path, "none"))
+        self.assertTrue((bundle_dir / "role_pool.json").exists())
+        self.assertFalse((bundle_dir / "role_pool.json.gz").exists())
+        self.assertEqual(read_save_payload(storage_state.save_path), plain_payload)
+
+    def test_save_cache_writes_configured_format_on_flush(self) -> None:
+        sid = "sess_compress_flush"
+        self._seed(sid)
+        bundle_dir = _save_bundle_dir(storage_state.save_path)
+
+        with patch.object(save_cache, "_part_format", "json+gzip"):
+            save = get_current_save(sid)
+            save.role_pool[0].name = "城门守卫"
+            save_current(save)
+            flush_current_save()
+
+        manifest = read_json(bundle_dir / "manifest.json")
+        self.assertEqual(set(manifest["formats"].values()), {"json+gzip", manifest["formats"]["game_logs"]})
+        self.assertFalse(list(bundle_dir.glob("*.json.tmp")))
+        save_cache.invalidate(storage_state.save_path)
+        self.assertEqual(get_current_save(sid).role_pool[0].name, "城门守卫")
+
+    def test_zstd_falls_back_to_gzip_without_zstandard(self) -> None:
+        with patch("app.core.storage.zstd_available", return_value=False):
+            self.assertEqual(resolve_part_format("zstd"), "json+gzip")
+        self.assertEqual(resolve_part_format(None), "json")
+        with self.assertRaises(ValueError):
+            resolve_part_format("brotli")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,303 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from app.core.save_cache import SaveConflictError, save_cache, save_revision
+from app.core.session_locks import SessionLockManager, session_locks
+from app.core.storage import open_save_bundle, storage_state
+from app.main import app
+from app.models.schemas import GameLogAddRequest, GameLogEntry, NpcRoleCard, PlayerStaticData
+from app.services.retention_service import RetentionPolicy, query_archive
+from app.services.world_service import (
+    add_game_log,
+    clear_current_save,
+    flush_current_save,
+    get_current_save,
+    retry_save_conflicts,
+    save_current,
+)
+
+
+def _role(role_id: str, name: str) -> NpcRoleCard:
+    return NpcRoleCard(role_id=role_id, name=name, profile=PlayerStaticData(role_type="npc"))
+
+
+def _in_other_scope(fn, *args):
+    box: dict[str, object] = {}
+
+    def run() -> None:
+        try:
+            with session_locks.lock("other_writer"):
+                box["result"] = fn(*args)
+        except BaseException as exc:
+            box["error"] = exc
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(5)
+    if "error" in box:
+        raise box["error"]
+    return box.get("result")
+
+
+class SessionLockManagerTests(unittest.TestCase):
+    def test_lock_blocks_same_session_only_and_drops_idle_keys(self) -> None:
+        manager = SessionLockManager()
+        order: list[str] = []
+        entered = threading.Event()
+        release = threading.Event()
+
+        def holder() -> None:
+            with manager.lock("sess_a"):
+                entered.set()
+                release.wait(5)
+                order.append("first")
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        entered.wait(5)
+        with manager.lock("sess_b"):
+            order.append("other_session")
+        threading.Timer(0.05, release.set).start()
+        with manager.lock("sess_a"):
+            order.append("second")
+        thread.join(5)
+
+        self.assertEqual(order, ["other_session", "first", "second"])
+        self.assertEqual(manager.stats()["active"], 0)
+        self.assertEqual(manager.stats()["contended"], 1)
+
+
+class SaveConcurrencyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _seed(self, session_id: str) -> None:
+        save = clear_current_save(session_id)
+        save.role_pool = [_role("npc_a", "Luna")]
+        save_current(save)
+
+    def test_disjoint_part_changes_merge(self) -> None:
+        sid = "sess_merge_parts"
+        self._seed(sid)
+        with session_locks.lock(sid):
+            stale = get_current_save(sid)
+            _in_other_scope(add_game_log, GameLogAddRequest(session_id=sid, kind="note", message="from frontend"))
+            stale.role_pool.append(_role("npc_b", "Mira"))
+            save_current(stale)
+
+        self.assertEqual(save_revision(stale), save_cache.revision(storage_state.save_path))
+        merged = get_current_save(sid)
+        self.assertEqual([role.role_id for role in merged.role_pool], ["npc_a", "npc_b"])
+        self.assertEqual([item.message for item in merged.game_logs], ["from frontend"])
+        self.assertEqual(len(stale.game_logs), 1)
+
+    def test_both_writers_append_game_logs(self) -> None:
+        sid = "sess_merge_logs"
+        self._seed(sid)
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="base"))
+        with session_locks.lock(sid):
+            stale = get_current_save(sid)
+            _in_other_scope(add_game_log, GameLogAddRequest(session_id=sid, kind="note", message="remote"))
+            stale.game_logs.append(GameLogEntry(id="log_local", session_id=sid, kind="note", message="local"))
+            save_current(stale)
+
+        messages = [item.message for item in get_current_save(sid).game_logs]
+        self.assertEqual(messages, ["base", "remote", "local"])
+
+    def test_overlapping_changes_raise_conflict(self) -> None:
+        sid = "sess_conflict"
+        self._seed(sid)
+
+        def rename(name: str) -> None:
+            save = get_current_save(sid)
+            save.role_pool[0].name = name
+            save_current(save)
+
+        with session_locks.lock(sid):
+            stale = get_current_save(sid)
+            _in_other_scope(rename, "Luna the Elder")
+            stale.role_pool[0].name = "Luna the Younger"
+            with self.assertRaises(SaveConflictError) as ctx:
+                save_current(stale)
+
+        self.assertEqual(ctx.exception.fields, ["role_pool"])
+        self.assertEqual(get_current_save(sid).role_pool[0].name, "Luna the Elder")
+        self.assertGreaterEqual(save_cache.stats()["conflicts"], 1)
+
+    def test_cold_logs_are_split_from_the_merged_save(self) -> None:
+        sid = "sess_merge_retention"
+        self._seed(sid)
+        save = get_current_save(sid)
+        save.game_logs = [GameLogEntry(id=f"log_{idx}", session_id=sid, kind="note", message=f"log {idx}") for idx in range(10)]
+        save_current(save)
+
+        def remote_log() -> None:
+            current = get_current_save(sid)
+            current.game_logs.append(GameLogEntry(id="log_remote", session_id=sid, kind="note", message="remote"))
+            save_current(current)
+
+        policy = RetentionPolicy(game_logs=10, quests=2, encounters=2, fate_archive=2, dialogue_logs=20)
+        with patch("app.services.retention_service.retention_policy", policy), session_locks.lock(sid):
+            stale = get_current_save(sid)
+            untouched = _in_other_scope(get_current_save, sid)
+            _in_other_scope(remote_log)
+            stale.game_logs.extend(GameLogEntry(id=f"log_new_{idx}", session_id=sid, kind="note", message="new") for idx in range(3))
+            save_current(stale)
+
+            live = [item.id for item in get_current_save(sid).game_logs]
+            self.assertEqual(live, [f"log_{idx}" for idx in range(4, 10)] + ["log_remote", "log_new_0", "log_new_1", "log_new_2"])
+            self.assertEqual([item["id"] for item in query_archive(sid, "game_logs").items], ["log_3", "log_2", "log_1", "log_0"])
+
+            # A writer that loaded before the trim and never touched the logs does not bring archived ones back.
+            untouched.role_pool.append(_role("npc_late", "Late"))
+            save_current(untouched)
+        merged = get_current_save(sid)
+        self.assertEqual([item.id for item in merged.game_logs], live)
+        self.assertIn("npc_late", [role.role_id for role in merged.role_pool])
+
+    def test_stale_writer_appends_after_logs_were_trimmed(self) -> None:
+        sid = "sess_merge_trimmed"
+        self._seed(sid)
+        save = get_current_save(sid)
+        save.game_logs = [GameLogEntry(id=f"log_{idx}", session_id=sid, kind="note", message=f"log {idx}") for idx in range(12)]
+        save_current(save)
+
+        policy = RetentionPolicy(game_logs=10, quests=2, encounters=2, fate_archive=2, dialogue_logs=20)
+        with patch("app.services.retention_service.retention_policy", policy), session_locks.lock(sid):
+            stale = get_current_save(sid)
+            _in_other_scope(add_game_log, GameLogAddRequest(session_id=sid, kind="note", message="remote"))
+            trimmed = [item.id for item in get_current_save(sid).game_logs]
+            self.assertEqual(trimmed[0], "log_3")
+            stale.game_logs.append(GameLogEntry(id="log_local", session_id=sid, kind="note", message="local"))
+            save_current(stale)
+
+        self.assertEqual([item.id for item in get_current_save(sid).game_logs], trimmed + ["log_local"])
+
+    def test_concurrent_changes_to_different_entities_merge(self) -> None:
+        sid = "sess_entity_merge"
+        self._seed(sid)
+        save = get_current_save(sid)
+        save.role_pool.append(_role("npc_b", "Mira"))
+        save_current(save)
+
+        def concurrent_write() -> None:
+            save = get_current_save(sid)
+            save.role_pool[0].name = "Luna the Elder"
+            save.role_pool.append(_role("npc_c", "Oren"))
+            save.player_static_data.name = "Remote Name"
+            save.game_logs.append(GameLogEntry(id="log_remote", session_id=sid, kind="note", message="remote"))
+            save_current(save)
+
+        with session_locks.lock(sid):
+            turn = get_current_save(sid)
+            _in_other_scope(concurrent_write)
+            turn.role_pool[1].name = "Mira the Bold"
+            turn.player_static_data.move_speed_mph = 3000
+            turn.game_logs.append(GameLogEntry(id="log_turn", session_id=sid, kind="note", message="turn"))
+            save_current(turn)
+
+        current = get_current_save(sid)
+        self.assertEqual([role.name for role in current.role_pool], ["Luna the Elder", "Mira the Bold", "Oren"])
+        self.assertEqual((current.player_static_data.name, current.player_static_data.move_speed_mph), ("Remote Name", 3000))
+        self.assertEqual([item.message for item in current.game_logs][-2:], ["remote", "turn"])
+
+    def test_concurrent_change_to_the_same_entity_is_not_overwritten(self) -> None:
+        sid = "sess_entity_conflict"
+        self._seed(sid)
+
+        def concurrent_write() -> None:
+            save = get_current_save(sid)
+            save.role_pool[0].name = "Luna the Elder"
+            save_current(save)
+
+        with session_locks.lock(sid):
+            turn = get_current_save(sid)
+            _in_other_scope(concurrent_write)
+            turn.role_pool[0].name = "Luna the Younger"
+            with self.assertRaises(SaveConflictError) as ctx:
+                save_current(turn)
+
+        self.assertEqual(ctx.exception.fields, ["role_pool"])
+        self.assertEqual(get_current_save(sid).role_pool[0].name, "Luna the Elder")
+
+    def test_retry_rereads_after_conflict(self) -> None:
+        sid = "sess_retry"
+        self._seed(sid)
+        calls = {"count": 0}
+
+        def rename() -> str:
+            calls["count"] += 1
+            save = get_current_save(sid)
+            if calls["count"] == 1:
+                _in_other_scope(lambda: retry_save_conflicts(_rename_other))
+            save.role_pool[0].name = "Luna the Younger"
+            save_current(save)
+            return save.role_pool[0].name
+
+        def _rename_other() -> None:
+            save = get_current_save(sid)
+            save.role_pool[0].name = "Luna the Elder"
+            save_current(save)
+
+        with session_locks.lock(sid):
+            result = retry_save_conflicts(rename)
+
+        self.assertEqual(result, "Luna the Younger")
+        self.assertEqual(calls["count"], 2)
+        self.assertEqual(get_current_save(sid).role_pool[0].name, "Luna the Younger")
+
+    def test_manifest_records_revision_and_reload_resumes_it(self) -> None:
+        sid = "sess_revision"
+        self._seed(sid)
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="hello"))
+        revision = save_revision(get_current_save(sid))
+        flush_current_save()
+
+        reader = open_save_bundle(storage_state.save_path)
+        self.assertIsNotNone(reader)
+        self.assertEqual(reader.revision, revision)
+
+        save_cache.invalidate(storage_state.save_path)
+        reloaded = get_current_save(sid)
+        self.assertGreaterEqual(save_revision(reloaded), revision)
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="again"))
+        self.assertGreater(save_revision(get_current_save(sid)), save_revision(reloaded))
+
+    def test_concurrent_game_log_posts_all_land(self) -> None:
+        sid = "sess_concurrent_posts"
+        self._seed(sid)
+
+        async def scenario() -> list[int]:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                responses = await asyncio.gather(
+                    *[
+                        client.post("/api/v1/logs/game", json={"session_id": sid, "kind": "note", "message": f"msg {idx}"})
+                        for idx in range(12)
+                    ]
+                )
+            return [response.status_code for response in responses]
+
+        self.assertEqual(asyncio.run(scenario()), [200] * 12)
+        messages = {item.message for item in get_current_save(sid).game_logs}
+        self.assertEqual(messages, {f"msg {idx}" for idx in range(12)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import gc
+import unittest
+
+from app.models.schemas import AreaSnapshot, AreaSubZone, AreaZone, Coord3D, EntityRef, NpcRoleCard, PlayerStaticData, SaveFile
+from app.services.consistency_service import _entity_exists, bump_world_revision
+from app.services.save_index import entity_index_stats, find_role, find_sub_zone, find_zone, lookup
+
+
+def _role(role_id: str, name: str) -> NpcRoleCard:
+    return NpcRoleCard(role_id=role_id, name=name, profile=PlayerStaticData(role_type="npc"))
+
+
+def _zone(zone_id: str) -> AreaZone:
+    return AreaZone(zone_id=zone_id, name=zone_id.upper(), center=Coord3D(x=0, y=0, z=0))
+
+
+def _save() -> SaveFile:
+    save = SaveFile(session_id="sess_index")
+    save.role_pool = [_role("npc_a", "Luna"), _role("npc_b", "Mira"), _role("npc_a", "Duplicate")]
+    save.area_snapshot = AreaSnapshot(zones=[_zone("zone_a"), _zone("zone_b")])
+    return save
+
+
+class SaveIndexTests(unittest.TestCase):
+    def test_lookup_matches_first_linear_hit(self) -> None:
+        save = _save()
+        self.assertEqual(find_role(save, "npc_a").name, "Luna")
+        self.assertEqual(find_role(save, "npc_b").name, "Mira")
+        self.assertIsNone(find_role(save, "npc_missing"))
+        self.assertIsNone(find_role(save, None))
+        self.assertEqual(find_zone(save.area_snapshot, "zone_b").name, "ZONE_B")
+
+    def test_index_follows_list_mutations(self) -> None:
+        save = _save()
+        self.assertIsNotNone(find_role(save, "npc_a"))
+        save.role_pool.append(_role("npc_c", "Nia"))
+        self.assertEqual(find_role(save, "npc_c").name, "Nia")
+
+        save.role_pool.pop(1)
+        save.role_pool.append(_role("npc_d", "Oren"))
+        self.assertIsNone(find_role(save, "npc_b"))
+        self.assertEqual(find_role(save, "npc_d").name, "Oren")
+
+        save.role_pool[0].role_id = "npc_renamed"
+        self.assertEqual(find_role(save, "npc_a").name, "Duplicate")
+
+        save.role_pool = [_role("npc_e", "Pell")]
+        self.assertIsNone(find_role(save, "npc_a"))
+        self.assertEqual(find_role(save, "npc_e").name, "Pell")
+
+        save.area_snapshot = AreaSnapshot(zones=[_zone("zone_z")])
+        self.assertIsNone(find_zone(save.area_snapshot, "zone_a"))
+        self.assertIsNotNone(find_zone(save.area_snapshot, "zone_z"))
+
+    def test_miss_rescans_middle_replacements_and_renames(self) -> None:
+        save = _save()
+        self.assertEqual(find_role(save, "npc_b").name, "Mira")
+
+        save.role_pool[1] = _role("npc_x", "Xan")
+        self.assertEqual(find_role(save, "npc_x").name, "Xan")
+
+        save.role_pool[1].role_id = "npc_y"
+        self.assertEqual(find_role(save, "npc_y").name, "Xan")
+        self.assertIsNone(find_role(save, "npc_x"))
+
+    def test_repeated_lookups_reuse_index(self) -> None:
+        save = _save()
+        find_role(save, "npc_a")
+        before = entity_index_stats()["rebuilds"]
+        for _ in range(50):
+            find_role(save, "npc_b")
+            lookup(save, "role_pool", "role_id", "npc_a")
+        self.assertEqual(entity_index_stats()["rebuilds"], before)
+
+        bump_world_revision(save, world_changed=True, map_changed=False)
+        find_role(save, "npc_b")
+        self.assertEqual(entity_index_stats()["rebuilds"], before + 1)
+
+    def test_entity_exists_uses_index_and_owners_are_released(self) -> None:
+        save = _save()
+        save.area_snapshot.sub_zones = [
+            AreaSubZone(sub_zone_id="sub_a", zone_id="zone_a", name="Gate", coord=Coord3D(x=0, y=0, z=0), description="gate")
+        ]
+        self.assertTrue(_entity_exists(save, EntityRef(entity_type="npc", entity_id="npc_b")))
+        self.assertTrue(_entity_exists(save, EntityRef(entity_type="sub_zone", entity_id="sub_a")))
+        self.assertFalse(_entity_exists(save, EntityRef(entity_type="zone", entity_id="zone_missing")))
+        self.assertEqual(find_sub_zone(save.area_snapshot, "sub_a").name, "Gate")
+
+        owners = entity_index_stats()["owners"]
+        del save
+        gc.collect()
+        self.assertLess(entity_index_stats()["owners"], owners)
+
+
+if __name__ == "__main__":
+    unittest.main()
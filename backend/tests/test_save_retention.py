@@ -0,0 +1,176 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.save_archive import SaveArchive
+from app.core.save_cache import SaveConflictError, set_save_revision
+from app.core.storage import save_archive_dir, storage_state
+from app.main import app
+from app.models.schemas import EncounterEntry, FateEvaluateRequest, FateGenerateRequest, FateLine, FatePhase, FateTriggerCondition, GameLogAddRequest, GameLogEntry, NpcRoleCard, PlayerStaticData, QuestEntry, WorldClock
+from app.services.fate_service import evaluate_fate_state, generate_fate
+from app.services.retention_service import RetentionPolicy, query_archive
+from app.services.world_service import _append_npc_dialogue, add_game_log, clear_current_save, get_current_save, save_current
+
+
+class SaveRetentionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+        policy = RetentionPolicy(game_logs=10, quests=2, encounters=2, fate_archive=2, dialogue_logs=20)
+        self._patch = patch("app.services.retention_service.retention_policy", policy)
+        self._patch.start()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def test_old_game_logs_move_to_compressed_archive(self) -> None:
+        sid = "sess_retention_logs"
+        clear_current_save(sid)
+        for idx in range(13):
+            add_game_log(GameLogAddRequest(session_id=sid, kind="note", message=f"log {idx}"))
+
+        live = get_current_save(sid).game_logs
+        self.assertEqual([item.message for item in live], [f"log {idx}" for idx in range(3, 13)])
+        archived = query_archive(sid, "game_logs")
+        self.assertEqual(archived.total, 3)
+        self.assertEqual([item["message"] for item in archived.items], ["log 2", "log 1", "log 0"])
+        self.assertEqual([item["message"] for item in query_archive(sid, "game_logs", offset=1, limit=1).items], ["log 1"])
+        self.assertTrue(list(SaveArchive(save_archive_dir(storage_state.save_path)).collection_dir(sid, "game_logs").glob("*.jsonl.gz")))
+
+        other = "sess_retention_other"
+        clear_current_save(other)
+        self.assertEqual(query_archive(other, "game_logs").total, 0)
+        for idx in range(13):
+            add_game_log(GameLogAddRequest(session_id=other, kind="note", message=f"other {idx}"))
+        self.assertEqual(query_archive(other, "game_logs").total, 3)
+        self.assertEqual(query_archive(sid, "game_logs").total, 3)
+        self.assertEqual(query_archive(sid, "game_logs").items[0]["message"], "log 2")
+
+    def test_save_rejected_by_conflict_check_archives_nothing(self) -> None:
+        sid = "sess_retention_conflict"
+        save = clear_current_save(sid)
+        save.game_logs = [GameLogEntry(id=f"glog_{idx}", session_id=sid, kind="note", message=f"log {idx}") for idx in range(13)]
+        set_save_revision(save, 10_000)
+
+        with self.assertRaises(SaveConflictError):
+            save_current(save)
+
+        self.assertEqual(query_archive(sid, "game_logs").total, 0)
+        self.assertFalse(SaveArchive(save_archive_dir(storage_state.save_path)).collection_dir(sid, "game_logs").exists())
+
+    def test_failed_archive_write_keeps_items_live(self) -> None:
+        sid = "sess_retention_archive_error"
+        save = clear_current_save(sid)
+        save.game_logs = [GameLogEntry(id=f"glog_{idx}", session_id=sid, kind="note", message=f"log {idx}") for idx in range(12)]
+        save_current(save)
+
+        with patch.object(SaveArchive, "append", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="log 12"))
+        self.assertEqual([item.message for item in get_current_save(sid).game_logs], [f"log {idx}" for idx in range(12)])
+        self.assertEqual(query_archive(sid, "game_logs").total, 0)
+
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="log 12"))
+        self.assertEqual(len(get_current_save(sid).game_logs), 10)
+        self.assertEqual([item["message"] for item in query_archive(sid, "game_logs").items], ["log 2", "log 1", "log 0"])
+
+    def test_only_terminal_unpinned_quests_and_old_dialogue_are_archived(self) -> None:
+        sid = "sess_retention_quests"
+        save = clear_current_save(sid)
+        statuses = ["completed", "completed", "active", "failed", "completed", "completed"]
+        save.quest_state.quests = [
+            QuestEntry(quest_id=f"quest_{idx}", title="Errand", description="Run an errand", status=status)  # type: ignore[arg-type]
+            for idx, status in enumerate(statuses)
+        ]
+        save.quest_state.tracked_quest_id = "quest_0"
+        role = NpcRoleCard(role_id="npc_chatty", name="Mira", profile=PlayerStaticData(role_type="npc"))
+        clock = WorldClock(calendar="fantasy_default", year=1024, month=3, day=14, hour=9, minute=30)
+        for idx in range(26):
+            _append_npc_dialogue(role, "player", "player_001", "Player", f"line {idx}", clock)
+        save.role_pool = [role]
+        save_current(save)
+
+        live = get_current_save(sid)
+        self.assertEqual([quest.quest_id for quest in live.quest_state.quests], ["quest_0", "quest_2", "quest_4", "quest_5"])
+        self.assertEqual(len(live.role_pool[0].dialogue_logs), 20)
+        self.assertEqual([item["quest_id"] for item in query_archive(sid, "quests").items], ["quest_3", "quest_1"])
+
+        response = TestClient(app).get(
+            "/api/v1/archive",
+            params={"session_id": sid, "collection": "dialogue_logs", "owner_id": "npc_chatty", "limit": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 6)
+        self.assertEqual([item["content"] for item in response.json()["items"]], ["line 5", "line 4"])
+        self.assertEqual(query_archive(sid, "dialogue_logs", owner_id="npc_other").total, 0)
+
+    def test_archived_fate_completion_log_is_not_written_again(self) -> None:
+        sid = "sess_retention_fate"
+        clear_current_save(sid)
+        generate_fate(FateGenerateRequest(session_id=sid))
+        save = get_current_save(sid)
+        phase = min(save.fate_state.current_fate.phases, key=lambda item: item.index)
+        quest = next(item for item in save.quest_state.quests if item.quest_id == phase.bound_quest_id)
+        quest.status = "completed"
+        quest.completed_at = "2024-01-01T00:00:00+00:00"
+        save_current(save)
+        evaluate_fate_state(FateEvaluateRequest(session_id=sid))
+        for idx in range(13):
+            add_game_log(GameLogAddRequest(session_id=sid, kind="note", message=f"log {idx}"))
+
+        def completions() -> list[str]:
+            live = [item.id for item in get_current_save(sid).game_logs if item.kind == "fate_phase_completed"]
+            archived = [item["id"] for item in query_archive(sid, "game_logs", limit=200).items if item["kind"] == "fate_phase_completed"]
+            return live + archived
+
+        self.assertEqual(len(completions()), 1)
+        self.assertFalse(any(item.kind == "fate_phase_completed" for item in get_current_save(sid).game_logs))
+        evaluate_fate_state(FateEvaluateRequest(session_id=sid))
+        self.assertEqual(len(completions()), 1)
+
+    def test_ids_referenced_by_open_fate_conditions_stay_live(self) -> None:
+        sid = "sess_retention_fate_pins"
+        save = clear_current_save(sid)
+        save.quest_state.quests = [
+            QuestEntry(quest_id=f"quest_{idx}", title="Errand", description="Run an errand", status="completed")
+            for idx in range(6)
+        ]
+        save.encounter_state.encounters = [
+            EncounterEntry(encounter_id=f"enc_{idx}", title="Ambush", description="Bandits", status="resolved")
+            for idx in range(6)
+        ]
+        save.encounter_state.encounters[1].related_fate_phase_ids = ["phase_open"]
+        conditions = [
+            FateTriggerCondition(condition_id="cond_quest", kind="completed_quest", description="Finish", payload={"quest_id": "quest_0"}),
+            FateTriggerCondition(condition_id="cond_enc", kind="resolved_encounter", description="Win", payload={"encounter_id": "enc_0"}),
+        ]
+        phase = FatePhase(phase_id="phase_open", title="Omen", description="Omen", trigger_conditions=conditions)
+        save.fate_state.current_fate = FateLine(fate_id="fate_pins", title="Fate", summary="Fate", phases=[phase])
+        save_current(save)
+
+        live = get_current_save(sid)
+        self.assertIn("quest_0", [quest.quest_id for quest in live.quest_state.quests])
+        self.assertIn("enc_0", [item.encounter_id for item in live.encounter_state.encounters])
+        self.assertIn("enc_1", [item.encounter_id for item in live.encounter_state.encounters])
+
+    def test_archive_skips_items_already_archived_by_a_retried_save(self) -> None:
+        archive = SaveArchive(save_archive_dir(storage_state.save_path))
+        records = [("", f"log_{idx}", {"id": f"log_{idx}"}) for idx in range(3)]
+        self.assertEqual(archive.append("sess_retry", "game_logs", records), 3)
+        self.assertEqual(archive.append("sess_retry", "game_logs", records), 0)
+        self.assertEqual(archive.stats("sess_retry")["game_logs"], 3)
+        self.assertEqual(archive.append("sess_retry", "game_logs", [("", "log_0", {"id": "log_0", "kind": "same_ms"})]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
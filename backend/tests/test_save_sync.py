@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.save_cache import save_cache
+from app.core.storage import storage_state
+from app.main import app
+from app.models.schemas import GameLogAddRequest, NpcRoleCard, PlayerStaticData, QuestEntry
+from app.services.world_service import add_game_log, clear_current_save, get_current_save, save_current, sync_save_changes
+
+
+def _role(role_id: str, name: str) -> NpcRoleCard:
+    return NpcRoleCard(role_id=role_id, name=name, profile=PlayerStaticData(role_type="npc"))
+
+
+class SaveSyncTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def test_sync_returns_only_changed_parts_and_new_logs(self) -> None:
+        sid = "sess_sync"
+        clear_current_save(sid)
+        full = sync_save_changes(sid)
+        self.assertTrue(full.full)
+        self.assertIn("role_pool", full.parts)
+
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="first"))
+        add_game_log(GameLogAddRequest(session_id=sid, kind="note", message="second"))
+        delta = sync_save_changes(sid, full.revision)
+        self.assertFalse(delta.full)
+        self.assertGreater(delta.revision, full.revision)
+        self.assertEqual([item.message for item in delta.game_logs_appended], ["first", "second"])
+        self.assertNotIn("game_logs", delta.parts)
+        self.assertNotIn("role_pool", delta.parts)
+
+        save = get_current_save(sid)
+        save.role_pool.append(_role("npc_sync", "Luna"))
+        save_current(save)
+        roles = sync_save_changes(sid, delta.revision)
+        self.assertNotIn("role_pool", roles.parts)
+        self.assertEqual([role["role_id"] for role in roles.entity_changes["role_pool"].upserted], ["npc_sync"])
+        self.assertEqual(roles.game_logs_appended, [])
+
+        unchanged = sync_save_changes(sid, roles.revision)
+        self.assertFalse(unchanged.full)
+        self.assertEqual(unchanged.parts, {})
+
+    def test_sync_sends_entity_upserts_and_removals_by_id(self) -> None:
+        sid = "sess_sync_entities"
+        clear_current_save(sid)
+        save = get_current_save(sid)
+        save.role_pool.extend([_role("npc_a", "Ada"), _role("npc_b", "Bram"), _role("npc_c", "Cato")])
+        save_current(save)
+        get_current_save(sid)  # the first load fills in the role templates
+        since = sync_save_changes(sid).revision
+
+        save = get_current_save(sid)
+        save.role_pool[1].name = "Bramble"
+        save_current(save)
+        delta = sync_save_changes(sid, since)
+        roles = delta.entity_changes["role_pool"]
+        self.assertEqual([role["role_id"] for role in roles.upserted], ["npc_b"])
+        self.assertEqual(roles.upserted[0]["name"], "Bramble")
+        self.assertEqual(roles.removed, [])
+        self.assertNotIn("role_pool", delta.parts)
+
+        save = get_current_save(sid)
+        save.role_pool = [role for role in save.role_pool if role.role_id != "npc_c"]
+        save_current(save)
+        self.assertEqual(sync_save_changes(sid, since).entity_changes["role_pool"].removed, ["npc_c"])
+
+        save = get_current_save(sid)
+        save.role_pool.append(_role("npc_d", "Dara"))
+        save_current(save)
+        self.assertIn("npc_d", [role["role_id"] for role in sync_save_changes(sid, since).entity_changes["role_pool"].upserted])
+        save = get_current_save(sid)
+        save.role_pool = [role for role in save.role_pool if role.role_id != "npc_d"]
+        save_current(save)
+        roles = sync_save_changes(sid, since).entity_changes["role_pool"]
+        self.assertNotIn("npc_d", [role["role_id"] for role in roles.upserted])
+        self.assertEqual(roles.removed, ["npc_c", "npc_d"])
+
+        save = get_current_save(sid)
+        save.quest_state.quests.append(QuestEntry(quest_id="quest_sync", title="Lost key", description="Find it."))
+        save.quest_state.tracked_quest_id = "quest_sync"
+        save_current(save)
+        quests = sync_save_changes(sid, since)
+        self.assertEqual([quest["quest_id"] for quest in quests.entity_changes["quest_state.quests"].upserted], ["quest_sync"])
+        self.assertNotIn("quests", quests.parts["quest_state"])
+        self.assertEqual(quests.parts["quest_state"]["tracked_quest_id"], "quest_sync")
+
+    def test_unknown_revision_falls_back_to_full_state(self) -> None:
+        sid = "sess_sync_full"
+        clear_current_save(sid)
+        revision = sync_save_changes(sid).revision
+        save_cache.invalidate(storage_state.save_path)
+
+        client = TestClient(app)
+        response = client.get("/api/v1/sync", params={"session_id": sid, "since": revision})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["full"])
+        self.assertIn("map_snapshot", response.json()["parts"])
+
+        stale = client.get("/api/v1/sync", params={"session_id": sid, "since": revision + 1000})
+        self.assertTrue(stale.json()["full"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from app.core.session_executor import ExecutorSaturatedError, SessionExecutor
+from app.main import app
+from app.models.schemas import NpcChatResponse
+
+
+class SessionExecutorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.executor = SessionExecutor(max_workers=4, queue_limit=16)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_jobs_for_same_session_run_in_order_one_at_a_time(self) -> None:
+        seen: list[int] = []
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def job(idx: int) -> int:
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.005)
+            seen.append(idx)
+            with lock:
+                active["now"] -= 1
+            return idx
+
+        futures = [self.executor.submit("sess_a", job, idx) for idx in range(8)]
+
+        self.assertEqual([future.result(timeout=5) for future in futures], list(range(8)))
+        self.assertEqual(seen, list(range(8)))
+        self.assertEqual(active["peak"], 1)
+
+    def test_different_sessions_run_concurrently(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+
+        first = self.executor.submit("sess_a", barrier.wait)
+        second = self.executor.submit("sess_b", barrier.wait)
+
+        first.result(timeout=5)
+        second.result(timeout=5)
+        self.assertEqual(self.executor.stats()["completed"], 2)
+
+    def test_queue_limit_rejects_and_reports_depth(self) -> None:
+        executor = SessionExecutor(max_workers=1, queue_limit=2)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocker() -> bool:
+            started.set()
+            return release.wait(5)
+
+        try:
+            blocked = executor.submit("sess_a", blocker)
+            self.assertTrue(started.wait(5))
+            pending = executor.submit("sess_a", lambda: "done")
+            with self.assertRaises(ExecutorSaturatedError):
+                executor.submit("sess_b", lambda: None)
+
+            stats = executor.stats()
+            self.assertEqual(stats["rejected"], 1)
+            self.assertEqual(stats["session_depths"], {"sess_a": 1})
+            release.set()
+            self.assertTrue(blocked.result(timeout=5))
+            self.assertEqual(pending.result(timeout=5), "done")
+        finally:
+            release.set()
+            executor.shutdown()
+
+    def test_errors_propagate_to_caller(self) -> None:
+        def boom() -> None:
+            raise KeyError("ROLE_NOT_FOUND")
+
+        with self.assertRaises(KeyError):
+            asyncio.run(self.executor.run("sess_a", boom))
+        self.assertEqual(self.executor.stats()["failed"], 1)
+
+
+class OffloadedRouteTests(unittest.IsolatedAsyncioTestCase):
+    async def test_health_stays_responsive_while_npc_chat_blocks(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_npc_chat(payload):
+            started.set()
+            release.wait(5)
+            return NpcChatResponse(session_id=payload.session_id, npc_role_id=payload.npc_role_id, reply="ok", time_spent_min=1)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            with patch("app.api.routes.npc_chat", side_effect=slow_npc_chat):
+                chat_task = asyncio.create_task(
+                    client.post("/api/v1/npc/chat", json={"session_id": "sess_offload", "npc_role_id": "npc_1", "player_message": "hi"})
+                )
+                self.assertTrue(await asyncio.to_thread(started.wait, 5))
+                health = await asyncio.wait_for(client.get("/api/v1/health"), timeout=2)
+                executor_stats = await client.get("/api/v1/runtime/executor")
+                release.set()
+                chat = await chat_task
+
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(executor_stats.json()["running"], 1)
+        self.assertEqual(chat.status_code, 200)
+        self.assertEqual(chat.json()["reply"], "ok")
+
+    async def test_saturated_executor_returns_503(self) -> None:
+        saturated = SessionExecutor(max_workers=1, queue_limit=1)
+        release = threading.Event()
+        saturated.submit("sess_busy", release.wait, 5)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                with patch("app.api.routes.session_executor", saturated):
+                    response = await client.post(
+                        "/api/v1/npc/chat", json={"session_id": "sess_busy", "npc_role_id": "npc_1", "player_message": "hi"}
+                    )
+        finally:
+            release.set()
+            saturated.shutdown()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers.get("retry-after"), "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import random
+import tempfile
+import unittest
+from math import hypot
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.storage import storage_state
+from app.main import app
+from app.models.schemas import AreaSnapshot, AreaSubZone, AreaZone, Coord3D, Position, Zone
+from app.services.spatial_index import SpatialEntry, SpatialGrid, grid_cache, zone_grid
+from app.services.world_service import _select_default_sub_zone_id_for_zone, clear_current_save, get_current_save, save_current
+
+
+def _zone(zone_id: str, x: int, y: int) -> Zone:
+    return Zone(zone_id=zone_id, name=zone_id.title(), x=x, y=y, radius_m=100, description="zone")
+
+
+class SpatialGridTests(unittest.TestCase):
+    def test_queries_match_brute_force(self) -> None:
+        rng = random.Random(5)
+        entries = [
+            SpatialEntry(key=f"z{idx}", x=rng.uniform(-4000, 4000), y=rng.uniform(-4000, 4000), radius=rng.uniform(40, 300))
+            for idx in range(300)
+        ]
+        grid = SpatialGrid(entries)
+        for _ in range(100):
+            x, y = rng.uniform(-6000, 6000), rng.uniform(-6000, 6000)
+            k, radius = rng.randint(1, 8), rng.uniform(0, 1500)
+
+            def ranked(items):
+                return [e.key for e in sorted(items, key=lambda e: (hypot(e.x - x, e.y - y), e.key))]
+
+            self.assertEqual([e.key for _, e in grid.nearest(x, y, k=k)], ranked(entries)[:k])
+            self.assertEqual(
+                [e.key for _, e in grid.within_radius(x, y, radius, touching=True)],
+                ranked([e for e in entries if hypot(e.x - x, e.y - y) <= radius + e.radius]),
+            )
+            box = (x, y, x + 2000, y + 1000)
+            self.assertEqual(
+                {e.key for e in grid.in_bbox(*box)},
+                {e.key for e in entries if box[0] <= e.x <= box[2] and box[1] <= e.y <= box[3]},
+            )
+
+
+class WorldMapQueryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _seed(self, session_id: str):
+        save = clear_current_save(session_id)
+        save.map_snapshot.zones = [_zone("zone_a", 0, 0), _zone("zone_b", 600, 0), _zone("zone_c", 3000, 3000)]
+        save.map_snapshot.player_position = Position(x=550, y=10, z=0, zone_id="zone_b")
+        save.player_runtime_data.current_position = save.map_snapshot.player_position
+        save.area_snapshot = AreaSnapshot(
+            zones=[AreaZone(zone_id="zone_a", name="Zone A", center=Coord3D(x=0, y=0, z=0))],
+            sub_zones=[
+                AreaSubZone(sub_zone_id="sub_far", zone_id="zone_a", name="Far", coord=Coord3D(x=80, y=0, z=0), description="far"),
+                AreaSubZone(sub_zone_id="sub_near", zone_id="zone_a", name="Near", coord=Coord3D(x=10, y=5, z=0), description="near"),
+            ],
+        )
+        save_current(save)
+        return save
+
+    def test_query_endpoint_nearest_radius_and_bbox(self) -> None:
+        sid = "sess_world_query"
+        self._seed(sid)
+        client = TestClient(app)
+
+        nearest = client.get("/api/v1/world-map/query", params={"session_id": sid, "k": 2, "include_sub_zones": False})
+        self.assertEqual(nearest.status_code, 200)
+        body = nearest.json()
+        self.assertEqual(body["origin"], {"x": 550, "y": 10})
+        self.assertEqual([hit["entity_id"] for hit in body["zones"]], ["zone_b", "zone_a"])
+        self.assertEqual(body["sub_zones"], [])
+
+        radius = client.get("/api/v1/world-map/query", params={"session_id": sid, "mode": "radius", "x": 0, "y": 0, "radius_m": 50})
+        self.assertEqual([hit["entity_id"] for hit in radius.json()["zones"]], ["zone_a"])
+        self.assertEqual([hit["entity_id"] for hit in radius.json()["sub_zones"]], ["sub_near"])
+
+        bbox = client.get(
+            "/api/v1/world-map/query",
+            params={"session_id": sid, "mode": "bbox", "min_x": 500, "min_y": -100, "max_x": 4000, "max_y": 4000},
+        )
+        self.assertEqual({hit["entity_id"] for hit in bbox.json()["zones"]}, {"zone_b", "zone_c"})
+
+        missing = client.get("/api/v1/world-map/query", params={"session_id": sid, "mode": "bbox", "min_x": 0})
+        self.assertEqual(missing.status_code, 422)
+
+    def test_map_view_culls_collapses_and_revalidates(self) -> None:
+        sid = "sess_world_view"
+        self._seed(sid)
+        client = TestClient(app)
+        viewport = {"session_id": sid, "min_x": -200, "min_y": -200, "max_x": 200, "max_y": 200}
+
+        far = client.get("/api/v1/world-map/view", params={**viewport, "zoom": 0.05})
+        self.assertEqual(far.status_code, 200)
+        body = far.json()
+        self.assertEqual(body["lod"], "zones")
+        self.assertEqual([(node["zone_id"], node["sub_zone_count"]) for node in body["nodes"]], [("zone_a", 2)])
+        self.assertEqual(body["sub_nodes"], [])
+
+        near = client.get("/api/v1/world-map/view", params={**viewport, "zoom": 2})
+        self.assertEqual(near.json()["lod"], "sub_zones")
+        self.assertEqual({node["sub_zone_id"] for node in near.json()["sub_nodes"]}, {"sub_far", "sub_near"})
+
+        etag = near.headers["etag"]
+        with patch("app.api.routes.render_map_view") as mocked_render:
+            cached = client.get("/api/v1/world-map/view", params={**viewport, "zoom": 2}, headers={"If-None-Match": etag})
+        mocked_render.assert_not_called()
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+        save = get_current_save(sid)
+        save.map_snapshot.zones[0].name = "Renamed"
+        save_current(save)
+        renamed = client.get("/api/v1/world-map/view", params={**viewport, "zoom": 2}, headers={"If-None-Match": etag})
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()["nodes"][0]["name"], "Renamed")
+        etag = renamed.headers["etag"]
+
+        moved = client.get("/api/v1/world-map/view", params={**viewport, "max_x": 700, "zoom": 2}, headers={"If-None-Match": etag})
+        self.assertEqual(moved.status_code, 200)
+        self.assertEqual({node["zone_id"] for node in moved.json()["nodes"]}, {"zone_a", "zone_b"})
+
+    def test_index_is_reused_until_zones_change(self) -> None:
+        save = self._seed("sess_world_grid")
+        grid = zone_grid(save)
+        builds = grid_cache.builds
+        self.assertIs(zone_grid(save), grid)
+        self.assertEqual(_select_default_sub_zone_id_for_zone(save, "zone_a"), "sub_near")
+        save.map_snapshot.zones.append(_zone("zone_d", -900, 0))
+        self.assertIsNot(zone_grid(save), grid)
+        self.assertEqual(grid_cache.builds, builds + 2)
+
+        save_current(save)
+        grid = zone_grid(get_current_save("sess_world_grid"))
+        builds = grid_cache.builds
+        self.assertIs(zone_grid(get_current_save("sess_world_grid")), grid)
+        self.assertEqual(_select_default_sub_zone_id_for_zone(get_current_save("sess_world_grid"), "zone_a"), "sub_near")
+        self.assertEqual(grid_cache.builds, builds + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
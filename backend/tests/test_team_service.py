@@ -26,7 +26,7 @@ from app.services.team_service import (
     leave_npc_from_team,
     team_chat,
 )
-from app.services.world_service import clear_current_save, get_current_save, save_current
+from app.services.world_service import clear_current_save, flush_current_save, get_current_save, save_current
 
 
 class TeamServiceTests(unittest.TestCase):
@@ -84,6 +84,7 @@ class TeamServiceTests(unittest.TestCase):
         sid = "sess_team_bundle"
         save = clear_current_save(sid)
         save_current(save)
+        flush_current_save()
 
         bundle_dir = _save_bundle_dir(storage_state.save_path)
         manifest = read_json(bundle_dir / "manifest.json")
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.storage import storage_state
+from app.main import app
+from app.models.schemas import ChatConfig, ChatRequest, EncounterCheckResponse, Message, NpcChatRequest, NpcRoleCard, PlayerStaticData
+from app.services.ai_adapter import JsonStringFieldStream
+from app.services.chat_service import resolve_main_chat_turn
+from app.services.public_scene_runtime_v2 import PublicSceneRound, _publish_scene_events
+from app.services.world_service import _new_scene_event, astream_npc_chat, clear_current_save, save_current
+
+
+def _scene_round_fakes(sid: str, team_event, bystander_event, resolve_seen=None):
+    scene_round = PublicSceneRound(
+        session_id=sid, display_text="", gm_summary="", scene_context=None, candidates=[], incoming_map={}, reputation_score=0
+    )
+
+    async def generate(save, scene_round, *, config=None):
+        return None
+
+    def apply(save, scene_round, *, config=None):
+        scene_round.scene_events.append(team_event)
+        _publish_scene_events(scene_round)
+
+    async def resolve(scene_round, *, config=None):
+        if resolve_seen is not None:
+            resolve_seen.append("resolve")
+        return "resolved"
+
+    def finish(save, scene_round, resolution_text, *, config=None):
+        scene_round.scene_events.append(bystander_event)
+        _publish_scene_events(scene_round)
+        return scene_round.scene_events[:10]
+
+    return (
+        patch("app.services.chat_service.plan_public_scene_round", return_value=scene_round),
+        patch("app.services.chat_service.agenerate_public_scene_actions", new=generate),
+        patch("app.services.chat_service.apply_public_scene_actions", new=apply),
+        patch("app.services.chat_service.aresolve_public_scene_round", new=resolve),
+        patch("app.services.chat_service.finish_public_scene_round", new=finish),
+    )
+
+
+def _chunk(content: str | None = None, *, tool_calls=None, usage=None):
+    choices = [] if content is None and tool_calls is None else [SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _StreamingCompletions:
+    def __init__(self, rounds: list[list[SimpleNamespace]], seen: list[str] | None = None) -> None:
+        self.rounds = rounds
+        self.seen = seen
+        self.calls: list[dict[str, object]] = []
+        self.deltas_before_last_chunk = 0
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        chunks = self.rounds.pop(0)
+
+        async def gen():
+            for idx, chunk in enumerate(chunks):
+                if idx == len(chunks) - 1 and self.seen is not None:
+                    self.deltas_before_last_chunk = len(self.seen)
+                yield chunk
+                await asyncio.sleep(0)
+
+        return gen()
+
+
+def _client(completions: _StreamingCompletions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class JsonStringFieldStreamTests(unittest.TestCase):
+    def test_emits_decoded_field_text_as_it_arrives(self) -> None:
+        raw = json.dumps({"action_reaction": 'She nods "slowly"。', "speech_reply": "Fine.", "relation_tag": "met"}, ensure_ascii=True)
+        stream = JsonStringFieldStream(("action_reaction", "speech_reply"))
+
+        pieces = [stream.feed(raw[idx : idx + 5]) for idx in range(0, len(raw), 5)]
+
+        self.assertEqual("".join(pieces), 'She nods "slowly"。\nFine.')
+        self.assertGreater(len([piece for piece in pieces if piece]), 2)
+
+
+class TokenStreamingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._orig_save = storage_state.save_path
+        self._orig_config = storage_state.config_path
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        storage_state.set_save_path(str(root / "current-save.json"))
+        storage_state.set_config_path(str(root / "config.json"))
+
+    def tearDown(self) -> None:
+        storage_state.set_save_path(str(self._orig_save))
+        storage_state.set_config_path(str(self._orig_config))
+        self._tmpdir.cleanup()
+
+    def _config(self) -> ChatConfig:
+        return ChatConfig(openai_api_key="test-key", model="test-model", stream=True, gm_prompt="gm")
+
+    def _seed_npc(self, session_id: str) -> None:
+        save = clear_current_save(session_id)
+        save.role_pool = [
+            NpcRoleCard(
+                role_id="npc_chat",
+                name="KaLu",
+                state="in_team",
+                personality="careful",
+                speaking_style="short answers",
+                likes=["old map"],
+                profile=PlayerStaticData(role_type="npc"),
+            )
+        ]
+        save_current(save)
+
+    def _npc_rounds(self) -> list[list[SimpleNamespace]]:
+        raw = json.dumps(
+            {
+                "action_reaction": "She unfolds the old map on the table and taps the northern ridge.",
+                "speech_reply": "The ridge path is the only dry road this week.",
+                "relation_tag": "friendly",
+            },
+            ensure_ascii=False,
+        )
+        chunks = [_chunk(raw[idx : idx + 12]) for idx in range(0, len(raw), 12)]
+        chunks.append(_chunk(usage=SimpleNamespace(prompt_tokens=3, completion_tokens=7)))
+        return [chunks]
+
+    def test_npc_stream_forwards_deltas_before_generation_finishes(self) -> None:
+        sid = "sess_npc_token_stream"
+        self._seed_npc(sid)
+        seen: list[str] = []
+        completions = _StreamingCompletions(self._npc_rounds(), seen)
+        request = NpcChatRequest(
+            session_id=sid,
+            npc_role_id="npc_chat",
+            player_message='{"input_type":"player_intent_v1","speech_description":"Which road is safe?"}',
+            config=self._config(),
+        )
+
+        with patch("app.services.world_service.AsyncOpenAI", return_value=_client(completions)):
+            result = asyncio.run(astream_npc_chat(request, seen.append))
+
+        self.assertTrue(completions.calls[0]["stream"])
+        self.assertGreater(completions.deltas_before_last_chunk, 1)
+        self.assertEqual("".join(seen), result.reply)
+        self.assertEqual(result.dialogue_logs[-1].content, result.reply)
+
+    def test_npc_stream_route_emits_multiple_delta_events(self) -> None:
+        sid = "sess_npc_token_route"
+        self._seed_npc(sid)
+        completions = _StreamingCompletions(self._npc_rounds())
+        payload = {
+            "session_id": sid,
+            "npc_role_id": "npc_chat",
+            "player_message": '{"input_type":"player_intent_v1","speech_description":"Which road is safe?"}',
+            "config": self._config().model_dump(mode="json"),
+        }
+
+        with patch("app.services.world_service.AsyncOpenAI", return_value=_client(completions)):
+            with TestClient(app).stream("POST", "/api/v1/npc/chat/stream", json=payload) as response:
+                body = "".join(chunk.decode("utf-8") for chunk in response.iter_raw())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(body.count("event: delta"), 2)
+        self.assertIn("event: end", body)
+        self.assertNotIn("event: error", body)
+
+    def test_main_turn_streams_text_after_tool_round(self) -> None:
+        sid = "sess_main_token_stream"
+        clear_current_save(sid)
+        tool_delta = SimpleNamespace(index=0, id="call_1", function=SimpleNamespace(name="unknown_tool", arguments='{"a"'))
+        tool_tail = SimpleNamespace(index=0, id=None, function=SimpleNamespace(name=None, arguments=": 1}"))
+        completions = _StreamingCompletions(
+            [
+                [_chunk(tool_calls=[tool_delta]), _chunk(tool_calls=[tool_tail]), _chunk(usage=SimpleNamespace(prompt_tokens=2, completion_tokens=1))],
+                [_chunk("The lantern "), _chunk("flickers."), _chunk(usage=SimpleNamespace(prompt_tokens=4, completion_tokens=3))],
+            ]
+        )
+        seen: list[str] = []
+        payload = ChatRequest(session_id=sid, config=self._config(), messages=[Message(role="user", content="I look around.")])
+
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=_client(completions)),
+            patch("app.services.chat_service.plan_public_scene_round", return_value=None),
+            patch("app.services.encounter_service.check_for_encounter", return_value=EncounterCheckResponse(generated=False)),
+        ):
+            reply, usage, tool_events, _, _, _ = asyncio.run(resolve_main_chat_turn(payload, on_delta=seen.append))
+
+        self.assertEqual(seen, ["The lantern ", "flickers."])
+        self.assertEqual(reply.content, "The lantern flickers.")
+        self.assertEqual((usage.input_tokens, usage.output_tokens), (6, 4))
+        self.assertEqual(len(tool_events), 1)
+        messages = completions.calls[1]["messages"]
+        tool_entry = next(item for item in messages if item.get("role") == "tool")
+        assistant_entry = next(item for item in messages if item.get("tool_calls"))
+        self.assertEqual(tool_entry["tool_call_id"], "call_1")
+        self.assertEqual(assistant_entry["tool_calls"][0].function.arguments, '{"a": 1}')
+
+    def test_text_from_tool_rounds_is_reset_before_the_reply(self) -> None:
+        sid = "sess_main_stream_reset"
+        clear_current_save(sid)
+        tool_delta = SimpleNamespace(index=0, id="call_1", function=SimpleNamespace(name="unknown_tool", arguments="{}"))
+        completions = _StreamingCompletions(
+            [
+                [_chunk("Let me check. "), _chunk(tool_calls=[tool_delta]), _chunk("Still checking."), _chunk(usage=SimpleNamespace(prompt_tokens=2, completion_tokens=1))],
+                [_chunk("The lantern "), _chunk("flickers."), _chunk(usage=SimpleNamespace(prompt_tokens=4, completion_tokens=3))],
+            ]
+        )
+        seen: list[tuple[str, str]] = []
+        payload = ChatRequest(session_id=sid, config=self._config(), messages=[Message(role="user", content="I look around.")])
+
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=_client(completions)),
+            patch("app.services.chat_service.plan_public_scene_round", return_value=None),
+            patch("app.services.encounter_service.check_for_encounter", return_value=EncounterCheckResponse(generated=False)),
+        ):
+            reply, _, _, _, _, _ = asyncio.run(
+                resolve_main_chat_turn(
+                    payload,
+                    on_delta=lambda chunk: seen.append(("delta", chunk)),
+                    on_stage=lambda event, data: seen.append((event, "")),
+                )
+            )
+
+        self.assertEqual(
+            seen[:5],
+            [("delta", "Let me check. "), ("delta_reset", ""), ("delta", "The lantern "), ("delta", "flickers."), ("narration", "")],
+        )
+        self.assertEqual(reply.content, "The lantern flickers.")
+
+    def test_main_stream_route_emits_stages_in_order(self) -> None:
+        sid = "sess_main_staged_stream"
+        clear_current_save(sid)
+        completions = _StreamingCompletions(
+            [[_chunk("The gate "), _chunk("creaks open."), _chunk(usage=SimpleNamespace(prompt_tokens=2, completion_tokens=2))]]
+        )
+        payload = {
+            "session_id": sid,
+            "config": self._config().model_dump(mode="json"),
+            "messages": [{"role": "user", "content": "I push the gate."}],
+        }
+        encounter_event = _new_scene_event("encounter_progress", "The guards stir.", metadata={"encounter_id": "enc_gate"})
+        team_event = _new_scene_event("team_public_reaction", "KaLu draws her blade.", actor_role_id="npc_chat", actor_name="KaLu")
+        bystander_event = _new_scene_event("public_bystander_reaction", "A merchant gasps.")
+
+        plan, generate, apply, resolve, finish = _scene_round_fakes(sid, team_event, bystander_event)
+
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=_client(completions)),
+            patch("app.services.chat_service.begin_main_chat_encounter_step", return_value=([encounter_event], None)),
+            plan,
+            generate,
+            apply,
+            resolve,
+            finish,
+            patch("app.services.chat_service.advance_active_encounter_in_save", return_value=None),
+        ):
+            with TestClient(app).stream("POST", "/api/v1/chat/stream", json=payload) as response:
+                body = "".join(chunk.decode("utf-8") for chunk in response.iter_raw())
+
+        events = [line[len("event: ") :] for line in body.splitlines() if line.startswith("event: ")]
+        self.assertEqual(
+            events,
+            ["start", "delta", "delta", "narration", "encounter_update", "team_reaction", "scene_event", "end"],
+        )
+        narration = json.loads(body.split("event: narration\ndata: ", 1)[1].split("\n", 1)[0])
+        self.assertEqual(narration["reply"]["content"], "The gate creaks open.")
+        end = json.loads(body.split("event: end\ndata: ", 1)[1].split("\n", 1)[0])
+        self.assertEqual([item["kind"] for item in end["scene_events"]], ["encounter_progress", "team_public_reaction", "public_bystander_reaction"])
+
+    def test_scene_round_events_stream_before_the_round_resolution(self) -> None:
+        sid = "sess_main_scene_events_early"
+        clear_current_save(sid)
+        completions = _StreamingCompletions([[_chunk("Rain falls."), _chunk(usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1))]])
+        team_event = _new_scene_event("team_public_reaction", "KaLu looks up.", actor_role_id="npc_chat", actor_name="KaLu")
+        bystander_event = _new_scene_event("public_bystander_reaction", "A dog barks.")
+        seen: list[str] = []
+        plan, generate, apply, resolve, finish = _scene_round_fakes(sid, team_event, bystander_event, resolve_seen=seen)
+        payload = ChatRequest(session_id=sid, config=self._config(), messages=[Message(role="user", content="I wait.")])
+
+        with (
+            patch("app.services.chat_service.AsyncOpenAI", return_value=_client(completions)),
+            plan,
+            generate,
+            apply,
+            resolve,
+            finish,
+            patch("app.services.chat_service.advance_active_encounter_in_save", return_value=None),
+        ):
+            _, _, _, scene_events, _, _ = asyncio.run(
+                resolve_main_chat_turn(payload, on_delta=lambda chunk: None, on_stage=lambda event, data: seen.append(event))
+            )
+
+        self.assertEqual(seen, ["narration", "team_reaction", "resolve", "scene_event"])
+        self.assertEqual([item.kind for item in scene_events], ["team_public_reaction", "public_bystander_reaction"])
+
+
+if __name__ == "__main__":
+    unittest.main()